@@ -5,7 +5,12 @@ import discord
 from discord.ext import commands
 
 from ui.views import MainPanelView  # 영속 뷰 등록
-from db.db import init_db
+from db.db import init_db, init_pool, close_pool, pool_stats
+from db.write_queue import stop_write_queue, write_queue_stats
+from db.backup import start_backup_task, stop_backup_task
+from db.checkpoint import start_checkpoint_task, stop_checkpoint_task, checkpoint_stats
+from domain.holiday_table import load_holiday_table
+from domain.report_compute import start_report_pool, shutdown_report_pool, report_compute_stats
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -41,6 +46,33 @@ async def main():
             print("DB init/migration 실패:", e)
             raise
 
+        # 공휴일 표 준비(없으면 만들어 저장). holidays 패키지 import/계산은 이벤트 루프 밖에서
+        try:
+            table = await asyncio.to_thread(load_holiday_table)
+            print(f"공휴일 표 준비 완료 ({table.first_year}~{table.last_year}년)")
+        except Exception as e:
+            print("공휴일 표 준비 실패:", e)
+
+        # 커넥션 풀 미리 열기(repo 호출마다 커넥션을 새로 여는 비용 제거)
+        pools = await init_pool()
+        sizes = ", ".join(f"{lane}={pool.size}" for lane, pool in pools.items())
+        print(f"DB 커넥션 풀 준비 완료 ({sizes})")
+
+        # 온라인 백업: 봇을 멈추지 않고 주기적으로 스냅샷을 뜬다
+        if start_backup_task() is not None:
+            print("DB 백업 태스크 시작")
+
+        # WAL 관리: 한가할 때 PASSIVE, 크기 상한을 넘으면 RESTART/TRUNCATE 체크포인트
+        if start_checkpoint_task() is not None:
+            print("WAL 체크포인트 태스크 시작")
+
+        # 리포트 계산 프로세스 풀: 기록이 긴 사용자의 계산이 이벤트 루프를 막지 않도록
+        try:
+            if await start_report_pool() is not None:
+                print("리포트 계산 프로세스 풀 시작")
+        except Exception as e:
+            print("리포트 계산 프로세스 풀 시작 실패(이벤트 루프 안에서 계산):", e)
+
         # 코그 로드 시도 (open_cog 제거됨)
         try:
             await bot.load_extension("cogs.ui_cog")
@@ -60,6 +92,12 @@ async def main():
         except Exception as e:
             print("report 코그 로드 실패:", e)
 
+        try:
+            await bot.load_extension("cogs.saved_reports")
+            print("cogs.saved_reports 로드 완료")
+        except Exception as e:
+            print("saved_reports 코그 로드 실패:", e)
+
         try:
             await bot.load_extension("cogs.scheduler")
             print("cogs.scheduler 로드 완료")
@@ -77,6 +115,38 @@ async def main():
     except Exception as e:
         print("봇 실행 중 예외 발생:", e)
         raise
+    finally:
+        # 종료 훅: 대기 중인 쓰기를 먼저 커밋한 뒤 풀에 남아 있는 커넥션 정리
+        try:
+            await stop_backup_task()
+        except Exception as e:
+            print("DB 백업 태스크 종료 실패:", e)
+        try:
+            stats = checkpoint_stats()
+            await stop_checkpoint_task()
+            if stats:
+                print("WAL 체크포인트 태스크 종료 완료:", stats)
+        except Exception as e:
+            print("WAL 체크포인트 태스크 종료 실패:", e)
+        try:
+            stats = report_compute_stats()
+            await asyncio.to_thread(shutdown_report_pool)
+            print("리포트 계산 프로세스 풀 종료 완료:", stats)
+        except Exception as e:
+            print("리포트 계산 프로세스 풀 종료 실패:", e)
+        try:
+            stats = write_queue_stats()
+            await stop_write_queue()
+            if stats:
+                print("쓰기 큐 종료 완료:", stats)
+        except Exception as e:
+            print("쓰기 큐 종료 실패:", e)
+        try:
+            print("DB 커넥션 풀 통계:", pool_stats())
+            await close_pool()
+            print("DB 커넥션 풀 종료 완료")
+        except Exception as e:
+            print("DB 커넥션 풀 종료 실패:", e)
 
 
 if __name__ == "__main__":
@@ -4,10 +4,20 @@ from discord.ext import commands
 from datetime import date, datetime
 from typing import Optional
 
-from repos import routine_repo
-from repos import report_season_repo
-from domain.stats import aggregate_user_metrics
-from domain.time_utils import now_kst, local_day
+from db.db import read_lane
+from storage import get_storage
+from domain.report_cache import get_report_metrics
+from domain.saved_stats import get_closed_season_metrics, snapshot_closed_seasons
+from domain.time_utils import user_local_day
+
+
+async def _freeze_closed_seasons(user_id: str) -> None:
+    """새 시즌 시작으로 끝난 직전 시즌의 스냅샷을 미리 만들어 둔다(실패해도 리포트를 열 때 다시 만든다)."""
+    try:
+        with read_lane():
+            await snapshot_closed_seasons(user_id)
+    except Exception as e:
+        print("snapshot_closed_seasons error:", e)
 
 
 class ReportResendView(discord.ui.View):
@@ -92,14 +102,15 @@ class ReportSeasonView(discord.ui.View):
             return
         await itx.response.defer(ephemeral=True)
         # 기본: 오늘 local_day를 시즌 시작일로(리포트는 오늘 제외라, 실질 집계는 내일부터 느낌)
-        start = local_day(now_kst()).isoformat()
+        start = (await user_local_day(str(itx.user.id))).isoformat()
         title = f"시즌 {start}"
         try:
-            new_id = await report_season_repo.create_new_season(str(itx.user.id), title=title, start_day=start, auto_close_prev=True)
+            new_id = await get_storage().create_new_season(str(itx.user.id), title=title, start_day=start, auto_close_prev=True)
         except Exception as e:
             print("create_new_season error:", e)
             await itx.followup.send("새 시즌을 시작하는 중 오류가 발생했어요.", ephemeral=True)
             return
+        await _freeze_closed_seasons(str(itx.user.id))
         await itx.followup.send(f"새 시즌을 시작했어요: **{title}**", ephemeral=True)
         await self.cog.open_scope_picker(itx, new_id)
 
@@ -153,8 +164,7 @@ class ReportCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    def _build_summary_embed(self, user: discord.abc.User, metrics: dict, scope: str, season: dict | None) -> discord.Embed:
-        today = local_day(now_kst())
+    def _build_summary_embed(self, user: discord.abc.User, metrics: dict, scope: str, season: dict | None, today: date) -> discord.Embed:
 
         scope_label = {
             "7d": "최근 7일",
@@ -230,8 +240,8 @@ class ReportCog(commands.Cog):
         user_id = str(itx.user.id)
         # 시즌이 없으면 기본 시즌 생성
         try:
-            await report_season_repo.ensure_default_season(user_id)
-            seasons = await report_season_repo.list_seasons_for_user(user_id)
+            await get_storage().ensure_default_season(user_id)
+            seasons = await get_storage().list_seasons_for_user(user_id)
         except Exception as e:
             print("list seasons error:", e)
             await itx.response.send_message("시즌 정보를 불러오는 중 오류가 발생했어요.", ephemeral=True)
@@ -242,35 +252,18 @@ class ReportCog(commands.Cog):
         # 시즌 선택 후 스코프 선택으로 전환
         await itx.followup.send("보고 싶은 리포트 기간을 선택해 주세요.", view=ReportScopeView(self, itx.user, season_id), ephemeral=True)
 
-    async def generate_report(self, itx: discord.Interaction, scope: str = "7d", *, season_id: int):
-        """UI 버튼/슬래시 명령 양쪽에서 공통으로 사용하는 리포트 생성 로직."""
-        scope = (scope or "7d").lower()
-        if scope not in ("7d", "30d", "all"):
-            scope = "7d"
-
-        user_id = str(itx.user.id)
-
+    async def _live_metrics(self, itx: discord.Interaction, user_id: str, season: dict, scope: str, today_local: date) -> Optional[dict]:
+        """진행 중 시즌의 리포트 지표. 오류/루틴 없음은 안내 메시지를 보내고 None."""
         try:
-            routines = await routine_repo.list_active_routines_for_user(user_id)
+            routines = await get_storage().list_active_routines_for_user(user_id)
         except Exception as e:
             print("list_active_routines_for_user 에러:", e)
             await itx.followup.send("루틴 정보를 불러오는 중 오류가 발생했습니다.", ephemeral=True)
-            return
+            return None
 
         if not routines:
             await itx.followup.send("활성화된 루틴이 없습니다. 먼저 루틴을 등록해 주세요.", ephemeral=True)
-            return
-
-        # 시즌 범위 결정
-        try:
-            season = await report_season_repo.get_season(user_id, int(season_id))
-            if not season:
-                await itx.followup.send("선택한 시즌을 찾을 수 없어요.", ephemeral=True)
-                return
-        except Exception as e:
-            print("get season error:", e)
-            await itx.followup.send("시즌 정보를 불러오는 중 오류가 발생했어요.", ephemeral=True)
-            return
+            return None
 
         try:
             season_start = datetime.fromisoformat(str(season["start_day"])).date()
@@ -285,13 +278,54 @@ class ReportCog(commands.Cog):
                 season_end = date.fromisoformat(str(season["end_day"]))
 
         try:
-            metrics = await aggregate_user_metrics(user_id, routines, scope, season_start=season_start, season_end=season_end)
+            # 리포트 계산은 읽기 전용 레인에서 실행(체크인 버튼 처리와 커넥션을 나눠 쓰지 않도록)
+            # 같은 리포트를 다시 열면 데이터가 바뀌지 않은 한 캐시한 결과를 쓴다
+            with read_lane():
+                return await get_report_metrics(
+                    user_id, routines, scope,
+                    season_id=int(season["id"]), season_start=season_start, season_end=season_end, today_local=today_local,
+                )
         except Exception as e:
             print("aggregate_user_metrics 에러:", e)
             await itx.followup.send("통계를 계산하는 중 오류가 발생했습니다.", ephemeral=True)
+            return None
+
+    async def generate_report(self, itx: discord.Interaction, scope: str = "7d", *, season_id: int):
+        """UI 버튼/슬래시 명령 양쪽에서 공통으로 사용하는 리포트 생성 로직."""
+        scope = (scope or "7d").lower()
+        if scope not in ("7d", "30d", "all"):
+            scope = "7d"
+
+        user_id = str(itx.user.id)
+
+        # 시즌 범위 결정
+        try:
+            season = await get_storage().get_season(user_id, int(season_id))
+            if not season:
+                await itx.followup.send("선택한 시즌을 찾을 수 없어요.", ephemeral=True)
+                return
+        except Exception as e:
+            print("get season error:", e)
+            await itx.followup.send("시즌 정보를 불러오는 중 오류가 발생했어요.", ephemeral=True)
             return
 
-        embed = self._build_summary_embed(itx.user, metrics, scope, season)
+        today_local = await user_local_day(user_id)
+
+        # 끝난 시즌은 저장된 스냅샷 한 행으로 보여준다(처음 볼 때만 계산)
+        try:
+            with read_lane():
+                metrics = await get_closed_season_metrics(user_id, season, scope, today_local)
+        except Exception as e:
+            print("get_closed_season_metrics 에러:", e)
+            await itx.followup.send("통계를 계산하는 중 오류가 발생했습니다.", ephemeral=True)
+            return
+
+        if metrics is None:
+            metrics = await self._live_metrics(itx, user_id, season, scope, today_local)
+            if metrics is None:
+                return
+
+        embed = self._build_summary_embed(itx.user, metrics, scope, season, today_local)
         # 에페메럴 리포트 + 일반 채널 재전송용 버튼 뷰 함께 전송
         await itx.followup.send(embed=embed, view=ReportResendView(embed, scope), ephemeral=True)
 
@@ -316,7 +350,7 @@ class ReportCog(commands.Cog):
 
         try:
             if season_id is None:
-                current = await report_season_repo.get_or_create_current_season(user_id)
+                current = await get_storage().get_or_create_current_season(user_id)
                 season_id = int(current["id"]) if current.get("id") is not None else None
 
             if season_id is None:
@@ -339,15 +373,16 @@ class SeasonCog(commands.Cog):
     async def season_restart(self, itx: discord.Interaction):
         await itx.response.defer(ephemeral=True)
         user_id = str(itx.user.id)
-        start = local_day(now_kst()).isoformat()
+        start = (await user_local_day(user_id)).isoformat()
         title = f"시즌 {start}"
 
         try:
-            new_id = await report_season_repo.create_new_season(user_id, title=title, start_day=start, auto_close_prev=True)
+            new_id = await get_storage().create_new_season(user_id, title=title, start_day=start, auto_close_prev=True)
         except Exception as e:
             print("season_restart create_new_season error:", e)
             await itx.followup.send("새 시즌을 시작하는 중 오류가 발생했어요.", ephemeral=True)
             return
+        await _freeze_closed_seasons(user_id)
 
         await itx.followup.send(f"새 시즌을 시작했어요: **{title}** (id={new_id})", ephemeral=True)
 
@@ -357,8 +392,8 @@ class SeasonCog(commands.Cog):
         user_id = str(itx.user.id)
 
         try:
-            await report_season_repo.ensure_default_season(user_id)
-            seasons = await report_season_repo.list_seasons_for_user(user_id, limit=12)
+            await get_storage().ensure_default_season(user_id)
+            seasons = await get_storage().list_seasons_for_user(user_id, limit=12)
         except Exception as e:
             print("season_list error:", e)
             await itx.followup.send("시즌 목록을 불러오는 중 오류가 발생했어요.", ephemeral=True)
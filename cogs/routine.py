@@ -3,15 +3,15 @@ from discord.ext import commands
 from typing import Dict, Tuple, Any, List
 from datetime import date, datetime
 
-from repos import routine_repo, checkin_repo, goal_repo, user_settings_repo
-from domain.time_utils import now_kst, local_day, is_valid_day
+from storage import get_storage
+from domain.time_utils import now_kst, user_local_day, valid_routines_on
 from ui.views import TodayCheckinView, GoalSuggestView
 
 
 class RoutineCog(commands.Cog):
     """루틴 관련 체크인 UI 및 버튼 처리 코그
 
-    - open_today_checkin_list: is_valid_day 필터를 적용해 유효 루틴만 표시
+    - open_today_checkin_list: 유효일 필터를 적용해 유효 루틴만 표시
     - handle_button: done/undo 처리 후 메시지 갱신
     - record_pending_skip / apply_skip_from_pending: 스킵 사유 모달 흐름 지원
     """
@@ -87,7 +87,7 @@ class RoutineCog(commands.Cog):
             return
 
         try:
-            await checkin_repo.skip_checkin(info["rid"], user_id, apply_day, reason)
+            await get_storage().skip_checkin(info["rid"], user_id, apply_day, reason)
         except Exception as e:
             print("skip_checkin 에러:", e)
             await itx.followup.send("스킵 처리 중 오류가 발생했습니다.", ephemeral=True)
@@ -108,26 +108,26 @@ class RoutineCog(commands.Cog):
         """주어진 날짜의 루틴 체크인 표시 데이터를 구성합니다.
 
         - target_day 기준으로 루틴 목록을 조회해야 과거 날짜 갱신 시 오늘 루틴이 섞이지 않습니다.
-        - is_valid_day 필터 적용 및 체크인 상태(❌/✅/➡️) 반영.
+        - 유효일(valid_routines_on) 필터 적용 및 체크인 상태(❌/✅/➡️) 반영.
         """
         if now is None:
             now = now_kst()
 
-        # target_day 를 date 객체로 최대한 보정 (실패 시, local_day(now) 사용)
+        # target_day 를 date 객체로 최대한 보정 (실패 시, 사용자 기준 오늘 사용)
         if isinstance(target_day, date):
             ld = target_day
         else:
             try:
                 ld = date.fromisoformat(str(target_day))
             except Exception:
-                ld = local_day(now)
+                ld = await user_local_day(user_id, now)
 
         try:
             # 🔁 기존에는 `prepare_checkin_for_date(user_id, now)` 를 사용해서
             # 항상 "오늘" 기준 루틴 목록을 가져오고 있었습니다.
             # 과거 날짜 패널을 갱신할 때도 오늘 기준 루틴이 사용되는 버그의 원인이므로,
             # 해당 날짜(ld) 기준으로 적용 가능한 루틴을 직접 조회합니다.
-            routines = await routine_repo.routines_applicable_for_date(user_id, ld)
+            routines = await get_storage().routines_applicable_for_date(user_id, ld)
         except Exception as e:
             print("routines_applicable_for_date 에러 (internal):", e)
             raise
@@ -135,27 +135,32 @@ class RoutineCog(commands.Cog):
         # 체크인 레코드용 날짜 문자열
         day_for_repo = ld.isoformat()
 
+        # 루틴별 get_checkin 대신 한 번의 쿼리로 해당 날짜의 체크인을 모두 가져온다
+        try:
+            checkins = await get_storage().get_checkins_for_routines([r["id"] for r in routines], day_for_repo)
+        except Exception as e:
+            print("get_checkins_for_routines 에러 (internal):", e)
+            checkins = {}
+
+        # 반복 규칙(weekend_mode/recurrence)이 변경될 수 있으므로 유효일(주말/공휴일/면책) 기준으로 한 번 더 거른다
+        try:
+            routines = await valid_routines_on(user_id, routines, ld)
+        except Exception as e:
+            print("valid_routines_on 체크 중 오류 (internal):", e)
+            routines = []
+
         display: List[Dict[str, Any]] = []
         for r in routines:
-            try:
-                # weekend_mode / 요일 규칙이 변경될 수 있으므로 is_valid_day 로 한 번 더 확인
-                if await is_valid_day(user_id, r.get("weekend_mode", "weekday"), ld):
-                    try:
-                        ci = await checkin_repo.get_checkin(r["id"], day_for_repo)
-                    except Exception:
-                        ci = None
-
-                    if ci and ci.get("skipped"):
-                        emoji = "➡️"
-                    elif ci and ci.get("checked_at"):
-                        emoji = "✅"
-                    else:
-                        emoji = "❌"
-
-                    display.append({"id": r["id"], "name": f"{emoji} {r['name']}"})
-            except Exception as e:
-                print("is_valid_day 체크 중 오류 (internal):", e)
-                continue
+            ci = checkins.get((r["id"], day_for_repo))
+
+            if ci and ci.get("skipped"):
+                emoji = "➡️"
+            elif ci and ci.get("checked_at"):
+                emoji = "✅"
+            else:
+                emoji = "❌"
+
+            display.append({"id": r["id"], "name": f"{emoji} {r['name']}"})
 
         return display
 
@@ -207,7 +212,7 @@ class RoutineCog(commands.Cog):
 
         # 1) 기간이 지난 목표(마감 < 오늘) 중 아직 진행 중(active=1)인 것 간단 언급
         try:
-            goals = await goal_repo.list_active_goals_for_user(user_id)
+            goals = await get_storage().list_active_goals_for_user(user_id)
         except Exception as e:
             print("_build_goal_suggestion_message: list_active_goals_for_user 에러:", e)
             goals = []
@@ -246,7 +251,7 @@ class RoutineCog(commands.Cog):
     async def _should_suggest_goals(self, user_id: str) -> bool:
         """user_settings 를 조회해 체크인 시 목표 제안을 보여줄지 여부를 반환."""
         try:
-            settings = await user_settings_repo.get_user_settings(user_id)
+            settings = await get_storage().get_user_settings(user_id)
         except Exception as e:
             print("_should_suggest_goals: get_user_settings 에러:", e)
             return True
@@ -363,7 +368,7 @@ class RoutineCog(commands.Cog):
         그 외에는 방어적으로 미완료로 초기화합니다.
         """
         try:
-            ci = await checkin_repo.get_checkin(rid, yyyymmdd)
+            ci = await get_storage().get_checkin(rid, yyyymmdd)
         except Exception as e:
             print("_toggle_checkin_state: get_checkin 에러:", e)
             raise
@@ -371,21 +376,21 @@ class RoutineCog(commands.Cog):
         try:
             # 1) 아직 기록이 없거나, checked_at/skip 이 모두 비어 있으면 -> 완료 처리
             if not ci or (not ci.get("checked_at") and not ci.get("skipped")):
-                await checkin_repo.upsert_checkin_done(rid, user_id, yyyymmdd)
+                await get_storage().upsert_checkin_done(rid, user_id, yyyymmdd)
                 return "완료"
 
             # 2) 완료 상태 -> 스킵으로 전환
             if ci.get("checked_at"):
-                await checkin_repo.skip_checkin(rid, user_id, yyyymmdd, reason="(사용자 버튼 스킵)")
+                await get_storage().skip_checkin(rid, user_id, yyyymmdd, reason="(사용자 버튼 스킵)")
                 return "스킵"
 
             # 3) 스킵 상태 -> 미완료(클리어)
             if ci.get("skipped"):
-                await checkin_repo.clear_checkin(rid, yyyymmdd)
+                await get_storage().clear_checkin(rid, yyyymmdd)
                 return "미완료"
 
             # 4) 기타 애매한 상태도 안전하게 미완료로 초기화
-            await checkin_repo.clear_checkin(rid, yyyymmdd)
+            await get_storage().clear_checkin(rid, yyyymmdd)
             return "미완료"
         except Exception as e:
             print("_toggle_checkin_state: DB 토글 처리 중 에러:", e)
@@ -539,7 +544,7 @@ class RoutineCog(commands.Cog):
                 await self._send_or_followup_error(itx, "날짜 형식이 올바르지 않습니다. YYYY-MM-DD 형식으로 입력해주세요. (예: 2025-01-15)")
                 return
         else:
-            ld = local_day(now)
+            ld = await user_local_day(user_id, now)
 
         try:
             display = await self._build_display_items(user_id, ld, now)
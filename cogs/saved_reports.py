@@ -1 +1,59 @@
+import discord
+from discord.ext import commands
 
+from db.db import read_lane
+from domain.saved_stats import list_closed_season_summaries
+
+
+class SavedReportsCog(commands.Cog):
+    """끝난 시즌들의 저장된 리포트(스냅샷)를 보여주는 Cog.
+
+    - /season_history: 끝난 시즌별 전체 기간 요약(평균 달성률/완료 횟수)
+    - 시즌별 상세는 /report season_id:<id> 로 보면 같은 스냅샷을 쓴다
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print("SavedReportsCog loaded: /season_history 사용 가능")
+
+    @discord.app_commands.command(name="season_history", description="끝난 시즌들의 리포트 요약을 보여줍니다.")
+    async def season_history(self, itx: discord.Interaction):
+        await itx.response.defer(ephemeral=True)
+        user_id = str(itx.user.id)
+
+        try:
+            with read_lane():
+                seasons = await list_closed_season_summaries(user_id)
+        except Exception as e:
+            print("season_history error:", e)
+            await itx.followup.send("지난 시즌 리포트를 불러오는 중 오류가 발생했어요.", ephemeral=True)
+            return
+
+        if not seasons:
+            await itx.followup.send("아직 끝난 시즌이 없어요. /season_restart 로 새 시즌을 시작하면 지난 시즌이 여기에 쌓여요.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"{itx.user.display_name} 님의 지난 시즌",
+            description="시즌 전체 기간 기준 요약입니다. 자세한 내용은 `/report season_id:<id>` 로 볼 수 있어요.",
+            color=discord.Color.blurple(),
+        )
+        for s in seasons[:25]:
+            summary = s["summary"]
+            embed.add_field(
+                name=f"{s.get('title') or '시즌'} (id={s['id']})"[:256],
+                value=(
+                    f"{s.get('start_day')}~{s.get('end_day')}\n"
+                    f"평균 달성률: **{summary.get('avg_rate', 0.0) * 100:.1f}%** · "
+                    f"완료 {summary.get('total_done', 0)}회 / 유효 {summary.get('total_valid', 0)}일"
+                ),
+                inline=False,
+            )
+        await itx.followup.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SavedReportsCog(bot))
@@ -4,14 +4,14 @@ from __future__ import annotations
 import asyncio
 from datetime import datetime, timedelta
 from typing import Set, Tuple, Optional
-from zoneinfo import ZoneInfo
 
 import discord
 from discord.ext import commands
 
-from db.db import connect_db
-from repos import user_settings_repo, routine_repo, checkin_repo
-from domain.time_utils import now_kst, local_day, is_valid_day, KST
+from db.db import read_lane
+from storage import get_storage
+from domain.time_utils import now_kst, is_valid_day, routine_rule, user_local_day, valid_routines_on, KST
+from domain.day_clock import get_zone
 
 
 class SchedulerCog(commands.Cog):
@@ -35,7 +35,10 @@ class SchedulerCog(commands.Cog):
         # 봇이 로드될 때 schedule_today를 시작
         # (discord.py v2 스타일 hook; on_ready에서도 중복 실행 방지 필요할 수 있음)
         # 비동기 초기화는 별도 태스크로 실행
-        self._startup_task = asyncio.create_task(self.schedule_today())
+        # 스케줄러의 조회는 모두 읽기 전용 레인을 사용해 대화형 체크인과 커넥션을 나눠 쓰지 않는다.
+        # (여기서 만든 태스크와 그 태스크가 만드는 하위 태스크가 이 설정을 물려받음)
+        with read_lane():
+            self._startup_task = asyncio.create_task(self.schedule_today())
 
     async def cog_unload(self) -> None:
         if self._correction_task:
@@ -58,21 +61,13 @@ class SchedulerCog(commands.Cog):
                     pass
 
             now = now_kst()
+            store = get_storage()
             # 스케줄링 대상 사용자 목록 조회
-            conn = await connect_db()
-            try:
-                cur = await conn.execute("SELECT user_id, tz, reminder_time FROM user_settings")
-                users = await cur.fetchall()
-                await cur.close()
-
-                # fallback: user_settings가 비어있으면 routine 테이블에서 사용자 목록을 추출
-                if not users:
-                    cur = await conn.execute("SELECT DISTINCT user_id FROM routine")
-                    rows = await cur.fetchall()
-                    await cur.close()
-                    users = [(r[0], 'Asia/Seoul', '23:00') for r in rows]
-            finally:
-                await conn.close()
+            users = [(u["user_id"], u["tz"], u["reminder_time"]) for u in await store.list_all_user_settings()]
+
+            # fallback: user_settings가 비어있으면 routine 테이블에서 사용자 목록을 추출
+            if not users:
+                users = [(uid, 'Asia/Seoul', '23:00') for uid in await store.list_routine_user_ids()]
 
             print(f"Scheduler: found {len(users) if users else 0} users for scheduling")
 
@@ -90,7 +85,7 @@ class SchedulerCog(commands.Cog):
                     print(f"Scheduler: skipping daily_prompt (time already passed) for user={user_id} at {when_dt.isoformat()}")
                 # deadline reminders: 모든 활성 루틴 조회
                 try:
-                    routines = await routine_repo.list_active_routines_for_user(user_id)
+                    routines = await store.list_active_routines_for_user(user_id)
                 except Exception as e:
                     print("scheduler: routine list error:", e)
                     routines = []
@@ -116,10 +111,7 @@ class SchedulerCog(commands.Cog):
 
     def _make_when_dt_for_date(self, now_kst_dt: datetime, tz_name: str, time_str: str) -> datetime:
         """사용자 tz/time_str으로 오늘의 datetime을 만들고 KST로 변환하여 반환한다."""
-        try:
-            tz = ZoneInfo(tz_name)
-        except Exception:
-            tz = KST
+        tz = get_zone(tz_name)
         # 현재 시각을 사용자 tz로 변환하여 오늘 날짜 결정
         now_user = now_kst_dt.astimezone(tz)
         h, m = 8, 0
@@ -140,24 +132,21 @@ class SchedulerCog(commands.Cog):
         if delay > 0:
             await asyncio.sleep(delay)
         # 멱등키 체크
-        ld = local_day(now_kst())
+        ld = await user_local_day(user_id)
         key = (user_id, ld.isoformat(), "daily_prompt", None)
         if key in self.sent_keys:
             return
-        # 루틴 존재 여부 확인 (is_valid_day 필터 포함)
+        # 루틴 존재 여부 확인 (유효일 필터 포함)
+        try:
+            routines = await get_storage().routines_applicable_for_date(user_id, ld)
+        except Exception as e:
+            print("daily_prompt: routines_applicable_for_date error:", e)
+            return
         try:
-            routines = await routine_repo.prepare_checkin_for_date(user_id, now_kst())
+            valid = await valid_routines_on(user_id, routines, ld)
         except Exception as e:
-            print("daily_prompt: prepare_checkin_for_date error:", e)
+            print("daily_prompt: valid_routines_on error:", e)
             return
-        valid = []
-        for r in routines:
-            try:
-                if await is_valid_day(user_id, r.get("weekend_mode", "weekday"), ld):
-                    valid.append(r)
-            except Exception as e:
-                print("daily_prompt: is_valid_day error:", e)
-                continue
         # Compose message listing incomplete routines (or an all-done message)
         try:
             content = await self._compose_reminder_message(user_id, ld, valid)
@@ -172,20 +161,20 @@ class SchedulerCog(commands.Cog):
         delay = (when_dt - now).total_seconds()
         if delay > 0:
             await asyncio.sleep(delay)
-        ld = local_day(now_kst())
+        ld = await user_local_day(user_id)
         key = (user_id, ld.isoformat(), "deadline_reminder", routine_id)
         if key in self.sent_keys:
             return
         # 확인: 해당 루틴이 유효한 날인지
         try:
-            routine = await routine_repo.get_routine(routine_id)
+            routine = await get_storage().get_routine(routine_id)
         except Exception as e:
             print("deadline_task: get_routine error:", e)
             return
         if routine is None:
             return
         try:
-            if not await is_valid_day(user_id, routine.get("weekend_mode", "weekday"), ld):
+            if not await is_valid_day(user_id, await routine_rule(routine), ld):
                 self.sent_keys.add(key)
                 return
         except Exception as e:
@@ -193,7 +182,7 @@ class SchedulerCog(commands.Cog):
             return
         # 체크인 상태 확인: 미완료면 DM
         try:
-            ci = await checkin_repo.get_checkin(routine_id, ld)
+            ci = await get_storage().get_checkin(routine_id, ld)
         except Exception as e:
             print("deadline_task: get_checkin error:", e)
             return
@@ -204,14 +193,8 @@ class SchedulerCog(commands.Cog):
         # 미완료: DM 보내기 (전체 미완성 목록으로 구성)
         try:
             # reuse compose logic to list incomplete routines for the day
-            routines = await routine_repo.prepare_checkin_for_date(user_id, now_kst())
-            valid = []
-            for r in routines:
-                try:
-                    if await is_valid_day(user_id, r.get("weekend_mode", "weekday"), ld):
-                        valid.append(r)
-                except Exception:
-                    continue
+            routines = await get_storage().routines_applicable_for_date(user_id, ld)
+            valid = await valid_routines_on(user_id, routines, ld)
             content = await self._compose_reminder_message(user_id, ld, valid)
             await self._safe_send_dm(user_id, content)
         except Exception as e:
@@ -235,16 +218,19 @@ class SchedulerCog(commands.Cog):
         if not routines_list:
             return f"{date_str}{particle} 모든 루틴을 달성하셨어요! 잘하셨습니다!"
 
+        # 루틴별 조회 대신 해당 날짜의 체크인을 한 번에 가져온다
+        try:
+            checkins = await get_storage().get_checkins_for_routines([r['id'] for r in routines_list], date_str)
+        except Exception as e:
+            print("_compose_reminder_message: checkin lookup error:", e)
+            # On error, assume incomplete to be safe
+            checkins = {}
+
         incomplete_names = []
         for r in routines_list:
-            try:
-                ci = await checkin_repo.get_checkin(r['id'], ld_date)
-                # If no record or not checked and not skipped -> incomplete
-                if not ci or (not ci.get('checked_at') and not ci.get('skipped')):
-                    incomplete_names.append(r.get('name') or f"루틴{r.get('id')}")
-            except Exception as e:
-                print("_compose_reminder_message: checkin lookup error:", e)
-                # On error, assume incomplete to be safe
+            ci = checkins.get((r['id'], date_str))
+            # If no record or not checked and not skipped -> incomplete
+            if not ci or (not ci.get('checked_at') and not ci.get('skipped')):
                 incomplete_names.append(r.get('name') or f"루틴{r.get('id')}")
         if not incomplete_names:
             return f"{date_str}{particle} 모든 루틴을 달성하셨어요! 잘하셨습니다!"
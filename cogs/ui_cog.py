@@ -5,9 +5,9 @@ from discord.ext import commands
 
 from ui.views import MainPanelView, RoutineManagerView, GoalManagerView
 from ui.modals import EditRoutineModal, EditGoalModal, SettingsModal
-from repos import routine_repo
-from repos import goal_repo
-from repos import user_settings_repo
+from storage import get_storage
+from domain.day_clock import is_valid_tz
+from domain.recurrence import RecurrenceError, split_schedule
 
 
 class UICog(commands.Cog):
@@ -68,7 +68,7 @@ class UICog(commands.Cog):
         """사용자 루틴 목록을 조회하고 RoutineManagerView를 에페메랄로 전송합니다."""
         user_id = str(itx.user.id)
         try:
-            routines = await routine_repo.list_active_routines_for_user(user_id)
+            routines = await get_storage().list_active_routines_for_user(user_id)
         except Exception as e:
             print("list_active_routines_for_user 에러:", e)
             await itx.followup.send("루틴 목록을 불러오는 중 오류가 발생했습니다.", ephemeral=True)
@@ -84,7 +84,7 @@ class UICog(commands.Cog):
     async def open_goal_manager(self, itx: discord.Interaction):
         user_id = str(itx.user.id)
         try:
-            goals = await goal_repo.list_active_goals_for_user(user_id)
+            goals = await get_storage().list_active_goals_for_user(user_id)
         except Exception as e:
             print("list_active_goals_for_user 에러:", e)
             await itx.followup.send("목표 목록을 불러오는 중 오류가 발생했습니다.", ephemeral=True)
@@ -109,7 +109,7 @@ class UICog(commands.Cog):
 
         # fetch routine data and open EditRoutineModal with initial values
         try:
-            r = await routine_repo.get_routine(rid)
+            r = await get_storage().get_routine(rid)
         except Exception as e:
             print("get_routine 에러:", e)
             await itx.followup.send("루틴을 불러오는 중 오류가 발생했습니다.", ephemeral=True)
@@ -126,10 +126,16 @@ class UICog(commands.Cog):
             await itx.followup.send("루틴 편집 모달을 여는 중 오류가 발생했습니다.", ephemeral=True)
 
     async def process_edit_routine(self, itx: discord.Interaction, rid: int, data: dict):
+        try:
+            weekend_mode, recurrence = split_schedule(data.get('weekend_mode'))
+        except RecurrenceError as e:
+            await itx.followup.send(f"반복 규칙을 해석할 수 없습니다: {e}", ephemeral=True)
+            return
         try:
             fields = {
                 'name': data.get('name'),
-                'weekend_mode': data.get('weekend_mode'),
+                'weekend_mode': weekend_mode,
+                'recurrence': recurrence,
                 'deadline_time': data.get('deadline_time'),
                 'notes': data.get('notes'),
             }
@@ -141,7 +147,7 @@ class UICog(commands.Cog):
                 except ValueError:
                     # 잘못된 값이면 무시하고 기존 값 유지
                     pass
-            await routine_repo.update_routine(rid, **fields)
+            await get_storage().update_routine(rid, **fields)
             await itx.followup.send(f"루틴 (id={rid})이(가) 수정되었습니다.", ephemeral=True)
         except Exception as e:
             print("update_routine 에러:", e)
@@ -149,7 +155,7 @@ class UICog(commands.Cog):
 
     async def process_delete_routine(self, itx: discord.Interaction, rid: int):
         try:
-            await routine_repo.delete_routine(rid)
+            await get_storage().delete_routine(rid)
             await itx.followup.send(f"루틴 (id={rid})이(가) 삭제되었습니다.", ephemeral=True)
         except Exception as e:
             print("delete_routine 에러:", e)
@@ -164,7 +170,7 @@ class UICog(commands.Cog):
             pass
 
         try:
-            g = await goal_repo.get_goal(gid)
+            g = await get_storage().get_goal(gid)
         except Exception as e:
             print("get_goal 에러:", e)
             await itx.followup.send("목표를 불러오는 중 오류가 발생했습니다.", ephemeral=True)
@@ -181,7 +187,7 @@ class UICog(commands.Cog):
 
     async def process_edit_goal(self, itx: discord.Interaction, gid: int, data: dict):
         try:
-            await goal_repo.update_goal(gid, title=data.get('title'), deadline=data.get('deadline'), description=data.get('description'))
+            await get_storage().update_goal(gid, title=data.get('title'), deadline=data.get('deadline'), description=data.get('description'))
             await itx.followup.send(f"목표 (id={gid})이(가) 수정되었습니다.", ephemeral=True)
         except Exception as e:
             print("update_goal 에러:", e)
@@ -189,7 +195,7 @@ class UICog(commands.Cog):
 
     async def process_delete_goal(self, itx: discord.Interaction, gid: int):
         try:
-            await goal_repo.delete_goal(gid)
+            await get_storage().delete_goal(gid)
             await itx.followup.send(f"목표 (id={gid})이(가) 삭제되었습니다.", ephemeral=True)
         except Exception as e:
             print("delete_goal 에러:", e)
@@ -197,6 +203,12 @@ class UICog(commands.Cog):
 
     async def process_add_routine(self, itx: discord.Interaction, data: dict):
         print("process_add_routine 호출 by", itx.user, data)
+        # 반복 입력은 weekend_mode(weekday|weekend|all) 또는 반복 규칙(RRULE)
+        try:
+            weekend_mode, recurrence = split_schedule(data.get("weekend_mode"))
+        except RecurrenceError as e:
+            await itx.followup.send(f"반복 규칙을 해석할 수 없습니다: {e}", ephemeral=True)
+            return
         # DB에 루틴 생성
         try:
             raw_order = (data.get('order_index') or '').strip()
@@ -207,13 +219,14 @@ class UICog(commands.Cog):
                 except ValueError:
                     order_index = None
 
-            rid = await routine_repo.create_routine(
+            rid = await get_storage().create_routine(
                 str(itx.user.id),
                 data.get("name"),
-                data.get("weekend_mode"),
+                weekend_mode,
                 data.get("deadline_time"),
                 data.get("notes"),
                 order_index=order_index,
+                recurrence=recurrence,
             )
             await itx.followup.send(f"루틴을 추가했습니다 (id={rid}).", ephemeral=True)
         except Exception as e:
@@ -223,7 +236,7 @@ class UICog(commands.Cog):
     async def process_add_goal(self, itx: discord.Interaction, data: dict):
         print("process_add_goal 호출 by", itx.user, data)
         try:
-            gid = await goal_repo.create_goal(str(itx.user.id), data.get('title'), data.get('deadline'), data.get('description'))
+            gid = await get_storage().create_goal(str(itx.user.id), data.get('title'), data.get('deadline'), data.get('description'))
             await itx.followup.send(f"목표을 추가했습니다 (id={gid}).", ephemeral=True)
         except Exception as e:
             print("목표 생성 중 오류:", e)
@@ -259,10 +272,25 @@ class UICog(commands.Cog):
                 # 알 수 없는 값이면 안전하게 기본값 True
                 suggest_flag = True
 
-            await user_settings_repo.upsert_user_settings(
+            # 시간대/하루 경계: 비워두면 기존 값 유지(None), 잘못된 값이면 저장하지 않고 안내
+            tz = (data.get('tz') or "").strip() or None
+            if tz is not None and not is_valid_tz(tz):
+                await itx.followup.send(f"알 수 없는 시간대입니다: {tz} (예: Asia/Seoul, America/New_York)", ephemeral=True)
+                return
+            raw_cutoff = (data.get('day_cutoff_hour') or "").strip()
+            day_cutoff_hour = None
+            if raw_cutoff:
+                if not raw_cutoff.isdigit() or not 0 <= int(raw_cutoff) <= 23:
+                    await itx.followup.send("하루가 바뀌는 시각은 0~23 사이의 숫자로 입력해주세요.", ephemeral=True)
+                    return
+                day_cutoff_hour = int(raw_cutoff)
+
+            await get_storage().upsert_user_settings(
                 str(itx.user.id),
+                tz=tz,
                 reminder_time=reminder_time,
                 suggest_goals_on_checkin=suggest_flag,
+                day_cutoff_hour=day_cutoff_hour,
             )
         except Exception as e:
             print("user_settings upsert 에러:", e)
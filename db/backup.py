@@ -0,0 +1,285 @@
+"""봇을 멈추지 않고 DB 스냅샷을 뜨는 온라인 백업 태스크.
+
+SQLite online backup API로 페이지를 조금씩(DB_BACKUP_PAGES) 복사하고, 단계 사이마다
+잠깐 쉬어 그 사이에 다른 커넥션의 쓰기가 진행되도록 한다. 복사는 별도 스레드에서
+돌기 때문에 이벤트 루프(디스코드 응답)는 멈추지 않는다.
+
+- 스냅샷은 DB_BACKUP_DIR에 database-YYYYmmdd-HHMMSS.db 형태로 남고, 최신 DB_BACKUP_KEEP개만 유지
+- 완성된 스냅샷은 별도 스레드에서 PRAGMA integrity_check로 검증한 뒤에만 최종 이름으로 바꾼다
+- 검증에 실패한 스냅샷은 지우고 로그만 남긴다(다음 주기에 다시 시도)
+
+환경변수:
+  DB_BACKUP_DIR            스냅샷 디렉터리(기본: DB 파일 옆의 backups/)
+  DB_BACKUP_INTERVAL_MIN   백업 주기(분, 기본 360). 0이면 백업 태스크를 띄우지 않음
+  DB_BACKUP_KEEP           보관할 스냅샷 수(기본 7)
+  DB_BACKUP_PAGES          한 단계에 복사할 페이지 수(기본 256)
+  DB_BACKUP_STEP_SLEEP_MS  단계 사이 대기(ms, 기본 10)
+
+사용 예:
+  start_backup_task()           # 봇 시작 시
+  await run_backup_once()       # 수동 스냅샷
+  await stop_backup_task()      # 봇 종료 시
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from db.db import DB_PATH, _project_root
+
+_raw_dir = os.getenv('DB_BACKUP_DIR')
+if _raw_dir:
+    DB_BACKUP_DIR = str(Path(_raw_dir) if Path(_raw_dir).is_absolute() else (_project_root / _raw_dir).resolve())
+else:
+    DB_BACKUP_DIR = str(Path(DB_PATH).parent / "backups")
+DB_BACKUP_INTERVAL_MIN = max(0.0, float(os.getenv('DB_BACKUP_INTERVAL_MIN', '360')))
+DB_BACKUP_KEEP = max(1, int(os.getenv('DB_BACKUP_KEEP', '7')))
+DB_BACKUP_PAGES = max(1, int(os.getenv('DB_BACKUP_PAGES', '256')))
+DB_BACKUP_STEP_SLEEP_MS = max(0.0, float(os.getenv('DB_BACKUP_STEP_SLEEP_MS', '10')))
+
+# 복사 도중 원본이 다른 커넥션에 의해 바뀌면 SQLite가 처음부터 다시 복사한다.
+# 쓰기가 계속 몰리는 동안 끝없이 재시작하지 않도록 상한을 둔다.
+_MAX_RESTARTS = 20
+
+
+class BackupAborted(Exception):
+    pass
+
+
+class BackupManager:
+    """주기적으로 스냅샷을 만들고 회전(rotate)시키는 백그라운드 태스크."""
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        backup_dir: str = DB_BACKUP_DIR,
+        *,
+        interval_min: float = DB_BACKUP_INTERVAL_MIN,
+        keep: int = DB_BACKUP_KEEP,
+        pages: int = DB_BACKUP_PAGES,
+        step_sleep_ms: float = DB_BACKUP_STEP_SLEEP_MS,
+    ):
+        self.db_path = db_path
+        self.backup_dir = Path(backup_dir)
+        self.interval = interval_min * 60.0
+        self.keep = keep
+        self.pages = pages
+        self.step_sleep = step_sleep_ms / 1000.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 통계
+        self._runs = 0
+        self._failures = 0
+        self._last_path: Optional[str] = None
+        self._last_ms = 0.0
+        self._last_size = 0
+        self._last_restarts = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print("BackupManager: 종료 중 오류:", e)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self._runs,
+            "failures": self._failures,
+            "last_path": self._last_path,
+            "last_ms": self._last_ms,
+            "last_size": self._last_size,
+            "last_restarts": self._last_restarts,
+            "last_error": self._last_error,
+            "snapshots": len(self.snapshots()),
+        }
+
+    def snapshots(self) -> list[Path]:
+        """보관 중인 스냅샷 목록(오래된 것부터)."""
+        if not self.backup_dir.is_dir():
+            return []
+        files = [p for p in self.backup_dir.glob(f"{Path(self.db_path).stem}-*.db") if p.is_file()]
+        return sorted(files, key=lambda p: (p.stat().st_mtime, p.name))
+
+    async def run_once(self) -> Optional[Path]:
+        """스냅샷 하나를 만들고 검증/회전까지 마친다. 실패하면 None."""
+        async with self._lock:
+            started = time.perf_counter()
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            # 이전 실행이 중간에 끊겨 남은 임시 파일 정리
+            for stale in self.backup_dir.glob("*.db.tmp"):
+                _unlink_quietly(stale)
+            final = self._next_path()
+            tmp = final.with_name(final.name + ".tmp")
+            try:
+                restarts = await asyncio.to_thread(self._copy, tmp)
+                # 검증은 복사 스레드와 별개의 스레드에서 새 커넥션으로 수행
+                result = await asyncio.to_thread(_integrity_check, str(tmp))
+                if result != "ok":
+                    raise BackupAborted(f"integrity_check 실패: {result}")
+                os.replace(tmp, final)
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                print(f"DB 백업 실패: {e}")
+                _unlink_quietly(tmp)
+                return None
+
+            self._runs += 1
+            self._last_path = str(final)
+            self._last_ms = (time.perf_counter() - started) * 1000.0
+            self._last_size = final.stat().st_size
+            self._last_restarts = restarts
+            self._last_error = None
+            removed = self._rotate()
+            print(f"DB 백업 완료: {final.name} ({self._last_size} bytes, {self._last_ms:.0f}ms, 정리 {removed}개)")
+            return final
+
+    def _next_path(self) -> Path:
+        stem = Path(self.db_path).stem
+        base = f"{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        path = self.backup_dir / f"{base}.db"
+        n = 1
+        while path.exists():
+            path = self.backup_dir / f"{base}-{n}.db"
+            n += 1
+        return path
+
+    def _copy(self, dest: Path) -> int:
+        # 워커 스레드에서 실행된다. 풀 커넥션을 붙잡지 않도록 원본 커넥션을 따로 연다.
+        restarts = 0
+        last_remaining: Optional[int] = None
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            nonlocal restarts, last_remaining
+            # 남은 페이지가 늘었다 = 원본이 바뀌어 처음부터 다시 복사 중
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > _MAX_RESTARTS:
+                    raise BackupAborted(f"원본 변경으로 {restarts}번 재시작되어 중단")
+            last_remaining = remaining
+
+        src = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            dst = sqlite3.connect(str(dest))
+            try:
+                src.backup(dst, pages=self.pages, progress=progress, sleep=self.step_sleep)
+                # 스냅샷은 단일 파일로 다룰 수 있게 WAL을 끈다
+                dst.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                dst.close()
+        finally:
+            src.close()
+        return restarts
+
+    def _rotate(self) -> int:
+        files = self.snapshots()
+        removed = 0
+        for p in files[: max(0, len(files) - self.keep)]:
+            if _unlink_quietly(p):
+                removed += 1
+        return removed
+
+    def _initial_delay(self) -> float:
+        # 마지막 스냅샷이 주기보다 오래됐으면 바로 한 번 뜬다
+        files = self.snapshots()
+        if not files:
+            return 0.0
+        age = time.time() - files[-1].stat().st_mtime
+        return max(0.0, self.interval - age)
+
+    async def _run(self) -> None:
+        delay = self._initial_delay()
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print("BackupManager: 백업 태스크 오류:", e)
+            delay = self.interval
+
+
+def _integrity_check(path: str) -> str:
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return "; ".join(str(r[0]) for r in rows) if rows else "no result"
+
+
+def _unlink_quietly(path: Path) -> bool:
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        print(f"DB 백업 파일 삭제 실패({path}):", e)
+        return False
+
+
+_backup_manager: Optional[BackupManager] = None
+
+
+def get_backup_manager() -> BackupManager:
+    """전역 BackupManager를 반환한다(없거나 다른 이벤트 루프의 것이면 새로 만든다)."""
+    global _backup_manager
+    bm = _backup_manager
+    if bm is None or (bm.loop is not None and bm.loop is not asyncio.get_running_loop()):
+        bm = _backup_manager = BackupManager()
+    return bm
+
+
+def start_backup_task() -> Optional[BackupManager]:
+    """주기 백업 태스크를 띄운다. DB_BACKUP_INTERVAL_MIN=0이면 아무것도 하지 않는다."""
+    if DB_BACKUP_INTERVAL_MIN <= 0:
+        return None
+    bm = get_backup_manager()
+    bm.start()
+    return bm
+
+
+async def run_backup_once() -> Optional[Path]:
+    """주기와 상관없이 스냅샷 하나를 바로 만든다."""
+    return await get_backup_manager().run_once()
+
+
+def backup_stats() -> dict:
+    """백업 실행 통계. 백업 매니저가 아직 없으면 빈 dict."""
+    return _backup_manager.stats() if _backup_manager is not None else {}
+
+
+async def stop_backup_task() -> None:
+    """주기 백업 태스크를 정리한다. 진행 중인 복사는 스레드에서 끝까지 돈다."""
+    global _backup_manager
+    bm, _backup_manager = _backup_manager, None
+    if bm is not None and bm.loop is asyncio.get_running_loop():
+        await bm.stop()
@@ -0,0 +1,252 @@
+"""WAL 체크포인트 관리 태스크.
+
+SQLite 기본 자동 체크포인트(wal_autocheckpoint)는 커밋한 커넥션에서 PASSIVE로만 돌고,
+읽는 커넥션이 계속 있으면 WAL을 처음으로 되감지 못해 -wal 파일이 피크 시간 내내 커진다.
+WAL이 길어질수록 읽기마다 훑어야 하는 프레임이 늘어 읽기도 느려진다.
+
+이 태스크는 주기적으로 WAL 크기와 DB 사용 상태를 보고:
+- 한가한 틈(풀 커넥션이 모두 반납되고 쓰기 큐가 비어 있는 상태가 DB_CHECKPOINT_IDLE_MS 이상)에는
+  PASSIVE 체크포인트로 WAL 내용을 DB 파일에 옮기고
+- WAL이 DB_WAL_SIZE_LIMIT_MB를 넘으면 RESTART로 WAL을 처음부터 다시 쓰게 하고,
+  그 상태에서 한가하기까지 하면 TRUNCATE로 파일 크기 자체를 0으로 줄인다.
+
+환경변수:
+  DB_CHECKPOINT_INTERVAL_SEC  상태 확인 주기(초, 기본 5). 0이면 태스크를 띄우지 않음
+  DB_CHECKPOINT_IDLE_MS       한가하다고 볼 최소 무활동 시간(ms, 기본 500)
+  DB_WAL_SIZE_LIMIT_MB        RESTART/TRUNCATE로 올릴 WAL 크기(MB, 기본 64)
+  DB_CHECKPOINT_BUSY_MS       RESTART/TRUNCATE가 읽기/쓰기 종료를 기다리는 최대 시간(ms, 기본 2000)
+
+사용 예:
+  start_checkpoint_task()           # 봇 시작 시
+  await checkpoint_now("TRUNCATE")  # 수동 실행
+  checkpoint_stats()                # WAL 크기, 옮긴 프레임 수, 소요 시간
+  await stop_checkpoint_task()      # 봇 종료 시
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from db.db import DB_PATH, pool_idle_seconds
+from db.write_queue import write_queue_state
+
+DB_CHECKPOINT_INTERVAL_SEC = max(0.0, float(os.getenv('DB_CHECKPOINT_INTERVAL_SEC', '5')))
+DB_CHECKPOINT_IDLE_MS = max(0.0, float(os.getenv('DB_CHECKPOINT_IDLE_MS', '500')))
+DB_WAL_SIZE_LIMIT_MB = max(1.0, float(os.getenv('DB_WAL_SIZE_LIMIT_MB', '64')))
+DB_CHECKPOINT_BUSY_MS = max(0, int(os.getenv('DB_CHECKPOINT_BUSY_MS', '2000')))
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+
+class CheckpointManager:
+    """WAL 크기와 DB 사용 상태를 보고 알맞은 모드로 체크포인트를 돌리는 백그라운드 태스크."""
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        *,
+        interval_sec: float = DB_CHECKPOINT_INTERVAL_SEC,
+        idle_ms: float = DB_CHECKPOINT_IDLE_MS,
+        size_limit_mb: float = DB_WAL_SIZE_LIMIT_MB,
+        busy_ms: int = DB_CHECKPOINT_BUSY_MS,
+    ):
+        self.db_path = db_path
+        self.wal_path = db_path + "-wal"
+        self.interval = interval_sec
+        self.idle = idle_ms / 1000.0
+        self.size_limit = int(size_limit_mb * 1024 * 1024)
+        self.busy_ms = busy_ms
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 마지막 체크포인트 직후의 WAL (크기, 수정 시각). 그 뒤로 쓰기가 없으면 PASSIVE를 건너뛴다
+        self._settled: Optional[tuple[int, int]] = None
+
+        # 통계
+        self._runs = {mode: 0 for mode in CHECKPOINT_MODES}
+        self._busy = 0
+        self._errors = 0
+        self._frames_checkpointed = 0
+        self._last_mode: Optional[str] = None
+        self._last_log_frames = 0
+        self._last_checkpointed = 0
+        self._last_ms = 0.0
+        self._max_ms = 0.0
+        self._max_wal_size = 0
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wal_size(self) -> int:
+        return self._wal_signature()[0]
+
+    def _wal_signature(self) -> tuple[int, int]:
+        try:
+            st = os.stat(self.wal_path)
+        except OSError:
+            return 0, 0
+        return st.st_size, st.st_mtime_ns
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                print("CheckpointManager: 종료 중 오류:", e)
+        async with self._lock:
+            conn, self._conn = self._conn, None
+            if conn is not None:
+                await asyncio.to_thread(conn.close)
+
+    def stats(self) -> dict:
+        wal_size = self.wal_size()
+        self._max_wal_size = max(self._max_wal_size, wal_size)
+        return {
+            "wal_size": wal_size,
+            "max_wal_size": self._max_wal_size,
+            "runs": dict(self._runs),
+            "busy": self._busy,
+            "errors": self._errors,
+            "frames_checkpointed": self._frames_checkpointed,
+            "last_mode": self._last_mode,
+            "last_log_frames": self._last_log_frames,
+            "last_checkpointed": self._last_checkpointed,
+            "last_ms": self._last_ms,
+            "max_ms": self._max_ms,
+        }
+
+    def is_idle(self) -> bool:
+        """풀 커넥션이 모두 반납되고 쓰기 큐도 비어 있는 상태가 idle 시간 이상 이어졌는지."""
+        if pool_idle_seconds() < self.idle:
+            return False
+        pending, last_commit_at = write_queue_state()
+        if pending:
+            return False
+        return last_commit_at is None or time.monotonic() - last_commit_at >= self.idle
+
+    def choose_mode(self, wal_size: int, idle: bool) -> Optional[str]:
+        """현재 상태에서 돌릴 체크포인트 모드. 돌릴 필요가 없으면 None."""
+        # RESTART는 파일 크기를 줄이지 않으므로, 그 뒤로 쓰기가 없었다면 다시 돌리지 않는다
+        changed = self._wal_signature() != self._settled
+        if wal_size >= self.size_limit:
+            if idle:
+                return "TRUNCATE"
+            return "RESTART" if changed else None
+        if idle and wal_size and changed:
+            return "PASSIVE"
+        return None
+
+    async def tick(self) -> Optional[str]:
+        """상태를 한 번 확인하고 필요하면 체크포인트를 돌린다. 실행한 모드를 반환."""
+        wal_size = self.wal_size()
+        self._max_wal_size = max(self._max_wal_size, wal_size)
+        mode = self.choose_mode(wal_size, self.is_idle())
+        if mode is None:
+            return None
+        await self.checkpoint(mode)
+        return mode
+
+    async def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        """지정한 모드로 체크포인트를 돌리고 (busy, log_frames, checkpointed)를 반환."""
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"unknown checkpoint mode: {mode}")
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                busy, log_frames, checkpointed = await asyncio.to_thread(self._checkpoint_sync, mode)
+            except Exception as e:
+                self._errors += 1
+                print(f"WAL 체크포인트({mode}) 실패:", e)
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            self._runs[mode] += 1
+            self._busy += 1 if busy else 0
+            self._frames_checkpointed += max(0, checkpointed)
+            self._last_mode = mode
+            self._last_log_frames = log_frames
+            self._last_checkpointed = checkpointed
+            self._last_ms = elapsed_ms
+            self._max_ms = max(self._max_ms, elapsed_ms)
+            self._settled = self._wal_signature()
+            if mode != "PASSIVE":
+                print(
+                    f"WAL 체크포인트 {mode}: frames={log_frames}, checkpointed={checkpointed}, "
+                    f"busy={busy}, {elapsed_ms:.0f}ms, wal={self._settled[0]} bytes"
+                )
+            return busy, log_frames, checkpointed
+
+    def _checkpoint_sync(self, mode: str) -> tuple[int, int, int]:
+        # 워커 스레드에서 실행된다. 풀 커넥션을 붙잡지 않도록 전용 커넥션을 쓴다.
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {0 if mode == 'PASSIVE' else self.busy_ms}")
+        row = self._conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return int(row[0]), int(row[1]), int(row[2])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                print("CheckpointManager: 체크포인트 태스크 오류:", e)
+
+
+_checkpoint_manager: Optional[CheckpointManager] = None
+
+
+def get_checkpoint_manager() -> CheckpointManager:
+    """전역 CheckpointManager를 반환한다(없거나 다른 이벤트 루프의 것이면 새로 만든다)."""
+    global _checkpoint_manager
+    cm = _checkpoint_manager
+    if cm is None or (cm.loop is not None and cm.loop is not asyncio.get_running_loop()):
+        cm = _checkpoint_manager = CheckpointManager()
+    return cm
+
+
+def start_checkpoint_task() -> Optional[CheckpointManager]:
+    """WAL 관리 태스크를 띄운다. DB_CHECKPOINT_INTERVAL_SEC=0이면 아무것도 하지 않는다."""
+    if DB_CHECKPOINT_INTERVAL_SEC <= 0:
+        return None
+    cm = get_checkpoint_manager()
+    cm.start()
+    return cm
+
+
+async def checkpoint_now(mode: str = "PASSIVE") -> tuple[int, int, int]:
+    """주기와 상관없이 체크포인트를 바로 한 번 돌린다."""
+    return await get_checkpoint_manager().checkpoint(mode)
+
+
+def checkpoint_stats() -> dict:
+    """WAL 크기/체크포인트 통계. 매니저가 아직 없으면 빈 dict."""
+    return _checkpoint_manager.stats() if _checkpoint_manager is not None else {}
+
+
+async def stop_checkpoint_task() -> None:
+    """WAL 관리 태스크와 전용 커넥션을 정리한다."""
+    global _checkpoint_manager
+    cm, _checkpoint_manager = _checkpoint_manager, None
+    if cm is not None and (cm.loop is None or cm.loop is asyncio.get_running_loop()):
+        await cm.stop()
@@ -1,9 +1,15 @@
 ﻿import os
 import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, List, Optional
 from dotenv import load_dotenv
 import aiosqlite
 
+from db.migrations import migrate
+
 load_dotenv()
 _raw_db = os.getenv('DATABASE_PATH', './data/database.db')
 
@@ -17,173 +23,92 @@ if Path(_raw_db).is_absolute():
 else:
     DB_PATH = str((_project_root / _raw_db).resolve())
 
-# SQL 스키마 (CREATE TABLE IF NOT EXISTS)
-_SCHEMA_SQL = r"""
-PRAGMA foreign_keys = ON;
-
-CREATE TABLE IF NOT EXISTS user_settings (
-  user_id TEXT PRIMARY KEY,
-  tz TEXT NOT NULL DEFAULT 'Asia/Seoul',
-  reminder_time TEXT NOT NULL DEFAULT '23:00',
-  created_at TEXT NOT NULL
-);
-
--- (확장) 리포트 시즌(다시 마음먹기)
-CREATE TABLE IF NOT EXISTS report_season (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id TEXT NOT NULL,
-  title TEXT NOT NULL DEFAULT '시즌',
-  start_day TEXT NOT NULL,
-  end_day TEXT,
-  created_at TEXT NOT NULL,
-  closed_at TEXT,
-  is_active INTEGER NOT NULL DEFAULT 1
-);
-CREATE INDEX IF NOT EXISTS idx_report_season_user_start ON report_season(user_id, start_day);
-
-CREATE TABLE IF NOT EXISTS routine (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id TEXT NOT NULL,
-  name TEXT NOT NULL,
-  weekend_mode TEXT NOT NULL CHECK(weekend_mode IN ('weekday','weekend','all')),
-  deadline_time TEXT,
-  notes TEXT,
-  active INTEGER NOT NULL DEFAULT 1,
-  created_at TEXT NOT NULL,
-  order_index INTEGER
-);
-
-CREATE TABLE IF NOT EXISTS routine_checkin (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  routine_id INTEGER NOT NULL,
-  user_id TEXT NOT NULL,
-  local_day TEXT NOT NULL,
-  checked_at TEXT,
-  undone_at TEXT,
-  skipped INTEGER NOT NULL DEFAULT 0,
-  skip_reason TEXT,
-  UNIQUE (routine_id, local_day)
-);
-
-CREATE TABLE IF NOT EXISTS goal (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id TEXT NOT NULL,
-  title TEXT NOT NULL,
-  deadline TEXT,
-  description TEXT,
-  active INTEGER NOT NULL DEFAULT 1,
-  created_at TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS goal_progress (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  goal_id INTEGER NOT NULL,
-  user_id TEXT NOT NULL,
-  delta INTEGER NOT NULL,
-  value_after INTEGER NOT NULL,
-  created_at TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS exemption (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id TEXT NOT NULL,
-  start_day TEXT NOT NULL,
-  end_day TEXT NOT NULL,
-  reason TEXT
-);
-
-CREATE INDEX IF NOT EXISTS idx_checkin_user_day ON routine_checkin(user_id, local_day);
-CREATE INDEX IF NOT EXISTS idx_goal_user ON goal(user_id, active);
-"""
-
-
-async def _ensure_routine_order_index(db: aiosqlite.Connection) -> None:
-    """기존 DB에 routine.order_index 컬럼이 없으면 추가하고, NULL 값은 user_id별 id 순서로 초기화."""
-    cur = await db.execute("PRAGMA table_info(routine)")
-    cols = [r[1] for r in await cur.fetchall()]  # (cid, name, type, notnull, dflt_value, pk)
-    await cur.close()
-
-    if "order_index" not in cols:
-        await db.execute("ALTER TABLE routine ADD COLUMN order_index INTEGER")
-
-    # NULL 인 값들만 user_id별 id 순서로 채우기
-    cur = await db.execute("SELECT id, user_id FROM routine WHERE order_index IS NULL ORDER BY user_id, id")
-    rows = await cur.fetchall()
-    await cur.close()
-
-    idx_by_user: dict[str, int] = {}
-    for rid, uid in rows:
-        uid = str(uid)
-        idx_by_user[uid] = idx_by_user.get(uid, 0) + 1
-        await db.execute("UPDATE routine SET order_index = ? WHERE id = ?", (idx_by_user[uid], rid))
-
-
-async def _fix_season_start_day_to_first_checkin(db: aiosqlite.Connection) -> None:
-    """시즌 도입 초기에 '오늘부터 시작'으로 잘못 만들어진 1개짜리 시즌을 과거 체크인 포함으로 보정.
-
-    안전 조건:
-    - report_season이 존재
-    - 해당 user_id의 시즌 수가 정확히 1개
-    - 그 시즌의 start_day가 오늘(서버 기준 date('now'))
-    - routine_checkin에 더 이른 first_checkin_day(MIN(local_day), done/skipped=0)가 존재
-
-    이때에만 start_day를 first_checkin_day로 수정한다.
-    """
-    # 보고서 시즌 테이블이 아예 없는 DB면 스킵
-    cur = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='report_season'")
-    has = await cur.fetchone()
-    await cur.close()
-    if not has:
-        return
-
-    # user별 조건에 맞는 시즌을 찾아 업데이트
-    cur = await db.execute(
-        """
-        SELECT rs.user_id, rs.id AS season_id,
-               rs.start_day,
-               (
-                 SELECT MIN(local_day)
-                 FROM routine_checkin rc
-                 WHERE rc.user_id = rs.user_id AND rc.checked_at IS NOT NULL AND rc.skipped = 0
-               ) AS first_day,
-               (
-                 SELECT COUNT(1)
-                 FROM report_season r2
-                 WHERE r2.user_id = rs.user_id
-               ) AS season_cnt
-        FROM report_season rs
-        WHERE rs.start_day = date('now')
-        """
-    )
-    rows = await cur.fetchall()
-    await cur.close()
-
-    for r in rows:
-        user_id = r[0]
-        season_id = r[1]
-        first_day = r[3]
-        season_cnt = r[4]
-
-        if season_cnt != 1:
-            continue
-        if not first_day:
-            continue
-        # first_day가 오늘보다 이전일 때만 보정
-        try:
-            if str(first_day) >= str(r[2]):
-                continue
-        except Exception:
-            # 문자열 비교 실패 시에도 안전하게 스킵
+# 커넥션 풀 크기(미리 열어두는 커넥션 수). 쓰기 레인 / 읽기 전용 레인
+DB_POOL_SIZE = max(1, int(os.getenv('DB_POOL_SIZE', '4')))
+DB_READ_POOL_SIZE = max(1, int(os.getenv('DB_READ_POOL_SIZE', '4')))
+WRITE_LANE = "write"
+READ_LANE = "read"
+
+# IN (...) 목록 한 번에 넣을 최대 id 수(SQLite 바인드 변수 한도보다 충분히 작게). 여러 id를 한 번에 읽는 repo 함수가 쓴다
+SQL_IN_CHUNK = 500
+
+# 커넥션 PRAGMA 성능 프로필. DB_PRAGMA_PROFILE 환경변수로 선택하고,
+# 개별 값은 DB_PRAGMA_<NAME>(예: DB_PRAGMA_CACHE_SIZE=-32000)으로 덮어쓸 수 있다.
+# - durable: 매 커밋 fsync(FULL), 작은 캐시. 전원 장애에도 커밋 유실 없음
+# - balanced: WAL + NORMAL(체크포인트 시점에만 fsync). 기본값
+#   (쓰기 큐 커넥션은 프로필과 상관없이 FULL: 그룹 커밋이 끝났다고 알린 쓰기는 유실되지 않는다. db/write_queue.py)
+# - throughput: fsync 생략(OFF), 큰 캐시/mmap. 장애 시 최근 커밋 유실 가능(파일 손상은 없음)
+PRAGMA_PROFILES: dict[str, dict[str, int | str]] = {
+    "durable": {
+        "synchronous": "FULL",
+        "cache_size": -8000,  # 음수: KiB 단위(약 8MB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000,  # ms
+        "wal_autocheckpoint": 1000,  # pages
+    },
+    "balanced": {
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+    },
+    "throughput": {
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 4000,
+    },
+}
+
+
+# DB_PRAGMA_<NAME> 덮어쓰기에 허용하는 값. 문자열 키워드는 목록 안의 것만, 숫자는 정수만(음수는 cache_size만)
+_PRAGMA_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+
+
+def _parse_pragma_override(key: str, raw: str) -> int | str | None:
+    """DB_PRAGMA_<NAME> 값을 검사해 PRAGMA에 넣을 값으로 바꾼다. 허용하지 않는 값이면 None."""
+    value = raw.strip().upper()
+    if key in _PRAGMA_KEYWORDS:
+        return value if value in _PRAGMA_KEYWORDS[key] else None
+    digits = value[1:] if key == "cache_size" and value.startswith("-") else value
+    return int(value) if digits.isdigit() else None
+
+
+def _resolve_pragma_profile() -> tuple[str, dict[str, int | str]]:
+    name = os.getenv('DB_PRAGMA_PROFILE', 'balanced').strip().lower()
+    if name not in PRAGMA_PROFILES:
+        print(f"DB_PRAGMA_PROFILE={name!r}는 알 수 없는 프로필입니다. balanced를 사용합니다.")
+        name = "balanced"
+    pragmas = dict(PRAGMA_PROFILES[name])
+    for key in pragmas:
+        override = os.getenv(f"DB_PRAGMA_{key.upper()}")
+        if not override:
             continue
+        value = _parse_pragma_override(key, override)
+        if value is None:
+            print(f"DB_PRAGMA_{key.upper()}={override!r}는 허용하지 않는 값입니다. {name} 프로필 값({pragmas[key]})을 사용합니다.")
+        else:
+            pragmas[key] = value
+    return name, pragmas
+
 
-        await db.execute(
-            "UPDATE report_season SET start_day = ? WHERE id = ? AND user_id = ?",
-            (str(first_day), int(season_id), str(user_id)),
-        )
+DB_PRAGMA_PROFILE, DB_PRAGMAS = _resolve_pragma_profile()
 
 
 async def init_db(db_path: str | None = None) -> None:
-    """Ensure DB file & directory exist and create tables/indexes if missing.
+    """Ensure DB file & directory exist and bring the schema up to date.
+
+    스키마 변경은 db/migrations.py의 번호 붙은 단계로 관리되며,
+    schema_version 테이블에 적용 기록이 남는다. 이미 최신인 DB는
+    버전 조회 한 번으로 끝난다.
 
     사용 예:
       await init_db()
@@ -194,33 +119,328 @@ async def init_db(db_path: str | None = None) -> None:
     # Ensure directory exists
     Path(path).parent.mkdir(parents=True, exist_ok=True)
 
-    async with aiosqlite.connect(path) as db:
-        # Use WAL for better concurrency in future
-        await db.execute("PRAGMA journal_mode = WAL;")
-        # Execute schema
-        await db.executescript(_SCHEMA_SQL)
+    # isolation_level=None: 마이그레이션 단계별 트랜잭션을 직접 제어한다
+    async with aiosqlite.connect(path, isolation_level=None) as db:
+        applied = await migrate(db)
+        if applied:
+            print(f"DB migration 적용: {applied}")
+
+
+# 실행된 SQL 문장 추적(테스트/진단용). enable_statement_trace() 이후에 열린 커넥션에만 적용된다.
+_trace_enabled = False
+_statement_listeners: List[Callable[[str], None]] = []
+
+
+def enable_statement_trace() -> None:
+    """이후에 여는 커넥션(풀/쓰기 큐 포함)이 실행하는 SQL을 capture_statements()로 볼 수 있게 한다.
+
+    풀이 열리기 전에 호출해야 한다. 운영 경로에서는 호출하지 않는다.
+    """
+    global _trace_enabled
+    _trace_enabled = True
+
 
-        # 자동 마이그레이션(기존 DB 보정)
-        await _ensure_routine_order_index(db)
-        await _fix_season_start_day_to_first_checkin(db)
+def _dispatch_statement(sql: str) -> None:
+    # aiosqlite 워커 스레드에서 호출된다
+    for fn in list(_statement_listeners):
+        fn(sql)
 
-        await db.commit()
+
+@contextmanager
+def capture_statements() -> Iterator[List[str]]:
+    """블록 안에서 실행된 SQL 문장(파라미터가 채워진 형태)을 리스트로 모은다.
+
+    사용 예:
+      enable_statement_trace()
+      with capture_statements() as stmts:
+          await routine_repo.list_active_routines_for_user(uid)
+      print(len(stmts))
+    """
+    captured: List[str] = []
+    _statement_listeners.append(captured.append)
+    try:
+        yield captured
+    finally:
+        _statement_listeners.remove(captured.append)
+
+
+async def _prepare_connection(conn: aiosqlite.Connection) -> None:
+    """커넥션 단위 설정(row_factory, PRAGMA)을 적용한다. 커넥션당 한 번만 호출된다."""
+    conn.row_factory = aiosqlite.Row
+    await conn.execute("PRAGMA foreign_keys = ON;")
+    for key, value in DB_PRAGMAS.items():
+        await conn.execute(f"PRAGMA {key} = {value};")
+    if _trace_enabled:
+        await conn.set_trace_callback(_dispatch_statement)
+
+
+async def effective_pragmas(conn: aiosqlite.Connection) -> dict[str, object]:
+    """커넥션에 실제로 적용된 PRAGMA 값(journal_mode 포함)을 읽어 반환한다."""
+    result: dict[str, object] = {}
+    for key in ("journal_mode", *DB_PRAGMAS.keys()):
+        cur = await conn.execute(f"PRAGMA {key};")
+        row = await cur.fetchone()
+        await cur.close()
+        result[key] = row[0] if row else None
+    return result
 
 
 async def connect_db(db_path: str | None = None) -> aiosqlite.Connection:
     """Return an aiosqlite connection with useful defaults.
 
+    풀을 거치지 않는 단독 커넥션이 필요할 때(스크립트, 스키마 작업 등)만 사용한다.
+    일반적인 repo 코드는 acquire_db()를 사용한다.
+
     사용 예:
       async with await connect_db() as db:
           await db.execute(...)  # 또는 fetch 등
     """
     path = db_path or DB_PATH
     conn = await aiosqlite.connect(path)
-    conn.row_factory = aiosqlite.Row
-    await conn.execute("PRAGMA foreign_keys = ON;")
+    await _prepare_connection(conn)
     return conn
 
 
+# close() 뒤 acquire()에서 기다리던 호출자를 깨우는 표시(받은 호출자는 다음 대기자를 위해 되돌려 놓는다)
+_POOL_CLOSED = object()
+
+
+class ConnectionPool:
+    """고정 개수의 aiosqlite 커넥션을 미리 열어두고 빌려주는 풀.
+
+    - open() 시점에 size개의 커넥션을 만들고 PRAGMA를 한 번씩만 적용
+    - acquire()는 async context manager로 커넥션을 빌려주고, 끝나면 반납
+    - 반납 시 커밋되지 않은 트랜잭션이 남아 있으면 롤백해 다음 사용자에게 넘기지 않음
+    - readonly=True면 커넥션에 query_only를 걸어 읽기 전용 레인으로 사용
+    - close()하면 커넥션을 기다리던 호출자도 RuntimeError로 깨운다
+    """
+
+    def __init__(self, path: str, size: int, *, readonly: bool = False, name: str = WRITE_LANE):
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        self.name = name
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._conns: list[aiosqlite.Connection] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+
+        # 통계: 커넥션을 기다리는 호출자 수(큐 깊이)와 대기 시간
+        self._waiting = 0
+        self._max_waiting = 0
+        self._checkouts = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._last_release: Optional[float] = None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def in_use(self) -> int:
+        return 0 if self._closed else len(self._conns) - self._idle.qsize()
+
+    @property
+    def last_release(self) -> Optional[float]:
+        """마지막으로 커넥션이 반납된 시각(time.monotonic 기준)."""
+        return self._last_release
+
+    async def open(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        for _ in range(self.size):
+            conn = aiosqlite.connect(self.path)
+            # 풀 커넥션은 오래 살아 있으므로, close_pool()을 호출하지 않은 스크립트도
+            # 종료될 수 있도록 워커 스레드를 daemon으로 둔다.
+            conn.daemon = True
+            conn = await conn
+            await _prepare_connection(conn)
+            if self.readonly:
+                await conn.execute("PRAGMA query_only = ON;")
+            self._conns.append(conn)
+            self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._closed:
+            raise RuntimeError("ConnectionPool is closed")
+        started = time.perf_counter()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            conn = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        if conn is _POOL_CLOSED:
+            self._idle.put_nowait(conn)
+            raise RuntimeError("ConnectionPool is closed")
+        wait_ms = (time.perf_counter() - started) * 1000.0
+        self._checkouts += 1
+        self._total_wait_ms += wait_ms
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+        try:
+            yield conn
+        finally:
+            try:
+                # 풀이 닫혔으면 커넥션도 이미 닫혀 있다
+                if not self._closed and conn.in_transaction:
+                    await conn.rollback()
+            except Exception as e:
+                print("ConnectionPool: 반납 시 롤백 실패:", e)
+            finally:
+                # 롤백을 기다리다 태스크가 취소돼도(CancelledError) 커넥션은 반드시 돌려놓는다.
+                # 롤백 자체는 커넥션 워커 스레드에서 다음 작업보다 먼저 끝난다.
+                self._last_release = time.monotonic()
+                if not self._closed:
+                    self._idle.put_nowait(conn)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._conns),
+            "in_use": self.in_use,
+            "waiting": self._waiting,
+            "max_waiting": self._max_waiting,
+            "checkouts": self._checkouts,
+            "avg_wait_ms": self._total_wait_ms / self._checkouts if self._checkouts else 0.0,
+            "max_wait_ms": self._max_wait_ms,
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        self._idle.put_nowait(_POOL_CLOSED)
+        conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                await conn.close()
+            except Exception as e:
+                print("ConnectionPool: 커넥션 종료 실패:", e)
+
+
+# 레인별 전역 풀. write: 대화형 읽기/쓰기, read: 리포트·스케줄러 스캔용 읽기 전용
+_pools: dict[str, ConnectionPool] = {}
+# asyncio.Lock은 처음 사용한 이벤트 루프에 묶이므로 루프별로 만든다
+_pool_locks: dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+# 현재 태스크의 기본 레인(read_lane()으로 전환). asyncio 태스크는 생성 시점의 값을 물려받는다.
+_default_lane: ContextVar[str] = ContextVar("db_default_lane", default=WRITE_LANE)
+
+
+def _pool_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _pool_locks.get(loop)
+    if lock is None:
+        # 닫힌 루프의 락은 더 이상 쓸 일이 없으므로 정리
+        for old in [lp for lp in _pool_locks if lp.is_closed()]:
+            del _pool_locks[old]
+        lock = _pool_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _usable(pool: Optional[ConnectionPool]) -> bool:
+    # 다른 이벤트 루프(예: 스크립트에서 asyncio.run 재호출)에서 만든 풀은 재사용할 수 없다
+    return pool is not None and not pool.closed and pool.loop is asyncio.get_running_loop()
+
+
+async def _get_pool(lane: str, db_path: str | None = None) -> ConnectionPool:
+    pool = _pools.get(lane)
+    if _usable(pool):
+        return pool
+    async with _pool_lock():
+        pool = _pools.get(lane)
+        if _usable(pool):
+            return pool
+        if pool is not None and not pool.closed:
+            # 다른 이벤트 루프에서 만든 풀: 커넥션(과 워커 스레드)이 남지 않도록 닫고 바꾼다
+            await pool.close()
+        if lane == READ_LANE:
+            pool = ConnectionPool(db_path or DB_PATH, DB_READ_POOL_SIZE, readonly=True, name=READ_LANE)
+        else:
+            pool = ConnectionPool(db_path or DB_PATH, DB_POOL_SIZE, name=WRITE_LANE)
+        await pool.open()
+        _pools[lane] = pool
+        return pool
+
+
+async def init_pool(db_path: str | None = None) -> dict[str, ConnectionPool]:
+    """전역 커넥션 풀(쓰기 레인 + 읽기 전용 레인)을 만든다. 이미 있으면 그대로 반환.
+
+    봇 시작 시 init_db() 이후에 호출해 커넥션을 미리 열어둔다.
+    호출하지 않아도 acquire_db() 첫 사용 시 해당 레인이 자동으로 만들어진다.
+    """
+    pools = {lane: await _get_pool(lane, db_path) for lane in (WRITE_LANE, READ_LANE)}
+    async with pools[WRITE_LANE].acquire() as conn:
+        print(f"DB PRAGMA profile={DB_PRAGMA_PROFILE}: {await effective_pragmas(conn)}")
+    return pools
+
+
+async def close_pool() -> None:
+    """전역 커넥션 풀(모든 레인)을 닫는다. 봇 종료 시 호출."""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
+
+
+def pool_stats() -> dict[str, dict]:
+    """레인별 풀 통계(크기, 사용 중, 대기 중인 호출자 수 등)."""
+    return {lane: pool.stats() for lane, pool in _pools.items()}
+
+
+def pool_idle_seconds() -> float:
+    """모든 레인의 커넥션이 반납된 뒤 지난 시간(초). 하나라도 사용 중이면 0.
+
+    한 번도 반납된 적이 없으면(풀이 없거나 막 열린 경우) inf를 반환한다.
+    WAL 체크포인트처럼 한가한 틈에 돌릴 작업이 판단 기준으로 사용한다.
+    """
+    pools = list(_pools.values())
+    if any(pool.in_use for pool in pools):
+        return 0.0
+    releases = [pool.last_release for pool in pools if pool.last_release is not None]
+    if not releases:
+        return float("inf")
+    return max(0.0, time.monotonic() - max(releases))
+
+
+@contextmanager
+def read_lane() -> Iterator[None]:
+    """블록 안(과 그 안에서 만든 태스크)의 acquire_db() 기본 레인을 읽기 전용 레인으로 바꾼다.
+
+    리포트 계산, 스케줄러 스캔처럼 오래 걸리는 읽기를 대화형 체크인과 분리할 때 사용한다.
+    쓰기 함수는 acquire_db(readonly=False)로 쓰기 레인을 명시하므로 영향을 받지 않는다.
+    """
+    token = _default_lane.set(READ_LANE)
+    try:
+        yield
+    finally:
+        _default_lane.reset(token)
+
+
+@asynccontextmanager
+async def acquire_db(readonly: Optional[bool] = None) -> AsyncIterator[aiosqlite.Connection]:
+    """풀에서 커넥션을 빌려온다.
+
+    - readonly=True: 읽기 전용 레인(query_only). WAL 덕분에 쓰기와 병렬로 읽는다.
+    - readonly=False: 쓰기 레인. 쓰기를 하는 함수는 반드시 명시한다.
+    - None(기본): 현재 컨텍스트의 기본 레인(보통 쓰기 레인, read_lane() 안에서는 읽기 레인).
+
+    사용 예:
+      async with acquire_db() as db:
+          cur = await db.execute(...)
+    """
+    if readonly is None:
+        lane = _default_lane.get()
+    else:
+        lane = READ_LANE if readonly else WRITE_LANE
+    pool = await _get_pool(lane)
+    async with pool.acquire() as conn:
+        yield conn
+
+
 if __name__ == '__main__':
     # 간단한 실행: init DB
     asyncio.run(init_db())
@@ -0,0 +1,958 @@
+﻿"""번호 붙은 스키마 마이그레이션.
+
+- 각 단계는 (version, name, fn)이며 version 순서대로 한 번만 적용된다.
+- 적용 기록은 schema_version 테이블에 남는다.
+- 단계 하나는 하나의 트랜잭션으로 실행되므로, 실패하면 그 단계 전체가 롤백된다.
+- 새 스키마 변경은 MIGRATIONS 끝에 새 번호로 추가한다(기존 단계는 수정하지 않는다).
+
+마이그레이션 도입 이전의 DB(schema_version 없음)는 version 0으로 보고 1단계부터
+적용한다. 모든 단계는 이미 반영된 상태에서도 안전하도록 작성되어 있다.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, UTC
+from typing import Awaitable, Callable, List, NamedTuple
+
+import aiosqlite
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    fn: Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+def _split_sql(script: str) -> List[str]:
+    """스크립트를 문장 단위로 나눈다(executescript는 트랜잭션을 강제 커밋하므로 사용하지 않음)."""
+    statements: List[str] = []
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        if not buf and line.strip().startswith("--"):
+            continue
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip()
+            if stmt and stmt != ";":
+                statements.append(stmt)
+            buf = ""
+    if buf.strip():
+        statements.append(buf.strip())
+    return statements
+
+
+async def _execute_script(db: aiosqlite.Connection, script: str) -> None:
+    for stmt in _split_sql(script):
+        await db.execute(stmt)
+
+
+async def _table_columns(db: aiosqlite.Connection, table: str) -> List[str]:
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    cols = [r[1] for r in await cur.fetchall()]  # (cid, name, type, notnull, dflt_value, pk)
+    await cur.close()
+    return cols
+
+
+# v1: 기본 스키마 (CREATE TABLE IF NOT EXISTS — 마이그레이션 도입 이전 DB에도 안전)
+_SCHEMA_SQL = r"""
+CREATE TABLE IF NOT EXISTS user_settings (
+  user_id TEXT PRIMARY KEY,
+  tz TEXT NOT NULL DEFAULT 'Asia/Seoul',
+  reminder_time TEXT NOT NULL DEFAULT '23:00',
+  created_at TEXT NOT NULL
+);
+
+-- (확장) 리포트 시즌(다시 마음먹기)
+CREATE TABLE IF NOT EXISTS report_season (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT NOT NULL,
+  title TEXT NOT NULL DEFAULT '시즌',
+  start_day TEXT NOT NULL,
+  end_day TEXT,
+  created_at TEXT NOT NULL,
+  closed_at TEXT,
+  is_active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_report_season_user_start ON report_season(user_id, start_day);
+
+CREATE TABLE IF NOT EXISTS routine (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT NOT NULL,
+  name TEXT NOT NULL,
+  weekend_mode TEXT NOT NULL CHECK(weekend_mode IN ('weekday','weekend','all')),
+  deadline_time TEXT,
+  notes TEXT,
+  active INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL,
+  order_index INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS routine_checkin (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  routine_id INTEGER NOT NULL,
+  user_id TEXT NOT NULL,
+  local_day TEXT NOT NULL,
+  checked_at TEXT,
+  undone_at TEXT,
+  skipped INTEGER NOT NULL DEFAULT 0,
+  skip_reason TEXT,
+  UNIQUE (routine_id, local_day)
+);
+
+CREATE TABLE IF NOT EXISTS goal (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT NOT NULL,
+  title TEXT NOT NULL,
+  deadline TEXT,
+  description TEXT,
+  active INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS goal_progress (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  goal_id INTEGER NOT NULL,
+  user_id TEXT NOT NULL,
+  delta INTEGER NOT NULL,
+  value_after INTEGER NOT NULL,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS exemption (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT NOT NULL,
+  start_day TEXT NOT NULL,
+  end_day TEXT NOT NULL,
+  reason TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_checkin_user_day ON routine_checkin(user_id, local_day);
+CREATE INDEX IF NOT EXISTS idx_goal_user ON goal(user_id, active);
+"""
+
+
+async def _m002_routine_order_index(db: aiosqlite.Connection) -> None:
+    """기존 DB에 routine.order_index 컬럼이 없으면 추가하고, NULL 값은 user_id별 id 순서로 초기화.
+
+    (예전 scripts/add_routine_order_column.py를 대체)
+    """
+    if "order_index" not in await _table_columns(db, "routine"):
+        await db.execute("ALTER TABLE routine ADD COLUMN order_index INTEGER")
+
+    # NULL 인 값들만 user_id별 id 순서로 채우기
+    cur = await db.execute("SELECT id, user_id FROM routine WHERE order_index IS NULL ORDER BY user_id, id")
+    rows = await cur.fetchall()
+    await cur.close()
+
+    idx_by_user: dict[str, int] = {}
+    for rid, uid in rows:
+        uid = str(uid)
+        idx_by_user[uid] = idx_by_user.get(uid, 0) + 1
+        await db.execute("UPDATE routine SET order_index = ? WHERE id = ?", (idx_by_user[uid], rid))
+
+
+async def fix_season_start_day_to_first_checkin(db: aiosqlite.Connection) -> None:
+    """시즌 도입 초기에 '오늘부터 시작'으로 잘못 만들어진 1개짜리 시즌을 과거 체크인 포함으로 보정.
+
+    안전 조건:
+    - report_season이 존재
+    - 해당 user_id의 시즌 수가 정확히 1개
+    - 그 시즌의 start_day가 오늘(서버 기준 date('now'))
+    - routine_checkin에 더 이른 first_checkin_day(MIN(local_day), done/skipped=0)가 존재
+
+    이때에만 start_day를 first_checkin_day로 수정한다.
+    """
+    # 보고서 시즌 테이블이 아예 없는 DB면 스킵
+    cur = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='report_season'")
+    has = await cur.fetchone()
+    await cur.close()
+    if not has:
+        return
+
+    # user별 조건에 맞는 시즌을 찾아 업데이트
+    cur = await db.execute(
+        """
+        SELECT rs.user_id, rs.id AS season_id,
+               rs.start_day,
+               (
+                 SELECT MIN(local_day)
+                 FROM routine_checkin rc
+                 WHERE rc.user_id = rs.user_id AND rc.checked_at IS NOT NULL AND rc.skipped = 0
+               ) AS first_day,
+               (
+                 SELECT COUNT(1)
+                 FROM report_season r2
+                 WHERE r2.user_id = rs.user_id
+               ) AS season_cnt
+        FROM report_season rs
+        WHERE rs.start_day = date('now')
+        """
+    )
+    rows = await cur.fetchall()
+    await cur.close()
+
+    for r in rows:
+        user_id = r[0]
+        season_id = r[1]
+        first_day = r[3]
+        season_cnt = r[4]
+
+        if season_cnt != 1:
+            continue
+        if not first_day:
+            continue
+        # first_day가 오늘보다 이전일 때만 보정
+        try:
+            if str(first_day) >= str(r[2]):
+                continue
+        except Exception:
+            # 문자열 비교 실패 시에도 안전하게 스킵
+            continue
+
+        await db.execute(
+            "UPDATE report_season SET start_day = ? WHERE id = ? AND user_id = ?",
+            (str(first_day), int(season_id), str(user_id)),
+        )
+
+
+async def _m001_base_schema(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _SCHEMA_SQL)
+
+
+# v3: goal 테이블을 (deadline, description) 형태로 전환.
+# 예전 scripts/recreate_goal_table.py는 테이블을 통째로 DROP했지만,
+# 여기서는 공통 컬럼을 옮겨 담아 기존 목표를 보존한다.
+_GOAL_TABLE_SQL = r"""
+CREATE TABLE goal_v3 (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT NOT NULL,
+  title TEXT NOT NULL,
+  deadline TEXT,
+  description TEXT,
+  active INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL
+);
+INSERT INTO goal_v3(id, user_id, title, deadline, description, active, created_at)
+  SELECT id, user_id, title, deadline, NULL, active, created_at FROM goal;
+DROP TABLE goal;
+ALTER TABLE goal_v3 RENAME TO goal;
+CREATE INDEX IF NOT EXISTS idx_goal_user ON goal(user_id, active);
+"""
+
+
+async def _m003_goal_table(db: aiosqlite.Connection) -> None:
+    if "description" in await _table_columns(db, "goal"):
+        return
+    await _execute_script(db, _GOAL_TABLE_SQL)
+
+
+async def _m004_user_settings_suggest_goals(db: aiosqlite.Connection) -> None:
+    """user_settings_repo가 쓰는 suggest_goals_on_checkin 컬럼 추가."""
+    if "suggest_goals_on_checkin" in await _table_columns(db, "user_settings"):
+        return
+    await db.execute("ALTER TABLE user_settings ADD COLUMN suggest_goals_on_checkin INTEGER NOT NULL DEFAULT 1")
+
+
+# v6: 자주 쓰는 조회 경로용 인덱스
+_HOT_PATH_INDEX_SQL = r"""
+-- 루틴 생성 시 MAX(order_index), 스케줄러의 DISTINCT user_id
+CREATE INDEX IF NOT EXISTS idx_routine_user_order ON routine(user_id, order_index);
+-- 활성 루틴 목록: WHERE user_id = ? AND active = 1 ORDER BY COALESCE(order_index, id), id
+CREATE INDEX IF NOT EXISTS idx_routine_user_active_order
+  ON routine(user_id, COALESCE(order_index, id), id) WHERE active = 1;
+-- 면책 조회: WHERE user_id = ? AND start_day <= ? AND end_day >= ? (커버링)
+CREATE INDEX IF NOT EXISTS idx_exemption_user_range ON exemption(user_id, start_day, end_day);
+-- 목표 진행 기록: WHERE goal_id = ? ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_goal_progress_goal_created ON goal_progress(goal_id, created_at);
+-- 시즌 경계 계산: 완료 체크인의 MIN/MAX(local_day)
+CREATE INDEX IF NOT EXISTS idx_checkin_user_done_day
+  ON routine_checkin(user_id, local_day) WHERE checked_at IS NOT NULL AND skipped = 0;
+"""
+
+
+async def _m006_hot_path_indexes(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _HOT_PATH_INDEX_SQL)
+
+
+async def _m007_user_settings_day_cutoff(db: aiosqlite.Connection) -> None:
+    """사용자별 하루 경계 시각(0~23시, 기본 04시) 컬럼 추가."""
+    if "day_cutoff_hour" in await _table_columns(db, "user_settings"):
+        return
+    await db.execute("ALTER TABLE user_settings ADD COLUMN day_cutoff_hour INTEGER NOT NULL DEFAULT 4")
+
+
+# v8: routine_checkin.local_day의 정수 표현(1970-01-01부터의 일수, domain.day_num)
+# julianday('1970-01-01') = 2440587.5
+_CHECKIN_DAY_NUM_SQL = r"""
+UPDATE routine_checkin SET day_num = CAST(julianday(local_day) - 2440587.5 AS INTEGER) WHERE day_num IS NULL;
+-- 루틴별 기간 조회: WHERE routine_id = ? AND day_num BETWEEN ? AND ?
+CREATE INDEX IF NOT EXISTS idx_checkin_routine_day_num ON routine_checkin(routine_id, day_num);
+-- repo를 거치지 않고 넣거나 고친 행도 day_num을 채운다
+CREATE TRIGGER IF NOT EXISTS trg_checkin_day_num_insert AFTER INSERT ON routine_checkin
+WHEN NEW.day_num IS NULL
+BEGIN
+  UPDATE routine_checkin SET day_num = CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER) WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_checkin_day_num_update AFTER UPDATE OF local_day ON routine_checkin
+BEGIN
+  UPDATE routine_checkin SET day_num = CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER) WHERE id = NEW.id;
+END;
+"""
+
+
+async def _m008_checkin_day_num(db: aiosqlite.Connection) -> None:
+    if "day_num" not in await _table_columns(db, "routine_checkin"):
+        await db.execute("ALTER TABLE routine_checkin ADD COLUMN day_num INTEGER")
+    await _execute_script(db, _CHECKIN_DAY_NUM_SQL)
+
+
+async def _m009_routine_recurrence(db: aiosqlite.Connection) -> None:
+    """반복 규칙(domain.recurrence) 컬럼 추가. NULL이면 weekend_mode를 그대로 쓴다."""
+    if "recurrence" in await _table_columns(db, "routine"):
+        return
+    await db.execute("ALTER TABLE routine ADD COLUMN recurrence TEXT")
+
+
+# v10: 루틴별 연속 완료 상태(domain.streaks)
+# 읽을 때 마지막 반영일(last_day_num) 다음 날부터만 이어서 계산하고, 이미 반영된 날을 바꾸는 쓰기는
+# 아래 트리거가 상태를 되돌린다.
+# - 바뀐 날이 현재 연속 구간(run_start_day_num ~) 안이면 구간 시작 직전 상태로 되돌린다(구간 길이만큼만 다시 계산)
+# - 그보다 이전이면 행을 지워 다음 조회 때 처음부터 다시 만든다
+# - rev는 상태를 건드릴 수 있는 쓰기마다 올라가며, 저장은 읽었을 때의 rev와 같을 때만 한다
+_ROUTINE_STREAK_SQL = r"""
+CREATE TABLE IF NOT EXISTS routine_streak (
+  routine_id INTEGER PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  current_streak INTEGER NOT NULL DEFAULT 0,
+  max_streak INTEGER NOT NULL DEFAULT 0,
+  last_day_num INTEGER NOT NULL,
+  run_start_day_num INTEGER NOT NULL,
+  max_before_run INTEGER NOT NULL DEFAULT 0,
+  rev INTEGER NOT NULL DEFAULT 0,
+  updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_routine_streak_user ON routine_streak(user_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_streak_insert AFTER INSERT ON routine_checkin
+BEGIN
+  DELETE FROM routine_streak
+   WHERE routine_id = NEW.routine_id
+     AND run_start_day_num > COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER));
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id = NEW.routine_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_streak_update AFTER UPDATE OF checked_at, skipped, local_day ON routine_checkin
+BEGIN
+  DELETE FROM routine_streak
+   WHERE routine_id IN (OLD.routine_id, NEW.routine_id)
+     AND run_start_day_num > MIN(CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER), CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER));
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= MIN(CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER), CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= MIN(CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER), CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= MIN(CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER), CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id IN (OLD.routine_id, NEW.routine_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_streak_delete AFTER DELETE ON routine_checkin
+BEGIN
+  DELETE FROM routine_streak
+   WHERE routine_id = OLD.routine_id
+     AND run_start_day_num > CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id = OLD.routine_id;
+END;
+
+-- 면책 기간이 생기거나 없어지면 그 사용자의 모든 루틴이 시작일부터 영향을 받는다
+CREATE TRIGGER IF NOT EXISTS trg_exemption_streak_insert AFTER INSERT ON exemption
+BEGIN
+  DELETE FROM routine_streak
+   WHERE user_id = NEW.user_id AND run_start_day_num > CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exemption_streak_delete AFTER DELETE ON exemption
+BEGIN
+  DELETE FROM routine_streak
+   WHERE user_id = OLD.user_id AND run_start_day_num > CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE user_id = OLD.user_id;
+END;
+
+-- 반복 규칙/시작일(created_at)이 바뀌거나 루틴이 지워지면 처음부터 다시 만든다
+CREATE TRIGGER IF NOT EXISTS trg_routine_streak_update AFTER UPDATE OF weekend_mode, recurrence, created_at, user_id ON routine
+BEGIN
+  DELETE FROM routine_streak WHERE routine_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_streak_delete AFTER DELETE ON routine
+BEGIN
+  DELETE FROM routine_streak WHERE routine_id = OLD.id;
+END;
+
+-- 시간대/하루 경계가 바뀌면 루틴 시작일(업무일)이 달라질 수 있다
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_streak_insert AFTER INSERT ON user_settings
+BEGIN
+  DELETE FROM routine_streak WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_streak_update AFTER UPDATE OF tz, day_cutoff_hour ON user_settings
+WHEN OLD.tz IS NOT NEW.tz OR OLD.day_cutoff_hour IS NOT NEW.day_cutoff_hour
+BEGIN
+  DELETE FROM routine_streak WHERE user_id = NEW.user_id;
+END;
+"""
+
+
+async def _m010_routine_streak(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _ROUTINE_STREAK_SQL)
+
+
+# v11: 끝난 시즌의 리포트 스냅샷(domain.saved_stats)
+# 시즌 마지막 날이 지나면 7d/30d/all 결과를 한 행(JSON)으로 저장해 두고, 그 시즌 리포트는 이 행만 읽는다.
+# 스냅샷에 반영된 날(시즌 마지막 날 이전)을 바꾸는 쓰기는 아래 트리거가 행을 지워 다음 조회 때 다시 만든다.
+_SAVED_STATS_SQL = r"""
+CREATE TABLE IF NOT EXISTS saved_stats (
+  season_id INTEGER PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  start_day TEXT NOT NULL,
+  end_day TEXT NOT NULL,
+  metrics TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_saved_stats_user ON saved_stats(user_id, end_day);
+
+-- 연속 완료 수는 시즌 이전 기록에도 좌우되므로 시즌 마지막 날 이전의 쓰기는 모두 해당
+CREATE TRIGGER IF NOT EXISTS trg_checkin_saved_stats_insert AFTER INSERT ON routine_checkin
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = NEW.user_id AND end_day >= NEW.local_day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_saved_stats_update AFTER UPDATE OF checked_at, skipped, local_day ON routine_checkin
+BEGIN
+  DELETE FROM saved_stats
+   WHERE user_id IN (OLD.user_id, NEW.user_id) AND end_day >= MIN(OLD.local_day, NEW.local_day);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_saved_stats_delete AFTER DELETE ON routine_checkin
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = OLD.user_id AND end_day >= OLD.local_day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exemption_saved_stats_insert AFTER INSERT ON exemption
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = NEW.user_id AND end_day >= NEW.start_day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exemption_saved_stats_delete AFTER DELETE ON exemption
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = OLD.user_id AND end_day >= OLD.start_day;
+END;
+
+-- 스냅샷에는 루틴 이름/구성도 들어 있다
+CREATE TRIGGER IF NOT EXISTS trg_routine_saved_stats_update AFTER UPDATE OF name, weekend_mode, recurrence, created_at, active, user_id ON routine
+BEGIN
+  DELETE FROM saved_stats WHERE user_id IN (OLD.user_id, NEW.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_saved_stats_delete AFTER DELETE ON routine
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_saved_stats_insert AFTER INSERT ON user_settings
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_saved_stats_update AFTER UPDATE OF tz, day_cutoff_hour ON user_settings
+WHEN OLD.tz IS NOT NEW.tz OR OLD.day_cutoff_hour IS NOT NEW.day_cutoff_hour
+BEGIN
+  DELETE FROM saved_stats WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_season_saved_stats_update AFTER UPDATE OF start_day, end_day ON report_season
+BEGIN
+  DELETE FROM saved_stats WHERE season_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_season_saved_stats_delete AFTER DELETE ON report_season
+BEGIN
+  DELETE FROM saved_stats WHERE season_id = OLD.id;
+END;
+"""
+
+
+async def _m011_saved_stats(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _SAVED_STATS_SQL)
+
+
+# v12: 전체 사용자 일별 지표 롤업(domain.rollup)
+# 야간 배치가 기준일(rollup_day)까지의 루틴별 7d/30d/전체 완료·유효일 수와 연속 완료를 한 행씩 쓴다.
+# metrics_rollup_run은 기준일별 진행 상태로, 사용자 청크를 커밋할 때마다 last_user_id를 함께 옮겨
+# 중간에 멈춘 배치를 이어서 돌릴 수 있게 한다.
+_METRICS_ROLLUP_SQL = r"""
+CREATE TABLE IF NOT EXISTS metrics_rollup (
+  rollup_day TEXT NOT NULL,
+  user_id TEXT NOT NULL,
+  routine_id INTEGER NOT NULL,
+  done_7d INTEGER NOT NULL DEFAULT 0,
+  valid_7d INTEGER NOT NULL DEFAULT 0,
+  done_30d INTEGER NOT NULL DEFAULT 0,
+  valid_30d INTEGER NOT NULL DEFAULT 0,
+  done_all INTEGER NOT NULL DEFAULT 0,
+  valid_all INTEGER NOT NULL DEFAULT 0,
+  max_streak INTEGER NOT NULL DEFAULT 0,
+  current_streak INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (rollup_day, user_id, routine_id)
+);
+
+CREATE TABLE IF NOT EXISTS metrics_rollup_run (
+  rollup_day TEXT PRIMARY KEY,
+  last_user_id TEXT NOT NULL DEFAULT '',
+  users_done INTEGER NOT NULL DEFAULT 0,
+  rows_written INTEGER NOT NULL DEFAULT 0,
+  started_at TEXT NOT NULL,
+  finished_at TEXT
+);
+
+-- 배치 스트림: WHERE user_id BETWEEN ? AND ? AND day_num <= ? ORDER BY user_id, routine_id, day_num (정렬 없이 인덱스 순서로)
+CREATE INDEX IF NOT EXISTS idx_checkin_user_routine_day_num ON routine_checkin(user_id, routine_id, day_num);
+"""
+
+
+async def _m012_metrics_rollup(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _METRICS_ROLLUP_SQL)
+
+
+# v13: 루틴별 일별 상태(domain.day_status)
+# 루틴 하나의 한 달을 한 행으로, 하루를 한 바이트로 담는다(0 미확정, 1 해당 없음, 2 면책, 3 미완료, 4 스킵, 5 완료).
+# finalized_through(그 달 안의 마지막 확정일) 이전 바이트는 확정된 값이고, 야간 확정 작업이나 조회가 채운다.
+# - 체크인 쓰기는 아래 트리거가 확정된 해당일 바이트(3/4/5 중 하나)를 바로 고치고 rev를 올린다
+#   (해당 없음/면책인 날은 체크인과 상관없이 그대로)
+# - 유효일 규칙이 바뀌는 쓰기(면책, 루틴 규칙/시작일, 시간대)는 해당 행을 지워 다시 확정하게 한다
+# - 저장은 읽었을 때의 rev와 같을 때만 한다
+_ROUTINE_DAY_STATUS_SQL = r"""
+CREATE TABLE IF NOT EXISTS routine_day_status (
+  routine_id INTEGER NOT NULL,
+  month_start INTEGER NOT NULL,
+  user_id TEXT NOT NULL,
+  status BLOB NOT NULL,
+  finalized_through INTEGER NOT NULL,
+  rev INTEGER NOT NULL DEFAULT 0,
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY (routine_id, month_start)
+);
+CREATE INDEX IF NOT EXISTS idx_routine_day_status_user ON routine_day_status(user_id, month_start);
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_day_status_insert AFTER INSERT ON routine_checkin
+BEGIN
+  UPDATE routine_day_status
+     SET status = CASE WHEN substr(status, strftime('%d', NEW.local_day) + 0, 1) IN (x'03', x'04', x'05')
+                       THEN CAST(substr(status, 1, strftime('%d', NEW.local_day) - 1) || CASE WHEN NEW.skipped THEN x'04' WHEN NEW.checked_at IS NOT NULL THEN x'05' ELSE x'03' END || substr(status, strftime('%d', NEW.local_day) + 1) AS BLOB)
+                       ELSE status END,
+         rev = rev + 1
+   WHERE routine_id = NEW.routine_id
+     AND month_start = CAST(julianday(NEW.local_day, 'start of month') - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_day_status_update AFTER UPDATE OF checked_at, skipped, local_day ON routine_checkin
+BEGIN
+  UPDATE routine_day_status
+     SET status = CASE WHEN substr(status, strftime('%d', OLD.local_day) + 0, 1) IN (x'03', x'04', x'05')
+                       THEN CAST(substr(status, 1, strftime('%d', OLD.local_day) - 1) || x'03' || substr(status, strftime('%d', OLD.local_day) + 1) AS BLOB)
+                       ELSE status END,
+         rev = rev + 1
+   WHERE routine_id = OLD.routine_id
+     AND month_start = CAST(julianday(OLD.local_day, 'start of month') - 2440587.5 AS INTEGER);
+  UPDATE routine_day_status
+     SET status = CASE WHEN substr(status, strftime('%d', NEW.local_day) + 0, 1) IN (x'03', x'04', x'05')
+                       THEN CAST(substr(status, 1, strftime('%d', NEW.local_day) - 1) || CASE WHEN NEW.skipped THEN x'04' WHEN NEW.checked_at IS NOT NULL THEN x'05' ELSE x'03' END || substr(status, strftime('%d', NEW.local_day) + 1) AS BLOB)
+                       ELSE status END,
+         rev = rev + 1
+   WHERE routine_id = NEW.routine_id
+     AND month_start = CAST(julianday(NEW.local_day, 'start of month') - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_checkin_day_status_delete AFTER DELETE ON routine_checkin
+BEGIN
+  UPDATE routine_day_status
+     SET status = CASE WHEN substr(status, strftime('%d', OLD.local_day) + 0, 1) IN (x'03', x'04', x'05')
+                       THEN CAST(substr(status, 1, strftime('%d', OLD.local_day) - 1) || x'03' || substr(status, strftime('%d', OLD.local_day) + 1) AS BLOB)
+                       ELSE status END,
+         rev = rev + 1
+   WHERE routine_id = OLD.routine_id
+     AND month_start = CAST(julianday(OLD.local_day, 'start of month') - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exemption_day_status_insert AFTER INSERT ON exemption
+BEGIN
+  DELETE FROM routine_day_status
+   WHERE user_id = NEW.user_id
+     AND month_start BETWEEN CAST(julianday(NEW.start_day, 'start of month') - 2440587.5 AS INTEGER)
+                         AND CAST(julianday(NEW.end_day) - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exemption_day_status_delete AFTER DELETE ON exemption
+BEGIN
+  DELETE FROM routine_day_status
+   WHERE user_id = OLD.user_id
+     AND month_start BETWEEN CAST(julianday(OLD.start_day, 'start of month') - 2440587.5 AS INTEGER)
+                         AND CAST(julianday(OLD.end_day) - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_day_status_update AFTER UPDATE OF weekend_mode, recurrence, created_at, user_id ON routine
+BEGIN
+  DELETE FROM routine_day_status WHERE routine_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_day_status_delete AFTER DELETE ON routine
+BEGIN
+  DELETE FROM routine_day_status WHERE routine_id = OLD.id;
+END;
+
+-- 시간대/하루 경계가 바뀌면 루틴 시작일(업무일)이 달라질 수 있다
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_day_status_insert AFTER INSERT ON user_settings
+BEGIN
+  DELETE FROM routine_day_status WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_day_status_update AFTER UPDATE OF tz, day_cutoff_hour ON user_settings
+WHEN OLD.tz IS NOT NEW.tz OR OLD.day_cutoff_hour IS NOT NEW.day_cutoff_hour
+BEGIN
+  DELETE FROM routine_day_status WHERE user_id = NEW.user_id;
+END;
+"""
+
+
+async def _m013_routine_day_status(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _ROUTINE_DAY_STATUS_SQL)
+
+
+# v14: 연속 완료 상태의 달 경계 체크포인트(routine_streak_checkpoint)
+# v10 트리거는 현재 연속 구간보다 오래된 수정이면 routine_streak 행을 지워 루틴 시작일부터 다시 접게 했다.
+# 이제는 접으면서 지나간 달 1일마다 '전날까지 반영한 상태'(current_streak, run_start_day_num, max_before_run)를
+# 남겨 두고, 수정된 날 이전의 가장 늦은 체크포인트로 되돌린다(다시 접는 날은 많아야 한 달 + 현재 구간).
+# - 체크포인트가 더 늦으면(구간 시작이 그 달 이전) 구간 시작 대신 체크포인트로 되돌린다
+# - 수정된 날 이후의 체크포인트는 지운다. 수정된 날 이전 체크포인트가 없으면(첫 달) 예전처럼 행을 지운다
+# - 루틴 규칙/시작일, 시간대가 바뀌면 체크포인트도 모두 지운다
+_ROUTINE_STREAK_CHECKPOINT_SQL = r"""
+CREATE TABLE IF NOT EXISTS routine_streak_checkpoint (
+  routine_id INTEGER NOT NULL,
+  month_start INTEGER NOT NULL,
+  user_id TEXT NOT NULL,
+  current_streak INTEGER NOT NULL,
+  run_start_day_num INTEGER NOT NULL,
+  max_before_run INTEGER NOT NULL,
+  PRIMARY KEY (routine_id, month_start)
+);
+CREATE INDEX IF NOT EXISTS idx_routine_streak_checkpoint_user ON routine_streak_checkpoint(user_id, month_start);
+
+DROP TRIGGER IF EXISTS trg_checkin_streak_insert;
+CREATE TRIGGER trg_checkin_streak_insert AFTER INSERT ON routine_checkin
+BEGIN
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = c.current_streak,
+    max_streak = MAX(c.max_before_run, c.current_streak),
+    last_day_num = c.month_start - 1,
+    run_start_day_num = c.run_start_day_num,
+    max_before_run = c.max_before_run
+   FROM routine_streak_checkpoint AS c
+   WHERE routine_streak.routine_id = NEW.routine_id
+     AND c.routine_id = routine_streak.routine_id
+     AND c.month_start = (SELECT MAX(month_start) FROM routine_streak_checkpoint
+                           WHERE routine_id = routine_streak.routine_id AND month_start <= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)))
+     AND routine_streak.last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER))
+     AND (routine_streak.run_start_day_num < c.month_start OR routine_streak.run_start_day_num > COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)));
+  DELETE FROM routine_streak
+   WHERE routine_id = NEW.routine_id AND run_start_day_num > COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER));
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER)) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id = NEW.routine_id;
+  DELETE FROM routine_streak_checkpoint
+   WHERE routine_id = NEW.routine_id AND month_start > COALESCE(NEW.day_num, CAST(julianday(NEW.local_day) - 2440587.5 AS INTEGER));
+END;
+
+DROP TRIGGER IF EXISTS trg_checkin_streak_update;
+CREATE TRIGGER trg_checkin_streak_update AFTER UPDATE OF checked_at, skipped, local_day ON routine_checkin
+BEGIN
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = c.current_streak,
+    max_streak = MAX(c.max_before_run, c.current_streak),
+    last_day_num = c.month_start - 1,
+    run_start_day_num = c.run_start_day_num,
+    max_before_run = c.max_before_run
+   FROM routine_streak_checkpoint AS c
+   WHERE routine_streak.routine_id IN (OLD.routine_id, NEW.routine_id)
+     AND c.routine_id = routine_streak.routine_id
+     AND c.month_start = (SELECT MAX(month_start) FROM routine_streak_checkpoint
+                           WHERE routine_id = routine_streak.routine_id AND month_start <= CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER))
+     AND routine_streak.last_day_num >= CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER)
+     AND (routine_streak.run_start_day_num < c.month_start OR routine_streak.run_start_day_num > CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER));
+  DELETE FROM routine_streak
+   WHERE routine_id IN (OLD.routine_id, NEW.routine_id) AND run_start_day_num > CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id IN (OLD.routine_id, NEW.routine_id);
+  DELETE FROM routine_streak_checkpoint
+   WHERE routine_id IN (OLD.routine_id, NEW.routine_id) AND month_start > CAST(julianday(MIN(OLD.local_day, NEW.local_day)) - 2440587.5 AS INTEGER);
+END;
+
+DROP TRIGGER IF EXISTS trg_checkin_streak_delete;
+CREATE TRIGGER trg_checkin_streak_delete AFTER DELETE ON routine_checkin
+BEGIN
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = c.current_streak,
+    max_streak = MAX(c.max_before_run, c.current_streak),
+    last_day_num = c.month_start - 1,
+    run_start_day_num = c.run_start_day_num,
+    max_before_run = c.max_before_run
+   FROM routine_streak_checkpoint AS c
+   WHERE routine_streak.routine_id = OLD.routine_id
+     AND c.routine_id = routine_streak.routine_id
+     AND c.month_start = (SELECT MAX(month_start) FROM routine_streak_checkpoint
+                           WHERE routine_id = routine_streak.routine_id AND month_start <= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER))
+     AND routine_streak.last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER)
+     AND (routine_streak.run_start_day_num < c.month_start OR routine_streak.run_start_day_num > CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER));
+  DELETE FROM routine_streak
+   WHERE routine_id = OLD.routine_id AND run_start_day_num > CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE routine_id = OLD.routine_id;
+  DELETE FROM routine_streak_checkpoint
+   WHERE routine_id = OLD.routine_id AND month_start > CAST(julianday(OLD.local_day) - 2440587.5 AS INTEGER);
+END;
+
+-- 면책 기간이 생기거나 없어지면 그 사용자의 모든 루틴이 시작일부터 영향을 받는다
+DROP TRIGGER IF EXISTS trg_exemption_streak_insert;
+CREATE TRIGGER trg_exemption_streak_insert AFTER INSERT ON exemption
+BEGIN
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = c.current_streak,
+    max_streak = MAX(c.max_before_run, c.current_streak),
+    last_day_num = c.month_start - 1,
+    run_start_day_num = c.run_start_day_num,
+    max_before_run = c.max_before_run
+   FROM routine_streak_checkpoint AS c
+   WHERE routine_streak.user_id = NEW.user_id
+     AND c.routine_id = routine_streak.routine_id
+     AND c.month_start = (SELECT MAX(month_start) FROM routine_streak_checkpoint
+                           WHERE routine_id = routine_streak.routine_id AND month_start <= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER))
+     AND routine_streak.last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER)
+     AND (routine_streak.run_start_day_num < c.month_start OR routine_streak.run_start_day_num > CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER));
+  DELETE FROM routine_streak
+   WHERE user_id = NEW.user_id AND run_start_day_num > CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE user_id = NEW.user_id;
+  DELETE FROM routine_streak_checkpoint
+   WHERE user_id = NEW.user_id AND month_start > CAST(julianday(NEW.start_day) - 2440587.5 AS INTEGER);
+END;
+
+DROP TRIGGER IF EXISTS trg_exemption_streak_delete;
+CREATE TRIGGER trg_exemption_streak_delete AFTER DELETE ON exemption
+BEGIN
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = c.current_streak,
+    max_streak = MAX(c.max_before_run, c.current_streak),
+    last_day_num = c.month_start - 1,
+    run_start_day_num = c.run_start_day_num,
+    max_before_run = c.max_before_run
+   FROM routine_streak_checkpoint AS c
+   WHERE routine_streak.user_id = OLD.user_id
+     AND c.routine_id = routine_streak.routine_id
+     AND c.month_start = (SELECT MAX(month_start) FROM routine_streak_checkpoint
+                           WHERE routine_id = routine_streak.routine_id AND month_start <= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER))
+     AND routine_streak.last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER)
+     AND (routine_streak.run_start_day_num < c.month_start OR routine_streak.run_start_day_num > CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER));
+  DELETE FROM routine_streak
+   WHERE user_id = OLD.user_id AND run_start_day_num > CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER);
+  UPDATE routine_streak SET
+    rev = rev + 1,
+    current_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN 0 ELSE current_streak END,
+    max_streak = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN max_before_run ELSE max_streak END,
+    last_day_num = CASE WHEN last_day_num >= CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER) THEN run_start_day_num - 1 ELSE last_day_num END
+   WHERE user_id = OLD.user_id;
+  DELETE FROM routine_streak_checkpoint
+   WHERE user_id = OLD.user_id AND month_start > CAST(julianday(OLD.start_day) - 2440587.5 AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_streak_checkpoint_update AFTER UPDATE OF weekend_mode, recurrence, created_at, user_id ON routine
+BEGIN
+  DELETE FROM routine_streak_checkpoint WHERE routine_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_routine_streak_checkpoint_delete AFTER DELETE ON routine
+BEGIN
+  DELETE FROM routine_streak_checkpoint WHERE routine_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_streak_checkpoint_insert AFTER INSERT ON user_settings
+BEGIN
+  DELETE FROM routine_streak_checkpoint WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_streak_checkpoint_update AFTER UPDATE OF tz, day_cutoff_hour ON user_settings
+WHEN OLD.tz IS NOT NEW.tz OR OLD.day_cutoff_hour IS NOT NEW.day_cutoff_hour
+BEGIN
+  DELETE FROM routine_streak_checkpoint WHERE user_id = NEW.user_id;
+END;
+"""
+
+
+async def _m014_routine_streak_checkpoint(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _ROUTINE_STREAK_CHECKPOINT_SQL)
+
+
+# v15: 연속 완료 상태 무효화를 트리거에서 쓰기 경로로 옮긴다
+# v10/v14 트리거의 되돌림 규칙(메모리 백엔드에도 같은 규칙이 따로 있었다)을 지우고, 체크인/면책/루틴/사용자 설정
+# repo가 같은 트랜잭션에서 repos.derived_repo.invalidation_statements()를 실행한다. 상태를 앞으로 옮기는 것은
+# 야간 작업(domain.streaks.advance_streaks)뿐이다.
+_STREAK_TRIGGERS_DROP_SQL = r"""
+DROP TRIGGER IF EXISTS trg_checkin_streak_insert;
+DROP TRIGGER IF EXISTS trg_checkin_streak_update;
+DROP TRIGGER IF EXISTS trg_checkin_streak_delete;
+DROP TRIGGER IF EXISTS trg_exemption_streak_insert;
+DROP TRIGGER IF EXISTS trg_exemption_streak_delete;
+DROP TRIGGER IF EXISTS trg_routine_streak_update;
+DROP TRIGGER IF EXISTS trg_routine_streak_delete;
+DROP TRIGGER IF EXISTS trg_user_settings_streak_insert;
+DROP TRIGGER IF EXISTS trg_user_settings_streak_update;
+DROP TRIGGER IF EXISTS trg_routine_streak_checkpoint_update;
+DROP TRIGGER IF EXISTS trg_routine_streak_checkpoint_delete;
+DROP TRIGGER IF EXISTS trg_user_settings_streak_checkpoint_insert;
+DROP TRIGGER IF EXISTS trg_user_settings_streak_checkpoint_update;
+"""
+
+
+async def _m015_streak_write_path_invalidation(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _STREAK_TRIGGERS_DROP_SQL)
+
+
+# v16: 일별 상태 갱신/무효화도 트리거에서 쓰기 경로로 옮긴다
+# v13 트리거(메모리 백엔드에도 같은 규칙이 따로 있었다)를 지우고, 체크인 repo는 repos.derived_repo.checkin_statements()로
+# 확정된 그날 바이트를 고치며, 면책/루틴/사용자 설정 repo는 invalidation_statements()로 달 행을 지운다.
+# 달 행을 채우는 것은 야간 확정(domain.day_status.finalize_day_status)뿐이다.
+_DAY_STATUS_TRIGGERS_DROP_SQL = r"""
+DROP TRIGGER IF EXISTS trg_checkin_day_status_insert;
+DROP TRIGGER IF EXISTS trg_checkin_day_status_update;
+DROP TRIGGER IF EXISTS trg_checkin_day_status_delete;
+DROP TRIGGER IF EXISTS trg_exemption_day_status_insert;
+DROP TRIGGER IF EXISTS trg_exemption_day_status_delete;
+DROP TRIGGER IF EXISTS trg_routine_day_status_update;
+DROP TRIGGER IF EXISTS trg_routine_day_status_delete;
+DROP TRIGGER IF EXISTS trg_user_settings_day_status_insert;
+DROP TRIGGER IF EXISTS trg_user_settings_day_status_update;
+"""
+
+
+async def _m016_day_status_write_path(db: aiosqlite.Connection) -> None:
+    await _execute_script(db, _DAY_STATUS_TRIGGERS_DROP_SQL)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "base schema", _m001_base_schema),
+    Migration(2, "routine.order_index", _m002_routine_order_index),
+    Migration(3, "goal table (deadline/description)", _m003_goal_table),
+    Migration(4, "user_settings.suggest_goals_on_checkin", _m004_user_settings_suggest_goals),
+    Migration(5, "season start_day -> first checkin", fix_season_start_day_to_first_checkin),
+    Migration(6, "hot path indexes", _m006_hot_path_indexes),
+    Migration(7, "user_settings.day_cutoff_hour", _m007_user_settings_day_cutoff),
+    Migration(8, "routine_checkin.day_num", _m008_checkin_day_num),
+    Migration(9, "routine.recurrence", _m009_routine_recurrence),
+    Migration(10, "routine_streak", _m010_routine_streak),
+    Migration(11, "saved_stats", _m011_saved_stats),
+    Migration(12, "metrics_rollup", _m012_metrics_rollup),
+    Migration(13, "routine_day_status", _m013_routine_day_status),
+    Migration(14, "routine_streak_checkpoint", _m014_routine_streak_checkpoint),
+    Migration(15, "routine_streak write-path invalidation", _m015_streak_write_path_invalidation),
+    Migration(16, "routine_day_status write-path updates", _m016_day_status_write_path),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    """적용된 최신 마이그레이션 번호. schema_version 테이블이 없으면 0."""
+    try:
+        cur = await db.execute("SELECT MAX(version) FROM schema_version")
+    except sqlite3.OperationalError:
+        return 0
+    row = await cur.fetchone()
+    await cur.close()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+async def migrate(db: aiosqlite.Connection) -> List[int]:
+    """대기 중인 마이그레이션을 순서대로 적용하고, 적용한 version 목록을 반환한다.
+
+    db는 isolation_level=None(autocommit)으로 열린 커넥션이어야 한다.
+    """
+    version = await current_version(db)
+    if version >= LATEST_VERSION:
+        return []
+
+    # journal_mode는 트랜잭션 안에서 바꿀 수 없고 DB 파일에 영구 기록되므로 여기서 한 번만 설정
+    await db.execute("PRAGMA journal_mode = WAL;")
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+          version INTEGER PRIMARY KEY,
+          name TEXT NOT NULL,
+          applied_at TEXT NOT NULL
+        )
+        """
+    )
+
+    applied: List[int] = []
+    for m in MIGRATIONS:
+        if m.version <= version:
+            continue
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await m.fn(db)
+            await db.execute(
+                "INSERT INTO schema_version(version, name, applied_at) VALUES(?, ?, ?)",
+                (m.version, m.name, datetime.now(UTC).isoformat()),
+            )
+            await db.execute("COMMIT")
+        except Exception:
+            await db.execute("ROLLBACK")
+            raise
+        applied.append(m.version)
+    return applied
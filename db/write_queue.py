@@ -0,0 +1,303 @@
+"""체크인 쓰기용 그룹 커밋 큐.
+
+여러 호출자가 동시에 보낸 쓰기를 단일 writer 태스크가 몇 ms 동안 모아
+하나의 트랜잭션(한 번의 fsync)으로 커밋한다. 각 호출자의 future는 공유 커밋이
+끝난 뒤에 결과로 채워진다.
+
+- writer 커넥션은 DB_PRAGMA_PROFILE과 상관없이 synchronous=FULL로 연다. WAL + NORMAL이면
+  커밋이 끝나도 체크포인트 전 전원 장애에 유실될 수 있어, 이미 채운 future의 약속이 깨진다.
+
+- 요청 하나는 SAVEPOINT로 감싸 실행하므로, 한 요청의 실패가 같은 배치의
+  다른 요청을 롤백시키지 않는다.
+- followups로 같은 SAVEPOINT에서 이어 실행할 문장(파생 상태 무효화 등)을 붙일 수 있다.
+  하나라도 실패하면 요청 전체가 롤백되고, 결과는 첫 문장의 것이다.
+- stats()로 배치 크기/커밋 지연 통계를 확인할 수 있다.
+
+사용 예:
+  await submit_write("UPDATE routine_checkin SET ... WHERE id = ?", (cid,))
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from db.db import DB_PATH, _prepare_connection
+
+# 첫 요청이 들어온 뒤 추가 요청을 모으는 시간(ms)
+DB_WRITE_FLUSH_MS = float(os.getenv('DB_WRITE_FLUSH_MS', '5'))
+# 한 트랜잭션에 담을 최대 요청 수
+DB_WRITE_MAX_BATCH = max(1, int(os.getenv('DB_WRITE_MAX_BATCH', '256')))
+
+_STOP = object()
+
+
+@dataclass
+class WriteResult:
+    rowcount: int
+    lastrowid: Optional[int]
+    rows: Optional[list] = None
+
+
+@dataclass
+class _WriteRequest:
+    sql: str
+    params: Sequence[Any]
+    fetch: bool
+    future: asyncio.Future
+    followups: Sequence[Tuple[str, Sequence[Any]]] = ()
+
+
+class WriteQueue:
+    """단일 writer 커넥션으로 쓰기 요청을 배치 커밋하는 큐."""
+
+    def __init__(self, path: str, flush_interval_ms: float = DB_WRITE_FLUSH_MS, max_batch: int = DB_WRITE_MAX_BATCH):
+        self.path = path
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._task: asyncio.Task = self._loop.create_task(self._run())
+        self._stopped = False
+
+        # 통계
+        self._batches = 0
+        self._writes = 0
+        self._errors = 0
+        self._last_batch_size = 0
+        self._max_batch_size = 0
+        self._last_commit_ms = 0.0
+        self._total_commit_ms = 0.0
+        self._max_commit_ms = 0.0
+        self._last_commit_at: Optional[float] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def last_commit_at(self) -> Optional[float]:
+        """마지막 커밋 시각(time.monotonic 기준). 커밋이 없었으면 None."""
+        return self._last_commit_at
+
+    async def submit(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        *,
+        fetch: bool = False,
+        followups: Sequence[Tuple[str, Sequence[Any]]] = (),
+    ) -> WriteResult:
+        """쓰기 요청을 큐에 넣고, 공유 커밋이 끝날 때까지 기다린다.
+
+        fetch=True면 RETURNING 등으로 돌아온 행을 WriteResult.rows에 담아준다.
+        followups의 (sql, params)는 같은 SAVEPOINT 안에서 sql 다음에 차례로 실행한다.
+        """
+        if self._stopped:
+            raise RuntimeError("WriteQueue is stopped")
+        fut = self._loop.create_future()
+        self._queue.put_nowait(_WriteRequest(sql, tuple(params), fetch, fut, tuple((q, tuple(p)) for q, p in followups)))
+        return await fut
+
+    async def stop(self) -> None:
+        """남은 요청을 모두 커밋한 뒤 writer 태스크와 커넥션을 정리한다."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put_nowait(_STOP)
+        try:
+            await self._task
+        except Exception as e:
+            print("WriteQueue: 종료 중 오류:", e)
+
+    def stats(self) -> dict:
+        batches = self._batches or 1
+        return {
+            "batches": self._batches,
+            "writes": self._writes,
+            "errors": self._errors,
+            "pending": self.pending,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size": self._max_batch_size,
+            "avg_batch_size": self._writes / batches if self._batches else 0.0,
+            "last_commit_ms": self._last_commit_ms,
+            "avg_commit_ms": self._total_commit_ms / batches if self._batches else 0.0,
+            "max_commit_ms": self._max_commit_ms,
+        }
+
+    async def _open(self) -> aiosqlite.Connection:
+        # isolation_level=None: BEGIN/COMMIT/SAVEPOINT를 직접 제어한다
+        conn = aiosqlite.connect(self.path, isolation_level=None)
+        conn.daemon = True
+        conn = await conn
+        await _prepare_connection(conn)
+        # 프로필이 NORMAL/OFF여도 그룹 커밋은 매번 fsync한다(모듈 설명 참고)
+        await conn.execute("PRAGMA synchronous = FULL;")
+        return conn
+
+    async def _run(self) -> None:
+        conn: Optional[aiosqlite.Connection] = None
+        batch: list = []
+        try:
+            conn = await self._open()
+            stop = False
+            while not stop:
+                first = await self._queue.get()
+                if first is _STOP:
+                    break
+                batch = [first]
+                # 잠깐 기다리며 다른 호출자의 요청을 모은다
+                if self.flush_interval > 0:
+                    await asyncio.sleep(self.flush_interval)
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                await self._commit_batch(conn, batch)
+        except asyncio.CancelledError:
+            # stop_write_queue() 없이 루프가 닫히는 등으로 취소되면, 기다리는 호출자가 멈추지 않도록 실패로 돌려준다
+            print("WriteQueue: writer 태스크 취소됨")
+            self._fail_pending(RuntimeError("WriteQueue writer task was cancelled"), batch)
+            raise
+        except Exception as e:
+            print("WriteQueue: writer 태스크 오류:", e)
+            self._fail_pending(e, batch)
+        finally:
+            if conn is not None:
+                try:
+                    await conn.close()
+                except Exception as e:
+                    print("WriteQueue: 커넥션 종료 실패:", e)
+
+    async def _commit_batch(self, conn: aiosqlite.Connection, batch: list) -> None:
+        started = time.perf_counter()
+        results: list[tuple[_WriteRequest, Any, Optional[BaseException]]] = []
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for req in batch:
+                await conn.execute("SAVEPOINT wq_item")
+                try:
+                    cur = await conn.execute(req.sql, req.params)
+                    rows = [dict(r) for r in await cur.fetchall()] if req.fetch else None
+                    res = WriteResult(rowcount=cur.rowcount, lastrowid=cur.lastrowid, rows=rows)
+                    await cur.close()
+                    for sql, params in req.followups:
+                        await (await conn.execute(sql, params)).close()
+                    await conn.execute("RELEASE wq_item")
+                    results.append((req, res, None))
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO wq_item")
+                    await conn.execute("RELEASE wq_item")
+                    results.append((req, None, e))
+            await conn.execute("COMMIT")
+        except Exception as e:
+            # 트랜잭션 자체가 실패하면 배치 전체를 실패로 돌려준다
+            try:
+                if conn.in_transaction:
+                    await conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            self._errors += len(batch)
+            for req in batch:
+                if not req.future.done():
+                    req.future.set_exception(e)
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self._batches += 1
+        self._writes += len(batch)
+        self._last_batch_size = len(batch)
+        self._max_batch_size = max(self._max_batch_size, len(batch))
+        self._last_commit_ms = elapsed_ms
+        self._total_commit_ms += elapsed_ms
+        self._max_commit_ms = max(self._max_commit_ms, elapsed_ms)
+        self._last_commit_at = time.monotonic()
+
+        # 커밋이 끝난 뒤에야 호출자에게 결과를 알린다
+        for req, res, err in results:
+            if req.future.done():
+                continue
+            if err is not None:
+                self._errors += 1
+                req.future.set_exception(err)
+            else:
+                req.future.set_result(res)
+
+    def _fail_pending(self, exc: BaseException, inflight: Sequence[_WriteRequest] = ()) -> None:
+        """큐를 멈추고, 처리 중이던 배치와 대기 중인 요청을 모두 exc로 실패시킨다."""
+        self._stopped = True
+        for req in inflight:
+            if not req.future.done():
+                req.future.set_exception(exc)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is not _STOP and not item.future.done():
+                item.future.set_exception(exc)
+
+
+_write_queue: Optional[WriteQueue] = None
+
+
+def get_write_queue() -> WriteQueue:
+    """전역 WriteQueue를 반환한다(없거나 다른 이벤트 루프의 것이면 새로 시작)."""
+    global _write_queue
+    wq = _write_queue
+    if wq is None or wq.stopped or wq.loop is not asyncio.get_running_loop():
+        wq = _write_queue = WriteQueue(DB_PATH)
+    return wq
+
+
+async def submit_write(
+    sql: str,
+    params: Sequence[Any] = (),
+    *,
+    fetch: bool = False,
+    followups: Sequence[Tuple[str, Sequence[Any]]] = (),
+) -> WriteResult:
+    """전역 WriteQueue로 쓰기 한 건(followups가 있으면 같은 SAVEPOINT의 이어지는 문장들)을 보내고,
+    공유 커밋이 끝나면 첫 문장의 결과를 반환한다.
+
+    read_lane()의 기본 레인과 상관없이 쓰기 큐 전용 커넥션을 쓴다(읽기 레인 안의 리포트 계산도 상태를 저장할 수 있다).
+    """
+    return await get_write_queue().submit(sql, params, fetch=fetch, followups=followups)
+
+
+def write_queue_stats() -> dict:
+    """현재 WriteQueue의 배치 크기/커밋 지연 통계. 큐가 아직 없으면 빈 dict."""
+    return _write_queue.stats() if _write_queue is not None else {}
+
+
+def write_queue_state() -> tuple[int, Optional[float]]:
+    """(대기 중인 요청 수, 마지막 커밋 시각). 큐가 아직 없으면 (0, None)."""
+    wq = _write_queue
+    if wq is None:
+        return 0, None
+    return wq.pending, wq.last_commit_at
+
+
+async def stop_write_queue() -> None:
+    """전역 WriteQueue를 정리한다. 봇 종료 시 close_pool()보다 먼저 호출."""
+    global _write_queue
+    wq, _write_queue = _write_queue, None
+    if wq is not None and wq.loop is asyncio.get_running_loop():
+        await wq.stop()
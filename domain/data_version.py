@@ -0,0 +1,45 @@
+"""쓰기마다 올라가는 프로세스 내 데이터 버전.
+
+계산 결과를 캐시하는 쪽(domain.window_metrics, domain.report_cache 등)은 계산을 시작하기 전에 버전을 읽어 결과와 함께
+저장하고, 다음에 쓸 때 버전이 같으면 그대로 쓴다. 계산 도중에 쓰기가 들어오면 버전이 달라지므로
+그 결과는 다음 조회 때 버려진다.
+
+- 루틴 버전: 그 루틴의 체크인 쓰기, 루틴 수정/삭제
+- 사용자 버전: 면책 기간 추가/삭제, 사용자 설정(시간대/하루 경계) 변경, 루틴 추가, 시즌 생성/마감
+- repo/메모리 백엔드의 쓰기 함수가 올린다. DB를 직접 고쳤다면 bump_all()을 호출한다.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Tuple
+
+_routine_versions: Dict[int, int] = {}
+_user_versions: Dict[str, int] = {}
+_global_version = 0
+
+
+def bump_routine(routine_id: int) -> None:
+    _routine_versions[routine_id] = _routine_versions.get(routine_id, 0) + 1
+
+
+def bump_user(user_id: str) -> None:
+    key = str(user_id)
+    _user_versions[key] = _user_versions.get(key, 0) + 1
+
+
+def bump_all() -> None:
+    """모든 캐시를 무효화(DB를 repo 밖에서 고쳤을 때)."""
+    global _global_version
+    _global_version += 1
+
+
+def routine_version(routine_id: int) -> int:
+    return _routine_versions.get(routine_id, 0)
+
+
+def user_version(user_id: str) -> int:
+    return _user_versions.get(str(user_id), 0)
+
+
+def data_version(user_id: str, routine_ids: Iterable[int] = ()) -> Tuple[int, ...]:
+    """사용자 데이터와 주어진 루틴들의 버전을 묶은 키(전역 버전 포함)."""
+    return (_global_version, user_version(user_id), *(routine_version(rid) for rid in routine_ids))
@@ -0,0 +1,181 @@
+"""사용자별 시간대/하루 경계(cutoff) 계산.
+
+사용자의 '오늘'은 user_settings.tz 시간대에서 day_cutoff_hour 시각(기본 04:00)을 경계로 정한다.
+매번 시간대 변환을 하지 않도록 사용자마다 현재 업무일과 그 경계(시작/다음 경계의 UTC 타임스탬프)를
+캐시해 두고, 경계 안이면 비교 한 번으로 답한다. 경계를 넘으면 그때 한 번만 다시 계산한다.
+
+- ZoneInfo 객체는 이름별로 캐시(get_zone), 잘못된 시간대 이름은 KST로 처리
+- 최근에 쓴 USER_DAY_CACHE_SIZE명의 시계만 유지(LRU)
+- user_settings_repo.upsert_user_settings가 해당 사용자의 시계를 무효화한다
+
+사용 예:
+  today = await user_local_day(user_id)            # 지금 기준
+  d = await user_local_day(user_id, some_datetime)  # 특정 시각 기준
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from storage import get_storage
+
+DEFAULT_TZ = "Asia/Seoul"
+DEFAULT_DAY_CUTOFF_HOUR = 4
+USER_DAY_CACHE_SIZE = max(1, int(os.getenv('USER_DAY_CACHE_SIZE', '4096')))
+
+
+@lru_cache(maxsize=128)
+def _load_zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def is_valid_tz(name: Optional[str]) -> bool:
+    return bool(name) and _load_zone(name) is not None
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """시간대 이름에 해당하는 ZoneInfo(캐시). 비어 있거나 잘못된 이름이면 KST."""
+    zone = _load_zone(name) if name else None
+    return zone if zone is not None else _load_zone(DEFAULT_TZ)
+
+
+def normalize_cutoff_hour(value) -> int:
+    """0~23 범위의 정수로 정규화. 해석할 수 없으면 기본값(4)."""
+    try:
+        hour = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_DAY_CUTOFF_HOUR
+    return hour if 0 <= hour <= 23 else DEFAULT_DAY_CUTOFF_HOUR
+
+
+def _as_aware(dt: Union[datetime, date], zone: ZoneInfo) -> datetime:
+    # date는 그 날짜의 00:00, naive datetime은 해당 시간대 시각으로 간주
+    if not isinstance(dt, datetime):
+        return datetime(dt.year, dt.month, dt.day, tzinfo=zone)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=zone)
+    return dt.astimezone(zone)
+
+
+def local_day_for(dt: Union[datetime, date], zone: ZoneInfo, cutoff_hour: int = DEFAULT_DAY_CUTOFF_HOUR) -> date:
+    """zone 시간대에서 cutoff_hour 시를 하루 경계로 하는 업무일."""
+    return (_as_aware(dt, zone) - timedelta(hours=cutoff_hour)).date()
+
+
+def day_bounds(d: date, zone: ZoneInfo, cutoff_hour: int = DEFAULT_DAY_CUTOFF_HOUR) -> Tuple[float, float]:
+    """업무일 d의 [시작, 다음 경계) UTC 타임스탬프."""
+    nxt = d + timedelta(days=1)
+    start = datetime(d.year, d.month, d.day, cutoff_hour, tzinfo=zone)
+    end = datetime(nxt.year, nxt.month, nxt.day, cutoff_hour, tzinfo=zone)
+    return start.timestamp(), end.timestamp()
+
+
+class DayClock:
+    """한 사용자의 시간대/경계와, 마지막으로 계산한 업무일 구간."""
+
+    __slots__ = ("zone", "cutoff_hour", "day", "start_ts", "end_ts")
+
+    def __init__(self, tz: Optional[str] = None, cutoff_hour: int = DEFAULT_DAY_CUTOFF_HOUR):
+        self.zone = get_zone(tz)
+        self.cutoff_hour = normalize_cutoff_hour(cutoff_hour)
+        self.day: Optional[date] = None
+        self.start_ts = 0.0
+        self.end_ts = 0.0
+
+    def day_at(self, ts: float) -> date:
+        """UTC 타임스탬프 ts가 속한 업무일. 캐시한 구간 안이면 비교만 한다."""
+        if self.start_ts <= ts < self.end_ts:
+            return self.day
+        d = local_day_for(datetime.fromtimestamp(ts, tz=self.zone), self.zone, self.cutoff_hour)
+        start, end = day_bounds(d, self.zone, self.cutoff_hour)
+        if start <= ts < end:
+            self.day, self.start_ts, self.end_ts = d, start, end
+        return d
+
+    def local_day(self, dt: Union[datetime, date, None] = None) -> date:
+        if dt is None:
+            return self.day_at(time.time())
+        if not isinstance(dt, datetime):
+            # 날짜만 주면 그 날짜 00:00(사용자 시간대) 기준
+            return local_day_for(dt, self.zone, self.cutoff_hour)
+        return self.day_at(_as_aware(dt, self.zone).timestamp())
+
+    def now(self) -> datetime:
+        """사용자 시간대의 현재 시각."""
+        return datetime.now(tz=self.zone)
+
+
+# user_id -> (읽어온 저장소 백엔드, 시계). 백엔드가 바뀌면(use_storage) 다시 읽는다.
+_cache: "OrderedDict[str, Tuple[object, DayClock]]" = OrderedDict()
+# 무효화 세대. 설정을 읽는 도중에 무효화되면 그 결과는 캐시에 넣지 않는다.
+_generation: Dict[str, int] = {}
+_global_generation = 0
+
+
+async def get_day_clock(user_id: str) -> DayClock:
+    """사용자의 시계. 캐시에 없으면 user_settings를 읽어 만든다(설정이 없으면 KST/04시)."""
+    store = get_storage()
+    hit = _cache.get(user_id)
+    if hit is not None and hit[0] is store:
+        _cache.move_to_end(user_id)
+        return hit[1]
+    gen = (_global_generation, _generation.get(user_id, 0))
+    settings = await store.get_user_settings(user_id) or {}
+    clock = DayClock(settings.get("tz"), settings.get("day_cutoff_hour", DEFAULT_DAY_CUTOFF_HOUR))
+    if (_global_generation, _generation.get(user_id, 0)) == gen:
+        _cache[user_id] = (store, clock)
+        _cache.move_to_end(user_id)
+        while len(_cache) > USER_DAY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return clock
+
+
+def prime_day_clocks(user_ids: Iterable[str], settings_rows: Iterable[dict]) -> None:
+    """이미 읽어 둔 user_settings 행들로 시계를 미리 캐시한다(배치에서 사용자마다 설정을 읽지 않도록).
+
+    settings_rows에 없는 사용자는 기본 시계(KST/04시). 캐시에 이미 있는 사용자는 건드리지 않는다.
+    """
+    store = get_storage()
+    by_user = {str(r["user_id"]): r for r in settings_rows}
+    for user_id in user_ids:
+        hit = _cache.get(user_id)
+        if hit is not None and hit[0] is store:
+            continue
+        settings = by_user.get(user_id) or {}
+        _cache[user_id] = (store, DayClock(settings.get("tz"), settings.get("day_cutoff_hour", DEFAULT_DAY_CUTOFF_HOUR)))
+        _cache.move_to_end(user_id)
+    while len(_cache) > USER_DAY_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def user_local_day(user_id: str, dt: Union[datetime, date, None] = None) -> date:
+    """사용자 시간대/경계 기준 업무일. dt가 없으면 현재 시각 기준."""
+    return (await get_day_clock(user_id)).local_day(dt)
+
+
+async def user_now(user_id: str) -> datetime:
+    """사용자 시간대의 현재 시각."""
+    return (await get_day_clock(user_id)).now()
+
+
+def invalidate_user_day(user_id: Optional[str] = None) -> None:
+    """시간대/경계 설정이 바뀐 사용자의 시계를 버린다. user_id가 None이면 전체."""
+    global _global_generation
+    if user_id is None:
+        _cache.clear()
+        _global_generation += 1
+        return
+    _cache.pop(user_id, None)
+    _generation[user_id] = _generation.get(user_id, 0) + 1
+
+
+def day_clock_stats() -> dict:
+    return {"cached_users": len(_cache), "max_size": USER_DAY_CACHE_SIZE, "zones": _load_zone.cache_info().currsize}
@@ -0,0 +1,59 @@
+"""업무일(local_day)의 정수 표현: 1970-01-01부터의 일수.
+
+도메인 계산(기간 순회, 집합 포함 여부, 마스크 인덱싱)은 date 객체나 ISO 문자열 대신 이 정수로 한다.
+변환은 저장소(repo)와 UI 경계에서만 한다.
+
+- routine_checkin 행에는 같은 값이 day_num 컬럼으로 함께 저장된다(마이그레이션 v8)
+- 요일은 weekday_of(n) (월=0 ... 일=6, date.weekday()와 같음)
+- 달 단위 묶음(routine_day_status)의 경계는 month_start_of(n) / next_month_start(n)
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List, Union
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def iso_to_day_num(s: str) -> int:
+    """'YYYY-MM-DD' 문자열 -> 일수."""
+    return date(int(s[0:4]), int(s[5:7]), int(s[8:10])).toordinal() - EPOCH_ORDINAL
+
+
+def to_day_num(d: Union[date, datetime, str]) -> int:
+    """date/datetime(날짜 부분)/ISO 문자열 -> 일수."""
+    if isinstance(d, str):
+        return iso_to_day_num(d)
+    if isinstance(d, datetime):
+        d = d.date()
+    return d.toordinal() - EPOCH_ORDINAL
+
+
+def from_day_num(n: int) -> date:
+    return date.fromordinal(n + EPOCH_ORDINAL)
+
+
+def day_num_to_iso(n: int) -> str:
+    return from_day_num(n).isoformat()
+
+
+def weekday_of(n: int) -> int:
+    # 1970-01-01은 목요일(3)
+    return (n + 3) % 7
+
+
+def to_dates(nums: Iterable[int]) -> List[date]:
+    return [from_day_num(n) for n in nums]
+
+
+def month_start_of(n: int) -> int:
+    """n이 속한 달의 1일(일수)."""
+    return n - from_day_num(n).day + 1
+
+
+def next_month_start(n: int) -> int:
+    """n이 속한 달의 다음 달 1일(일수)."""
+    d = from_day_num(n)
+    return to_day_num(date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1))
@@ -0,0 +1,213 @@
+"""루틴별 일별 상태(routine_day_status)를 유지하며 연속된 구간으로 읽는다.
+
+리포트/연속 완료는 체크인 원본에 날짜마다 유효일 판단(반복 규칙/공휴일/면책/스킵)을 더해 계산했다.
+여기서는 루틴 하나의 한 달을 한 행(하루 한 바이트, domain.report_compute의 STATUS_*)으로 저장해 두고,
+[first, last] 구간은 저장된 바이트를 이어 붙여 읽는다. 확정되지 않은 날만 체크인에서 계산한다.
+
+저장 규칙:
+  - 달 행을 채우는 것은 야간 확정(finalize_day_status, scripts/finalize_day_status.py)뿐이고,
+    조회(get_day_status_many)는 저장하지 않는다. 전날까지 채워 두면 조회는 체크인을 오늘 하루치만 읽는다
+  - 사용자 기준 어제까지만 저장한다(finalized_through). 오늘 이후는 조회 때만 계산하고,
+    해당일인데 아직 완료하지 않았으면 미완료(STATUS_MISSED)로 돌려준다(리포트/연속 완료 계산과 같은 기준)
+  - 체크인 쓰기는 같은 트랜잭션에서 확정된 그날 바이트를 바로 고친다(repos.derived_repo.checkin_statements)
+  - 면책/루틴 규칙·시작일/시간대가 바뀌면 쓰기 경로가 해당 행을 지우고(invalidation_statements), 다음 야간 확정 때 다시 만든다
+    (메모리 백엔드는 같은 규칙의 _checkin_derived/_invalidate_derived)
+  - 저장은 읽었을 때의 rev가 그대로일 때만 한다(계산 중에 들어온 체크인을 덮어쓰지 않음)
+
+사용 예:
+  status = await get_day_status(user_id, routine, routine_start, end)        # [routine_start, end] 바이트
+  many = await get_day_status_many(user_id, [(routine, start, first, last), ...])  # day_num, 체크인 쿼리 한 번
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from domain.day_num import from_day_num, month_start_of, next_month_start, to_day_num
+from domain.report_compute import (
+    STATUS_DONE,
+    STATUS_EXEMPT,
+    STATUS_MISSED,
+    STATUS_NA,
+    STATUS_PENDING,
+    STATUS_SKIPPED,
+    compact_checkins,
+    run_report_task,
+    status_slices,
+)
+from domain.time_utils import day_rule_inputs, routine_rule, user_local_day
+from storage import get_storage
+
+__all__ = [
+    "STATUS_PENDING",
+    "STATUS_NA",
+    "STATUS_EXEMPT",
+    "STATUS_MISSED",
+    "STATUS_SKIPPED",
+    "STATUS_DONE",
+    "get_day_status_many",
+    "get_day_status",
+    "finalize_day_status",
+    "rebuild_day_status",
+]
+
+
+def _months(first: int, last: int) -> List[int]:
+    """[first, last]가 걸친 달의 1일(day_num) 목록."""
+    months: List[int] = []
+    if first > last:
+        return months
+    m = month_start_of(first)
+    while m <= last:
+        months.append(m)
+        m = next_month_start(m)
+    return months
+
+
+def _frontier(rows: Dict[Tuple[int, int], dict], rid: int, start: int, first: int, stop: int) -> int:
+    """first가 속한 달부터 stop까지 저장된 행으로 덮이지 않는 첫날(루틴 시작일보다 앞서지 않음). 다 덮이면 stop + 1."""
+    for m in _months(first, stop):
+        row = rows.get((rid, m))
+        done_through = row["finalized_through"] if row else m - 1
+        if done_through < min(next_month_start(m) - 1, stop):
+            return max(start, done_through + 1)
+    return stop + 1
+
+
+async def get_day_status_many(
+    user_id: str,
+    wanted: Iterable[Tuple[Dict[str, Any], int, int, int]],
+) -> Dict[int, bytearray]:
+    """(루틴, 루틴 시작일, 첫날, 끝날)(day_num) 목록에 대한 [첫날, 끝날] 일별 상태. {routine_id: bytearray}
+
+    - 저장된 달 행은 한 번에 읽는다(구간이 모두 오늘 이후면 읽지 않음)
+    - 확정되지 않은 날의 체크인은 루틴 수와 상관없이 한 번에 읽는다
+    - 아무것도 저장하지 않는다
+    - 첫날은 루틴 시작일보다 앞서지 않아야 한다
+    """
+    return await _day_status_many(user_id, wanted, persist=False)
+
+
+async def _day_status_many(
+    user_id: str,
+    wanted: Iterable[Tuple[Dict[str, Any], int, int, int]],
+    persist: bool,
+) -> Dict[int, bytearray]:
+    """get_day_status_many 본체. persist=True(야간 확정)면 어제까지 새로 확정한 달을 저장한다."""
+    store = get_storage()
+    items = [(routine, start, max(first, start), last) for routine, start, first, last in wanted]
+    items = [item for item in items if item[2] <= item[3]]
+    result: Dict[int, bytearray] = {routine["id"]: bytearray() for routine, *_ in wanted}
+    if not items:
+        return result
+    through = to_day_num(await user_local_day(user_id)) - 1
+
+    persisted = [(routine["id"], first, min(last, through)) for routine, _, first, last in items if first <= through]
+    rows: Dict[Tuple[int, int], dict] = {}
+    if persisted:
+        rows = await store.get_day_status_rows(
+            [rid for rid, _, _ in persisted],
+            month_start_of(min(first for _, first, _ in persisted)),
+            max(stop for _, _, stop in persisted),
+        )
+
+    # 루틴마다 확정되지 않은 첫날(cf)부터 계산한다. 그 앞은 저장된 바이트를 그대로 쓴다
+    # (루틴, 시작일, cf, 첫날, 끝날, 저장할 마지막 날)
+    todo: List[Tuple[Dict[str, Any], int, int, int, int, int]] = []
+    for routine, start, first, last in items:
+        rid = routine["id"]
+        stop = min(last, through)
+        cf = _frontier(rows, rid, start, first, stop) if first <= stop else first
+        status = bytearray()
+        if cf > first:
+            for m in _months(first, cf - 1):
+                status += rows[(rid, m)]["status"][max(first, m) - m:min(cf - 1, next_month_start(m) - 1) - m + 1]
+        result[rid] = status
+        if cf <= last:
+            todo.append((routine, start, cf, first, last, stop))
+    if not todo:
+        return result
+
+    inserted: Set[Tuple[int, int]] = set()
+    if persist:
+        # 저장할 달에 행이 없으면 자리표시 행(rev 0)을 먼저 커밋해 둬야, 계산하는 동안 들어온 체크인이 rev를 올려 저장을 막는다
+        placeholders = [
+            (routine["id"], str(routine.get("user_id") or user_id), m, next_month_start(m) - m)
+            for routine, _, cf, _, _, stop in todo
+            for m in _months(cf, stop)
+            if (routine["id"], m) not in rows
+        ]
+        if placeholders:
+            inserted = await store.insert_day_status_placeholders(placeholders)
+
+    lo = min(cf for _, _, cf, _, _, _ in todo)
+    hi = max(last for _, _, _, _, last, _ in todo)
+    checkins = await store.get_checkins_for_routines([r["id"] for r, *_ in todo], from_day_num(lo), from_day_num(hi))
+    by_routine: Dict[int, List[dict]] = {}
+    for (rid, _), row in checkins.items():
+        by_routine.setdefault(rid, []).append(row)
+    holidays, exemptions = await day_rule_inputs(str(user_id), from_day_num(lo), from_day_num(hi))
+    jobs = [
+        (await routine_rule(routine), start, cf, last, compact_checkins(by_routine.get(routine["id"], ())))
+        for routine, start, cf, _, last, _ in todo
+    ]
+    slices = await run_report_task(status_slices, jobs, holidays, exemptions, work=sum(last - cf + 1 for _, _, cf, _, last, _ in todo))
+
+    saves = []
+    for (routine, start, cf, first, last, stop), computed in zip(todo, slices):
+        rid = routine["id"]
+        result[rid] += computed[max(first, cf) - cf:]
+        if not persist:
+            continue
+        # 어제까지 새로 확정한 달은 저장한다(시작일 전날까지는 해당 없음)
+        for m in _months(cf, stop):
+            row = rows.get((rid, m))
+            month_end = next_month_start(m) - 1
+            done_through = min(month_end, stop)
+            if (row is None and (rid, m) not in inserted) or (row is not None and row["finalized_through"] >= done_through):
+                continue
+            status = bytearray(row["status"] if row else bytes(month_end - m + 1))
+            if start > m:
+                n = min(start, month_end + 1) - m
+                status[:n] = bytes([STATUS_NA]) * n
+            a = max(m, cf)
+            status[a - m:done_through - m + 1] = computed[a - cf:done_through - cf + 1]
+            saves.append(store.save_day_status(rid, m, row["rev"] if row else 0, bytes(status), done_through))
+    if saves:
+        await asyncio.gather(*saves)
+    return result
+
+
+async def get_day_status(user_id: str, routine: Dict[str, Any], start: date, end: date) -> bytearray:
+    """루틴 시작일(start)부터 end까지의 일별 상태(히트맵 등)."""
+    s = to_day_num(start)
+    return (await get_day_status_many(user_id, [(routine, s, s, to_day_num(end))]))[routine["id"]]
+
+
+async def finalize_day_status(user_id: Optional[str] = None) -> int:
+    """야간 확정: 사용자별로 루틴 시작일부터 어제까지를 확정해 저장한다(이미 확정된 달은 읽기만). 처리한 루틴 수를 반환한다."""
+    # domain.stats -> window_metrics -> 이 모듈 순서로 import되므로 여기서 가져온다
+    from domain.stats import _routine_start_date
+
+    store = get_storage()
+    user_ids = [user_id] if user_id is not None else await store.list_routine_user_ids()
+    count = 0
+    for uid in user_ids:
+        routines = await store.list_active_routines_for_user(uid)
+        today_local = await user_local_day(uid)
+        yesterday = to_day_num(today_local) - 1
+        wanted = []
+        for r in routines:
+            start = to_day_num(await _routine_start_date(r, today_local))
+            if start <= yesterday:
+                wanted.append((r, start, start, yesterday))
+        await _day_status_many(uid, wanted, persist=True)
+        count += len(wanted)
+    return count
+
+
+async def rebuild_day_status(user_id: Optional[str] = None) -> int:
+    """저장된 일별 상태를 지우고 체크인 원본에서 다시 확정한다(공휴일 표 재생성 등 복구용). 처리한 루틴 수를 반환한다."""
+    await get_storage().delete_day_status(user_id)
+    return await finalize_day_status(user_id)
@@ -0,0 +1,125 @@
+"""사용자별 면책(exemption) 기간 인덱스.
+
+is_exempt()를 날짜마다 DB에 묻는 대신, 사용자의 면책 기간을 한 번 읽어 겹치거나 맞닿은
+구간을 합친 정렬 목록으로 만들어 두고 bisect로 답한다.
+
+- 처음 필요할 때 사용자 단위로 읽어오고(lazy), 최근에 쓴 EXEMPTION_INDEX_CACHE_SIZE명만 유지(LRU)
+- exemption_repo.create_exemption/delete_exemption이 해당 사용자의 인덱스를 무효화한다
+  (repo를 거치지 않고 exemption 테이블을 직접 고쳤다면 invalidate_exemption_index()를 호출)
+
+사용 예:
+  idx = await get_exemption_index(user_id)
+  idx.contains(d)                 # 하루
+  idx.overlaps(start, end)        # 범위와 겹치는지
+  idx.exempt_days(start, end)     # 범위 안의 면책일 집합
+"""
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from storage import get_storage
+
+EXEMPTION_INDEX_CACHE_SIZE = max(1, int(os.getenv('EXEMPTION_INDEX_CACHE_SIZE', '1024')))
+
+
+class ExemptionIndex:
+    """합쳐진 면책 구간 [start, end](양끝 포함) 목록."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable[Tuple[date, date]] = ()):
+        merged: List[List[date]] = []
+        for start, end in sorted(iv for iv in intervals if iv[0] <= iv[1]):
+            # 겹치거나 바로 이어지는 구간은 하나로 합친다
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts: List[date] = [s for s, _ in merged]
+        self.ends: List[date] = [e for _, e in merged]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "ExemptionIndex":
+        intervals = []
+        for r in rows:
+            try:
+                intervals.append((date.fromisoformat(str(r["start_day"])), date.fromisoformat(str(r["end_day"]))))
+            except (KeyError, ValueError) as e:
+                print(f"ExemptionIndex: 잘못된 면책 기간 무시(id={r.get('id')}):", e)
+        return cls(intervals)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def intervals(self) -> List[Tuple[date, date]]:
+        return list(zip(self.starts, self.ends))
+
+    def contains(self, d: date) -> bool:
+        """d가 면책 기간 안에 있는지."""
+        i = bisect_right(self.starts, d) - 1
+        return i >= 0 and self.ends[i] >= d
+
+    def overlaps(self, start: date, end: date) -> bool:
+        """[start, end] 범위와 겹치는 면책 기간이 있는지."""
+        if start > end:
+            return False
+        i = bisect_right(self.starts, end) - 1
+        return i >= 0 and self.ends[i] >= start
+
+    def exempt_days(self, start: date, end: date) -> Set[date]:
+        """[start, end] 범위 안의 면책일 집합."""
+        days: Set[date] = set()
+        if start > end:
+            return days
+        i = max(0, bisect_right(self.starts, start) - 1)
+        while i < len(self.starts) and self.starts[i] <= end:
+            d = max(self.starts[i], start)
+            last = min(self.ends[i], end)
+            while d <= last:
+                days.add(d)
+                d += timedelta(days=1)
+            i += 1
+        return days
+
+
+# user_id -> (읽어온 저장소 백엔드, 인덱스). 백엔드가 바뀌면(use_storage) 다시 읽는다.
+_cache: "OrderedDict[str, Tuple[object, ExemptionIndex]]" = OrderedDict()
+# 무효화 세대. 읽어오는 도중에 무효화되면 그 결과는 캐시에 넣지 않는다.
+_generation: Dict[str, int] = {}
+_global_generation = 0
+
+
+async def get_exemption_index(user_id: str) -> ExemptionIndex:
+    """사용자의 면책 인덱스. 캐시에 없으면 저장소에서 읽어 만든다."""
+    store = get_storage()
+    hit = _cache.get(user_id)
+    if hit is not None and hit[0] is store:
+        _cache.move_to_end(user_id)
+        return hit[1]
+    gen = (_global_generation, _generation.get(user_id, 0))
+    idx = ExemptionIndex.from_rows(await store.list_exemptions_for_user(user_id))
+    if (_global_generation, _generation.get(user_id, 0)) == gen:
+        _cache[user_id] = (store, idx)
+        _cache.move_to_end(user_id)
+        while len(_cache) > EXEMPTION_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return idx
+
+
+def invalidate_exemption_index(user_id: Optional[str] = None) -> None:
+    """면책 기간이 바뀐 사용자의 인덱스를 버린다. user_id가 None이면 전체."""
+    global _global_generation
+    if user_id is None:
+        _cache.clear()
+        _global_generation += 1
+        return
+    _cache.pop(user_id, None)
+    _generation[user_id] = _generation.get(user_id, 0) + 1
+
+
+def exemption_index_stats() -> dict:
+    return {"cached_users": len(_cache), "max_size": EXEMPTION_INDEX_CACHE_SIZE}
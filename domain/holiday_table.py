@@ -0,0 +1,167 @@
+"""미리 계산해 둔 한국 공휴일 비트맵.
+
+HOLIDAY_TABLE_START_YEAR ~ HOLIDAY_TABLE_END_YEAR 범위의 모든 날짜를 1비트씩(공휴일이면 1)
+담은 표를 DB 파일 옆(kr_holidays.bin)에 저장해 두고, 공휴일 판정은 비트 하나를 읽는 것으로 끝낸다.
+
+- 표가 없거나, 설정한 범위를 덮지 못하거나, 설치된 holidays 패키지 버전이 바뀌었으면
+  처음 쓸 때 다시 만들어 저장한다(scripts/build_holiday_table.py로 미리 만들 수도 있음)
+- holidays 패키지는 표를 만들 때와 표 범위 밖의 연도를 물을 때만 import 한다
+
+파일 형식: 헤더(매직, 시작/끝 연도, holidays 버전) + 시작 연도 1월 1일부터의 일자별 비트(LSB 우선)
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+from db.db import DB_PATH
+
+HOLIDAY_TABLE_PATH = os.getenv('HOLIDAY_TABLE_PATH') or str(Path(DB_PATH).parent / "kr_holidays.bin")
+HOLIDAY_TABLE_START_YEAR = int(os.getenv('HOLIDAY_TABLE_START_YEAR', '2015'))
+HOLIDAY_TABLE_END_YEAR = int(os.getenv('HOLIDAY_TABLE_END_YEAR', str(date.today().year + 5)))
+
+_MAGIC = b"KRHOL1"
+_HEADER = struct.Struct("<6sHH16s")
+
+
+def _holidays_version() -> str:
+    # 패키지를 import 하지 않고 설치 메타데이터에서 버전만 읽는다
+    try:
+        from importlib.metadata import version
+        return version("holidays")
+    except Exception:
+        return "unknown"
+
+
+@lru_cache(maxsize=32)
+def _fallback_year(year: int) -> frozenset:
+    """표 범위 밖 연도의 공휴일 집합(holidays 패키지로 계산)."""
+    import holidays
+    return frozenset(holidays.CountryHoliday("KR", years=year).keys())
+
+
+class HolidayTable:
+    """first_year 1월 1일부터 last_year 12월 31일까지의 공휴일 비트맵."""
+
+    __slots__ = ("first_year", "last_year", "version", "bits", "_base", "_end")
+
+    def __init__(self, first_year: int, last_year: int, version: str, bits: bytes):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.version = version
+        self.bits = bytes(bits)
+        self._base = date(first_year, 1, 1).toordinal()
+        self._end = date(last_year, 12, 31).toordinal()
+
+    @classmethod
+    def build(cls, first_year: int, last_year: int) -> "HolidayTable":
+        import holidays
+        kr = holidays.CountryHoliday("KR", years=range(first_year, last_year + 1))
+        base = date(first_year, 1, 1).toordinal()
+        n = date(last_year, 12, 31).toordinal() - base + 1
+        bits = bytearray((n + 7) // 8)
+        for d in kr.keys():
+            i = d.toordinal() - base
+            if 0 <= i < n:
+                bits[i >> 3] |= 1 << (i & 7)
+        return cls(first_year, last_year, _holidays_version(), bytes(bits))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["HolidayTable"]:
+        try:
+            data = Path(path).read_bytes()
+            magic, first_year, last_year, version = _HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or last_year < first_year:
+            return None
+        table = cls(first_year, last_year, version.rstrip(b"\0").decode("ascii", "replace"), data[_HEADER.size:])
+        if len(table.bits) < (table._end - table._base + 1 + 7) // 8:
+            return None
+        return table
+
+    def save(self, path: str) -> None:
+        header = _HEADER.pack(_MAGIC, self.first_year, self.last_year, self.version.encode("ascii", "replace")[:16])
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(header + self.bits)
+        os.replace(tmp, target)
+
+    def covers(self, first_year: int, last_year: int) -> bool:
+        return self.first_year <= first_year and self.last_year >= last_year
+
+    def contains(self, d: date) -> Optional[bool]:
+        """표 범위 안이면 공휴일 여부, 범위 밖이면 None."""
+        i = d.toordinal() - self._base
+        if i < 0 or d.toordinal() > self._end:
+            return None
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def holidays_between(self, start: date, end: date) -> List[date]:
+        """[start, end] 중 표 범위 안의 공휴일 목록(범위 밖 날짜는 포함하지 않음)."""
+        lo = max(start.toordinal(), self._base) - self._base
+        hi = min(end.toordinal(), self._end) - self._base
+        result: List[date] = []
+        i = lo
+        while i <= hi:
+            byte = self.bits[i >> 3]
+            if byte == 0:
+                # 공휴일이 없는 8일 묶음은 통째로 건너뛴다
+                i = (i | 7) + 1
+                continue
+            if byte >> (i & 7) & 1:
+                result.append(date.fromordinal(self._base + i))
+            i += 1
+        return result
+
+
+_table: Optional[HolidayTable] = None
+_lock = threading.Lock()
+
+
+def load_holiday_table() -> HolidayTable:
+    """공휴일 표를 준비한다. 파일이 맞지 않으면 새로 만들어 저장한다(봇 시작 시 스레드에서 미리 호출)."""
+    global _table
+    if _table is not None:
+        return _table
+    with _lock:
+        if _table is not None:
+            return _table
+        first, last = HOLIDAY_TABLE_START_YEAR, max(HOLIDAY_TABLE_START_YEAR, HOLIDAY_TABLE_END_YEAR)
+        table = HolidayTable.load(HOLIDAY_TABLE_PATH)
+        if table is None or not table.covers(first, last) or table.version != _holidays_version():
+            table = HolidayTable.build(first, last)
+            try:
+                table.save(HOLIDAY_TABLE_PATH)
+                print(f"공휴일 표 생성: {first}~{last}년 -> {HOLIDAY_TABLE_PATH}")
+            except OSError as e:
+                print("공휴일 표 저장 실패(메모리에서만 사용):", e)
+        _table = table
+        return table
+
+
+def is_holiday(d: date) -> bool:
+    """한국 공휴일인지. 표 범위 안이면 비트 하나만 읽는다."""
+    hit = load_holiday_table().contains(d)
+    if hit is not None:
+        return hit
+    return d in _fallback_year(d.year)
+
+
+def holidays_between(start: date, end: date) -> List[date]:
+    """[start, end] 범위의 한국 공휴일 목록(날짜 오름차순)."""
+    if start > end:
+        return []
+    table = load_holiday_table()
+    result = table.holidays_between(start, end)
+    # 표 범위 밖 연도는 holidays 패키지로 보충
+    years = [y for y in range(start.year, end.year + 1) if not table.first_year <= y <= table.last_year]
+    for y in years:
+        result.extend(h for h in _fallback_year(y) if start <= h <= end)
+    return sorted(result) if years else result
@@ -0,0 +1,349 @@
+"""루틴 반복 규칙(recurrence).
+
+routine.recurrence에 RRULE(RFC 5545)의 일부를 문자열로 저장하고, 한 번 파싱/컴파일한 규칙으로
+날짜 범위 전체의 적용 여부 마스크를 한 번에 만든다. recurrence가 비어 있으면 기존 weekend_mode
+(weekday|weekend|all)를 같은 방식의 주간 규칙으로 쓴다.
+
+지원하는 형식(대소문자 무시, 앞의 'RRULE:'은 생략 가능):
+  FREQ=DAILY;INTERVAL=2                  이틀에 한 번(기준일: DTSTART, 없으면 루틴 생성일)
+  FREQ=WEEKLY;BYDAY=MO,WE,FR             월/수/금
+  FREQ=WEEKLY;INTERVAL=2;BYDAY=TU        격주 화요일
+  FREQ=MONTHLY;BYDAY=1MO                 매월 첫째 월요일(-1FR: 마지막 금요일)
+  FREQ=MONTHLY;BYMONTHDAY=1,15,-1        매월 1일/15일/말일
+  DTSTART=YYYY-MM-DD, UNTIL=YYYY-MM-DD   시작/종료일(양끝 포함)
+
+- 일/주 단위 규칙은 주기(period)만큼의 패턴으로 컴파일해 범위 길이만큼 반복해 붙인다
+- 월 단위 규칙은 범위 안의 달마다 해당 날짜만 계산한다
+- 컴파일 결과는 (규칙, 기준일)별로, 루틴별 규칙은 루틴 id별로 캐시한다
+- 루틴의 기준일은 사용자 기준 루틴 시작일이다(domain.time_utils.routine_rule이 구해 넘긴다)
+"""
+from __future__ import annotations
+
+import calendar
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+from domain.day_num import from_day_num, to_day_num, weekday_of
+
+ROUTINE_RULE_CACHE_SIZE = max(1, int(os.getenv('ROUTINE_RULE_CACHE_SIZE', '4096')))
+
+LEGACY_MODES = ("weekday", "weekend", "all")
+_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class RecurrenceError(ValueError):
+    """해석할 수 없거나 지원하지 않는 반복 규칙."""
+
+
+class RuleSpec(NamedTuple):
+    freq: str
+    interval: int
+    byday: Tuple[Tuple[int, int], ...]  # (순번, 요일) — 순번 0은 '매'
+    bymonthday: Tuple[int, ...]
+    dtstart: Optional[int]
+    until: Optional[int]
+
+    @property
+    def needs_anchor(self) -> bool:
+        """DTSTART가 없을 때 기준일(루틴 생성일)이 있어야 계산되는 규칙인지."""
+        if self.dtstart is not None:
+            return False
+        if self.freq == "DAILY":
+            return self.interval > 1
+        if self.freq == "WEEKLY":
+            return self.interval > 1 or not self.byday
+        return self.interval > 1 or (not self.byday and not self.bymonthday)
+
+
+def _parse_day(value: str, key: str) -> int:
+    try:
+        return to_day_num(date.fromisoformat(value))
+    except ValueError:
+        raise RecurrenceError(f"{key} 날짜 형식이 올바르지 않습니다(YYYY-MM-DD): {value}")
+
+
+def _parse_byday(value: str) -> Tuple[Tuple[int, int], ...]:
+    result = []
+    for token in filter(None, (t.strip() for t in value.split(","))):
+        wd = token[-2:]
+        if wd not in _WEEKDAYS:
+            raise RecurrenceError(f"BYDAY 요일을 알 수 없습니다: {token}")
+        ordinal = token[:-2]
+        try:
+            n = int(ordinal) if ordinal else 0
+        except ValueError:
+            raise RecurrenceError(f"BYDAY 순번을 알 수 없습니다: {token}")
+        if not -5 <= n <= 5:
+            raise RecurrenceError(f"BYDAY 순번은 -5~5 사이여야 합니다: {token}")
+        result.append((n, _WEEKDAYS.index(wd)))
+    return tuple(sorted(set(result)))
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(text: str) -> RuleSpec:
+    """규칙 문자열(또는 weekday|weekend|all)을 해석한다. 잘못된 규칙이면 RecurrenceError."""
+    raw = (text or "").strip()
+    legacy = raw.lower()
+    if legacy == "all":
+        return RuleSpec("DAILY", 1, (), (), None, None)
+    if legacy == "weekday":
+        return RuleSpec("WEEKLY", 1, tuple((0, i) for i in range(5)), (), None, None)
+    if legacy == "weekend":
+        return RuleSpec("WEEKLY", 1, ((0, 5), (0, 6)), (), None, None)
+
+    body = raw.upper()
+    if body.startswith("RRULE:"):
+        body = body[len("RRULE:"):]
+    parts: Dict[str, str] = {}
+    for item in filter(None, (p.strip() for p in body.split(";"))):
+        key, sep, value = item.partition("=")
+        if not sep or not value:
+            raise RecurrenceError(f"규칙 항목 형식이 올바르지 않습니다: {item}")
+        parts[key.strip()] = value.strip()
+
+    unknown = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "DTSTART", "UNTIL", "WKST"}
+    if unknown:
+        raise RecurrenceError(f"지원하지 않는 규칙 항목: {', '.join(sorted(unknown))}")
+    freq = parts.get("FREQ")
+    if freq not in ("DAILY", "WEEKLY", "MONTHLY"):
+        raise RecurrenceError("FREQ는 DAILY, WEEKLY, MONTHLY 중 하나여야 합니다")
+    try:
+        interval = int(parts.get("INTERVAL", "1"))
+    except ValueError:
+        raise RecurrenceError(f"INTERVAL은 숫자여야 합니다: {parts['INTERVAL']}")
+    if not 1 <= interval <= 366:
+        raise RecurrenceError("INTERVAL은 1~366 사이여야 합니다")
+
+    byday = _parse_byday(parts["BYDAY"]) if "BYDAY" in parts else ()
+    try:
+        bymonthday = tuple(sorted({int(v) for v in parts["BYMONTHDAY"].split(",") if v.strip()})) if "BYMONTHDAY" in parts else ()
+    except ValueError:
+        raise RecurrenceError(f"BYMONTHDAY는 숫자 목록이어야 합니다: {parts['BYMONTHDAY']}")
+    if any(v == 0 or not -31 <= v <= 31 for v in bymonthday):
+        raise RecurrenceError("BYMONTHDAY는 1~31 또는 -31~-1이어야 합니다")
+    dtstart = _parse_day(parts["DTSTART"], "DTSTART") if "DTSTART" in parts else None
+    until = _parse_day(parts["UNTIL"], "UNTIL") if "UNTIL" in parts else None
+
+    if freq != "MONTHLY":
+        if bymonthday:
+            raise RecurrenceError("BYMONTHDAY는 FREQ=MONTHLY에서만 쓸 수 있습니다")
+        if any(n for n, _ in byday):
+            raise RecurrenceError("순번이 있는 BYDAY(예: 1MO)는 FREQ=MONTHLY에서만 쓸 수 있습니다")
+    if freq == "DAILY" and byday:
+        if interval != 1:
+            raise RecurrenceError("FREQ=DAILY에 BYDAY를 쓰려면 INTERVAL=1이어야 합니다")
+        freq = "WEEKLY"
+    return RuleSpec(freq, interval, byday, bymonthday, dtstart, until)
+
+
+def normalize_rule(text: str) -> str:
+    """저장용 표준 문자열. weekday|weekend|all은 소문자 그대로, 나머지는 RRULE 형식으로."""
+    raw = (text or "").strip()
+    if raw.lower() in LEGACY_MODES:
+        return raw.lower()
+    spec = parse_rule(raw)
+    items = [f"FREQ={spec.freq}"]
+    if spec.interval != 1:
+        items.append(f"INTERVAL={spec.interval}")
+    if spec.byday:
+        items.append("BYDAY=" + ",".join(f"{n or ''}{_WEEKDAYS[wd]}" for n, wd in spec.byday))
+    if spec.bymonthday:
+        items.append("BYMONTHDAY=" + ",".join(str(v) for v in spec.bymonthday))
+    if spec.dtstart is not None:
+        items.append(f"DTSTART={from_day_num(spec.dtstart).isoformat()}")
+    if spec.until is not None:
+        items.append(f"UNTIL={from_day_num(spec.until).isoformat()}")
+    return ";".join(items)
+
+
+class CompiledRule(ABC):
+    """컴파일된 규칙. mask_nums(lo, hi)[i]는 day_num lo + i일에 적용되면 1. 하위 클래스가 _raw_mask를 구현한다."""
+
+    __slots__ = ("text", "first", "until")
+
+    def __init__(self, text: str, first: Optional[int], until: Optional[int]):
+        self.text = text
+        self.first = first
+        self.until = until
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.text!r})"
+
+    @abstractmethod
+    def _raw_mask(self, lo: int, n: int) -> bytearray:
+        """DTSTART/UNTIL을 적용하기 전, day_num lo부터 n일의 마스크."""
+
+    def mask_nums(self, lo: int, hi: int) -> bytearray:
+        n = hi - lo + 1
+        if n <= 0:
+            return bytearray()
+        mask = self._raw_mask(lo, n)
+        # DTSTART 이전, UNTIL 이후는 지운다
+        if self.first is not None and self.first > lo:
+            cut = min(n, self.first - lo)
+            mask[:cut] = bytes(cut)
+        if self.until is not None and self.until < hi:
+            cut = max(0, self.until - lo + 1)
+            mask[cut:] = bytes(n - cut)
+        return mask
+
+    def mask(self, start: Union[date, datetime], end: Union[date, datetime]) -> bytearray:
+        """[start, end] 범위의 적용 마스크(길이 = 날짜 수)."""
+        return self.mask_nums(to_day_num(start), to_day_num(end))
+
+    def occurs_on(self, d: Union[date, datetime, int]) -> bool:
+        n = d if isinstance(d, int) else to_day_num(d)
+        return bool(self.mask_nums(n, n)[0])
+
+
+class PeriodicRule(CompiledRule):
+    """period일마다 반복되는 패턴(일/주 단위 규칙). pattern[i]는 anchor + i일(mod period)."""
+
+    __slots__ = ("period", "anchor", "pattern")
+
+    def __init__(self, text: str, period: int, anchor: int, pattern: bytes, first: Optional[int], until: Optional[int]):
+        super().__init__(text, first, until)
+        self.period = period
+        self.anchor = anchor
+        self.pattern = bytes(pattern)
+
+    def _raw_mask(self, lo: int, n: int) -> bytearray:
+        o = (lo - self.anchor) % self.period
+        rotated = self.pattern[o:] + self.pattern[:o]
+        return bytearray((rotated * (n // self.period + 1))[:n])
+
+
+class MonthlyRule(CompiledRule):
+    """매 interval개월(anchor_month 기준)의 BYMONTHDAY/BYDAY 날짜."""
+
+    __slots__ = ("interval", "anchor_month", "monthdays", "bydays")
+
+    def __init__(self, text: str, interval: int, anchor_month: int, monthdays: Tuple[int, ...], bydays: Tuple[Tuple[int, int], ...], first: Optional[int], until: Optional[int]):
+        super().__init__(text, first, until)
+        self.interval = interval
+        self.anchor_month = anchor_month
+        self.monthdays = monthdays
+        self.bydays = bydays
+
+    def _days_in_month(self, year: int, month: int):
+        length = calendar.monthrange(year, month)[1]
+        base = to_day_num(date(year, month, 1))
+        for md in self.monthdays:
+            day = md if md > 0 else length + 1 + md
+            if 1 <= day <= length:
+                yield base + day - 1
+        first_wd = weekday_of(base)
+        for ordinal, wd in self.bydays:
+            first = 1 + (wd - first_wd) % 7  # 그 달의 첫 wd
+            days = list(range(first, length + 1, 7))
+            if ordinal == 0:
+                yield from (base + day - 1 for day in days)
+            elif abs(ordinal) <= len(days):
+                yield base + days[ordinal - 1 if ordinal > 0 else ordinal] - 1
+
+    def _raw_mask(self, lo: int, n: int) -> bytearray:
+        mask = bytearray(n)
+        start, end = from_day_num(lo), from_day_num(lo + n - 1)
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            if (year * 12 + month - 1 - self.anchor_month) % self.interval == 0:
+                for dn in self._days_in_month(year, month):
+                    if lo <= dn < lo + n:
+                        mask[dn - lo] = 1
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+        return mask
+
+
+@lru_cache(maxsize=1024)
+def _compile(spec: RuleSpec, anchor: Optional[int], text: str) -> CompiledRule:
+    base = spec.dtstart if spec.dtstart is not None else anchor
+    if base is None:
+        # 기준일이 필요 없는 규칙이거나 루틴 생성일을 모를 때는 1970-01-01 기준
+        base = 0
+    if spec.freq == "DAILY":
+        return PeriodicRule(text, spec.interval, base, b"\x01" + bytes(spec.interval - 1), spec.dtstart, spec.until)
+    if spec.freq == "WEEKLY":
+        weekdays = {wd for _, wd in spec.byday} if spec.byday else {weekday_of(base)}
+        week = bytes(1 if i in weekdays else 0 for i in range(7))
+        # 기준 주의 월요일부터 interval주 주기
+        monday = base - weekday_of(base)
+        return PeriodicRule(text, 7 * spec.interval, monday, week + bytes(7 * (spec.interval - 1)), spec.dtstart, spec.until)
+    ref = from_day_num(base)
+    monthdays = spec.bymonthday if (spec.bymonthday or spec.byday) else (ref.day,)
+    return MonthlyRule(text, spec.interval, ref.year * 12 + ref.month - 1, monthdays, spec.byday, spec.dtstart, spec.until)
+
+
+def compile_rule(text: str, anchor: Union[date, datetime, int, None] = None) -> CompiledRule:
+    """규칙을 컴파일한다(캐시). anchor는 DTSTART가 없는 격일/격주/월 단위 규칙의 기준일."""
+    spec = parse_rule(text)
+    if not spec.needs_anchor:
+        anchor = None
+    elif anchor is not None and not isinstance(anchor, int):
+        anchor = to_day_num(anchor)
+    return _compile(spec, anchor, (text or "").strip())
+
+
+def split_schedule(value: Optional[str]) -> Tuple[str, Optional[str]]:
+    """UI 입력 하나를 (weekend_mode, recurrence)로 나눈다.
+
+    weekday|weekend|all이면 weekend_mode만, 그 외에는 규칙을 검증/정규화해 recurrence로
+    (이때 weekend_mode는 'all'). 잘못된 규칙이면 RecurrenceError.
+    """
+    raw = (value or "").strip()
+    if not raw:
+        return "weekday", None
+    if raw.lower() in LEGACY_MODES:
+        return raw.lower(), None
+    return "all", normalize_rule(raw)
+
+
+def schedule_text(routine: Mapping[str, Any]) -> str:
+    """루틴의 반복 규칙을 사람이 읽을 문자열로(recurrence가 있으면 그것, 없으면 weekend_mode)."""
+    return routine.get("recurrence") or routine.get("weekend_mode") or "weekday"
+
+
+# routine_id -> ((recurrence, weekend_mode, 기준일), 컴파일된 규칙 또는 None)
+_routine_rules: "OrderedDict[Any, Tuple[tuple, Optional[CompiledRule]]]" = OrderedDict()
+
+
+def rule_for_routine(routine: Mapping[str, Any], start: Union[date, int, None]) -> Optional[CompiledRule]:
+    """루틴의 컴파일된 규칙(루틴 id별 캐시). 규칙이 잘못되었으면 None(적용일 없음).
+
+    start는 사용자 기준 루틴 시작일(격일/격주/월 단위 규칙의 기준일). 모르면 None.
+    보통은 그 값을 구해 주는 domain.time_utils.routine_rule을 쓴다.
+    """
+    if start is not None and not isinstance(start, int):
+        start = to_day_num(start)
+    key = (routine.get("recurrence"), routine.get("weekend_mode", "weekday"), start)
+    rid = routine.get("id")
+    hit = _routine_rules.get(rid)
+    if hit is not None and hit[0] == key:
+        _routine_rules.move_to_end(rid)
+        return hit[1]
+    try:
+        rule: Optional[CompiledRule] = compile_rule(schedule_text(routine), start)
+    except RecurrenceError as e:
+        print(f"rule_for_routine: 잘못된 반복 규칙 무시(routine={rid}):", e)
+        rule = None
+    if rid is not None:
+        _routine_rules[rid] = (key, rule)
+        _routine_rules.move_to_end(rid)
+        while len(_routine_rules) > ROUTINE_RULE_CACHE_SIZE:
+            _routine_rules.popitem(last=False)
+    return rule
+
+
+def as_rule(schedule: Union[str, CompiledRule, None]) -> Optional[CompiledRule]:
+    """weekend_mode/규칙 문자열이나 컴파일된 규칙을 CompiledRule로. 잘못된 값이면 None."""
+    if isinstance(schedule, CompiledRule):
+        return schedule
+    try:
+        return compile_rule(schedule or "")
+    except RecurrenceError:
+        return None
@@ -0,0 +1,86 @@
+"""리포트 집계 결과 캐시.
+
+/report에서 7일/30일/전체 버튼을 오가거나 같은 리포트를 다시 열 때, 데이터가 그대로면
+aggregate_user_metrics를 다시 돌리지 않고 캐시한 결과를 돌려준다.
+
+- 키: (user_id, season_id, scope, 리포트 기준일)
+- 태그: 계산을 시작하기 전에 읽은 데이터 버전(domain.data_version).
+  사용자 버전(면책/설정/시즌/루틴 추가)과 그 사용자 루틴들의 버전(체크인/루틴 수정)을 묶은 값이라,
+  관련 쓰기가 있으면 태그가 달라져 다음 조회 때 다시 계산한다
+- 최근에 쓴 REPORT_CACHE_SIZE개만 유지(LRU), report_cache_stats()로 적중/실패 수를 본다
+- 돌려주는 dict는 캐시와 공유하므로 호출자가 고치면 안 된다
+
+사용 예:
+  metrics = await get_report_metrics(user_id, routines, "30d", season_id=sid, season_start=s, season_end=e)
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain.data_version import data_version
+from domain.stats import aggregate_user_metrics
+from domain.time_utils import user_local_day
+from storage import get_storage
+
+REPORT_CACHE_SIZE = max(1, int(os.getenv('REPORT_CACHE_SIZE', '1024')))
+
+# (user_id, season_id, scope, 기준일 ISO) -> (저장소 백엔드, 데이터 버전, 결과)
+_cache: "OrderedDict[Tuple[str, Optional[int], str, str], Tuple[object, tuple, Dict[str, Any]]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+async def get_report_metrics(
+    user_id: str,
+    routines: List[Dict[str, Any]],
+    scope: str,
+    *,
+    season_id: Optional[int] = None,
+    season_start: Optional[date] = None,
+    season_end: Optional[date] = None,
+    today_local: Optional[date] = None,
+) -> Dict[str, Any]:
+    """aggregate_user_metrics와 같은 결과. 같은 키/같은 데이터 버전이면 캐시에서 돌려준다."""
+    user_id = str(user_id)
+    if today_local is None:
+        today_local = await user_local_day(user_id)
+    store = get_storage()
+    key = (user_id, season_id, scope, today_local.isoformat())
+    # 계산 전에 읽은 버전으로 저장해야, 도중에 들어온 쓰기가 있으면 다음 조회 때 다시 계산한다
+    rids = tuple(r["id"] for r in routines)
+    version = (*data_version(user_id, rids), rids, season_start, season_end)
+    hit = _cache.get(key)
+    if hit is not None and hit[0] is store and hit[1] == version:
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return hit[2]
+
+    _stats["misses"] += 1
+    metrics = await aggregate_user_metrics(user_id, routines, scope, today_local, season_start=season_start, season_end=season_end)
+    _cache[key] = (store, version, metrics)
+    _cache.move_to_end(key)
+    while len(_cache) > REPORT_CACHE_SIZE:
+        _cache.popitem(last=False)
+        _stats["evictions"] += 1
+    return metrics
+
+
+def invalidate_report_cache(user_id: Optional[str] = None) -> None:
+    """캐시한 리포트를 버린다. user_id가 None이면 전체."""
+    if user_id is None:
+        _cache.clear()
+        return
+    for key in [k for k in _cache if k[0] == str(user_id)]:
+        del _cache[key]
+
+
+def report_cache_stats() -> dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "size": len(_cache),
+        "max_size": REPORT_CACHE_SIZE,
+        **_stats,
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+    }
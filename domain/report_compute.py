@@ -0,0 +1,297 @@
+"""리포트 계산의 순수 CPU 부분과, 그것을 프로세스 풀에서 돌리는 실행기.
+
+기록이 몇 년씩 쌓인 사용자의 누적 배열(domain.window_metrics)이나 연속 완료 상태(domain.streaks)를
+처음부터 만들 때는 날짜 수만큼 도는 계산이 이벤트 루프를 잡아 다른 상호작용의 응답(3초)을 늦춘다.
+조회(체크인/공휴일/면책)는 호출하는 쪽이 async로 미리 해 두고, 여기 함수들은 그 결과(일반 값)만 받아
+계산하므로 다른 프로세스에서 그대로 돌릴 수 있다.
+
+- run_report_task(fn, ..., work=루틴×일수 합): work가 REPORT_POOL_MIN_DAYS 이상이면 프로세스 풀에서,
+  아니면(작은 사용자) 이벤트 루프 안에서 바로 계산한다
+- REPORT_POOL_SIZE=0이면 풀을 쓰지 않는다. 풀은 처음 쓸 때(또는 start_report_pool) spawn으로 만든다
+- 풀이 깨지면(작업 프로세스 종료 등) 그 작업은 이 프로세스에서 계산하고 다음 번에 풀을 다시 만든다
+- 이 모듈은 작업 프로세스에서도 import되므로 저장소/DB 모듈을 import하지 않는다
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from domain.recurrence import CompiledRule
+
+REPORT_POOL_SIZE = max(0, int(os.getenv('REPORT_POOL_SIZE', '2')))
+REPORT_POOL_MIN_DAYS = max(1, int(os.getenv('REPORT_POOL_MIN_DAYS', '20000')))
+
+T = TypeVar("T")
+
+# (day_num, skipped, done) — 체크인 행에서 계산에 필요한 값만 남긴 형태
+CheckinFlags = Tuple[int, int, int]
+
+# 일별 상태 바이트(routine_day_status 한 바이트, repos.derived_repo.checkin_statements와 같은 값)
+STATUS_PENDING = 0   # 아직 확정하지 않음
+STATUS_NA = 1        # 해당 없음(반복 규칙/공휴일/루틴 시작 전)
+STATUS_EXEMPT = 2    # 해당일이지만 면책
+STATUS_MISSED = 3    # 해당일, 미완료
+STATUS_SKIPPED = 4   # 해당일, 스킵
+STATUS_DONE = 5      # 해당일, 완료
+
+# 상태 바이트 -> (유효일 마스크, 완료 표시) 0/1, bytes.translate용
+_STATUS_TO_MASK = bytes(1 if b in (STATUS_MISSED, STATUS_DONE) else 0 for b in range(256))
+_STATUS_TO_HITS = bytes(1 if b == STATUS_DONE else 0 for b in range(256))
+
+
+def compact_checkins(rows: Iterable[Dict[str, Any]]) -> List[CheckinFlags]:
+    """체크인 행(dict)을 작업 프로세스로 넘기기 가벼운 (day_num, skipped, done) 튜플로."""
+    return [(r["day_num"], 1 if r["skipped"] else 0, 1 if r["checked_at"] is not None else 0) for r in rows]
+
+
+def day_mask(
+    rule: Optional[CompiledRule],
+    first: int,
+    last: int,
+    holidays: Sequence[int],
+    exemptions: Sequence[Tuple[int, int]],
+) -> bytearray:
+    """[first, last](day_num) 유효일 마스크: 반복 규칙에서 공휴일과 면책 구간을 지운다.
+
+    holidays/exemptions는 이 범위를 덮는 day_num 목록/구간(더 넓어도 됨). 규칙이 None이면 모두 0.
+    """
+    n = last - first + 1
+    if n <= 0:
+        return bytearray()
+    if rule is None:
+        return bytearray(n)
+    mask = rule.mask_nums(first, last)
+    for h in holidays:
+        if first <= h <= last:
+            mask[h - first] = 0
+    for ex_start, ex_end in exemptions:
+        if ex_end < first or ex_start > last:
+            continue
+        a = max(ex_start, first) - first
+        b = min(ex_end, last) - first + 1
+        mask[a:b] = bytes(b - a)
+    return mask
+
+
+def checkin_flags(rows: Iterable[CheckinFlags], mask: bytearray, first: int) -> bytearray:
+    """완료 표시(hits)를 만들고, 스킵한 날은 mask에서 지운다. 완료는 유효일에 한 것만 센다."""
+    hits = bytearray(len(mask))
+    for day_num, skipped, done in rows:
+        i = day_num - first
+        if not 0 <= i < len(mask):
+            continue
+        if skipped:
+            mask[i] = 0
+        elif done and mask[i]:
+            hits[i] = 1
+    return hits
+
+
+def day_statuses(
+    rule: Optional[CompiledRule],
+    start: int,
+    first: int,
+    last: int,
+    holidays: Sequence[int],
+    exemptions: Sequence[Tuple[int, int]],
+    rows: Iterable[CheckinFlags],
+) -> bytearray:
+    """[first, last](day_num) 일별 상태 바이트. start(루틴 시작일) 전날까지는 해당 없음.
+
+    유효일/스킵/완료 판단은 day_mask + checkin_flags와 같다(스킵이 완료보다 먼저, 해당 없음/면책인 날의 체크인은 무시).
+    """
+    status = day_mask(rule, first, last, holidays, ()).translate(bytes([STATUS_NA, STATUS_MISSED]) + bytes(254))
+    for ex_start, ex_end in exemptions:
+        for i in range(max(ex_start, first) - first, min(ex_end, last) - first + 1):
+            if status[i] == STATUS_MISSED:
+                status[i] = STATUS_EXEMPT
+    if start > first:
+        n = min(start, last + 1) - first
+        status[:n] = bytes([STATUS_NA]) * n
+    for day_num, skipped, done in rows:
+        i = day_num - first
+        if 0 <= i < len(status) and status[i] == STATUS_MISSED:
+            if skipped:
+                status[i] = STATUS_SKIPPED
+            elif done:
+                status[i] = STATUS_DONE
+    return status
+
+
+def status_flags(status: bytes) -> Tuple[bytearray, bytearray]:
+    """상태 바이트 -> (유효일 마스크, 완료 표시). day_mask + checkin_flags가 만드는 값과 같다."""
+    return bytearray(status.translate(_STATUS_TO_MASK)), bytearray(status.translate(_STATUS_TO_HITS))
+
+
+class StreakState(NamedTuple):
+    current: int
+    best: int
+    last_day: int
+    run_start: int
+    best_before_run: int
+    rev: int
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "StreakState":
+        return cls(
+            row["current_streak"],
+            row["max_streak"],
+            row["last_day_num"],
+            row["run_start_day_num"],
+            row["max_before_run"],
+            row["rev"],
+        )
+
+    @classmethod
+    def from_checkpoint(cls, row: Dict[str, Any], rev: int) -> "StreakState":
+        """체크포인트(routine_streak_checkpoint 행): 달 1일 전날까지 반영한 상태."""
+        return cls(
+            row["current_streak"],
+            max(row["max_before_run"], row["current_streak"]),
+            row["month_start"] - 1,
+            row["run_start_day_num"],
+            row["max_before_run"],
+            rev,
+        )
+
+    @classmethod
+    def empty(cls, start: int, rev: int = 0) -> "StreakState":
+        """시작일 전날까지 반영한(아무것도 없는) 상태."""
+        return cls(0, 0, start - 1, start, 0, rev)
+
+
+def advance(state: StreakState, mask: bytearray, hits: bytearray) -> StreakState:
+    """state.last_day 다음 날부터 len(mask)일을 반영한 상태를 반환한다.
+
+    mask[i]: 그날이 중립이 아니면(유효일이고 스킵하지 않았으면) 1, hits[i]: 완료했으면 1.
+    """
+    current, best_before, run_start = state.current, state.best_before_run, state.run_start
+    first = state.last_day + 1
+    for i, valid in enumerate(mask):
+        if not valid:
+            continue
+        if hits[i]:
+            current += 1
+        else:
+            # 미완료: 지금까지의 구간을 닫고 다음 날부터 새 구간
+            best_before = max(best_before, current)
+            current = 0
+            run_start = first + i + 1
+    return StreakState(current, max(best_before, current), state.last_day + len(mask), run_start, best_before, state.rev)
+
+
+# ------------------------------------------------------------------ 작업 단위(프로세스 풀로 보낼 수 있는 함수)
+def rollup_counts(
+    jobs: Sequence[Tuple[Optional[CompiledRule], int, int, Sequence[CheckinFlags], Sequence[Tuple[int, int]]]],
+    holidays: Sequence[int],
+) -> List[Tuple[int, ...]]:
+    """(규칙, 첫날, 기준일, 체크인, 그 사용자의 면책 구간) 작업마다 기준일까지의
+    (7일 완료, 7일 유효, 30일 완료, 30일 유효, 전체 완료, 전체 유효, 최대 연속, 현재 연속).
+
+    여러 사용자를 한꺼번에 계산하므로 면책 구간은 작업마다 받는다. 기간은 기준일에서 끝나고 첫날보다 앞서지 않는다.
+    """
+    result = []
+    for rule, first, last, rows, exemptions in jobs:
+        mask = day_mask(rule, first, last, holidays, exemptions)
+        hits = checkin_flags(rows, mask, first)
+        counts: List[int] = []
+        for days in (7, 30):
+            i = max(0, len(mask) - days)
+            counts += (sum(hits[i:]), sum(mask[i:]))
+        state = advance(StreakState.empty(first), mask, hits)
+        result.append((*counts, sum(hits), sum(mask), state.best, state.current))
+    return result
+
+
+def status_slices(
+    jobs: Sequence[Tuple[Optional[CompiledRule], int, int, int, Sequence[CheckinFlags]]],
+    holidays: Sequence[int],
+    exemptions: Sequence[Tuple[int, int]],
+) -> List[bytearray]:
+    """(규칙, 루틴 시작일, 첫날, 끝날, 체크인) 작업마다 [첫날, 끝날] 일별 상태 바이트."""
+    return [day_statuses(rule, start, first, last, holidays, exemptions, rows) for rule, start, first, last, rows in jobs]
+
+
+def fold_status_streaks(
+    jobs: Sequence[Tuple[StreakState, bytes, Sequence[int]]],
+) -> List[Tuple[StreakState, StreakState, List[StreakState]]]:
+    """(상태, 마지막 반영일 다음 날부터 오늘까지의 일별 상태, 체크포인트를 남길 달 1일들) 작업마다
+    (어제까지 반영한 상태, 오늘까지 더한 상태, 달 1일마다 그 전날까지 반영한 상태 목록).
+
+    달 1일은 오름차순이고 (마지막 반영일 + 1, 오늘] 안에 있어야 한다.
+    유효하지 않은 날과 스킵한 날은 중립, 유효한 날 미완료는 연속 종료(stats.calc_streak과 같은 규칙).
+    """
+    result = []
+    for state, status, marks in jobs:
+        mask, hits = status_flags(status)
+        first = state.last_day + 1
+        done = state
+        checkpoints = []
+        for m in marks:
+            a = done.last_day + 1 - first
+            done = advance(done, mask[a:m - first], hits[a:m - first])
+            checkpoints.append(done)
+        a = done.last_day + 1 - first
+        done = advance(done, mask[a:-1], hits[a:-1])
+        result.append((done, advance(done, mask[-1:], hits[-1:]), checkpoints))
+    return result
+
+
+# ------------------------------------------------------------------ 실행기
+_pool: Optional[ProcessPoolExecutor] = None
+_stats = {"inline": 0, "offloaded": 0, "fallbacks": 0}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # fork는 스레드(aiosqlite/쓰기 큐)가 도는 프로세스에서 안전하지 않으므로 spawn
+        _pool = ProcessPoolExecutor(max_workers=REPORT_POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _noop() -> None:
+    return None
+
+
+async def start_report_pool() -> Optional[ProcessPoolExecutor]:
+    """풀을 만들고 작업 프로세스를 미리 띄운다(첫 리포트가 프로세스 시작을 기다리지 않도록). 쓰지 않으면 None."""
+    if REPORT_POOL_SIZE <= 0:
+        return None
+    pool = _get_pool()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(REPORT_POOL_SIZE)))
+    return pool
+
+
+def shutdown_report_pool() -> None:
+    """풀을 닫는다(봇 종료/테스트 정리). 다음에 쓰면 다시 만든다."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_report_task(fn: Callable[..., T], *args: Any, work: int) -> T:
+    """fn(*args)를 계산한다. work(루틴×일수 합)가 크면 프로세스 풀에서, 작으면 바로."""
+    global _pool
+    if REPORT_POOL_SIZE <= 0 or work < REPORT_POOL_MIN_DAYS:
+        _stats["inline"] += 1
+        return fn(*args)
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+    except BrokenProcessPool as e:
+        print("리포트 계산 프로세스 풀 오류, 이 프로세스에서 계산:", e)
+        _pool = None
+        _stats["fallbacks"] += 1
+        return fn(*args)
+    _stats["offloaded"] += 1
+    return result
+
+
+def report_compute_stats() -> dict:
+    return {"pool_size": REPORT_POOL_SIZE, "min_days": REPORT_POOL_MIN_DAYS, "pool_started": _pool is not None, **_stats}
@@ -0,0 +1,147 @@
+"""전체 사용자 일별 지표 롤업(야간 배치, metrics_rollup).
+
+aggregate_user_metrics를 사용자마다 부르면 그 조회들이 사용자 수만큼 곱해진다. 여기서는 활성 루틴을 가진
+사용자를 user_id 순서로 ROLLUP_CHUNK_USERS명씩 나눠, 청크마다
+  - 루틴/면책/사용자 설정을 각각 한 번에 읽고
+  - routine_checkin을 (user_id, routine_id, day_num) 순서로 한 번 흘려 읽으며(청크 밖 행은 메모리에 두지 않음)
+  - 루틴별 7d/30d/전체 완료·유효일 수와 연속 완료를 계산하고(domain.report_compute, 날짜 수가 많으면 프로세스 풀)
+  - metrics_rollup에 쓰면서 진행 위치(metrics_rollup_run.last_user_id)를 같은 트랜잭션에서 옮긴다
+중간에 멈추면 다음 실행이 마지막으로 커밋한 청크 다음 사용자부터 이어서 한다.
+
+기준은 끝난 시즌 스냅샷(domain.saved_stats)과 같다.
+- 기간은 기준일(rollup_day, 기본은 모든 사용자에게 끝난 마지막 날)에서 끝나는 7일/30일/루틴 시작일부터 전체
+- 연속 완료는 기준일까지의 최대와 기준일에 진행 중이던 연속(calc_streak(until=기준일)과 같은 값)
+- 기준일 이후에 만든 루틴은 넣지 않는다
+- 이미 끝난 기준일은 다시 돌리지 않는다(restart=True면 그 기준일 행을 지우고 처음부터)
+
+사용 예:
+  run = await run_rollup()                                   # 모두에게 끝난 마지막 날 기준, 끝났으면 상태만 반환
+  run = await run_rollup(date(2025, 1, 31), restart=True)
+  metrics = await get_user_rollup(user_id, rollup_day, "7d")  # aggregate_user_metrics와 같은 모양
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from domain.day_clock import DEFAULT_DAY_CUTOFF_HOUR, DayClock, prime_day_clocks
+from domain.day_num import from_day_num, to_day_num
+from domain.exemption_index import ExemptionIndex
+from domain.holiday_table import holidays_between
+from domain.report_compute import rollup_counts, run_report_task
+from domain.stats import _routine_start_date
+from domain.time_utils import routine_rule
+from storage import StorageBackend, get_storage
+
+ROLLUP_CHUNK_USERS = max(1, int(os.getenv('ROLLUP_CHUNK_USERS', '200')))
+
+
+async def default_rollup_day() -> date:
+    """기본 기준일: 모든 사용자에게 끝난 마지막 날.
+
+    업무일은 사용자마다(시간대/하루 경계) 다르므로 KST 어제를 쓰면 KST보다 서쪽 사용자의 아직 끝나지 않은
+    오늘이 미완료로 굳는다. 설정 조합(+ 설정 없는 사용자의 기본 KST/04시)마다 지금의 업무일을 구해
+    가장 이른 날의 전날을 쓴다. 조회는 사용자 수와 상관없이 한 번.
+    """
+    clocks = [DayClock()] + [
+        DayClock(row["tz"], DEFAULT_DAY_CUTOFF_HOUR if row["day_cutoff_hour"] is None else row["day_cutoff_hour"])
+        for row in await get_storage().list_day_clock_settings()
+    ]
+    return min(clock.local_day() for clock in clocks) - timedelta(days=1)
+
+
+async def _rollup_chunk(store: StorageBackend, user_ids: Sequence[str], rollup_day: date) -> List[Tuple]:
+    """user_ids(오름차순) 사용자들의 롤업 행. 조회는 사용자 수와 상관없이 네 번(입력 세 번 + 체크인 스트림)."""
+    inputs = await store.get_rollup_inputs(user_ids)
+    # 루틴 시작일(업무일) 계산이 사용자마다 설정을 읽지 않도록 시계를 미리 채운다
+    prime_day_clocks(user_ids, inputs["settings"])
+    end = to_day_num(rollup_day)
+
+    exemption_rows: Dict[str, List[dict]] = {}
+    for row in inputs["exemptions"]:
+        exemption_rows.setdefault(str(row["user_id"]), []).append(row)
+    exemptions = {
+        uid: [(to_day_num(a), to_day_num(b)) for a, b in ExemptionIndex.from_rows(rows).intervals()]
+        for uid, rows in exemption_rows.items()
+    }
+
+    routines: List[Tuple[Dict[str, Any], int]] = []
+    for r in inputs["routines"]:
+        start = to_day_num(await _routine_start_date(r, rollup_day + timedelta(days=1)))
+        if start <= end:
+            routines.append((r, start))
+    if not routines:
+        return []
+
+    wanted = {r["id"] for r, _ in routines}
+    checkins: Dict[int, List[Tuple[int, int, int]]] = {}
+    async for _, rid, day_num, skipped, done in store.iter_checkins_for_users(user_ids[0], user_ids[-1], end):
+        if rid in wanted:
+            checkins.setdefault(rid, []).append((day_num, skipped, done))
+
+    lo = min(start for _, start in routines)
+    holidays = [to_day_num(h) for h in holidays_between(from_day_num(lo), rollup_day)]
+    jobs = [
+        (await routine_rule(r), start, end, checkins.get(r["id"], ()), exemptions.get(str(r["user_id"]), ()))
+        for r, start in routines
+    ]
+    counts = await run_report_task(rollup_counts, jobs, holidays, work=sum(end - start + 1 for _, start in routines))
+    return [(str(r["user_id"]), r["id"], *c) for (r, _), c in zip(routines, counts)]
+
+
+async def run_rollup(
+    rollup_day: Optional[date] = None,
+    *,
+    restart: bool = False,
+    max_chunks: Optional[int] = None,
+) -> Dict[str, Any]:
+    """기준일 롤업을 돌린다(이어서). max_chunks개 청크만 하고 멈출 수 있다. 진행 상태 행을 반환한다."""
+    store = get_storage()
+    if rollup_day is None:
+        rollup_day = await default_rollup_day()
+    key = rollup_day.isoformat()
+    run = await store.start_rollup_run(key, restart=restart)
+    chunks = 0
+    while run["finished_at"] is None:
+        if max_chunks is not None and chunks >= max_chunks:
+            break
+        user_ids = await store.list_rollup_user_ids(run["last_user_id"], ROLLUP_CHUNK_USERS)
+        if user_ids:
+            rows = await _rollup_chunk(store, user_ids, rollup_day)
+            await store.save_rollup_chunk(key, rows, user_ids[-1], len(user_ids))
+            chunks += 1
+        else:
+            await store.finish_rollup_run(key)
+        run = await store.get_rollup_run(key)
+    return run
+
+
+async def get_user_rollup(user_id: str, rollup_day: date, scope: Optional[str] = "7d") -> Optional[Dict[str, Any]]:
+    """롤업 행으로 만든 aggregate_user_metrics와 같은 모양의 결과. 그 기준일 행이 없으면 None."""
+    rows = await get_storage().list_metrics_rollup(rollup_day.isoformat(), str(user_id))
+    if not rows:
+        return None
+    suffix = scope if scope in ("7d", "30d") else "all"
+    results = []
+    for row in rows:
+        done, valid = row[f"done_{suffix}"], row[f"valid_{suffix}"]
+        results.append(
+            {
+                "id": row["routine_id"],
+                "name": row.get("name"),
+                "rate": (done / valid) if valid > 0 else 0.0,
+                "done": done,
+                "valid": valid,
+                "max_streak": row["max_streak"],
+                "current_streak": row["current_streak"],
+            }
+        )
+    return {
+        "by_routine": results,
+        "summary": {
+            "avg_rate": sum(r["rate"] for r in results) / len(results),
+            "total_done": sum(r["done"] for r in results),
+            "total_valid": sum(r["valid"] for r in results),
+        },
+    }
@@ -0,0 +1,133 @@
+"""끝난 시즌의 리포트 스냅샷(saved_stats).
+
+시즌의 마지막 날(end_day)이 사용자 기준 오늘보다 이전이면 그 시즌 리포트는 더 바뀌지 않는다.
+7d/30d/all 세 가지 결과를 한 번 계산해 saved_stats 한 행(JSON)으로 저장해 두고, 다시 볼 때는
+그 행만 읽는다(루틴/체크인/면책 조회 없음).
+
+- 기간은 진행 중 시즌과 같게 시즌 마지막 날로 끝나는 7일/30일/시즌 전체
+- 연속 완료(max_streak/current_streak)는 시즌 마지막 날 기준(그날까지의 최대, 그날 진행 중이던 연속)
+- 시즌 마지막 날 이후에 만든 루틴은 넣지 않는다
+- 시즌 마지막 날 이전 체크인 보충 입력, 면책 추가/삭제, 루틴 수정/삭제, 시간대 변경, 시즌 기간 변경이
+  있으면 DB 트리거(마이그레이션 v11, 메모리 백엔드는 _drop_saved_stats)가 행을 지우고,
+  다음 조회 때 다시 만든다
+- 계산하는 동안 그 사용자 데이터에 쓰기가 들어왔으면(domain.data_version) 저장하지 않는다
+
+사용 예:
+  metrics = await get_closed_season_metrics(user_id, season, "30d")  # 끝나지 않은 시즌이면 None
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from domain.data_version import data_version
+from domain.stats import _routine_start_date, aggregate_user_metrics, calc_streak
+from domain.time_utils import user_local_day
+from storage import get_storage
+
+SCOPES = ("7d", "30d", "all")
+
+
+def _parse_day(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except ValueError:
+        return date.fromisoformat(str(value))
+
+
+def season_closed(season: Dict[str, Any], today_local: date) -> bool:
+    """시즌이 끝나서(마지막 날이 오늘보다 이전) 결과가 더 바뀌지 않는지."""
+    end = _parse_day(season.get("end_day"))
+    return end is not None and end < today_local
+
+
+async def build_season_snapshot(user_id: str, season: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """끝난 시즌의 {scope: aggregate_user_metrics 결과}를 계산해 저장하고 반환한다."""
+    user_id = str(user_id)
+    store = get_storage()
+    start = _parse_day(season["start_day"])
+    end = _parse_day(season["end_day"])
+
+    routines = [r for r in await store.list_active_routines_for_user(user_id) if await _routine_start_date(r, end) <= end]
+    # 계산 전에 읽은 버전과 저장 직전 버전이 다르면 계산 도중 쓰기가 있었던 것
+    version = data_version(user_id, [r["id"] for r in routines])
+
+    # 시즌 마지막 날 다음 날을 기준일로 두면 세 기간 모두 마지막 날에서 끝난다
+    snapshot = {
+        scope: await aggregate_user_metrics(user_id, routines, scope, end + timedelta(days=1), season_start=start, season_end=end)
+        for scope in SCOPES
+    }
+    streaks = {r["id"]: await calc_streak(user_id, r, until=end) for r in routines}
+    for metrics in snapshot.values():
+        for row in metrics["by_routine"]:
+            row["max_streak"], row["current_streak"] = streaks[row["id"]]
+
+    if data_version(user_id, [r["id"] for r in routines]) == version:
+        await store.save_saved_stats(int(season["id"]), user_id, start.isoformat(), end.isoformat(), json.dumps(snapshot, ensure_ascii=False))
+    return snapshot
+
+
+async def get_season_snapshot(user_id: str, season: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """끝난 시즌의 스냅샷. 저장된 행이 있으면 그것만 읽고, 없으면(처음/무효화됨) 만든다."""
+    row = await get_storage().get_saved_stats(int(season["id"]))
+    if row is not None and row["end_day"] == _parse_day(season["end_day"]).isoformat():
+        return json.loads(row["metrics"])
+    return await build_season_snapshot(user_id, season)
+
+
+async def get_closed_season_metrics(
+    user_id: str,
+    season: Dict[str, Any],
+    scope: str,
+    today_local: Optional[date] = None,
+) -> Optional[Dict[str, Any]]:
+    """끝난 시즌이면 스냅샷에서 scope 결과를, 아직 진행 중이면 None을 반환한다."""
+    if today_local is None:
+        today_local = await user_local_day(str(user_id))
+    if not season_closed(season, today_local):
+        return None
+    snapshot = await get_season_snapshot(user_id, season)
+    return snapshot.get(scope) or snapshot["7d"]
+
+
+async def snapshot_closed_seasons(user_id: str) -> int:
+    """사용자의 끝난 시즌 중 스냅샷이 없는 시즌을 만든다. 새로 만든 수를 반환한다."""
+    user_id = str(user_id)
+    store = get_storage()
+    today_local = await user_local_day(user_id)
+    saved = {r["season_id"] for r in await store.list_saved_stats_for_user(user_id)}
+    count = 0
+    for season in await store.list_seasons_for_user(user_id, limit=1000):
+        if season["id"] not in saved and season_closed(season, today_local):
+            await build_season_snapshot(user_id, season)
+            count += 1
+    return count
+
+
+async def list_closed_season_summaries(user_id: str) -> List[Dict[str, Any]]:
+    """끝난 시즌들의 (시즌 정보 + 전체 기간 요약) 목록(최근 시즌 먼저). 없는 스냅샷은 먼저 만든다."""
+    user_id = str(user_id)
+    store = get_storage()
+    await snapshot_closed_seasons(user_id)
+    seasons = {s["id"]: s for s in await store.list_seasons_for_user(user_id, limit=1000)}
+    result = []
+    for row in await store.list_saved_stats_for_user(user_id):
+        season = seasons.get(row["season_id"])
+        if season is None:
+            continue
+        result.append({**season, "summary": json.loads(row["metrics"])["all"]["summary"]})
+    return result
+
+
+async def rebuild_saved_stats(user_id: Optional[str] = None) -> int:
+    """저장된 시즌 스냅샷을 지우고 다시 만든다(복구용). 다시 만든 시즌 수를 반환한다."""
+    store = get_storage()
+    await store.delete_saved_stats(user_id)
+    user_ids = [user_id] if user_id is not None else await store.list_routine_user_ids()
+    count = 0
+    for uid in user_ids:
+        count += await snapshot_closed_seasons(uid)
+    return count
@@ -1,10 +1,13 @@
 ﻿from __future__ import annotations
 
-from datetime import date, datetime, timedelta
-from typing import List, Optional, Tuple, Dict, Any
+from datetime import date, timedelta
+from itertools import compress
+from typing import List, Optional, Sequence, Tuple, Dict, Any
 
-from db.db import connect_db
-from domain.time_utils import is_valid_day, local_day, now_kst
+from domain.day_num import from_day_num, to_day_num
+from domain.time_utils import routine_anchor_day, routine_rule, user_local_day, valid_day_mask
+from domain.window_metrics import get_series_many
+from storage import get_storage
 
 
 def window_dates(scope: Optional[str], today_local: date) -> Optional[List[date]]:
@@ -30,185 +33,107 @@ async def _routine_start_date(routine: Dict[str, Any], today_local: date) -> dat
 
     우선순위:
       1) routine["start_date"] (YYYY-MM-DD)
-      2) routine["created_at"] (ISO datetime)
+      2) routine["created_at"] (ISO datetime, 사용자 시간대/경계 기준 업무일)
+      둘은 time_utils.routine_anchor_day가 구한다(반복 규칙의 기준일과 같은 날)
       3) (today_local - 365일)
     """
-    # 1) 명시적 start_date 우선
-    sd = routine.get("start_date")
-    if sd:
-        try:
-            return datetime.fromisoformat(str(sd)).date()
-        except Exception:
-            try:
-                return date.fromisoformat(str(sd))
-            except Exception:
-                pass
-
-    # 2) created_at 사용
-    created_at = routine.get("created_at")
-    if created_at:
-        try:
-            dt = datetime.fromisoformat(str(created_at))
-            return local_day(dt)
-        except Exception:
-            pass
-
+    start = await routine_anchor_day(routine)
+    if start is not None:
+        return start
     # 3) fallback: 1년 전
     return today_local - timedelta(days=365)
 
 
-async def count_done_days(routine_id: int, dates: Optional[List[date]]) -> Tuple[int, List[date]]:
-    """주어진 날짜들 중 완료(checked_at IS NOT NULL, skipped = 0)로 표시된 날짜 수와 날짜 목록 반환.
+async def count_done_days(routine_id: int, days: Optional[Sequence[int]]) -> Tuple[int, List[int]]:
+    """주어진 날짜(day_num)들 중 완료(checked_at IS NOT NULL, skipped = 0)로 표시된 날짜 수와 날짜 목록 반환.
 
-    dates가 None이면 전체 기록을 대상으로 계산한다.
-    반환: (완료일수, 완료일 리스트)
+    days가 None이면 전체 기록을 대상으로 계산한다.
+    반환: (완료일수, 완료일 day_num 리스트)
     """
-    conn = await connect_db()
-    try:
-        if dates is None or len(dates) == 0:
-            cur = await conn.execute(
-                "SELECT local_day FROM routine_checkin WHERE routine_id = ? AND checked_at IS NOT NULL AND skipped = 0",
-                (routine_id,),
-            )
-            rows = await cur.fetchall()
-            await cur.close()
-            done_days = [datetime.fromisoformat(r["local_day"]).date() if isinstance(r["local_day"], str) else r["local_day"] for r in rows]
-            return len(done_days), done_days
-        placeholders = ",".join("?" for _ in dates)
-        iso_dates = [d.isoformat() for d in dates]
-        cur = await conn.execute(
-            f"SELECT local_day FROM routine_checkin WHERE routine_id = ? AND local_day IN ({placeholders}) AND checked_at IS NOT NULL AND skipped = 0",
-            (routine_id, *iso_dates),
-        )
-        rows = await cur.fetchall()
-        await cur.close()
-        done_days = [datetime.fromisoformat(r["local_day"]).date() for r in rows]
-        return len(done_days), done_days
-    finally:
-        await conn.close()
-
-
-async def count_valid_days(user_id: str, routine: Dict[str, Any], dates: Optional[List[date]]) -> Tuple[int, List[date]]:
-    """주어진 날짜들 중 유효한(체크인이 요구되는) 날짜 수와 날짜 목록을 반환.
-
-    - is_valid_day(user_id, weekend_mode, d)가 True여야 함
+    store = get_storage()
+    if not days:
+        rows = await store.list_checkins_for_routine(routine_id)
+        wanted = None
+    else:
+        # 날짜 목록의 최소~최대 범위를 한 번에 읽고 목록에 있는 날짜만 남긴다
+        rows = await store.list_checkins_for_routine(routine_id, from_day_num(min(days)), from_day_num(max(days)))
+        wanted = set(days)
+    done_days = [
+        r["day_num"]
+        for r in rows
+        if r["checked_at"] is not None and not r["skipped"] and (wanted is None or r["day_num"] in wanted)
+    ]
+    return len(done_days), done_days
+
+
+async def count_valid_days(user_id: str, routine: Dict[str, Any], days: Optional[Sequence[int]]) -> Tuple[int, List[int]]:
+    """주어진 날짜(day_num)들 중 유효한(체크인이 요구되는) 날짜 수와 날짜 목록을 반환.
+
+    - is_valid_day(user_id, 루틴의 반복 규칙, d)가 True여야 함
     - 사용자가 스킵(skipped=1)으로 표시한 날짜는 유효일에서 제외함
-    dates가 None이면 루틴 생성일 ~ 오늘 범위를 사용하도록 호출자가 결정해야 함.
+    days가 None이면 루틴 생성일 ~ 오늘 범위를 사용하도록 호출자가 결정해야 함.
     """
-    if dates is None:
+    if days is None:
         return 0, []
 
     # 루틴 시작일 이전 날짜는 분모에서 제외
-    today_local = local_day(now_kst())
-    start_date = await _routine_start_date(routine, today_local)
-    # dates는 모두 today_local 이전이므로 단순 필터 가능
-    dates = [d for d in dates if d >= start_date]
-    if not dates:
+    today_local = await user_local_day(user_id)
+    start = to_day_num(await _routine_start_date(routine, today_local))
+    # days는 모두 today_local 이전이므로 단순 필터 가능
+    days = [n for n in days if n >= start]
+    if not days:
         return 0, []
+    lo, hi = min(days), max(days)
 
-    # 미리 DB에서 스킵 정보를 가져와서 파싱
-    conn = await connect_db()
-    try:
-        placeholders = ",".join("?" for _ in dates)
-        iso_dates = [d.isoformat() for d in dates]
-        cur = await conn.execute(
-            f"SELECT local_day, skipped FROM routine_checkin WHERE routine_id = ? AND local_day IN ({placeholders})",
-            (routine["id"], *iso_dates),
-        )
-        rows = await cur.fetchall()
-        await cur.close()
-        skipped_map = {datetime.fromisoformat(r["local_day"]).date(): bool(r["skipped"]) for r in rows}
-    finally:
-        await conn.close()
-
-    valid_days: List[date] = []
-    for d in dates:
-        # is_valid_day는 async
-        if not await is_valid_day(str(user_id), routine.get("weekend_mode", "weekday"), d):
-            continue
-        # 사용자가 스킵으로 표시했으면 유효일에서 제외
-        if skipped_map.get(d, False):
-            continue
-        valid_days.append(d)
+    # 미리 저장소에서 스킵 정보를 가져온다
+    rows = await get_storage().list_checkins_for_routine(routine["id"], from_day_num(lo), from_day_num(hi))
+    skipped = {r["day_num"] for r in rows if r["skipped"]}
 
+    # 주말/공휴일/면책 규칙은 범위 마스크로 한 번에 계산
+    mask = await valid_day_mask(str(user_id), await routine_rule(routine), from_day_num(lo), from_day_num(hi))
+    # 사용자가 스킵으로 표시했으면 유효일에서 제외
+    valid_days = [n for n in days if mask[n - lo] and n not in skipped]
     return len(valid_days), valid_days
 
 
-async def _build_date_range(start: date, end: date) -> List[date]:
-    """시작일과 종료일 사이의 모든 날짜 리스트를 생성."""
-    days: List[date] = []
-    cur = start
-    while cur <= end:
-        days.append(cur)
-        cur = cur + timedelta(days=1)
-    return days
-
-
-async def calc_streak(user_id: str, routine: Dict[str, Any]) -> Tuple[int, int]:
+async def calc_streak(user_id: str, routine: Dict[str, Any], until: Optional[date] = None) -> Tuple[int, int]:
     """루틴의 유효일 기준 최대 연속 완료(max_streak)와 현재 진행중인 연속 완료(current_streak)를 계산하여 반환.
 
-    알고리즘 요약:
-      - 루틴 생성일(created_at)을 시작으로 오늘까지 모든 날짜를 순회
-      - 각 날짜에 대해 is_valid_day 검사. 유효하지 않으면 건너뜀(연속성에 영향 없음)
-      - 유효한 날짜에 대해 체크인 레코드를 확인: skipped이면 건너뜀(중립), checked이면 완료로 간주(연속 증가), 그렇지 않으면 연속 종료
+    규칙:
+      - 루틴 시작일(_routine_start_date)부터 오늘까지가 대상
+      - 유효하지 않은 날(반복 규칙/공휴일/면책)과 스킵한 날은 중립: 연속을 끊지도 늘리지도 않음
+      - 유효한 날에 완료면 연속 증가, 완료도 스킵도 아니면 연속 종료
       - max_streak은 전체 기간 동안의 최대 연속 완료 수
       - current_streak은 가장 최신 유효일(오늘 포함)부터 거꾸로 가며 연속 완료된 날 수
+      - until이 주어지면 그날(포함)까지만 보고 그날을 오늘로 친다(끝난 시즌의 마지막 날 기준 등)
+
+    체크인 조회 한 번 + 유효일 마스크 한 번으로, 중립인 날을 뺀 완료 여부 열(0/1)을 만들고
+    그 열의 1 구간 길이(run length)로 두 값을 함께 구한다.
     """
     # 오늘의 local_day
-    today = local_day(now_kst())
+    today_local = until if until is not None else await user_local_day(user_id)
 
     # 시작일 결정: 루틴 시작일 헬퍼 사용
-    start_date: Optional[date] = await _routine_start_date(routine, today)
+    start_local = await _routine_start_date(routine, today_local)
+    start = to_day_num(start_local)
 
-    # 전체 날짜 리스트
-    all_dates = await _build_date_range(start_date, today)
+    # 유효일 여부는 범위 마스크로 한 번에 계산(mask[i]는 start + i일)
+    mask = await valid_day_mask(str(user_id), await routine_rule(routine), start_local, today_local)
+    if not mask:
+        return 0, 0
 
-    # 미리 DB에서 해당 루틴의 체크인 레코드들을 가져옴
-    conn = await connect_db()
-    try:
-        cur = await conn.execute(
-            "SELECT local_day, checked_at, skipped FROM routine_checkin WHERE routine_id = ? AND local_day BETWEEN ? AND ?",
-            (routine["id"], start_date.isoformat(), today.isoformat()),
-        )
-        rows = await cur.fetchall()
-        await cur.close()
-        rec_map = {datetime.fromisoformat(r["local_day"]).date(): {"checked_at": r["checked_at"], "skipped": bool(r["skipped"]) } for r in rows}
-    finally:
-        await conn.close()
-
-    max_streak = 0
-    running = 0
-    # 전체 최대 연속 계산(순방향)
-    for d in all_dates:
-        if not await is_valid_day(str(user_id), routine.get("weekend_mode", "weekday"), d):
-            continue
-        rec = rec_map.get(d)
-        if rec and rec.get("skipped"):
-            # 스킵은 중립: 연속을 끊지 않음, 그러나 완료수에는 포함되지 않음
-            continue
-        if rec and rec.get("checked_at"):
-            running += 1
-            if running > max_streak:
-                max_streak = running
-        else:
-            running = 0
-
-    # 현재 연속(역방향)
-    current_streak = 0
-    for d in reversed(all_dates):
-        if not await is_valid_day(str(user_id), routine.get("weekend_mode", "weekday"), d):
-            continue
-        rec = rec_map.get(d)
-        if rec and rec.get("skipped"):
-            # 중립: 계속 뒤로 감
-            continue
-        if rec and rec.get("checked_at"):
-            current_streak += 1
-            continue
-        # 유효한 날이면서 완료도 아니고 스킵도 아니면 현재 연속 종료
-        break
-
-    return max_streak, current_streak
+    # 체크인은 한 번에 읽어 완료일 표시(hits)를 만들고, 스킵한 날은 마스크에서 빼서 중립으로
+    hits = bytearray(len(mask))
+    for r in await get_storage().list_checkins_for_routine(routine["id"], start_local, today_local):
+        i = r["day_num"] - start
+        if r["skipped"]:
+            mask[i] = 0
+        elif r["checked_at"]:
+            hits[i] = 1
+
+    # 중립이 아닌 날만 남긴 완료 여부 열. 0(미완료)으로 나눈 조각이 각각의 연속 구간
+    runs = bytes(compress(hits, mask)).split(b"\x00")
+    return max(map(len, runs)), len(runs[-1])
 
 
 async def aggregate_user_metrics(
@@ -222,13 +147,21 @@ async def aggregate_user_metrics(
 ) -> Dict[str, Any]:
     """사용자 전체(루틴별 동등 가중치) 합산 지표를 계산하여 반환.
 
-    - today_local(기준일)은 기본 now_kst()의 local_day
+    - today_local(기준일)은 기본 사용자 시간대/하루 경계 기준 오늘(user_local_day)
     - 기본 정책: 오늘(today_local)은 항상 제외하고, 어제까지 집계
     - season_start/season_end가 주어지면, 해당 시즌 범위 안에서만 집계
       (scope=7d/30d/all 모두 동일하게 시즌 범위를 '상한/하한'으로 씀)
+    - 완료/유효일 수는 루틴별 누적 배열(domain.window_metrics)에서 기간 양끝을 빼서 구한다
+    - 조회는 루틴 수와 상관없이 상수 번: 누적 배열을 새로 만들 루틴들의 체크인 한 번,
+      연속 완료 상태/이후 체크인 한 번씩, 면책은 사용자 인덱스(domain.exemption_index)로 한 번
+    - 연속 완료(max_streak/current_streak)는 기준일과 상관없이 실제 오늘 기준이며,
+      저장된 상태(domain.streaks)에서 이어서 구한다
     """
+    # domain.streaks -> domain.stats 순환 import를 피하려고 쓸 때 가져온다
+    from domain.streaks import get_streaks
+
     if today_local is None:
-        today_local = local_day(now_kst())
+        today_local = await user_local_day(user_id)
 
     # 리포트는 오늘 제외
     default_end = today_local - timedelta(days=1)
@@ -239,40 +172,39 @@ async def aggregate_user_metrics(
     if season_start is not None and default_end < season_start:
         return {"by_routine": [], "summary": {"avg_rate": 0.0, "total_done": 0, "total_valid": 0}}
 
-    results = []
-    total_rate = 0.0
-    total_done = 0
-    total_valid = 0
-
+    # 루틴별 기간 [start, end]. 스코프 기본 윈도우의 끝은 항상 오늘-1 기준
+    end = default_end
+    windows = []
     for r in routines:
-        # 스코프 기본 윈도우(끝은 항상 오늘-1 기준)
-        end = default_end
-
+        routine_start = await _routine_start_date(r, today_local)
         if scope in ("7d", "30d"):
             days = 7 if scope == "7d" else 30
             start = end - timedelta(days=days - 1)
         else:
             # all
-            start = await _routine_start_date(r, today_local)
+            start = routine_start
 
         # 시즌 하한 적용
         if season_start is not None:
             start = max(start, season_start)
 
         # 루틴 자체 시작일 하한 적용(all이 아니어도 적용되게)
-        routine_start = await _routine_start_date(r, today_local)
         start = max(start, routine_start)
+        windows.append((r, routine_start, start))
 
-        # start > end면 빈 범위
-        if start > end:
-            dates: List[date] = []
-        else:
-            dates = await _build_date_range(start, end)
+    series = await get_series_many(str(user_id), [(r, rs, max(end, rs)) for r, rs, _ in windows])
+    streaks = await get_streaks(str(user_id), routines)
+
+    results = []
+    total_rate = 0.0
+    total_done = 0
+    total_valid = 0
 
-        valid_count, valid_days = await count_valid_days(str(user_id), r, dates)
-        done_count, _ = await count_done_days(r["id"], valid_days)
+    for r, _, start in windows:
+        # start > end면 빈 범위(0, 0)
+        done_count, valid_count = series[r["id"]].counts(to_day_num(start), to_day_num(end))
         rate = (done_count / max(1, valid_count)) if valid_count > 0 else 0.0
-        max_streak, current_streak = await calc_streak(str(user_id), r)
+        max_streak, current_streak = streaks[r["id"]]
 
         results.append(
             {
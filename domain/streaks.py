@@ -0,0 +1,158 @@
+"""루틴별 연속 완료(streak) 상태를 routine_streak 테이블에 유지하며 읽는다.
+
+stats.calc_streak은 루틴 시작일부터 오늘까지 매번 다시 훑는다. 여기서는 '어제까지 반영한 상태'를
+저장해 두고, 조회할 때는 마지막 반영일 다음 날부터 오늘까지만 이어서 계산한다(보통 하루).
+
+상태(routine_streak 한 행):
+  - last_day_num: 반영이 끝난 마지막 날(항상 오늘보다 이전, 오늘은 저장하지 않고 조회 때만 더한다)
+  - run_start_day_num: 현재 연속 구간의 시작일. 그 전날은 미완료(또는 루틴 시작 전)라서
+    그날부터 다시 세면 current_streak = 0, max_streak = max_before_run 에서 출발할 수 있다
+  - current_streak: run_start ~ last_day 의 완료 수, max_streak = max(max_before_run, current_streak)
+
+접으면서 지나간 달 1일마다 그 전날까지 반영한 상태를 체크포인트(routine_streak_checkpoint)로 남긴다.
+
+상태를 저장하는 것은 야간 작업(advance_streaks, scripts/finalize_day_status.py)뿐이고 get_streaks는 읽기만 한다.
+체크인/면책/루틴 규칙/사용자 설정을 바꾸는 쓰기는 repos.derived_repo의 규칙으로 바뀐 날 이후를 반영한
+상태와 체크포인트를 같은 트랜잭션에서 버린다(메모리 백엔드는 같은 규칙의 _invalidate_derived).
+조회와 야간 작업은 남아 있는 상태와 가장 늦은 체크포인트 중 더 늦은 것에서 이어서 계산하므로,
+오래된 과거를 고쳐도 다시 계산하는 날은 그날이 속한 달 1일부터다.
+저장은 읽었을 때의 rev가 그대로일 때만 하므로, 계산 중에 들어온 쓰기를 덮어쓰지 않는다.
+
+규칙은 calc_streak과 같다(유효하지 않은 날과 스킵한 날은 중립, 유효한 날 미완료는 연속 종료).
+이어서 계산할 날들은 일별 상태(domain.day_status)의 연속 구간으로 읽는다.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain.day_num import next_month_start, to_day_num
+from domain.day_status import get_day_status_many
+from domain.report_compute import StreakState, fold_status_streaks, run_report_task
+from domain.stats import _routine_start_date
+from domain.time_utils import user_local_day
+from storage import get_storage
+
+
+def _month_marks(last_day: int, today: int) -> List[int]:
+    """(last_day + 1, today] 안의 달 1일(day_num). 여기서 체크포인트를 남긴다."""
+    marks: List[int] = []
+    m = next_month_start(last_day + 1)
+    while m <= today:
+        marks.append(m)
+        m = next_month_start(m)
+    return marks
+
+
+def _usable(st: Optional[StreakState], start: int, today: int) -> bool:
+    """상태가 있고 앞뒤가 맞는지(오늘 전까지 반영, 루틴 시작 뒤의 구간)."""
+    return st is not None and st.last_day < today and st.run_start >= start
+
+
+def _base_state(row: Optional[Dict[str, Any]], checkpoint: Optional[Dict[str, Any]], start: int, today: int) -> StreakState:
+    """저장된 상태와 가장 늦은 체크포인트 중 쓸 수 있는 더 늦은 것(둘 다 없으면 시작일 전날). rev는 상태 행의 것(행이 없으면 -1)."""
+    rev = row["rev"] if row else -1
+    base = StreakState.empty(start, rev)
+    for st in (StreakState.from_row(row) if row else None, StreakState.from_checkpoint(checkpoint, rev) if checkpoint else None):
+        if _usable(st, start, today) and st.last_day > base.last_day:
+            base = st
+    return base
+
+
+async def _start_days(routines: List[Dict[str, Any]], today_local: date) -> Dict[int, int]:
+    return {r["id"]: to_day_num(await _routine_start_date(r, today_local)) for r in routines}
+
+
+async def _fold(
+    user_id: str,
+    routines: List[Dict[str, Any]],
+    starts: Dict[int, int],
+    states: Dict[int, StreakState],
+    today: int,
+    checkpoints: bool,
+) -> List[Tuple[StreakState, StreakState, List[StreakState]]]:
+    """마지막 반영일 다음 날부터 오늘까지 접는다. 계산은 한꺼번에 run_report_task로(날짜 수가 많으면 프로세스 풀)."""
+    statuses = await get_day_status_many(user_id, [(r, starts[r["id"]], states[r["id"]].last_day + 1, today) for r in routines])
+    jobs = [
+        (states[r["id"]], statuses[r["id"]], _month_marks(states[r["id"]].last_day, today) if checkpoints else [])
+        for r in routines
+    ]
+    return await run_report_task(fold_status_streaks, jobs, work=sum(today - st.last_day for st, _, _ in jobs))
+
+
+async def get_streaks(user_id: str, routines: List[Dict[str, Any]]) -> Dict[int, Tuple[int, int]]:
+    """루틴별 (max_streak, current_streak). stats.calc_streak과 같은 값을 저장된 상태에서 이어서 구한다.
+
+    - 상태는 한 번에 읽고, 상태가 없거나 버려진 루틴만 가장 늦은 체크포인트를 읽는다
+    - 마지막 반영일 이후의 일별 상태도 루틴들을 묶어 한 번에 읽는다
+    - 아무것도 저장하지 않는다(상태를 앞으로 옮기는 것은 야간 작업의 advance_streaks)
+    """
+    if not routines:
+        return {}
+    store = get_storage()
+    today_local = await user_local_day(user_id)
+    today = to_day_num(today_local)
+    starts = await _start_days(routines, today_local)
+    result: Dict[int, Tuple[int, int]] = {r["id"]: (0, 0) for r in routines}
+    todo = [r for r in routines if starts[r["id"]] <= today]
+    if not todo:
+        return result
+
+    rows = await store.get_routine_streaks([r["id"] for r in todo])
+    missing = [r["id"] for r in todo if not _usable(StreakState.from_row(rows[r["id"]]) if r["id"] in rows else None, starts[r["id"]], today)]
+    checkpoints = await store.get_latest_streak_checkpoints(missing) if missing else {}
+    states = {r["id"]: _base_state(rows.get(r["id"]), checkpoints.get(r["id"]), starts[r["id"]], today) for r in todo}
+    for r, (_, now, _) in zip(todo, await _fold(user_id, todo, starts, states, today, checkpoints=False)):
+        result[r["id"]] = (now.best, now.current)
+    return result
+
+
+async def _advance_user(user_id: str, routines: List[Dict[str, Any]]) -> int:
+    store = get_storage()
+    today_local = await user_local_day(user_id)
+    today = to_day_num(today_local)
+    starts = await _start_days(routines, today_local)
+    todo = [r for r in routines if starts[r["id"]] <= today]
+    if not todo:
+        return 0
+
+    rows = await store.get_routine_streaks([r["id"] for r in todo])
+    stale = [r for r in todo if not _usable(StreakState.from_row(rows[r["id"]]) if r["id"] in rows else None, starts[r["id"]], today)]
+    checkpoints: Dict[int, dict] = {}
+    if stale:
+        # 자리표시 행을 먼저 커밋해 둬야 계산하는 동안 들어온 쓰기가 rev를 올리거나 행을 지워 저장을 막는다
+        await asyncio.gather(*(store.reset_routine_streak(r["id"], str(r.get("user_id") or user_id), starts[r["id"]]) for r in stale))
+        ids = [r["id"] for r in stale]
+        for rid in ids:
+            rows.pop(rid, None)
+        rows.update(await store.get_routine_streaks(ids))
+        checkpoints = await store.get_latest_streak_checkpoints(ids)
+    states = {r["id"]: _base_state(rows.get(r["id"]), checkpoints.get(r["id"]), starts[r["id"]], today) for r in todo}
+
+    saves = []
+    for r, (done, _, points) in zip(todo, await _fold(user_id, todo, starts, states, today, checkpoints=True)):
+        st = states[r["id"]]
+        # 어제까지 새로 반영한 상태만 저장한다(오늘은 조회 때 더한다)
+        if done.last_day != st.last_day and st.rev >= 0:
+            marks = [(cp.last_day + 1, cp.current, cp.run_start, cp.best_before_run) for cp in points]
+            saves.append(store.save_routine_streak(r["id"], st.rev, done.current, done.best, done.last_day, done.run_start, done.best_before_run, marks))
+    if saves:
+        await asyncio.gather(*saves)
+    return len(todo)
+
+
+async def advance_streaks(user_id: Optional[str] = None) -> int:
+    """야간 작업: 연속 완료 상태를 어제까지 반영해 저장한다(user_id가 없으면 전체). 처리한 루틴 수를 반환한다."""
+    store = get_storage()
+    user_ids = [user_id] if user_id is not None else await store.list_routine_user_ids()
+    count = 0
+    for uid in user_ids:
+        count += await _advance_user(uid, await store.list_active_routines_for_user(uid))
+    return count
+
+
+async def rebuild_streaks(user_id: Optional[str] = None) -> int:
+    """저장된 연속 완료 상태를 지우고 체크인 원본에서 다시 만든다(복구용). 다시 만든 루틴 수를 반환한다."""
+    await get_storage().delete_routine_streaks(user_id)
+    return await advance_streaks(user_id)
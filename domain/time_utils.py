@@ -1,13 +1,15 @@
 ﻿from __future__ import annotations
 
-from datetime import datetime, date, timedelta
+from datetime import UTC, datetime, date, timedelta
 from zoneinfo import ZoneInfo
-from functools import lru_cache
-from typing import Union
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
-import holidays
-
-from db.db import connect_db
+from domain.day_clock import DEFAULT_DAY_CUTOFF_HOUR, DayClock, local_day_for, user_local_day, user_now
+from domain.day_num import to_day_num
+from domain.exemption_index import get_exemption_index
+from domain.holiday_table import holidays_between, is_holiday
+from domain.recurrence import CompiledRule, as_rule, rule_for_routine
+from domain.report_compute import day_mask
 
 KST = ZoneInfo("Asia/Seoul")
 
@@ -19,27 +21,18 @@ def now_kst() -> datetime:
 
 def local_day(dt: Union[datetime, date]) -> date:
     """
-    로컬의 '업무일'을 계산합니다.
+    로컬의 '업무일'을 계산합니다(기본값: KST, 04:00 경계).
 
     규칙: local_day(dt) = (dt - 4시간).date()
     즉, 날짜 경계가 04:00 KST 입니다.
 
     입력으로 datetime이나 date를 받습니다. date면 그 날짜의 자정(00:00)을
     KST 기준으로 간주합니다.
-    """
-    if isinstance(dt, date) and not isinstance(dt, datetime):
-        # date만 들어오면 그 날짜의 00:00 KST로 간주
-        dt = datetime(dt.year, dt.month, dt.day, tzinfo=KST)
-    else:
-        # datetime이면 KST로 변환
-        if dt.tzinfo is None:
-            # naive datetime은 KST로 간주
-            dt = dt.replace(tzinfo=KST)
-        else:
-            dt = dt.astimezone(KST)
 
-    adjusted = dt - timedelta(hours=4)
-    return adjusted.date()
+    사용자별 시간대/경계(user_settings.tz, day_cutoff_hour)를 따라야 하면
+    user_local_day(user_id, dt)를 사용하세요.
+    """
+    return local_day_for(dt, KST, DEFAULT_DAY_CUTOFF_HOUR)
 
 
 def is_weekend(d: Union[date, datetime]) -> bool:
@@ -49,40 +42,62 @@ def is_weekend(d: Union[date, datetime]) -> bool:
     return d.weekday() >= 5  # 5: Saturday, 6: Sunday
 
 
-@lru_cache(maxsize=10)
-def _holiday_set_for_year(year: int) -> set[date]:
-    """주어진 연도의 한국 공휴일 집합을 반환합니다. 캐시 사용."""
-    # holidays 라이브러리의 CountryHoliday를 사용
-    kr = holidays.CountryHoliday("KR", years=year)
-    return set(kr.keys())
-
-
 def is_korean_holiday(d: Union[date, datetime]) -> bool:
-    """한국 공휴일인지 확인합니다. 연도별 캐시 사용."""
+    """한국 공휴일인지 확인합니다. 미리 계산한 공휴일 비트맵(domain.holiday_table)을 사용."""
     if isinstance(d, datetime):
         d = d.date()
-    return d in _holiday_set_for_year(d.year)
+    return is_holiday(d)
+
+
+async def routine_anchor_day(routine: Mapping[str, Any], clock: Optional[DayClock] = None) -> Optional[date]:
+    """루틴의 사용자 기준 시작일. 리포트의 시작일과 반복 규칙의 기준일이 모두 이 값을 씁니다.
+
+    우선순위:
+      1) routine["start_date"] (YYYY-MM-DD)
+      2) routine["created_at"] (ISO datetime, 시간대가 없으면 UTC)을 사용자 시간대/경계로 바꾼 업무일
+    둘 다 없거나 읽을 수 없으면 None. clock을 넘기면 사용자 설정 대신 그 시계로 업무일을 정합니다.
+    """
+    sd = routine.get("start_date")
+    if sd:
+        try:
+            return datetime.fromisoformat(str(sd)).date()
+        except Exception:
+            try:
+                return date.fromisoformat(str(sd))
+            except Exception:
+                pass
+
+    created_at = routine.get("created_at")
+    if created_at:
+        try:
+            dt = datetime.fromisoformat(str(created_at))
+            if dt.tzinfo is None:
+                # routine_repo는 created_at을 UTC(utcnow)로 저장한다
+                dt = dt.replace(tzinfo=UTC)
+            if clock is not None:
+                return clock.local_day(dt)
+            if routine.get("user_id"):
+                return await user_local_day(routine["user_id"], dt)
+            return local_day(dt)
+        except Exception:
+            pass
+    return None
+
+
+async def routine_rule(routine: Mapping[str, Any]) -> Optional[CompiledRule]:
+    """루틴의 컴파일된 반복 규칙(캐시). 기준일은 routine_anchor_day(사용자 기준 시작일)입니다."""
+    return rule_for_routine(routine, await routine_anchor_day(routine))
 
 
 async def is_exempt(user_id: str, d: Union[date, datetime]) -> bool:
-    """DB의 exemption 테이블을 확인해 주어진 날짜에 사용자가 면책인지 확인합니다.
+    """사용자의 면책(exemption) 기간 인덱스로 주어진 날짜에 면책인지 확인합니다.
 
-    exemption 테이블의 start_day, end_day 칼럼은 ISO 포맷(YYYY-MM-DD) 문자열로 저장되어 있다고 가정합니다.
+    인덱스는 사용자별로 한 번 읽어 메모리에 캐시되므로 날짜마다 DB를 조회하지 않습니다.
+    exemption의 start_day, end_day는 ISO 포맷(YYYY-MM-DD) 문자열로 저장되어 있다고 가정합니다.
     """
     if isinstance(d, datetime):
         d = d.date()
-    iso = d.isoformat()
-    conn = await connect_db()
-    try:
-        cur = await conn.execute(
-            "SELECT 1 FROM exemption WHERE user_id = ? AND start_day <= ? AND end_day >= ? LIMIT 1",
-            (user_id, iso, iso),
-        )
-        row = await cur.fetchone()
-        await cur.close()
-        return row is not None
-    finally:
-        await conn.close()
+    return (await get_exemption_index(user_id)).contains(d)
 
 
 def is_applicable_day(weekend_mode: str, d: Union[date, datetime]) -> bool:
@@ -102,12 +117,14 @@ def is_applicable_day(weekend_mode: str, d: Union[date, datetime]) -> bool:
     raise ValueError(f"Invalid weekend_mode: {weekend_mode}")
 
 
-async def is_valid_day(user_id: str, weekend_mode: str, d: Union[date, datetime]) -> bool:
+async def is_valid_day(user_id: str, weekend_mode: Union[str, CompiledRule, None], d: Union[date, datetime]) -> bool:
     """주말/공휴일/면책을 종합해 '유효한(체크인이 필요한) 날짜'인지 반환합니다.
 
+    weekend_mode 자리에는 weekend_mode/반복 규칙 문자열이나 routine_rule()의 결과를 넘깁니다.
+
     정책(기본 해석):
       - 사용자가 면책(exemption)인 경우: 유효하지 않음 (체크인이 필요 없음)
-      - weekend_mode에 의해 적용 대상이 아니면 유효하지 않음
+      - 반복 규칙(weekend_mode)에 의해 적용 대상이 아니면 유효하지 않음
       - 공휴일이면 유효하지 않음
       - 위 조건을 모두 통과하면 유효함
     """
@@ -116,14 +133,68 @@ async def is_valid_day(user_id: str, weekend_mode: str, d: Union[date, datetime]
     # 면책 우선
     if await is_exempt(user_id, d):
         return False
-    # 주말 모드 검사
-    try:
-        if not is_applicable_day(weekend_mode, d):
-            return False
-    except Exception:
-        # 잘못된 weekend_mode가 들어오면 안전하게 False 반환
+    # 반복 규칙 검사(잘못된 weekend_mode/규칙이면 안전하게 False 반환)
+    rule = as_rule(weekend_mode)
+    if rule is None or not rule.occurs_on(d):
         return False
     # 한국 공휴일이면 유효하지 않음
     if is_korean_holiday(d):
         return False
     return True
+
+
+async def valid_day_mask(user_id: str, weekend_mode: Union[str, CompiledRule, None], start: date, end: date) -> bytearray:
+    """[start, end] 범위의 '유효한 날짜' 마스크를 한 번에 만든다.
+
+    반환값 mask[i]는 start + i일이 유효하면 1, 아니면 0 (길이 = 날짜 수, start > end면 빈 배열).
+    weekend_mode 자리에는 weekend_mode/반복 규칙 문자열이나 routine_rule()의 결과를 넘긴다.
+    is_valid_day와 같은 규칙(반복 규칙, 한국 공휴일, 면책)을 날짜마다 await하지 않고
+    컴파일된 규칙의 범위 마스크 + 공휴일/면책 구간 지우기로 한 번에 적용한다.
+    """
+    if isinstance(start, datetime):
+        start = start.date()
+    if isinstance(end, datetime):
+        end = end.date()
+    n = (end - start).days + 1
+    if n <= 0:
+        return bytearray()
+    rule = as_rule(weekend_mode)
+    if rule is None:
+        # is_valid_day와 마찬가지로 잘못된 weekend_mode/규칙은 모두 무효
+        return bytearray(n)
+
+    # 반복 규칙 마스크에서 한국 공휴일과 면책 기간(합쳐진 구간 단위)을 지운다
+    holidays, exemptions = await day_rule_inputs(user_id, start, end)
+    return day_mask(rule, to_day_num(start), to_day_num(end), holidays, exemptions)
+
+
+async def day_rule_inputs(user_id: str, start: date, end: date) -> Tuple[List[int], List[Tuple[int, int]]]:
+    """[start, end] 범위 유효일 계산에 필요한 (공휴일 day_num 목록, 면책 구간 day_num 목록).
+
+    domain.report_compute의 순수 계산 함수(day_mask 등)에 넘기는 미리 읽어 둔 값이다.
+    """
+    holidays = [to_day_num(h) for h in holidays_between(start, end)]
+    exemptions = [
+        (to_day_num(a), to_day_num(b))
+        for a, b in (await get_exemption_index(user_id)).intervals()
+        if b >= start and a <= end
+    ]
+    return holidays, exemptions
+
+
+def mask_days(start: date, mask: bytearray) -> List[date]:
+    """valid_day_mask 결과에서 유효한 날짜만 골라 리스트로 반환합니다."""
+    return [start + timedelta(days=i) for i, v in enumerate(mask) if v]
+
+
+async def valid_routines_on(user_id: str, routines: List[Dict[str, Any]], d: Union[date, datetime]) -> List[Dict[str, Any]]:
+    """routines 중 d가 유효한 날짜인 루틴만 순서대로 반환합니다.
+
+    공휴일/면책은 하루에 한 번만 판정하고, 루틴마다 컴파일된 반복 규칙(캐시)으로 거릅니다.
+    """
+    if isinstance(d, datetime):
+        d = d.date()
+    rules = [await routine_rule(r) for r in routines]
+    if not any(rules) or not (await valid_day_mask(user_id, "all", d, d))[0]:
+        return []
+    return [r for r, rule in zip(routines, rules) if rule is not None and rule.occurs_on(d)]
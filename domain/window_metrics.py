@@ -0,0 +1,146 @@
+"""루틴별 누적합(prefix sum)으로 임의 기간의 완료/유효일 수를 구한다.
+
+루틴 시작일부터 day_num 기준으로
+  valid[i] = start ~ start+i-1 중 유효일(반복 규칙/공휴일/면책 통과, 스킵 아님) 수
+  done[i]  = 그중 완료한 날 수
+를 array('I')로 만들어 두면 [a, b] 기간은 valid[b-start+1] - valid[a-start] 처럼 뺄셈 두 번이다.
+7d/30d/all/시즌 범위 등 어떤 기간이든 배열이 있으면 O(1).
+
+- 루틴마다 캐시하고 최근에 쓴 WINDOW_METRICS_CACHE_SIZE개만 유지(LRU)
+- 캐시 항목은 만들 때의 데이터 버전(domain.data_version)을 함께 갖고, 쓰기로 버전이 바뀌면 다시 만든다
+- 더 뒤의 날짜가 필요하면(날짜가 바뀜) 버전이 같을 때는 늘어난 날만 이어 붙인다
+- 마스크/완료 표시는 일별 상태(domain.day_status)의 연속 구간에서 바로 만든다. 확정되지 않은 날만
+  체크인에서 계산하고(오래된 기록을 처음부터 만들 때는 프로세스 풀), 확정된 달은 저장된 바이트를 그대로 읽는다
+
+사용 예:
+  series = await get_series(user_id, routine, routine_start, end)
+  done, valid = series.counts(to_day_num(a), to_day_num(b))
+  many = await get_series_many(user_id, [(routine, routine_start, end), ...])  # 일별 상태 조회 한 번
+"""
+from __future__ import annotations
+
+import os
+from array import array
+from collections import OrderedDict
+from datetime import date
+from itertools import accumulate, islice
+from typing import Any, Dict, Iterable, List, Tuple
+
+from domain.data_version import data_version
+from domain.day_num import to_day_num
+from domain.day_status import get_day_status_many
+from domain.report_compute import status_flags
+from storage import get_storage
+
+WINDOW_METRICS_CACHE_SIZE = max(1, int(os.getenv('WINDOW_METRICS_CACHE_SIZE', '2048')))
+
+
+class RoutineSeries:
+    """루틴 하나의 [start, end](day_num, 양끝 포함) 누적 완료/유효일 배열."""
+
+    __slots__ = ("start", "end", "done", "valid")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.end = start - 1
+        self.done = array("I", [0])
+        self.valid = array("I", [0])
+
+    def __len__(self) -> int:
+        return self.end - self.start + 1
+
+    def counts(self, a: int, b: int) -> Tuple[int, int]:
+        """[a, b] 기간(day_num, 양끝 포함)의 (완료일 수, 유효일 수). 배열 범위 밖은 0으로 본다."""
+        a = max(a, self.start)
+        b = min(b, self.end)
+        if a > b:
+            return 0, 0
+        i, j = a - self.start, b - self.start + 1
+        return self.done[j] - self.done[i], self.valid[j] - self.valid[i]
+
+    def rate(self, a: int, b: int) -> float:
+        done, valid = self.counts(a, b)
+        return done / valid if valid else 0.0
+
+    def extend(self, mask: bytearray, hits: bytearray) -> None:
+        """end 다음 날부터 len(mask)일을 이어 붙인다. mask/hits는 그날 유효/완료 여부(0/1)."""
+        self.valid.extend(islice(accumulate(mask, initial=self.valid[-1]), 1, None))
+        self.done.extend(islice(accumulate(hits, initial=self.done[-1]), 1, None))
+        self.end += len(mask)
+
+
+async def _extend_many(user_id: str, items: List[Tuple[RoutineSeries, Dict[str, Any], int]]) -> None:
+    """(series, 루틴, end)마다 series를 end까지 늘린다. [series.end + 1, end] 일별 상태는 루틴들을 묶어 한 번에 읽는다."""
+    items = [(series, routine, end, series.end + 1) for series, routine, end in items if end > series.end]
+    if not items:
+        return
+    statuses = await get_day_status_many(user_id, [(routine, series.start, first, end) for series, routine, end, first in items])
+    for series, routine, _, first in items:
+        # 기다리는 동안 다른 호출이 먼저 이어 붙였으면 그대로 둔다
+        if series.end + 1 == first:
+            series.extend(*status_flags(statuses[routine["id"]]))
+
+
+# routine_id -> (저장소 백엔드, 데이터 버전, 시리즈)
+_cache: "OrderedDict[int, Tuple[object, tuple, RoutineSeries]]" = OrderedDict()
+_stats = {"hits": 0, "builds": 0, "extends": 0}
+
+
+async def get_series_many(user_id: str, wanted: Iterable[Tuple[Dict[str, Any], date, date]]) -> Dict[int, RoutineSeries]:
+    """(루틴, 루틴 시작일, 끝날) 목록에 대한 누적 배열들. {routine_id: series}
+
+    캐시가 유효하면 그대로(필요하면 늘려서) 쓰고, 새로 만들거나 늘려야 하는 루틴들의 일별 상태는
+    루틴 수와 상관없이 한 번에 읽는다(domain.day_status).
+    """
+    store = get_storage()
+    result: Dict[int, RoutineSeries] = {}
+    todo: List[Tuple[Dict[str, Any], tuple, RoutineSeries, int]] = []
+    for routine, start, end in wanted:
+        rid = routine["id"]
+        s, e = to_day_num(start), to_day_num(end)
+        # 계산 전에 읽은 버전으로 저장해야, 도중에 들어온 쓰기가 있으면 다음 조회 때 다시 만든다
+        version = (*data_version(user_id, (rid,)), routine.get("recurrence"), routine.get("weekend_mode"))
+        hit = _cache.get(rid)
+        if hit is not None and hit[0] is store and hit[1] == version and hit[2].start == s:
+            series = hit[2]
+            _cache.move_to_end(rid)
+            if series.end >= e:
+                _stats["hits"] += 1
+                result[rid] = series
+                continue
+            _stats["extends"] += 1
+        else:
+            series = RoutineSeries(s)
+            _stats["builds"] += 1
+        todo.append((routine, version, series, e))
+
+    if todo:
+        await _extend_many(user_id, [(series, routine, e) for routine, _, series, e in todo])
+        for routine, version, series, e in todo:
+            rid = routine["id"]
+            # 다른 호출과 엇갈려 덜 늘어났으면 이 루틴만 따로 읽어 채운다
+            while series.end < e:
+                await _extend_many(user_id, [(series, routine, e)])
+            _cache[rid] = (store, version, series)
+            _cache.move_to_end(rid)
+            result[rid] = series
+        while len(_cache) > WINDOW_METRICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+async def get_series(user_id: str, routine: Dict[str, Any], start: date, end: date) -> RoutineSeries:
+    """루틴 시작일(start)부터 적어도 end까지 덮는 누적 배열."""
+    return (await get_series_many(user_id, [(routine, start, end)]))[routine["id"]]
+
+
+def invalidate_series(routine_id: int | None = None) -> None:
+    """캐시한 누적 배열을 버린다. routine_id가 None이면 전체."""
+    if routine_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(routine_id, None)
+
+
+def window_metrics_stats() -> dict:
+    return {"cached_routines": len(_cache), "max_size": WINDOW_METRICS_CACHE_SIZE, **_stats}
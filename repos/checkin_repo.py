@@ -1,9 +1,13 @@
 ﻿from __future__ import annotations
 
 from datetime import datetime, date
-from typing import Optional, List, Union
+from typing import Dict, Iterable, Optional, List, Tuple, Union
 
-from db.db import connect_db
+from db.db import SQL_IN_CHUNK, acquire_db
+from db.write_queue import submit_write
+from domain.data_version import bump_routine
+from domain.day_num import to_day_num
+from repos.derived_repo import checkin_statements
 
 
 def _iso_date(d: Union[date, str]) -> str:
@@ -16,88 +20,131 @@ async def upsert_checkin_done(routine_id: int, user_id: str, local_day: Union[da
     """체크인 완료(또는 idempotent 업서트).
 
     동일 (routine_id, local_day)에 대해 여러 번 실행해도 안전하게 최신 checked_at으로 갱신됩니다.
+    체크인 쓰기는 모두 그룹 커밋 큐(db.write_queue)를 거치며, 공유 커밋이 끝난 뒤 반환됩니다.
+    파생 상태(repos.derived_repo: 그날 이후의 연속 완료 상태, 그날 일별 상태)는 같은 SAVEPOINT에서 고칩니다.
     """
     ld = _iso_date(local_day)
     now = datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
-        await conn.execute(
-            """
-            INSERT INTO routine_checkin(routine_id, user_id, local_day, checked_at, undone_at, skipped, skip_reason)
-            VALUES(?, ?, ?, ?, NULL, 0, NULL)
-            ON CONFLICT(routine_id, local_day) DO UPDATE SET
-              checked_at = excluded.checked_at,
-              undone_at = NULL,
-              skipped = 0,
-              skip_reason = NULL
-            """,
-            (routine_id, user_id, ld, now),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await submit_write(
+        """
+        INSERT INTO routine_checkin(routine_id, user_id, local_day, day_num, checked_at, undone_at, skipped, skip_reason)
+        VALUES(?, ?, ?, ?, ?, NULL, 0, NULL)
+        ON CONFLICT(routine_id, local_day) DO UPDATE SET
+          checked_at = excluded.checked_at,
+          undone_at = NULL,
+          skipped = 0,
+          skip_reason = NULL
+        """,
+        (routine_id, user_id, ld, to_day_num(ld), now),
+        followups=checkin_statements(routine_id, to_day_num(ld)),
+    )
+    bump_routine(routine_id)
 
 
 async def undo_checkin(routine_id: int, local_day: Union[date, str]) -> None:
     """체크인을 취소(undo). checked_at을 지우고 undone_at을 기록한다."""
     ld = _iso_date(local_day)
     now = datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
-        await conn.execute(
-            "UPDATE routine_checkin SET checked_at = NULL, undone_at = ? WHERE routine_id = ? AND local_day = ?",
-            (now, routine_id, ld),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await submit_write(
+        "UPDATE routine_checkin SET checked_at = NULL, undone_at = ? WHERE routine_id = ? AND local_day = ?",
+        (now, routine_id, ld),
+        followups=checkin_statements(routine_id, to_day_num(ld)),
+    )
+    bump_routine(routine_id)
 
 
 async def skip_checkin(routine_id: int, user_id: str, local_day: Union[date, str], reason: Optional[str] = None) -> None:
     """해당 날짜 체크인을 스킵으로 표시(스킵은 idempotent)."""
     ld = _iso_date(local_day)
     datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
-        await conn.execute(
-            """
-            INSERT INTO routine_checkin(routine_id, user_id, local_day, checked_at, undone_at, skipped, skip_reason)
-            VALUES(?, ?, ?, NULL, NULL, 1, ?)
-            ON CONFLICT(routine_id, local_day) DO UPDATE SET
-              skipped = 1,
-              skip_reason = excluded.skip_reason,
-              checked_at = NULL,
-              undone_at = NULL
-            """,
-            (routine_id, user_id, ld, reason),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await submit_write(
+        """
+        INSERT INTO routine_checkin(routine_id, user_id, local_day, day_num, checked_at, undone_at, skipped, skip_reason)
+        VALUES(?, ?, ?, ?, NULL, NULL, 1, ?)
+        ON CONFLICT(routine_id, local_day) DO UPDATE SET
+          skipped = 1,
+          skip_reason = excluded.skip_reason,
+          checked_at = NULL,
+          undone_at = NULL
+        """,
+        (routine_id, user_id, ld, to_day_num(ld), reason),
+        followups=checkin_statements(routine_id, to_day_num(ld)),
+    )
+    bump_routine(routine_id)
 
 
 async def get_checkin(routine_id: int, local_day: Union[date, str]) -> Optional[dict]:
     ld = _iso_date(local_day)
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM routine_checkin WHERE routine_id = ? AND local_day = ?", (routine_id, ld))
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def list_checkins_for_user_day(user_id: str, local_day: Union[date, str]) -> List[dict]:
     ld = _iso_date(local_day)
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM routine_checkin WHERE user_id = ? AND local_day = ?", (user_id, ld))
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
+
+
+async def list_checkins_for_routine(
+    routine_id: int,
+    start_day: Union[date, str, None] = None,
+    end_day: Union[date, str, None] = None,
+) -> List[dict]:
+    """루틴의 체크인 레코드를 local_day 오름차순으로 반환한다. start_day/end_day는 양끝 포함, None이면 제한 없음.
+
+    기간 조건은 정수 day_num 컬럼((routine_id, day_num) 인덱스)으로 건다.
+    """
+    sql = "SELECT * FROM routine_checkin WHERE routine_id = ?"
+    params: list = [routine_id]
+    if start_day is not None:
+        sql += " AND day_num >= ?"
+        params.append(to_day_num(start_day))
+    if end_day is not None:
+        sql += " AND day_num <= ?"
+        params.append(to_day_num(end_day))
+    sql += " ORDER BY day_num"
+    async with acquire_db() as conn:
+        cur = await conn.execute(sql, params)
+        rows = await cur.fetchall()
+        await cur.close()
+        return [dict(r) for r in rows]
+
+
+async def get_checkins_for_routines(
+    routine_ids: Iterable[int],
+    start_day: Union[date, str],
+    end_day: Union[date, str, None] = None,
+) -> Dict[Tuple[int, str], dict]:
+    """여러 루틴의 체크인을 날짜 범위(양끝 포함, end_day가 없으면 start_day 하루)로 한 번에 조회한다.
+
+    반환: {(routine_id, local_day ISO 문자열): row}. 레코드가 없는 조합은 키가 없다.
+    루틴마다 get_checkin()을 부르는 대신 (routine_id, day_num) 인덱스를 타는 쿼리 하나로 읽는다.
+    """
+    ids = list(dict.fromkeys(routine_ids))
+    if not ids:
+        return {}
+    sd = to_day_num(start_day)
+    ed = to_day_num(end_day) if end_day is not None else sd
+    result: Dict[Tuple[int, str], dict] = {}
+    async with acquire_db() as conn:
+        for i in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[i:i + SQL_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = await conn.execute(
+                f"SELECT * FROM routine_checkin WHERE routine_id IN ({placeholders}) AND day_num BETWEEN ? AND ?",
+                (*chunk, sd, ed),
+            )
+            rows = await cur.fetchall()
+            await cur.close()
+            for r in rows:
+                result[(r["routine_id"], r["local_day"])] = dict(r)
+    return result
 
 
 async def clear_checkin(routine_id: int, local_day: Union[date, str]) -> None:
@@ -106,12 +153,9 @@ async def clear_checkin(routine_id: int, local_day: Union[date, str]) -> None:
     기존 레코드가 있으면 checked_at, undone_at, skipped, skip_reason을 NULL/0으로 갱신합니다.
     """
     ld = _iso_date(local_day)
-    conn = await connect_db()
-    try:
-        await conn.execute(
-            "UPDATE routine_checkin SET checked_at = NULL, undone_at = NULL, skipped = 0, skip_reason = NULL WHERE routine_id = ? AND local_day = ?",
-            (routine_id, ld),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await submit_write(
+        "UPDATE routine_checkin SET checked_at = NULL, undone_at = NULL, skipped = 0, skip_reason = NULL WHERE routine_id = ? AND local_day = ?",
+        (routine_id, ld),
+        followups=checkin_statements(routine_id, to_day_num(ld)),
+    )
+    bump_routine(routine_id)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from db.db import SQL_IN_CHUNK, acquire_db
+from db.write_queue import submit_write
+
+
+async def get_day_status_rows(routine_ids: Iterable[int], first_month: int, last_month: int) -> Dict[Tuple[int, int], dict]:
+    """여러 루틴의 [first_month, last_month] 달 행(routine_day_status)을 한 번에 읽는다. {(routine_id, month_start): 행}"""
+    ids = list(dict.fromkeys(routine_ids))
+    result: Dict[Tuple[int, int], dict] = {}
+    if not ids:
+        return result
+    async with acquire_db() as conn:
+        for i in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[i:i + SQL_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = await conn.execute(
+                f"SELECT * FROM routine_day_status WHERE routine_id IN ({placeholders}) AND month_start BETWEEN ? AND ?",
+                (*chunk, first_month, last_month),
+            )
+            rows = await cur.fetchall()
+            await cur.close()
+            for r in rows:
+                result[(r["routine_id"], r["month_start"])] = dict(r)
+    return result
+
+
+async def insert_day_status_placeholders(rows: Sequence[Tuple[int, str, int, int]]) -> Set[Tuple[int, int]]:
+    """(routine_id, user_id, month_start, 그달 일수)마다 빈 달 행(모두 미확정, rev 0)을 넣는다.
+
+    이미 있는 행은 건드리지 않는다. 실제로 넣은 (routine_id, month_start) 집합을 반환한다.
+    (같은 배치의 쓰기는 쓰기 큐가 한 커밋으로 묶는다)
+    """
+    now = datetime.utcnow().isoformat()
+    results = await asyncio.gather(*(
+        submit_write(
+            """
+            INSERT INTO routine_day_status(routine_id, month_start, user_id, status, finalized_through, rev, updated_at)
+            VALUES(?, ?, ?, ?, ?, 0, ?)
+            ON CONFLICT(routine_id, month_start) DO NOTHING
+            RETURNING routine_id, month_start
+            """,
+            (routine_id, month_start, user_id, bytes(days), month_start - 1, now),
+            fetch=True,
+        )
+        for routine_id, user_id, month_start, days in rows
+    ))
+    return {(r["routine_id"], r["month_start"]) for res in results for r in res.rows or ()}
+
+
+async def save_day_status(routine_id: int, month_start: int, rev: int, status: bytes, finalized_through: int) -> bool:
+    """읽었을 때의 rev가 그대로일 때만 달 행을 저장한다. 그 사이 체크인이 바뀌었거나 행이 지워졌으면 False."""
+    res = await submit_write(
+        """
+        UPDATE routine_day_status SET status = ?, finalized_through = ?, rev = rev + 1, updated_at = ?
+        WHERE routine_id = ? AND month_start = ? AND rev = ?
+        """,
+        (bytes(status), finalized_through, datetime.utcnow().isoformat(), routine_id, month_start, rev),
+    )
+    return res.rowcount > 0
+
+
+async def delete_day_status(user_id: Optional[str] = None) -> int:
+    """일별 상태 행을 지운다(user_id가 없으면 전체). 지운 행 수를 반환한다. 다음 야간 확정 때 다시 만들어진다."""
+    if user_id is None:
+        res = await submit_write("DELETE FROM routine_day_status")
+    else:
+        res = await submit_write("DELETE FROM routine_day_status WHERE user_id = ?", (user_id,))
+    return res.rowcount
@@ -0,0 +1,88 @@
+"""원본이 바뀔 때 파생 상태(연속 완료 상태와 체크포인트, 일별 상태)를 고치거나 버리는 규칙.
+
+체크인/면책/루틴 규칙/사용자 시간대를 바꾸는 쓰기는 같은 트랜잭션에서 여기의 문장을 함께 실행한다
+(체크인은 쓰기 큐의 followups로). 파생 상태를 채우고 앞으로 옮기는 것은 야간 작업뿐이고,
+조회는 남아 있는 스냅샷 뒤를 계산만 한다. 메모리 백엔드의 _invalidate_derived/_patch_checkin_day가 같은 규칙을 따른다.
+
+규칙:
+  - first_day 이후가 바뀌면 first_day를 이미 반영한 스냅샷을 버린다
+    routine_streak: last_day_num >= first_day 인 행은 지우고, 남은 행은 rev만 올려 그 사이의 야간 저장을 막는다
+    routine_streak_checkpoint: month_start > first_day 인 행(그 전날까지 반영)을 지운다
+  - 유효일이 바뀌면(면책) [first_day가 속한 달, last_day]의 일별 상태 달 행을 지운다
+  - 체크인 하나가 바뀌면 일별 상태는 지우지 않고, 확정된 그날 바이트(미완료/스킵/완료)만 체크인 행에 맞춰 고친다
+  - first_day가 None이면(루틴 규칙/시작일, 시간대 변경, 루틴 삭제) 행을 모두 지운다
+"""
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+from domain.day_num import from_day_num, month_start_of
+
+Statement = Tuple[str, Tuple[Any, ...]]
+
+
+def _key(routine_id: Optional[int], user_id: Optional[str]) -> Tuple[str, Any]:
+    if (routine_id is None) == (user_id is None):
+        raise ValueError("routine_id와 user_id 중 하나만 지정해야 합니다")
+    return ("routine_id", routine_id) if routine_id is not None else ("user_id", user_id)
+
+
+def _streak_statements(key: str, value: Any, first_day: Optional[int]) -> List[Statement]:
+    if first_day is None:
+        return [
+            (f"DELETE FROM routine_streak WHERE {key} = ?", (value,)),
+            (f"DELETE FROM routine_streak_checkpoint WHERE {key} = ?", (value,)),
+        ]
+    return [
+        (f"DELETE FROM routine_streak WHERE {key} = ? AND last_day_num >= ?", (value, first_day)),
+        (f"UPDATE routine_streak SET rev = rev + 1 WHERE {key} = ?", (value,)),
+        (f"DELETE FROM routine_streak_checkpoint WHERE {key} = ? AND month_start > ?", (value, first_day)),
+    ]
+
+
+def invalidation_statements(
+    *,
+    routine_id: Optional[int] = None,
+    user_id: Optional[str] = None,
+    first_day: Optional[int] = None,
+    last_day: Optional[int] = None,
+) -> List[Statement]:
+    """루틴 하나(routine_id) 또는 사용자의 모든 루틴(user_id)에서 유효일이 [first_day, last_day](day_num)에서 바뀔 때 실행할 문장들.
+
+    last_day가 None이면 first_day 이후 전체. first_day가 None이면 파생 상태를 모두 지운다.
+    """
+    key, value = _key(routine_id, user_id)
+    statements = _streak_statements(key, value, first_day)
+    if first_day is None:
+        statements.append((f"DELETE FROM routine_day_status WHERE {key} = ?", (value,)))
+    elif last_day is None:
+        statements.append((f"DELETE FROM routine_day_status WHERE {key} = ? AND month_start >= ?", (value, month_start_of(first_day))))
+    else:
+        statements.append((
+            f"DELETE FROM routine_day_status WHERE {key} = ? AND month_start BETWEEN ? AND ?",
+            (value, month_start_of(first_day), last_day),
+        ))
+    return statements
+
+
+def checkin_statements(routine_id: int, day: int) -> List[Statement]:
+    """루틴의 day(day_num) 체크인을 쓴 뒤 실행할 문장들. 체크인 행이 없으면(지운 경우) 미완료로 고친다.
+
+    rev는 고칠 바이트가 없어도(미확정/해당 없음/면책) 올려, 읽는 중이던 야간 저장을 막는다.
+    """
+    month_start = month_start_of(day)
+    patch = (
+        """
+        UPDATE routine_day_status
+           SET status = CASE WHEN substr(status, ?1, 1) IN (x'03', x'04', x'05')
+                             THEN CAST(substr(status, 1, ?1 - 1)
+                                       || COALESCE((SELECT CASE WHEN skipped THEN x'04' WHEN checked_at IS NOT NULL THEN x'05' ELSE x'03' END
+                                                      FROM routine_checkin WHERE routine_id = ?2 AND local_day = ?3), x'03')
+                                       || substr(status, ?1 + 1) AS BLOB)
+                             ELSE status END,
+               rev = rev + 1
+         WHERE routine_id = ?2 AND month_start = ?4
+        """,
+        (day - month_start + 1, routine_id, from_day_num(day).isoformat(), month_start),
+    )
+    return _streak_statements("routine_id", routine_id, day) + [patch]
@@ -3,51 +3,68 @@
 from datetime import date
 from typing import Optional, List
 
-from db.db import connect_db
+from db.db import acquire_db
+from domain.data_version import bump_user
+from domain.day_num import to_day_num
+from domain.exemption_index import invalidate_exemption_index
+from repos.derived_repo import invalidation_statements
 
 
 async def create_exemption(user_id: str, start_day: date | str, end_day: date | str, reason: Optional[str] = None) -> int:
     sd = start_day.isoformat() if isinstance(start_day, date) else start_day
     ed = end_day.isoformat() if isinstance(end_day, date) else end_day
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         cur = await conn.execute(
             "INSERT INTO exemption(user_id, start_day, end_day, reason) VALUES(?, ?, ?, ?)",
             (user_id, sd, ed, reason),
         )
+        for sql, params in invalidation_statements(user_id=user_id, first_day=to_day_num(sd), last_day=to_day_num(ed)):
+            await conn.execute(sql, params)
         await conn.commit()
-        return cur.lastrowid
-    finally:
-        await conn.close()
+    invalidate_exemption_index(user_id)
+    bump_user(user_id)
+    return cur.lastrowid
 
 
 async def get_exemption(exemption_id: int) -> Optional[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM exemption WHERE id = ?", (exemption_id,))
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def list_exemptions_for_user(user_id: str) -> List[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM exemption WHERE user_id = ? ORDER BY start_day DESC", (user_id,))
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
+
+
+async def has_exemption_on(user_id: str, day: date | str) -> bool:
+    """주어진 날짜(양끝 포함)에 걸친 면책 기간이 하나라도 있는지."""
+    iso = day.isoformat() if isinstance(day, date) else day
+    async with acquire_db() as conn:
+        cur = await conn.execute(
+            "SELECT 1 FROM exemption WHERE user_id = ? AND start_day <= ? AND end_day >= ? LIMIT 1",
+            (user_id, iso, iso),
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        return row is not None
 
 
 async def delete_exemption(exemption_id: int) -> None:
-    conn = await connect_db()
-    try:
-        await conn.execute("DELETE FROM exemption WHERE id = ?", (exemption_id,))
+    async with acquire_db(readonly=False) as conn:
+        cur = await conn.execute("DELETE FROM exemption WHERE id = ? RETURNING user_id, start_day, end_day", (exemption_id,))
+        rows = await cur.fetchall()
+        await cur.close()
+        for r in rows:
+            for sql, params in invalidation_statements(user_id=str(r["user_id"]), first_day=to_day_num(r["start_day"]), last_day=to_day_num(r["end_day"])):
+                await conn.execute(sql, params)
         await conn.commit()
-    finally:
-        await conn.close()
+    for r in rows:
+        invalidate_exemption_index(str(r["user_id"]))
+        bump_user(r["user_id"])
 
@@ -3,32 +3,26 @@
 from datetime import datetime
 from typing import Optional, List
 
-from db.db import connect_db
+from db.db import acquire_db
 
 
 async def create_goal(user_id: str, title: str, deadline: Optional[str] = None, description: Optional[str] = None) -> int:
     now = datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         cur = await conn.execute(
             "INSERT INTO goal(user_id, title, deadline, description, active, created_at) VALUES(?, ?, ?, ?, 1, ?)",
             (user_id, title, deadline, description, now),
         )
         await conn.commit()
         return cur.lastrowid
-    finally:
-        await conn.close()
 
 
 async def get_goal(goal_id: int) -> Optional[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM goal WHERE id = ?", (goal_id,))
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def update_goal(goal_id: int, **fields) -> None:
@@ -37,29 +31,20 @@ async def update_goal(goal_id: int, **fields) -> None:
     keys = ", ".join(f"{k} = ?" for k in fields.keys())
     vals = list(fields.values())
     vals.append(goal_id)
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         await conn.execute(f"UPDATE goal SET {keys} WHERE id = ?", vals)
         await conn.commit()
-    finally:
-        await conn.close()
 
 
 async def delete_goal(goal_id: int) -> None:
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         await conn.execute("DELETE FROM goal WHERE id = ?", (goal_id,))
         await conn.commit()
-    finally:
-        await conn.close()
 
 
 async def list_active_goals_for_user(user_id: str) -> List[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM goal WHERE user_id = ? AND active = 1", (user_id,))
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
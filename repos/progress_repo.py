@@ -3,14 +3,13 @@
 from datetime import datetime
 from typing import List, Optional
 
-from db.db import connect_db
+from db.db import acquire_db
 
 
 async def add_progress(goal_id: int, user_id: str, delta: int) -> int:
     """goal_progress에 기록을 남기고 goal.current를 갱신한다."""
     now = datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         # 현재 목표의 값 읽기
         cur = await conn.execute("SELECT current FROM goal WHERE id = ?", (goal_id,))
         row = await cur.fetchone()
@@ -28,17 +27,12 @@ async def add_progress(goal_id: int, user_id: str, delta: int) -> int:
         await conn.execute("UPDATE goal SET current = ? WHERE id = ?", (new_value, goal_id))
         await conn.commit()
         return cur.lastrowid
-    finally:
-        await conn.close()
 
 
 async def list_progress_for_goal(goal_id: int) -> List[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM goal_progress WHERE goal_id = ? ORDER BY created_at DESC", (goal_id,))
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
 
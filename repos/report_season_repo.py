@@ -3,13 +3,13 @@ from __future__ import annotations
 from datetime import date, datetime, UTC
 from typing import Optional, List, Dict, Any
 
-from db.db import connect_db
+from db.db import acquire_db
+from domain.data_version import bump_user
 
 
 async def get_first_checkin_day(user_id: str) -> Optional[str]:
     """유저의 첫 완료 체크인 local_day(YYYY-MM-DD). 없으면 None."""
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             """
             SELECT MIN(local_day) AS first_day
@@ -23,8 +23,6 @@ async def get_first_checkin_day(user_id: str) -> Optional[str]:
         if not row or row["first_day"] is None:
             return None
         return str(row["first_day"])
-    finally:
-        await conn.close()
 
 
 async def ensure_default_season(user_id: str, title: str = "현재 시즌") -> int:
@@ -37,8 +35,7 @@ async def ensure_default_season(user_id: str, title: str = "현재 시즌") -> i
 
     반환: current season id
     """
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             "SELECT id FROM report_season WHERE user_id = ? ORDER BY start_day DESC, id DESC LIMIT 1",
             (user_id,),
@@ -48,12 +45,14 @@ async def ensure_default_season(user_id: str, title: str = "현재 시즌") -> i
         if row:
             return int(row["id"])
 
-        now = datetime.now(UTC).isoformat()
+    now = datetime.now(UTC).isoformat()
 
-        # 첫 시즌 start_day는 '첫 완료 체크인 day'를 우선 사용
-        first_day = await get_first_checkin_day(user_id)
-        start_day = first_day or date.today().isoformat()
+    # 첫 시즌 start_day는 '첫 완료 체크인 day'를 우선 사용
+    # (풀 커넥션을 쥔 채로 다른 repo 함수를 부르면 풀이 고갈될 수 있으므로 반납 후 조회)
+    first_day = await get_first_checkin_day(user_id)
+    start_day = first_day or date.today().isoformat()
 
+    async with acquire_db(readonly=False) as conn:
         cur2 = await conn.execute(
             """
             INSERT INTO report_season(user_id, title, start_day, end_day, created_at, closed_at, is_active)
@@ -62,14 +61,12 @@ async def ensure_default_season(user_id: str, title: str = "현재 시즌") -> i
             (user_id, title, start_day, now),
         )
         await conn.commit()
-        return int(cur2.lastrowid)
-    finally:
-        await conn.close()
+    bump_user(user_id)
+    return int(cur2.lastrowid)
 
 
 async def list_seasons_for_user(user_id: str, limit: int = 12) -> List[Dict[str, Any]]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             """
             SELECT id, user_id, title, start_day, end_day, created_at, closed_at, is_active
@@ -83,13 +80,10 @@ async def list_seasons_for_user(user_id: str, limit: int = 12) -> List[Dict[str,
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
 
 
 async def get_season(user_id: str, season_id: int) -> Optional[Dict[str, Any]]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             "SELECT * FROM report_season WHERE user_id = ? AND id = ?",
             (user_id, season_id),
@@ -97,13 +91,10 @@ async def get_season(user_id: str, season_id: int) -> Optional[Dict[str, Any]]:
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def get_current_season(user_id: str) -> Optional[Dict[str, Any]]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             """
             SELECT * FROM report_season
@@ -116,8 +107,6 @@ async def get_current_season(user_id: str) -> Optional[Dict[str, Any]]:
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def get_or_create_current_season(user_id: str) -> Dict[str, Any]:
@@ -139,8 +128,7 @@ async def get_season_by_id_for_user(user_id: str, season_id: int) -> Optional[Di
 
 async def get_last_checkin_day(user_id: str) -> Optional[str]:
     """유저의 마지막 완료 체크인 local_day (YYYY-MM-DD). 없으면 None."""
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute(
             """
             SELECT MAX(local_day) AS last_day
@@ -154,8 +142,6 @@ async def get_last_checkin_day(user_id: str) -> Optional[str]:
         if not row or row["last_day"] is None:
             return None
         return str(row["last_day"])
-    finally:
-        await conn.close()
 
 
 async def close_previous_season_to_last_checkin(user_id: str) -> None:
@@ -164,8 +150,7 @@ async def close_previous_season_to_last_checkin(user_id: str) -> None:
     if not last_day:
         return
 
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         # 최신 시즌(현재 시즌)을 제외한 '직전 시즌'을 찾는다.
         cur = await conn.execute(
             """
@@ -192,8 +177,7 @@ async def close_previous_season_to_last_checkin(user_id: str) -> None:
             (last_day, prev_id, user_id),
         )
         await conn.commit()
-    finally:
-        await conn.close()
+    bump_user(user_id)
 
 
 async def create_new_season(user_id: str, title: str, start_day: str, auto_close_prev: bool = True) -> int:
@@ -204,8 +188,7 @@ async def create_new_season(user_id: str, title: str, start_day: str, auto_close
     반환: new season id
     """
     now = datetime.now(UTC).isoformat()
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         cur = await conn.execute(
             """
             INSERT INTO report_season(user_id, title, start_day, end_day, created_at, closed_at, is_active)
@@ -215,8 +198,7 @@ async def create_new_season(user_id: str, title: str, start_day: str, auto_close
         )
         await conn.commit()
         new_id = int(cur.lastrowid)
-    finally:
-        await conn.close()
+    bump_user(user_id)
 
     if auto_close_prev:
         # 새 시즌이 만들어졌으니, '직전 시즌'은 이전 레코드가 됨
@@ -0,0 +1,165 @@
+﻿from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from db.db import SQL_IN_CHUNK, acquire_db
+
+# 배치 스트림에서 한 번에 가져올 체크인 행 수
+ROLLUP_FETCH_ROWS = max(1, int(os.getenv('ROLLUP_FETCH_ROWS', '2000')))
+
+_ROLLUP_COLUMNS = ("done_7d", "valid_7d", "done_30d", "valid_30d", "done_all", "valid_all", "max_streak", "current_streak")
+
+
+async def list_rollup_user_ids(after_user_id: str, limit: int) -> List[str]:
+    """활성 루틴을 가진 사용자 중 after_user_id 다음부터 limit명(user_id 오름차순)."""
+    async with acquire_db(readonly=True) as conn:
+        cur = await conn.execute(
+            "SELECT DISTINCT user_id FROM routine WHERE active = 1 AND user_id > ? ORDER BY user_id LIMIT ?",
+            (after_user_id, limit),
+        )
+        rows = await cur.fetchall()
+        await cur.close()
+        return [str(r[0]) for r in rows]
+
+
+async def list_day_clock_settings() -> List[dict]:
+    """user_settings에 있는 서로 다른 (tz, day_cutoff_hour) 조합. 사용자 수와 상관없이 쿼리 한 번."""
+    async with acquire_db(readonly=True) as conn:
+        cur = await conn.execute("SELECT DISTINCT tz, day_cutoff_hour FROM user_settings")
+        rows = await cur.fetchall()
+        await cur.close()
+        return [dict(r) for r in rows]
+
+
+async def get_rollup_inputs(user_ids: Sequence[str]) -> Dict[str, List[dict]]:
+    """여러 사용자의 활성 루틴/면책/사용자 설정을 묶어 읽는다.
+
+    반환: {"routines": [...], "exemptions": [...], "settings": [...]}
+    (SQL_IN_CHUNK명씩 쿼리 세 번. 사용자 수가 그보다 적으면 쿼리 세 번)
+    """
+    result: Dict[str, List[dict]] = {"routines": [], "exemptions": [], "settings": []}
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return result
+    queries = (
+        ("routines", "SELECT * FROM routine WHERE user_id IN ({}) AND active = 1 ORDER BY user_id, COALESCE(order_index, id), id"),
+        ("exemptions", "SELECT * FROM exemption WHERE user_id IN ({})"),
+        ("settings", "SELECT * FROM user_settings WHERE user_id IN ({})"),
+    )
+    async with acquire_db(readonly=True) as conn:
+        for i in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[i:i + SQL_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            for key, sql in queries:
+                cur = await conn.execute(sql.format(placeholders), chunk)
+                rows = await cur.fetchall()
+                await cur.close()
+                result[key].extend(dict(r) for r in rows)
+    return result
+
+
+async def iter_checkins_for_users(first_user_id: str, last_user_id: str, end_day_num: int) -> AsyncIterator[Tuple[str, int, int, int, int]]:
+    """[first_user_id, last_user_id] 사용자들의 체크인을 (user_id, routine_id, day_num) 순서로 흘려보낸다.
+
+    행은 (user_id, routine_id, day_num, skipped, done) 튜플이고, ROLLUP_FETCH_ROWS개씩 읽어
+    전체를 메모리에 올리지 않는다. 순서는 idx_checkin_user_routine_day_num 인덱스 순서 그대로(정렬 없음).
+    """
+    async with acquire_db(readonly=True) as conn:
+        cur = await conn.execute(
+            """
+            SELECT user_id, routine_id, day_num, skipped, checked_at IS NOT NULL
+            FROM routine_checkin
+            WHERE user_id BETWEEN ? AND ? AND day_num <= ?
+            ORDER BY user_id, routine_id, day_num
+            """,
+            (first_user_id, last_user_id, end_day_num),
+        )
+        try:
+            while True:
+                rows = await cur.fetchmany(ROLLUP_FETCH_ROWS)
+                if not rows:
+                    break
+                for r in rows:
+                    yield str(r[0]), r[1], r[2], 1 if r[3] else 0, r[4]
+        finally:
+            await cur.close()
+
+
+async def get_rollup_run(rollup_day: str) -> Optional[dict]:
+    """기준일의 배치 진행 상태(metrics_rollup_run 행). 시작한 적 없으면 None."""
+    async with acquire_db() as conn:
+        cur = await conn.execute("SELECT * FROM metrics_rollup_run WHERE rollup_day = ?", (rollup_day,))
+        row = await cur.fetchone()
+        await cur.close()
+        return dict(row) if row else None
+
+
+async def start_rollup_run(rollup_day: str, restart: bool = False) -> dict:
+    """기준일 배치를 시작한다. 이미 있으면 그 상태를 그대로 이어 쓰고, restart면 롤업 행을 지우고 처음부터."""
+    now = datetime.utcnow().isoformat()
+    async with acquire_db(readonly=False) as conn:
+        if restart:
+            await conn.execute("DELETE FROM metrics_rollup WHERE rollup_day = ?", (rollup_day,))
+            await conn.execute("DELETE FROM metrics_rollup_run WHERE rollup_day = ?", (rollup_day,))
+        await conn.execute(
+            "INSERT INTO metrics_rollup_run(rollup_day, started_at) VALUES(?, ?) ON CONFLICT(rollup_day) DO NOTHING",
+            (rollup_day, now),
+        )
+        await conn.commit()
+        cur = await conn.execute("SELECT * FROM metrics_rollup_run WHERE rollup_day = ?", (rollup_day,))
+        row = await cur.fetchone()
+        await cur.close()
+        return dict(row)
+
+
+async def save_rollup_chunk(rollup_day: str, rows: Sequence[Tuple], last_user_id: str, users: int) -> None:
+    """청크 결과를 쓰고 진행 위치(last_user_id)를 같은 트랜잭션에서 옮긴다.
+
+    rows: (user_id, routine_id, done_7d, valid_7d, done_30d, valid_30d, done_all, valid_all, max_streak, current_streak)
+    중간에 실패하면 청크 전체가 롤백되므로, 다음 실행은 이 청크의 첫 사용자부터 다시 한다.
+    """
+    columns = ", ".join(_ROLLUP_COLUMNS)
+    placeholders = ", ".join("?" for _ in _ROLLUP_COLUMNS)
+    async with acquire_db(readonly=False) as conn:
+        await conn.executemany(
+            f"INSERT OR REPLACE INTO metrics_rollup(rollup_day, user_id, routine_id, {columns}) VALUES(?, ?, ?, {placeholders})",
+            [(rollup_day, *row) for row in rows],
+        )
+        await conn.execute(
+            """
+            UPDATE metrics_rollup_run
+               SET last_user_id = ?, users_done = users_done + ?, rows_written = rows_written + ?
+             WHERE rollup_day = ?
+            """,
+            (last_user_id, users, len(rows), rollup_day),
+        )
+        await conn.commit()
+
+
+async def finish_rollup_run(rollup_day: str) -> None:
+    async with acquire_db(readonly=False) as conn:
+        await conn.execute(
+            "UPDATE metrics_rollup_run SET finished_at = ? WHERE rollup_day = ?",
+            (datetime.utcnow().isoformat(), rollup_day),
+        )
+        await conn.commit()
+
+
+async def list_metrics_rollup(rollup_day: str, user_id: Optional[str] = None) -> List[dict]:
+    """기준일 롤업 행(루틴 이름 포함). user_id가 있으면 그 사용자만, 루틴 순서대로."""
+    sql = """
+        SELECT m.*, r.name AS name
+        FROM metrics_rollup m LEFT JOIN routine r ON r.id = m.routine_id
+        WHERE m.rollup_day = ?{}
+        ORDER BY m.user_id, COALESCE(r.order_index, m.routine_id), m.routine_id
+    """
+    async with acquire_db() as conn:
+        if user_id is None:
+            cur = await conn.execute(sql.format(""), (rollup_day,))
+        else:
+            cur = await conn.execute(sql.format(" AND m.user_id = ?"), (rollup_day, user_id))
+        rows = await cur.fetchall()
+        await cur.close()
+        return [dict(r) for r in rows]
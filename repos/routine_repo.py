@@ -3,14 +3,24 @@
 from datetime import datetime, date
 from typing import List, Optional
 
-from db.db import connect_db
-from domain.time_utils import local_day, is_applicable_day
+from db.db import acquire_db
+from domain.data_version import bump_routine, bump_user
+from domain.recurrence import normalize_rule
+from domain.time_utils import routine_rule, user_local_day
+from repos.derived_repo import invalidation_statements
 
+# 바뀌면 루틴의 유효일/시작일이 달라져 파생 상태를 모두 버려야 하는 컬럼
+_RULE_COLUMNS = {"weekend_mode", "recurrence", "created_at", "user_id"}
 
-async def create_routine(user_id: str, name: str, weekend_mode: str = "weekday", deadline_time: Optional[str] = None, notes: Optional[str] = None, active: int = 1, order_index: Optional[int] = None) -> int:
+
+async def create_routine(user_id: str, name: str, weekend_mode: str = "weekday", deadline_time: Optional[str] = None, notes: Optional[str] = None, active: int = 1, order_index: Optional[int] = None, recurrence: Optional[str] = None) -> int:
+    """루틴 생성. recurrence(반복 규칙, domain.recurrence)가 있으면 weekend_mode 대신 그 규칙을 따른다.
+
+    잘못된 규칙이면 RecurrenceError(ValueError)를 그대로 올린다.
+    """
     now = datetime.utcnow().isoformat()
-    conn = await connect_db()
-    try:
+    recurrence = normalize_rule(recurrence) if recurrence else None
+    async with acquire_db(readonly=False) as conn:
         # order_index 가 주어지지 않으면, 해당 user_id 의 현재 최대 order_index + 1 로 설정
         if order_index is None:
             cur = await conn.execute("SELECT COALESCE(MAX(order_index), 0) FROM routine WHERE user_id = ?", (user_id,))
@@ -20,52 +30,50 @@ async def create_routine(user_id: str, name: str, weekend_mode: str = "weekday",
             order_index = max_idx + 1
 
         cur = await conn.execute(
-            "INSERT INTO routine(user_id, name, weekend_mode, deadline_time, notes, active, created_at, order_index) VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
-            (user_id, name, weekend_mode, deadline_time, notes, active, now, order_index),
+            "INSERT INTO routine(user_id, name, weekend_mode, deadline_time, notes, active, created_at, order_index, recurrence) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, name, weekend_mode, deadline_time, notes, active, now, order_index, recurrence),
         )
         await conn.commit()
-        return cur.lastrowid
-    finally:
-        await conn.close()
+    bump_user(user_id)
+    return cur.lastrowid
 
 
 async def get_routine(routine_id: int) -> Optional[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM routine WHERE id = ?", (routine_id,))
         row = await cur.fetchone()
         await cur.close()
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def update_routine(routine_id: int, **fields) -> None:
     if not fields:
         return
+    if "recurrence" in fields:
+        fields["recurrence"] = normalize_rule(fields["recurrence"]) if fields["recurrence"] else None
     keys = ", ".join(f"{k} = ?" for k in fields.keys())
     vals = list(fields.values())
     vals.append(routine_id)
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         await conn.execute(f"UPDATE routine SET {keys} WHERE id = ?", vals)
+        if fields.keys() & _RULE_COLUMNS:
+            for sql, params in invalidation_statements(routine_id=routine_id):
+                await conn.execute(sql, params)
         await conn.commit()
-    finally:
-        await conn.close()
+    bump_routine(routine_id)
 
 
 async def delete_routine(routine_id: int) -> None:
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
         await conn.execute("DELETE FROM routine WHERE id = ?", (routine_id,))
+        for sql, params in invalidation_statements(routine_id=routine_id):
+            await conn.execute(sql, params)
         await conn.commit()
-    finally:
-        await conn.close()
+    bump_routine(routine_id)
 
 
 async def list_active_routines_for_user(user_id: str) -> List[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         # 정렬: order_index ASC, fallback 으로 id ASC
         cur = await conn.execute(
             "SELECT * FROM routine WHERE user_id = ? AND active = 1 ORDER BY COALESCE(order_index, id), id",
@@ -74,14 +82,20 @@ async def list_active_routines_for_user(user_id: str) -> List[dict]:
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
-    finally:
-        await conn.close()
+
+
+async def list_routine_user_ids() -> List[str]:
+    """루틴을 하나라도 가진 사용자 id 목록(user_settings가 비어 있을 때 스케줄러 fallback용)."""
+    async with acquire_db(readonly=True) as conn:
+        cur = await conn.execute("SELECT DISTINCT user_id FROM routine")
+        rows = await cur.fetchall()
+        await cur.close()
+        return [str(r[0]) for r in rows]
 
 
 async def routines_applicable_for_date(user_id: str, d: date) -> List[dict]:
-    """주어진 날짜(local_day) 기준으로 적용 가능한(주말모드에 맞는) 활성 루틴 목록을 반환한다."""
-    conn = await connect_db()
-    try:
+    """주어진 날짜(local_day) 기준으로 적용 가능한(반복 규칙/주말모드에 맞는) 활성 루틴 목록을 반환한다."""
+    async with acquire_db() as conn:
         cur = await conn.execute(
             "SELECT * FROM routine WHERE user_id = ? AND active = 1 ORDER BY COALESCE(order_index, id), id",
             (user_id,),
@@ -90,14 +104,14 @@ async def routines_applicable_for_date(user_id: str, d: date) -> List[dict]:
         await cur.close()
         result = []
         for r in rows:
-            if is_applicable_day(r["weekend_mode"], d):
-                result.append(dict(r))
+            r = dict(r)
+            rule = await routine_rule(r)
+            if rule is not None and rule.occurs_on(d):
+                result.append(r)
         return result
-    finally:
-        await conn.close()
 
 
 async def prepare_checkin_for_date(user_id: str, dt: datetime) -> List[dict]:
-    """주어진 시각(dt)의 local_day에 대해 체크인이 준비되어야 하는 루틴 목록 반환."""
-    ld = local_day(dt)
+    """주어진 시각(dt)의 사용자 기준 업무일(user_local_day)에 체크인이 준비되어야 하는 루틴 목록 반환."""
+    ld = await user_local_day(user_id, dt)
     return await routines_applicable_for_date(user_id, ld)
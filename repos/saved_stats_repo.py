@@ -1 +1,54 @@
+from __future__ import annotations
 
+from datetime import datetime
+from typing import List, Optional
+
+from db.db import acquire_db
+from db.write_queue import submit_write
+
+
+async def get_saved_stats(season_id: int) -> Optional[dict]:
+    """시즌 스냅샷(saved_stats 행). 없거나 무효화됐으면 None. metrics는 JSON 문자열 그대로."""
+    async with acquire_db() as conn:
+        cur = await conn.execute("SELECT * FROM saved_stats WHERE season_id = ?", (season_id,))
+        row = await cur.fetchone()
+        await cur.close()
+        return dict(row) if row else None
+
+
+async def list_saved_stats_for_user(user_id: str) -> List[dict]:
+    """사용자의 시즌 스냅샷 목록(최근 시즌 먼저)."""
+    async with acquire_db() as conn:
+        cur = await conn.execute(
+            "SELECT * FROM saved_stats WHERE user_id = ? ORDER BY end_day DESC, season_id DESC",
+            (user_id,),
+        )
+        rows = await cur.fetchall()
+        await cur.close()
+        return [dict(r) for r in rows]
+
+
+async def save_saved_stats(season_id: int, user_id: str, start_day: str, end_day: str, metrics: str) -> None:
+    """시즌 스냅샷을 저장한다(있으면 덮어쓴다). metrics는 JSON 문자열."""
+    await submit_write(
+        """
+        INSERT INTO saved_stats(season_id, user_id, start_day, end_day, metrics, created_at)
+        VALUES(?, ?, ?, ?, ?, ?)
+        ON CONFLICT(season_id) DO UPDATE SET
+          user_id = excluded.user_id,
+          start_day = excluded.start_day,
+          end_day = excluded.end_day,
+          metrics = excluded.metrics,
+          created_at = excluded.created_at
+        """,
+        (season_id, user_id, start_day, end_day, metrics, datetime.utcnow().isoformat()),
+    )
+
+
+async def delete_saved_stats(user_id: Optional[str] = None) -> int:
+    """시즌 스냅샷을 지운다(user_id가 없으면 전체). 지운 행 수를 반환한다. 다음 조회 때 다시 만들어진다."""
+    if user_id is None:
+        res = await submit_write("DELETE FROM saved_stats")
+    else:
+        res = await submit_write("DELETE FROM saved_stats WHERE user_id = ?", (user_id,))
+    return res.rowcount
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from db.db import SQL_IN_CHUNK, acquire_db
+from db.write_queue import submit_write
+
+
+async def get_routine_streaks(routine_ids: Iterable[int]) -> Dict[int, dict]:
+    """여러 루틴의 연속 완료 상태(routine_streak 행)를 한 번에 읽는다. 행이 없는 루틴은 키가 없다."""
+    ids = list(dict.fromkeys(routine_ids))
+    result: Dict[int, dict] = {}
+    if not ids:
+        return result
+    async with acquire_db() as conn:
+        for i in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[i:i + SQL_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = await conn.execute(f"SELECT * FROM routine_streak WHERE routine_id IN ({placeholders})", chunk)
+            rows = await cur.fetchall()
+            await cur.close()
+            for r in rows:
+                result[r["routine_id"]] = dict(r)
+    return result
+
+
+async def get_latest_streak_checkpoints(routine_ids: Iterable[int]) -> Dict[int, dict]:
+    """루틴마다 가장 늦은 체크포인트(routine_streak_checkpoint 행). 체크포인트가 없는 루틴은 키가 없다."""
+    ids = list(dict.fromkeys(routine_ids))
+    result: Dict[int, dict] = {}
+    if not ids:
+        return result
+    async with acquire_db() as conn:
+        for i in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[i:i + SQL_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            # MAX()와 함께 고른 나머지 컬럼은 그 최댓값 행의 값이다(SQLite)
+            cur = await conn.execute(
+                f"""
+                SELECT routine_id, MAX(month_start) AS month_start, user_id, current_streak, run_start_day_num, max_before_run
+                FROM routine_streak_checkpoint WHERE routine_id IN ({placeholders}) GROUP BY routine_id
+                """,
+                chunk,
+            )
+            rows = await cur.fetchall()
+            await cur.close()
+            for r in rows:
+                result[r["routine_id"]] = dict(r)
+    return result
+
+
+async def reset_routine_streak(routine_id: int, user_id: str, start_day_num: int) -> None:
+    """루틴의 상태를 '시작일 전날까지 반영, 연속 0'으로 초기화한다(행이 있으면 rev를 올려 덮어쓴다).
+
+    야간 작업이 계산 전에 자리표시 행으로 넣는다. 계산하는 동안 들어온 쓰기가 rev를 올리거나 행을 지워 저장을 막는다.
+    체크포인트는 그대로 둔다(남아 있는 것은 쓰기 경로가 버리지 않은, 아직 맞는 값이다).
+    """
+    now = datetime.utcnow().isoformat()
+    await submit_write(
+        """
+        INSERT INTO routine_streak(routine_id, user_id, current_streak, max_streak, last_day_num, run_start_day_num, max_before_run, rev, updated_at)
+        VALUES(?, ?, 0, 0, ?, ?, 0, 0, ?)
+        ON CONFLICT(routine_id) DO UPDATE SET
+          user_id = excluded.user_id,
+          current_streak = 0,
+          max_streak = 0,
+          last_day_num = excluded.last_day_num,
+          run_start_day_num = excluded.run_start_day_num,
+          max_before_run = 0,
+          rev = rev + 1,
+          updated_at = excluded.updated_at
+        """,
+        (routine_id, user_id, start_day_num - 1, start_day_num, now),
+    )
+
+
+async def save_routine_streak(
+    routine_id: int,
+    rev: int,
+    current_streak: int,
+    max_streak: int,
+    last_day_num: int,
+    run_start_day_num: int,
+    max_before_run: int,
+    checkpoints: Sequence[Tuple[int, int, int, int]] = (),
+) -> bool:
+    """읽었을 때의 rev가 그대로일 때만 상태를 저장한다. 그 사이 체크인/면책이 바뀌었으면 False.
+
+    checkpoints: 접으면서 지나간 달 1일마다 (month_start, current_streak, run_start_day_num, max_before_run).
+    상태보다 먼저(같은 rev일 때만) 넣는다. 그 뒤에 들어온 쓰기는 쓰기 경로(repos.derived_repo)가 그날 이후 체크포인트를 지운다.
+    """
+    if checkpoints:
+        values = ",".join("(?, ?, ?, ?)" for _ in checkpoints)
+        await submit_write(
+            f"""
+            INSERT OR REPLACE INTO routine_streak_checkpoint(routine_id, month_start, user_id, current_streak, run_start_day_num, max_before_run)
+            SELECT s.routine_id, v.column1, s.user_id, v.column2, v.column3, v.column4
+              FROM (VALUES {values}) AS v
+              JOIN routine_streak AS s ON s.routine_id = ? AND s.rev = ?
+            """,
+            tuple(x for cp in checkpoints for x in cp) + (routine_id, rev),
+        )
+    res = await submit_write(
+        """
+        UPDATE routine_streak SET
+          current_streak = ?, max_streak = ?, last_day_num = ?, run_start_day_num = ?, max_before_run = ?,
+          rev = rev + 1, updated_at = ?
+        WHERE routine_id = ? AND rev = ?
+        """,
+        (current_streak, max_streak, last_day_num, run_start_day_num, max_before_run,
+         datetime.utcnow().isoformat(), routine_id, rev),
+    )
+    return res.rowcount > 0
+
+
+async def delete_routine_streaks(user_id: Optional[str] = None) -> int:
+    """연속 완료 상태와 체크포인트를 지운다(user_id가 없으면 전체). 지운 상태 행 수를 반환한다. 다음 야간 작업 때 다시 만들어진다."""
+    if user_id is None:
+        await submit_write("DELETE FROM routine_streak_checkpoint")
+        res = await submit_write("DELETE FROM routine_streak")
+    else:
+        await submit_write("DELETE FROM routine_streak_checkpoint WHERE user_id = ?", (user_id,))
+        res = await submit_write("DELETE FROM routine_streak WHERE user_id = ?", (user_id,))
+    return res.rowcount
@@ -1,47 +1,60 @@
 ﻿from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from db.db import connect_db
+from db.db import acquire_db
+from domain.data_version import bump_user
+from domain.day_clock import DEFAULT_DAY_CUTOFF_HOUR, invalidate_user_day, normalize_cutoff_hour
+from repos.derived_repo import invalidation_statements
 
 
 async def upsert_user_settings(
     user_id: str,
-    tz: str = "Asia/Seoul",
+    tz: Optional[str] = None,
     reminder_time: str = "23:00",
     suggest_goals_on_checkin: int | bool = True,
+    day_cutoff_hour: Optional[int] = None,
 ) -> None:
     """user_settings 테이블에 upsert(기본값 포함).
 
-    - 새 레코드가 없으면 INSERT
-    - 있으면 tz, reminder_time, suggest_goals_on_checkin 을 갱신
+    - 새 레코드가 없으면 INSERT (tz 기본 'Asia/Seoul', day_cutoff_hour 기본 4)
+    - 있으면 reminder_time, suggest_goals_on_checkin 을 갱신
+    - tz, day_cutoff_hour 는 None이면 기존 값을 유지
+    - 새 레코드이거나 tz/day_cutoff_hour가 바뀌면 루틴 시작일(업무일)이 달라질 수 있어 파생 상태를 버린다
     """
     now = datetime.utcnow().isoformat()
     # bool 로 들어오면 0/1 로 정규화
     suggest_flag = 1 if bool(suggest_goals_on_checkin) else 0
+    cutoff = None if day_cutoff_hour is None else normalize_cutoff_hour(day_cutoff_hour)
 
-    conn = await connect_db()
-    try:
+    async with acquire_db(readonly=False) as conn:
+        cur = await conn.execute("SELECT tz, day_cutoff_hour FROM user_settings WHERE user_id = ?", (user_id,))
+        prev = await cur.fetchone()
+        await cur.close()
+        if prev is None or (tz is not None and tz != prev["tz"]) or (cutoff is not None and cutoff != prev["day_cutoff_hour"]):
+            for sql, params in invalidation_statements(user_id=user_id):
+                await conn.execute(sql, params)
         await conn.execute(
             """
-            INSERT INTO user_settings(user_id, tz, reminder_time, suggest_goals_on_checkin, created_at)
-            VALUES(?, ?, ?, ?, ?)
+            INSERT INTO user_settings(user_id, tz, reminder_time, suggest_goals_on_checkin, day_cutoff_hour, created_at)
+            VALUES(?, COALESCE(?, 'Asia/Seoul'), ?, ?, COALESCE(?, 4), ?)
             ON CONFLICT(user_id) DO UPDATE SET
-              tz = excluded.tz,
+              tz = COALESCE(?, tz),
               reminder_time = excluded.reminder_time,
-              suggest_goals_on_checkin = excluded.suggest_goals_on_checkin
+              suggest_goals_on_checkin = excluded.suggest_goals_on_checkin,
+              day_cutoff_hour = COALESCE(?, day_cutoff_hour)
             """,
-            (user_id, tz, reminder_time, suggest_flag, now),
+            (user_id, tz, reminder_time, suggest_flag, cutoff, now, tz, cutoff),
         )
         await conn.commit()
-    finally:
-        await conn.close()
+    # 시간대/하루 경계가 바뀌었을 수 있으므로 캐시한 업무일 경계를 버린다
+    invalidate_user_day(user_id)
+    bump_user(user_id)
 
 
 async def get_user_settings(user_id: str) -> Optional[dict]:
-    conn = await connect_db()
-    try:
+    async with acquire_db() as conn:
         cur = await conn.execute("SELECT * FROM user_settings WHERE user_id = ?", (user_id,))
         row = await cur.fetchone()
         await cur.close()
@@ -51,6 +64,15 @@ async def get_user_settings(user_id: str) -> Optional[dict]:
         # 없다면 코드 레벨 기본값을 채워줌(마이그레이션 이전 레코드 호환)
         if "suggest_goals_on_checkin" not in data or data["suggest_goals_on_checkin"] is None:
             data["suggest_goals_on_checkin"] = 1
+        if data.get("day_cutoff_hour") is None:
+            data["day_cutoff_hour"] = DEFAULT_DAY_CUTOFF_HOUR
         return data
-    finally:
-        await conn.close()
+
+
+async def list_all_user_settings() -> List[dict]:
+    """스케줄러용: 모든 사용자의 (user_id, tz, reminder_time). 전체를 훑는 쿼리이므로 읽기 전용 레인을 쓴다."""
+    async with acquire_db(readonly=True) as conn:
+        cur = await conn.execute("SELECT user_id, tz, reminder_time FROM user_settings")
+        rows = await cur.fetchall()
+        await cur.close()
+        return [dict(r) for r in rows]
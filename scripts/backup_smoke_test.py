@@ -0,0 +1,71 @@
+"""온라인 백업 스모크 테스트.
+
+시나리오:
+- 임시 DB에 체크인을 채운 뒤, 쓰기 큐로 체크인을 계속 넣는 동안 작은 페이지 단위로 백업
+- 백업이 끝나기 전에도 쓰기가 계속 커밋되는지(봇이 멈추지 않는지) 확인
+- 스냅샷이 integrity_check를 통과하고 행이 들어 있는지, KEEP개만 남는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일/디렉터리를 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="backup_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "database.db")
+
+from db.db import DB_PATH, init_db, close_pool
+from db.backup import BackupManager
+from db.write_queue import stop_write_queue
+from repos import checkin_repo
+
+USER = "backup_test_user"
+
+
+async def main() -> None:
+    await init_db()
+    try:
+        await asyncio.gather(*(checkin_repo.upsert_checkin_done(i, USER, "2026-01-05") for i in range(2000)))
+
+        bm = BackupManager(DB_PATH, str(Path(_tmpdir) / "backups"), keep=2, pages=1, step_sleep_ms=1)
+        backup = asyncio.create_task(bm.run_once())
+        written = 0
+        while not backup.done():
+            await checkin_repo.upsert_checkin_done(50_000 + written, USER, "2026-01-06")
+            written += 1
+        snap = await backup
+        assert snap is not None and snap.exists(), bm.stats()
+        assert written > 0, "쓰기가 백업 동안 진행되지 않음"
+
+        db = sqlite3.connect(str(snap))
+        try:
+            assert db.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            n = db.execute("SELECT COUNT(*) FROM routine_checkin WHERE local_day = '2026-01-05'").fetchone()[0]
+            assert n == 2000, n
+        finally:
+            db.close()
+
+        for _ in range(2):
+            assert await bm.run_once() is not None
+        assert len(bm.snapshots()) == 2, bm.snapshots()
+        assert not list(Path(bm.backup_dir).glob("*.tmp"))
+        print("stats:", bm.stats())
+        print(f"OK: snapshot verified, {written} writes committed during backup, rotation keeps {bm.keep}")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
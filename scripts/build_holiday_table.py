@@ -0,0 +1,35 @@
+"""한국 공휴일 비트맵(kr_holidays.bin)을 미리 만들어 둔다.
+
+배포/빌드 단계에서 실행하면 봇 시작 시 holidays 패키지를 import 하지 않아도 된다.
+범위는 HOLIDAY_TABLE_START_YEAR / HOLIDAY_TABLE_END_YEAR, 경로는 HOLIDAY_TABLE_PATH 환경변수를 따른다.
+
+사용 예:
+  python scripts/build_holiday_table.py
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from domain.holiday_table import (
+    HOLIDAY_TABLE_END_YEAR,
+    HOLIDAY_TABLE_PATH,
+    HOLIDAY_TABLE_START_YEAR,
+    HolidayTable,
+)
+
+
+def main() -> None:
+    table = HolidayTable.build(HOLIDAY_TABLE_START_YEAR, max(HOLIDAY_TABLE_START_YEAR, HOLIDAY_TABLE_END_YEAR))
+    table.save(HOLIDAY_TABLE_PATH)
+    count = sum(bin(b).count("1") for b in table.bits)
+    print(f"{table.first_year}~{table.last_year}년 공휴일 {count}일 -> {HOLIDAY_TABLE_PATH} ({len(table.bits)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
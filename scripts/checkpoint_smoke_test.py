@@ -0,0 +1,71 @@
+"""WAL 체크포인트 관리 스모크 테스트.
+
+시나리오:
+- 자동 체크포인트를 끈 커넥션으로 WAL을 키운 뒤, 사용 중(비한가)일 때는 PASSIVE를 건너뛰는지 확인
+- 한가해지면 PASSIVE로 프레임을 옮기는지, 크기 상한을 넘으면 TRUNCATE로 WAL 파일을 비우는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="checkpoint_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "database.db")
+os.environ["DB_PRAGMA_WAL_AUTOCHECKPOINT"] = "0"
+
+from db.db import DB_PATH, init_db, acquire_db, close_pool
+from db.checkpoint import CheckpointManager
+from db.write_queue import stop_write_queue
+from repos import checkin_repo
+
+USER = "checkpoint_test_user"
+
+
+async def main() -> None:
+    await init_db()
+    cm = CheckpointManager(DB_PATH, idle_ms=50, size_limit_mb=1)
+    try:
+        await asyncio.gather(*(checkin_repo.upsert_checkin_done(i, USER, "2026-01-05") for i in range(300)))
+        assert cm.wal_size() > 0, "WAL이 비어 있음"
+
+        # 커넥션을 빌려 둔 동안에는 한가하지 않으므로 PASSIVE를 돌리지 않는다
+        async with acquire_db(readonly=True):
+            assert not cm.is_idle()
+            assert await cm.tick() is None
+
+        await asyncio.sleep(0.1)
+        assert cm.is_idle()
+        assert await cm.tick() == "PASSIVE", cm.stats()
+        assert cm.stats()["frames_checkpointed"] > 0, cm.stats()
+        # 그 뒤로 쓰기가 없으면 다시 돌리지 않는다
+        assert await cm.tick() is None
+
+        # 상한(1MB)을 넘기면 TRUNCATE로 파일을 비운다
+        for day in range(10):
+            await asyncio.gather(*(checkin_repo.upsert_checkin_done(i, USER, f"2026-02-{day + 1:02d}") for i in range(300)))
+        assert cm.wal_size() >= cm.size_limit, cm.wal_size()
+        await asyncio.sleep(0.1)
+        assert await cm.tick() == "TRUNCATE", cm.stats()
+        stats = cm.stats()
+        assert stats["wal_size"] == 0, stats
+        print("stats:", stats)
+        print("OK: PASSIVE on idle, TRUNCATE above size limit")
+    finally:
+        await cm.stop()
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""커넥션 풀 반납/교체 스모크 테스트.
+
+시나리오:
+- 반납 시 롤백을 기다리는 도중 태스크가 취소돼도 커넥션이 풀로 돌아오는지 확인
+  (풀 크기보다 많이 취소한 뒤에도 acquire_db()가 바로 커넥션을 받는지)
+- 풀을 닫으면 커넥션을 기다리던 호출자가 멈추지 않고 RuntimeError를 받는지 확인
+- 이벤트 루프를 바꿔 가며(asyncio.run 반복) 풀을 다시 만들 때 이전 풀의 워커 스레드가 남지 않는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="connection_pool_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "connection_pool.db")
+
+from db.db import DB_PATH, WRITE_LANE, ConnectionPool, _pools, acquire_db, close_pool, init_db
+
+
+async def select_one() -> None:
+    async with acquire_db(readonly=False) as conn:
+        cur = await conn.execute("SELECT 1")
+        await cur.fetchall()
+        await cur.close()
+
+
+async def cancel_during_rollback() -> None:
+    await select_one()
+    pool = _pools[WRITE_LANE]
+    size = len(pool._conns)
+    rolling_back = asyncio.Event()
+
+    async def open_transaction() -> None:
+        async with acquire_db(readonly=False) as conn:
+            await conn.execute("BEGIN")
+            rollback = conn.rollback
+
+            async def slow_rollback() -> None:
+                rolling_back.set()
+                await asyncio.sleep(1)
+                await rollback()
+
+            conn.rollback = slow_rollback
+
+    for _ in range(size + 1):
+        rolling_back.clear()
+        task = asyncio.create_task(open_transaction())
+        await rolling_back.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    assert pool._idle.qsize() == size, (pool._idle.qsize(), size)
+    await asyncio.wait_for(select_one(), 2)
+    await close_pool()
+
+
+async def close_while_waiting() -> None:
+    pool = ConnectionPool(DB_PATH, 1)
+    await pool.open()
+    holding = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with pool.acquire():
+            holding.set()
+            await release.wait()
+
+    async def wait_for_conn() -> None:
+        async with pool.acquire():
+            pass
+
+    holder = asyncio.create_task(hold())
+    await holding.wait()
+    waiters = [asyncio.create_task(wait_for_conn()) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    await pool.close()
+    res = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 2)
+    assert all(isinstance(r, RuntimeError) for r in res), res
+    release.set()
+    await holder
+
+
+def main() -> None:
+    asyncio.run(init_db())
+    asyncio.run(cancel_during_rollback())
+    asyncio.run(close_while_waiting())
+
+    asyncio.run(select_one())
+    threads = threading.active_count()
+    for _ in range(3):
+        asyncio.run(select_one())
+    assert threading.active_count() == threads, (threads, threading.active_count())
+    asyncio.run(close_pool())
+    print(f"OK: connections returned after cancelled rollbacks, waiters woken on close, stale-loop pools closed ({threads} threads stable)")
+
+
+if __name__ == "__main__":
+    main()
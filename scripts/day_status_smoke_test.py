@@ -0,0 +1,197 @@
+"""루틴별 일별 상태(routine_day_status) 스모크 테스트.
+
+시나리오:
+- SQLite 백엔드(임시 DB)와 메모리 백엔드 각각에서, 석 달에 걸친 루틴들의 일별 상태가
+  날짜별 is_valid_day + 체크인으로 만든 기준값과 같은지 확인
+- 조회는 저장하지 않고, 야간 확정(finalize_day_status)이 어제까지를 달 행으로 저장하며,
+  그 뒤 조회는 저장된 행 + 오늘 체크인만 읽고 쓰지 않는지 확인(SQLite)
+- 확정된 과거 날짜의 완료 취소/스킵/완료 쓰기가 저장된 바이트를 바로 고치는지 확인(쓰기 경로)
+- 면책 추가/삭제, 루틴 규칙 변경이 해당 행을 지우고, 조회는 맞는 값을 계산만 하며 야간 확정이 다시 만드는지 확인
+- 야간 확정이 미완료 날을 확정해 두는지, 계산 중에 들어온 체크인이 있으면 저장(rev 비교)이 거절되는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="day_status_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "day_status.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.day_num import from_day_num, month_start_of, to_day_num
+from domain.day_status import (
+    STATUS_DONE,
+    STATUS_EXEMPT,
+    STATUS_MISSED,
+    STATUS_NA,
+    STATUS_SKIPPED,
+    finalize_day_status,
+    get_day_status,
+)
+from domain.stats import _routine_start_date
+from domain.time_utils import is_valid_day, routine_rule, user_local_day
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USER = "day_status_user"
+DAYS = 75
+
+
+async def expected(store: StorageBackend, routine: dict, start: int, today: int) -> bytearray:
+    """날짜별 is_valid_day + 체크인으로 만든 기준값. 면책으로 빠진 날은 해당 없음/면책 둘 다 허용하도록 NA로 둔다."""
+    rule = await routine_rule(routine)
+    rows = {r["day_num"]: r for r in await store.list_checkins_for_routine(routine["id"], from_day_num(start), from_day_num(today))}
+    status = bytearray()
+    for n in range(start, today + 1):
+        if not await is_valid_day(USER, rule, from_day_num(n)):
+            status.append(STATUS_NA)
+        elif n in rows and rows[n]["skipped"]:
+            status.append(STATUS_SKIPPED)
+        elif n in rows and rows[n]["checked_at"] is not None:
+            status.append(STATUS_DONE)
+        else:
+            status.append(STATUS_MISSED)
+    return status
+
+
+async def check(store: StorageBackend, routines: list, label: str) -> dict:
+    today_local = await user_local_day(USER)
+    today = to_day_num(today_local)
+    got = {}
+    for r in routines:
+        start = to_day_num(await _routine_start_date(r, today_local))
+        status = await get_day_status(USER, r, from_day_num(start), today_local)
+        want = await expected(store, r, start, today)
+        assert len(status) == len(want), (label, r["id"], len(status), len(want))
+        folded = bytes(STATUS_NA if b == STATUS_EXEMPT else b for b in status)
+        assert folded == bytes(want), (label, r["id"], list(status), list(want))
+        got[r["id"]] = (start, status)
+    return got
+
+
+async def stored_byte(store: StorageBackend, rid: int, n: int) -> int | None:
+    row = (await store.get_day_status_rows([rid], month_start_of(n), month_start_of(n))).get((rid, month_start_of(n)))
+    if row is None or row["finalized_through"] < n:
+        return None
+    return row["status"][n - row["month_start"]]
+
+
+async def scenario(store: StorageBackend, sqlite: bool) -> None:
+    random.seed(25)
+    today_local = await user_local_day(USER)
+    t = to_day_num(today_local)
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    rids = []
+    for i, (mode, rule) in enumerate((("all", None), ("weekday", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"))):
+        rid = await store.create_routine(USER, f"루틴{i}", mode, recurrence=rule)
+        await store.update_routine(rid, created_at=created)
+        rids.append(rid)
+    for rid in rids:
+        for k in range(DAYS + 1):
+            x = random.random()
+            if x < 0.7:
+                await store.upsert_checkin_done(rid, USER, today_local - timedelta(days=k))
+            elif x < 0.8:
+                await store.skip_checkin(rid, USER, today_local - timedelta(days=k), "rest")
+    routines = await store.list_active_routines_for_user(USER)
+    daily = next(r for r in routines if r["id"] == rids[0])
+
+    got = await check(store, routines, "before nightly")
+    start = got[rids[0]][0]
+    assert len({month_start_of(n) for n in range(start, t)}) >= 3
+    assert not await store.get_day_status_rows(rids, month_start_of(start), t)
+    assert await finalize_day_status(USER) == len(routines)
+    await check(store, routines, "first build")
+    rows = await store.get_day_status_rows(rids, month_start_of(start), t)
+    assert rows[(rids[0], month_start_of(t - 1))]["finalized_through"] == t - 1, rows
+    assert all(row["finalized_through"] < t for row in rows.values())
+
+    if sqlite:
+        # 어제까지 저장돼 있으면 달 행 1번 + 오늘 체크인 1번만 읽고 쓰지 않는다
+        with capture_statements() as stmts:
+            await get_day_status(USER, daily, from_day_num(start), today_local)
+        assert sum("FROM routine_day_status" in s for s in stmts) == 1, stmts
+        assert [s for s in stmts if "FROM routine_checkin" in s] == [
+            f"SELECT * FROM routine_checkin WHERE routine_id IN ({rids[0]}) AND day_num BETWEEN {t} AND {t}"
+        ], stmts
+        assert not any(s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE")) for s in stmts), stmts
+
+    # 확정된 과거 날짜의 쓰기는 저장된 바이트를 바로 고친다
+    d = t - 20
+    await store.upsert_checkin_done(rids[0], USER, from_day_num(d))
+    assert await stored_byte(store, rids[0], d) == STATUS_DONE
+    await store.undo_checkin(rids[0], from_day_num(d))
+    assert await stored_byte(store, rids[0], d) == STATUS_MISSED
+    await store.skip_checkin(rids[0], USER, from_day_num(d), "sick")
+    assert await stored_byte(store, rids[0], d) == STATUS_SKIPPED
+    await check(store, routines, "patched")
+
+    # 면책: 그 기간이 걸친 달 행을 지우고, 조회는 면책으로 계산만 하며 야간 확정이 다시 만든다
+    ex_start, ex_end = t - 40, t - 35
+    ex_id = await store.create_exemption(USER, from_day_num(ex_start), from_day_num(ex_end), "trip")
+    assert await stored_byte(store, rids[0], ex_start) is None
+    got = await check(store, routines, "exemption")
+    s0, status = got[rids[0]]
+    assert STATUS_EXEMPT in status[ex_start - s0:ex_end - s0 + 1], list(status)
+    assert await stored_byte(store, rids[0], ex_start) is None
+    await finalize_day_status(USER)
+    assert await stored_byte(store, rids[0], ex_start) in (STATUS_EXEMPT, STATUS_NA)
+    await store.delete_exemption(ex_id)
+    assert await stored_byte(store, rids[0], ex_start) is None
+    await check(store, routines, "exemption deleted")
+
+    # 루틴 규칙 변경은 그 루틴 행만 지운다
+    await store.update_routine(rids[2], recurrence="FREQ=WEEKLY;BYDAY=TU,TH")
+    assert not await store.get_day_status_rows([rids[2]], month_start_of(start), t)
+    assert await store.get_day_status_rows([rids[1]], month_start_of(start), t)
+    routines = await store.list_active_routines_for_user(USER)
+    await check(store, routines, "rule changed")
+    assert not await store.get_day_status_rows([rids[2]], month_start_of(start), t)
+
+    # 야간 확정: 지운 뒤 다시 확정하면 체크인이 없는 해당일은 미완료로 저장된다
+    await store.delete_day_status(USER)
+    assert await finalize_day_status(USER) == len(routines)
+    missed = next(n for n in range(start, t) if got[rids[0]][1][n - start] == STATUS_MISSED)
+    assert await stored_byte(store, rids[0], missed) == STATUS_MISSED
+    assert await stored_byte(store, rids[0], t - 1) is not None and await stored_byte(store, rids[0], t) is None
+
+    # 계산 도중 들어온 체크인이 rev를 올리면 저장이 거절된다
+    row = (await store.get_day_status_rows([rids[0]], month_start_of(missed), month_start_of(missed)))[(rids[0], month_start_of(missed))]
+    await store.upsert_checkin_done(rids[0], USER, from_day_num(missed))
+    assert not await store.save_day_status(rids[0], row["month_start"], row["rev"], row["status"], row["finalized_through"])
+    assert await stored_byte(store, rids[0], missed) == STATUS_DONE
+    await check(store, routines, "after concurrent write")
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    try:
+        with use_storage(SqliteBackend()) as store:
+            await scenario(store, sqlite=True)
+        memory = MemoryBackend()
+        with use_storage(memory):
+            await scenario(memory, sqlite=False)
+        print("OK: day status slices match day-by-day reference on sqlite/memory, reads never write, patched by checkin writes, dropped on rule edits, finalized nightly, stale saves rejected")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
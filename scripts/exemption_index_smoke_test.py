@@ -0,0 +1,79 @@
+"""면책 기간 인덱스 스모크 테스트.
+
+시나리오:
+- 겹치거나 맞닿은 면책 기간이 하나로 합쳐지는지, 단일 날짜/범위 질의가 맞는지 확인
+- 인덱스를 한 번 읽은 뒤에는 is_exempt가 DB를 조회하지 않는지 확인
+- create_exemption/delete_exemption 뒤에는 인덱스가 무효화되어 새 기간이 반영되는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="exemption_index_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "exemption_index.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from domain.exemption_index import ExemptionIndex
+from domain.time_utils import is_exempt
+from repos import exemption_repo
+
+USER = "exemption_index_user"
+D = date(2026, 3, 1)
+
+
+def check_index() -> None:
+    idx = ExemptionIndex([
+        (D, D + timedelta(days=2)),
+        (D + timedelta(days=3), D + timedelta(days=4)),  # 맞닿음 -> 합쳐짐
+        (D + timedelta(days=1), D + timedelta(days=1)),  # 포함됨
+        (D + timedelta(days=10), D + timedelta(days=12)),
+        (D + timedelta(days=20), D + timedelta(days=19)),  # 역전된 구간은 무시
+    ])
+    assert idx.intervals() == [(D, D + timedelta(days=4)), (D + timedelta(days=10), D + timedelta(days=12))], idx.intervals()
+    assert idx.contains(D) and idx.contains(D + timedelta(days=4)) and idx.contains(D + timedelta(days=11))
+    assert not idx.contains(D - timedelta(days=1)) and not idx.contains(D + timedelta(days=5))
+    assert idx.overlaps(D + timedelta(days=5), D + timedelta(days=10))
+    assert not idx.overlaps(D + timedelta(days=5), D + timedelta(days=9))
+    assert idx.exempt_days(D + timedelta(days=3), D + timedelta(days=10)) == {
+        D + timedelta(days=3), D + timedelta(days=4), D + timedelta(days=10)
+    }
+
+
+async def main() -> None:
+    check_index()
+    enable_statement_trace()
+    await init_db()
+    try:
+        eid = await exemption_repo.create_exemption(USER, D, D + timedelta(days=2), "trip")
+        assert await is_exempt(USER, D + timedelta(days=1))
+        with capture_statements() as stmts:
+            for i in range(365):
+                await is_exempt(USER, D + timedelta(days=i))
+        assert not stmts, f"캐시된 인덱스인데 {len(stmts)}개 쿼리 실행"
+
+        eid2 = await exemption_repo.create_exemption(USER, D + timedelta(days=30), D + timedelta(days=31))
+        assert await is_exempt(USER, D + timedelta(days=30)), "create_exemption 뒤 인덱스가 갱신되지 않음"
+        await exemption_repo.delete_exemption(eid)
+        assert not await is_exempt(USER, D + timedelta(days=1)), "delete_exemption 뒤 인덱스가 갱신되지 않음"
+        await exemption_repo.delete_exemption(eid2)
+        assert not await is_exempt(USER, D + timedelta(days=30))
+        print("OK: merged intervals, cached lookups without queries, invalidation on create/delete")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""루틴별 일별 상태(routine_day_status)와 연속 완료 상태(routine_streak) 야간 확정 스크립트.
+
+용도:
+- 매일 새벽(모든 사용자의 하루 경계가 지난 뒤) 작업 스케줄러/cron으로 돌려, 전날까지의 일별 상태
+  (체크인이 없는 해당일은 미완료)를 확정해 둔다. 그러면 리포트/연속 완료 조회는 체크인을 오늘 하루치만 읽는다.
+- 이어서 연속 완료 상태를 어제까지 반영해 저장한다. 조회(get_streaks)는 저장하지 않으므로 이 작업이 유일한 저장 경로다.
+- 이미 확정된 달은 읽기만 하므로 매일 돌려도 새로 확정할 날만 계산한다.
+- 공휴일 표를 다시 만들었거나 쓰기 경로를 거치지 않고 DB를 직접 고쳤으면 --rebuild로 지우고 다시 만든다.
+
+사용 예(PowerShell):
+  python scripts\\finalize_day_status.py
+  python scripts\\finalize_day_status.py --user 123456789 --rebuild
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain.day_status import finalize_day_status, rebuild_day_status
+from domain.report_compute import shutdown_report_pool
+from domain.streaks import advance_streaks, rebuild_streaks
+
+
+async def main(user_id: str | None, rebuild: bool) -> int:
+    await init_db()
+    try:
+        started = time.perf_counter()
+        count = await (rebuild_day_status(user_id) if rebuild else finalize_day_status(user_id))
+        print(f"routine_day_status {'rebuilt' if rebuild else 'finalized'}: {count} routines ({time.perf_counter() - started:.1f}s)")
+        started = time.perf_counter()
+        count = await (rebuild_streaks(user_id) if rebuild else advance_streaks(user_id))
+        print(f"routine_streak {'rebuilt' if rebuild else 'advanced'}: {count} routines ({time.perf_counter() - started:.1f}s)")
+        return 0
+    finally:
+        shutdown_report_pool()
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="루틴별 일별 상태와 연속 완료 상태를 어제까지 확정한다")
+    parser.add_argument("--user", help="이 사용자만(기본: 전체)")
+    parser.add_argument("--rebuild", action="store_true", help="저장된 일별 상태/연속 완료 상태를 지우고 체크인 원본에서 다시 만든다")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.user, args.rebuild)))
@@ -0,0 +1,170 @@
+"""파생 테이블 무효화 동등성 스모크 테스트(SQLite vs 메모리 백엔드).
+
+routine_streak / routine_streak_checkpoint / routine_day_status 는 쓰기 경로가 repos.derived_repo의 문장으로,
+saved_stats 는 트리거(마이그레이션 v11)가 고치거나 무효화한다.
+메모리 백엔드에서는 같은 규칙을 옮긴 Python 코드가 무효화한다.
+두 구현이 어긋나지 않도록 같은 쓰기 순서를 두 백엔드에 똑같이 실행하고 원본 행을 비교한다.
+
+시나리오:
+- 두 사용자, 석 달 넘는 체크인으로 연속 완료/체크포인트/일별 상태/닫힌 시즌 스냅샷을 만든 뒤
+- 오늘 체크인, 현재 구간 안/오래된 과거 보충 입력, 완료 취소/스킵/지우기, 면책 추가/삭제, 새 시즌,
+  루틴 이름/규칙 변경/비활성/삭제, 시간대 변경을 차례로 실행
+- 쓰기마다 (1) 쓰기 직후(무효화만 반영) (2) 다시 조회해 파생 상태를 채운 뒤의 행을 비교
+  (updated_at/created_at은 비교하지 않음)
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="invalidation_parity_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "invalidation_parity.db")
+
+from db.db import acquire_db, init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain.day_status import finalize_day_status
+from domain.saved_stats import snapshot_closed_seasons
+from domain.streaks import advance_streaks
+from domain.time_utils import user_local_day
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USERS = ("parity_user_a", "parity_user_b")
+DAYS = 120
+# 테이블 -> 정렬 키. 메모리 백엔드는 같은 모양의 행을 아래 속성에 들고 있다
+TABLES = {
+    "routine_streak": ("routine_id",),
+    "routine_streak_checkpoint": ("routine_id", "month_start"),
+    "saved_stats": ("season_id",),
+    "routine_day_status": ("routine_id", "month_start"),
+}
+_MEMORY_TABLES = {
+    "routine_streak": "_streaks",
+    "routine_streak_checkpoint": "_streak_checkpoints",
+    "saved_stats": "_saved_stats",
+    "routine_day_status": "_day_status",
+}
+_IGNORED = {"updated_at", "created_at"}
+
+
+def _normalize(rows, keys) -> list:
+    out = [{k: bytes(v) if isinstance(v, (bytes, bytearray)) else v for k, v in row.items() if k not in _IGNORED} for row in rows]
+    return sorted(out, key=lambda r: tuple(r[k] for k in keys))
+
+
+async def dump(store: StorageBackend) -> dict:
+    if isinstance(store, MemoryBackend):
+        return {t: _normalize(getattr(store, _MEMORY_TABLES[t]).values(), keys) for t, keys in TABLES.items()}
+    result = {}
+    async with acquire_db() as conn:
+        for table, keys in TABLES.items():
+            cur = await conn.execute(f"SELECT * FROM {table}")
+            result[table] = _normalize([dict(r) for r in await cur.fetchall()], keys)
+            await cur.close()
+    return result
+
+
+async def derive() -> None:
+    """야간 작업과 시즌 스냅샷이 채우는 파생 상태를 만든다."""
+    for uid in USERS:
+        await finalize_day_status(uid)
+        await advance_streaks(uid)
+        await snapshot_closed_seasons(uid)
+
+
+async def scenario(store: StorageBackend, created: str) -> list:
+    random.seed(25)
+    a, b = USERS
+    today = await user_local_day(a)
+    rids = {}
+    for uid in USERS:
+        await store.upsert_user_settings(uid)
+        rids[uid] = []
+        for i, (mode, rule) in enumerate((("all", None), ("weekday", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"))):
+            rid = await store.create_routine(uid, f"루틴{i}", mode, recurrence=rule)
+            await store.update_routine(rid, created_at=created)
+            rids[uid].append(rid)
+        for rid in rids[uid]:
+            for k in range(1, DAYS + 1):
+                x = random.random()
+                if x < 0.85:
+                    await store.upsert_checkin_done(rid, uid, today - timedelta(days=k))
+                elif x < 0.9:
+                    await store.skip_checkin(rid, uid, today - timedelta(days=k), "rest")
+        await store.ensure_default_season(uid)
+        await store.create_new_season(uid, "시즌2", (today - timedelta(days=30)).isoformat())
+    r0, r1, r2 = rids[a]
+    exemption = {}
+
+    async def add_exemption() -> None:
+        exemption["id"] = await store.create_exemption(a, today - timedelta(days=50), today - timedelta(days=45), "trip")
+
+    steps = [
+        ("setup", None),
+        ("today checkin", lambda: store.upsert_checkin_done(r0, a, today)),
+        ("undo in run", lambda: store.undo_checkin(r0, today - timedelta(days=3))),
+        ("old backfill", lambda: store.upsert_checkin_done(r1, a, today - timedelta(days=70))),
+        ("old clear", lambda: store.clear_checkin(r0, today - timedelta(days=100))),
+        ("old skip", lambda: store.skip_checkin(r2, a, today - timedelta(days=40), "sick")),
+        ("near start", lambda: store.skip_checkin(r0, a, today - timedelta(days=DAYS - 1), "first month")),
+        ("other user", lambda: store.upsert_checkin_done(rids[b][0], b, today - timedelta(days=20))),
+        ("exemption added", add_exemption),
+        ("exemption deleted", lambda: store.delete_exemption(exemption["id"])),
+        ("new season", lambda: store.create_new_season(a, "시즌3", (today - timedelta(days=2)).isoformat())),
+        ("routine renamed", lambda: store.update_routine(r2, name="이름 바꿈")),
+        ("rule changed", lambda: store.update_routine(r1, weekend_mode="all")),
+        ("deactivated", lambda: store.update_routine(r2, active=0)),
+        ("routine deleted", lambda: store.delete_routine(r0)),
+        ("tz changed", lambda: store.upsert_user_settings(a, tz="America/New_York")),
+    ]
+    snapshots = []
+    for label, write in steps:
+        if write is not None:
+            await write()
+            snapshots.append((f"{label} (write)", await dump(store)))
+        await derive()
+        snapshots.append((f"{label} (derived)", await dump(store)))
+    return snapshots
+
+
+def compare(sqlite: list, memory: list) -> None:
+    assert [label for label, _ in sqlite] == [label for label, _ in memory]
+    for (label, want), (_, got) in zip(sqlite, memory):
+        for table in TABLES:
+            assert got[table] == want[table], (label, table, [r for r in got[table] if r not in want[table]], [r for r in want[table] if r not in got[table]])
+
+
+async def main() -> None:
+    await init_db()
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    try:
+        with use_storage(SqliteBackend()) as store:
+            sqlite = await scenario(store, created)
+        memory = MemoryBackend()
+        with use_storage(memory):
+            got = await scenario(memory, created)
+        compare(sqlite, got)
+        last = sqlite[-3][1]
+        assert all(last[t] for t in TABLES), {t: len(rows) for t, rows in last.items()}
+        print(f"OK: {len(sqlite)} snapshots of {len(TABLES)} derived tables identical on sqlite and memory backend")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
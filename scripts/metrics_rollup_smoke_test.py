@@ -0,0 +1,152 @@
+"""전체 사용자 일별 지표 롤업(domain.rollup) 스모크 테스트.
+
+시나리오:
+- SQLite 백엔드(임시 DB)와 메모리 백엔드 각각에서, 시간대/하루 경계/면책/반복 규칙이 다른 사용자 여럿을
+  만들고 청크 하나만 돌린 뒤 멈췄다가(max_chunks) 이어서 끝까지 돌려, 사용자별 7d/30d/all 결과가
+  aggregate_user_metrics(기준일 다음 날) + calc_streak(until=기준일)과 같은지 확인
+- 기준일 이후에 만든 루틴은 롤업에 없는지 확인
+- 기본 기준일이 사용자별 업무일 중 가장 이른 날의 전날인지 확인
+- 끝난 기준일은 다시 돌려도 아무것도 읽지 않고, restart면 처음부터 같은 결과를 만드는지 확인
+- 조회 수가 사용자 수와 상관없이 청크마다 상수인지, 체크인 스트림이 정렬 없이 인덱스 순서로 읽히는지 확인(SQLite)
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+- 청크 크기를 줄여(ROLLUP_CHUNK_USERS=3) 작은 데이터로도 여러 청크가 되게 합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="metrics_rollup_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "metrics_rollup.db")
+os.environ["ROLLUP_CHUNK_USERS"] = "3"
+
+from db.db import DB_PATH, init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.rollup import default_rollup_day, get_user_rollup, run_rollup
+from domain.stats import _routine_start_date, aggregate_user_metrics, calc_streak
+from domain.time_utils import local_day, now_kst, user_local_day
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USERS = [f"rollup_user_{i}" for i in range(8)]
+SETTINGS = [("Asia/Seoul", 4), ("America/New_York", 0), ("Europe/London", 6), ("Asia/Seoul", 0)]
+MODES = [("all", None), ("weekday", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"), ("weekend", None)]
+DAYS = 50
+
+
+async def seed(store: StorageBackend, rollup_day) -> None:
+    random.seed(24)
+    for n, uid in enumerate(USERS):
+        tz, cutoff = SETTINGS[n % len(SETTINGS)]
+        if n % 3:
+            await store.upsert_user_settings(uid, tz=tz, day_cutoff_hour=cutoff)
+        for i in range(1 + n % 3):
+            mode, rule = MODES[(n + i) % len(MODES)]
+            rid = await store.create_routine(uid, f"{uid}-{i}", mode, recurrence=rule)
+            age = DAYS - 7 * i
+            await store.update_routine(rid, created_at=(datetime.utcnow() - timedelta(days=age)).isoformat())
+            for k in range(age + 2):
+                x = random.random()
+                d = rollup_day + timedelta(days=1) - timedelta(days=k)
+                if x < 0.75:
+                    await store.upsert_checkin_done(rid, uid, d)
+                elif x < 0.8:
+                    await store.skip_checkin(rid, uid, d, "rest")
+        if n % 2:
+            start = rollup_day - timedelta(days=5 + n)
+            await store.create_exemption(uid, start, start + timedelta(days=3), "trip")
+    # 기준일 이후에 만든 루틴은 롤업에 들어가지 않는다
+    await store.create_routine(USERS[0], "새 루틴", "all")
+
+
+async def expected(store: StorageBackend, uid: str, rollup_day, scope: str) -> dict:
+    today = rollup_day + timedelta(days=1)
+    routines = [r for r in await store.list_active_routines_for_user(uid) if await _routine_start_date(r, today) <= rollup_day]
+    metrics = await aggregate_user_metrics(uid, routines, scope, today)
+    for row, r in zip(metrics["by_routine"], routines):
+        row["max_streak"], row["current_streak"] = await calc_streak(uid, r, until=rollup_day)
+    return metrics
+
+
+async def check_all(store: StorageBackend, rollup_day, label: str) -> None:
+    for uid in USERS:
+        for scope in ("7d", "30d", "all"):
+            got = await get_user_rollup(uid, rollup_day, scope)
+            want = await expected(store, uid, rollup_day, scope)
+            assert got == want, (label, uid, scope, got, want)
+    assert "새 루틴" not in [r["name"] for r in await store.list_metrics_rollup(rollup_day.isoformat(), USERS[0])]
+
+
+async def scenario(store: StorageBackend, sqlite: bool) -> None:
+    rollup_day = local_day(now_kst()) - timedelta(days=1)
+    await seed(store, rollup_day)
+    # 기본 기준일은 KST 어제가 아니라 모든 사용자(America/New_York 포함)에게 끝난 마지막 날
+    assert await default_rollup_day() == min([await user_local_day(uid) for uid in USERS]) - timedelta(days=1)
+
+    # 청크 하나만 하고 멈췄다가 이어서
+    run = await run_rollup(rollup_day, max_chunks=1)
+    assert run["finished_at"] is None and run["users_done"] == 3 and run["last_user_id"] == USERS[2], run
+    with capture_statements() as stmts:
+        run = await run_rollup(rollup_day)
+    assert run["finished_at"] is not None and run["users_done"] == len(USERS), run
+    rows = await store.list_metrics_rollup(rollup_day.isoformat())
+    assert run["rows_written"] == len(rows) == sum(1 + n % 3 for n in range(len(USERS))), (run, len(rows))
+    await check_all(store, rollup_day, "resumed")
+
+    if sqlite:
+        # 남은 5명 = 청크 2개: 청크마다 사용자 목록 + 입력 세 번 + 체크인 스트림 + 진행 상태, 사용자별 조회 없음
+        reads = [s for s in stmts if s.lstrip().upper().startswith("SELECT")]
+        assert sum("FROM routine_checkin" in s for s in reads) == 2, reads
+        assert not any("FROM user_settings WHERE user_id =" in s for s in reads), reads
+        assert len(reads) == 2 * 6 + 3, reads
+        with sqlite3.connect(DB_PATH) as db:
+            plan = " ".join(r[3] for r in db.execute(
+                "EXPLAIN QUERY PLAN SELECT user_id, routine_id, day_num, skipped, checked_at IS NOT NULL FROM routine_checkin"
+                " WHERE user_id BETWEEN ? AND ? AND day_num <= ? ORDER BY user_id, routine_id, day_num",
+                ("a", "z", 0),
+            ))
+        assert "idx_checkin_user_routine_day_num" in plan and "TEMP B-TREE" not in plan, plan
+
+    # 끝난 기준일은 다시 읽지 않는다
+    with capture_statements() as stmts:
+        again = await run_rollup(rollup_day)
+    assert again == run
+    assert not any("routine_checkin" in s for s in stmts), stmts
+
+    # restart: 지우고 처음부터, 결과는 같다
+    rerun = await run_rollup(rollup_day, restart=True)
+    assert rerun["finished_at"] is not None and rerun["rows_written"] == run["rows_written"], rerun
+    await check_all(store, rollup_day, "restart")
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    try:
+        with use_storage(SqliteBackend()) as store:
+            await scenario(store, sqlite=True)
+        memory = MemoryBackend()
+        with use_storage(memory):
+            await scenario(memory, sqlite=False)
+        print(f"OK: rollup for {len(USERS)} users in chunks of 3 resumed after a pause, matched per-user metrics on sqlite/memory, one checkin stream per chunk")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
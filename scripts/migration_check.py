@@ -20,6 +20,7 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from db.db import init_db, connect_db
+from db.migrations import LATEST_VERSION, current_version
 
 
 async def main() -> None:
@@ -31,6 +32,8 @@ async def main() -> None:
         names = [r["name"] for r in rows]
         print("tables:", names)
         print("has report_season:", "report_season" in names)
+        version = await current_version(db)
+        print(f"schema version: {version} (latest {LATEST_VERSION})")
     finally:
         await db.close()
 
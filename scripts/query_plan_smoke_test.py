@@ -0,0 +1,240 @@
+"""repo 쿼리 실행 계획 회귀 테스트.
+
+목표:
+- repos/*와 도메인 계층(stats, time_utils)이 실제로 실행하는 SQL 문장을 모두 수집
+- 시드 데이터가 들어간 DB에서 각 문장에 EXPLAIN QUERY PLAN을 돌려
+  인덱스 없이 테이블 전체를 훑는(SCAN <table>) 쿼리가 있으면 실패
+
+새 repo 함수를 추가하면 아래 exercise_repos()에도 호출을 추가한다.
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+# db.db가 DB_PATH를 읽기 전에 임시 DB로 돌린다
+_tmpdir = tempfile.mkdtemp(prefix="query_plan_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "query_plan.db")
+
+from db.db import DB_PATH, SQL_IN_CHUNK, init_db, enable_statement_trace, capture_statements, close_pool
+from db.write_queue import stop_write_queue
+from repos import (
+    checkin_repo,
+    day_status_repo,
+    exemption_repo,
+    goal_repo,
+    progress_repo,
+    report_season_repo,
+    rollup_repo,
+    routine_repo,
+    saved_stats_repo,
+    streak_repo,
+    user_settings_repo,
+)
+from domain import stats, time_utils
+from domain.day_num import month_start_of, to_day_num
+
+_DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+# 'SCAN <table>' 뒤에 인덱스 사용 표시(USING ... INDEX)가 없으면 전체 테이블 스캔
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+# 서브쿼리/VALUES 목록을 임시로 만든 것(MATERIALIZE/CO-ROUTINE <이름>)을 훑는 것은 테이블 스캔이 아니다
+_SUBQUERY = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\w+)$")
+# 의도적으로 테이블 전체를 읽는 쿼리(스케줄러의 전체 사용자 스캔, 야간 롤업의 시간대 조합 조회)
+_ALLOWED_FULL_SCANS = (
+    "SELECT user_id, tz, reminder_time FROM user_settings",
+    "SELECT DISTINCT tz, day_cutoff_hour FROM user_settings",
+)
+
+
+async def seed(user_id: str) -> dict:
+    await user_settings_repo.upsert_user_settings(user_id)
+    rids = [await routine_repo.create_routine(user_id, f"루틴{i}", "all") for i in range(5)]
+    today = date(2026, 3, 1)
+    for rid in rids:
+        for i in range(60):
+            d = today - timedelta(days=i)
+            if i % 5 == 0:
+                await checkin_repo.skip_checkin(rid, user_id, d, "seed")
+            elif i % 3:
+                await checkin_repo.upsert_checkin_done(rid, user_id, d)
+    ex_id = await exemption_repo.create_exemption(user_id, today - timedelta(days=10), today - timedelta(days=8), "seed")
+    gid = await goal_repo.create_goal(user_id, "seed goal", None, None)
+    db = sqlite3.connect(DB_PATH)
+    try:
+        db.execute(
+            "INSERT INTO goal_progress(goal_id, user_id, delta, value_after, created_at) VALUES(?, ?, 1, 1, '2026-03-01')",
+            (gid, user_id),
+        )
+        db.commit()
+    finally:
+        db.close()
+    return {"rids": rids, "ex_id": ex_id, "gid": gid, "today": today}
+
+
+async def exercise_repos(user_id: str, seeded: dict) -> None:
+    rids, today = seeded["rids"], seeded["today"]
+    rid = rids[0]
+
+    # routine_repo
+    r = await routine_repo.get_routine(rid)
+    routines = await routine_repo.list_active_routines_for_user(user_id)
+    await routine_repo.routines_applicable_for_date(user_id, today)
+    await routine_repo.list_routine_user_ids()
+    await routine_repo.update_routine(rid, notes="memo")
+    tmp_rid = await routine_repo.create_routine(user_id, "임시", "weekday")
+    await routine_repo.delete_routine(tmp_rid)
+
+    # checkin_repo
+    await checkin_repo.get_checkin(rid, today)
+    await checkin_repo.list_checkins_for_user_day(user_id, today)
+    await checkin_repo.list_checkins_for_routine(rid)
+    with capture_statements() as bulk:
+        await checkin_repo.get_checkins_for_routines(rids, today - timedelta(days=6), today)
+    assert len(bulk) == 1, bulk
+    await checkin_repo.list_checkins_for_routine(rid, today - timedelta(days=30), today)
+    await checkin_repo.upsert_checkin_done(rid, user_id, today)
+    await checkin_repo.undo_checkin(rid, today)
+    await checkin_repo.skip_checkin(rid, user_id, today, "x")
+    await checkin_repo.clear_checkin(rid, today)
+
+    # exemption_repo
+    await exemption_repo.get_exemption(seeded["ex_id"])
+    await exemption_repo.list_exemptions_for_user(user_id)
+    await exemption_repo.has_exemption_on(user_id, today)
+    tmp_ex = await exemption_repo.create_exemption(user_id, today, today, "tmp")
+    await exemption_repo.delete_exemption(tmp_ex)
+
+    # goal_repo / progress_repo
+    await goal_repo.get_goal(seeded["gid"])
+    await goal_repo.list_active_goals_for_user(user_id)
+    await goal_repo.update_goal(seeded["gid"], description="memo")
+    tmp_gid = await goal_repo.create_goal(user_id, "tmp", None, None)
+    await goal_repo.delete_goal(tmp_gid)
+    # add_progress는 goal.current 컬럼(구 스키마)을 읽으므로 현재 스키마에서는 제외
+    await progress_repo.list_progress_for_goal(seeded["gid"])
+
+    # report_season_repo
+    await report_season_repo.get_first_checkin_day(user_id)
+    await report_season_repo.get_last_checkin_day(user_id)
+    sid = await report_season_repo.ensure_default_season(user_id)
+    await report_season_repo.list_seasons_for_user(user_id)
+    await report_season_repo.get_season(user_id, sid)
+    await report_season_repo.get_current_season(user_id)
+    await report_season_repo.create_new_season(user_id, "시즌2", today.isoformat())
+
+    # saved_stats_repo
+    await saved_stats_repo.save_saved_stats(sid, user_id, "2026-01-01", today.isoformat(), "{}")
+    await saved_stats_repo.get_saved_stats(sid)
+    await saved_stats_repo.list_saved_stats_for_user(user_id)
+    await saved_stats_repo.delete_saved_stats(user_id)
+    await saved_stats_repo.delete_saved_stats()
+
+    # streak_repo(체크인 쓰기의 무효화 문장은 위 checkin_repo 호출에서 함께 실행된다)
+    t = to_day_num(today)
+    await streak_repo.reset_routine_streak(rid, user_id, t - 40)
+    row = (await streak_repo.get_routine_streaks(rids))[rid]
+    assert await streak_repo.save_routine_streak(rid, row["rev"], 3, 5, t - 1, t - 3, 5, [(t - 10, 1, t - 11, 5)])
+    assert (await streak_repo.get_latest_streak_checkpoints(rids))[rid]["month_start"] == t - 10
+    await streak_repo.delete_routine_streaks(user_id)
+    await streak_repo.delete_routine_streaks()
+
+    # day_status_repo(체크인 쓰기의 바이트 수정 문장도 위 checkin_repo 호출에서 함께 실행된다)
+    ms = month_start_of(t)
+    assert await day_status_repo.insert_day_status_placeholders([(rid, user_id, ms, 31)]) == {(rid, ms)}
+    row = (await day_status_repo.get_day_status_rows(rids, ms, t))[(rid, ms)]
+    assert await day_status_repo.save_day_status(rid, ms, row["rev"], bytes([5]) * 31, ms)
+    await checkin_repo.undo_checkin(rid, today)
+    await day_status_repo.delete_day_status(user_id)
+    await day_status_repo.delete_day_status()
+
+    # user_settings_repo
+    await user_settings_repo.get_user_settings(user_id)
+    await user_settings_repo.list_all_user_settings()
+    await user_settings_repo.upsert_user_settings(user_id, tz="UTC")
+    await user_settings_repo.upsert_user_settings(user_id, tz="Asia/Seoul")
+
+    # rollup_repo
+    assert await rollup_repo.list_rollup_user_ids("", 10) == [user_id]
+    await rollup_repo.list_day_clock_settings()
+    with capture_statements() as bulk:
+        inputs = await rollup_repo.get_rollup_inputs([user_id])
+    assert len(bulk) == 3 and len(inputs["routines"]) == len(routines), bulk
+    # 사용자가 SQL_IN_CHUNK명을 넘으면 IN 목록을 나눠 읽는다(없는 사용자는 결과에 영향 없음)
+    many = [user_id] + [f"nobody_{i}" for i in range(SQL_IN_CHUNK)]
+    with capture_statements() as bulk:
+        assert (await rollup_repo.get_rollup_inputs(many))["routines"] == inputs["routines"]
+    assert len(bulk) == 6, len(bulk)
+    async for _ in rollup_repo.iter_checkins_for_users(user_id, user_id, to_day_num(today)):
+        pass
+    day = today.isoformat()
+    await rollup_repo.start_rollup_run(day)
+    await rollup_repo.get_rollup_run(day)
+    await rollup_repo.save_rollup_chunk(day, [(user_id, rid, 1, 1, 1, 1, 1, 1, 1, 1)], user_id, 1)
+    await rollup_repo.finish_rollup_run(day)
+    await rollup_repo.list_metrics_rollup(day)
+    await rollup_repo.list_metrics_rollup(day, user_id)
+    await rollup_repo.start_rollup_run(day, restart=True)
+
+    # 도메인 계층
+    await time_utils.is_exempt(user_id, today)
+    for scope in ("7d", "30d", "all"):
+        await stats.aggregate_user_metrics(user_id, routines, scope, today)
+    assert r is not None
+
+
+def full_scans(statements: list[str]) -> list[tuple[str, str]]:
+    db = sqlite3.connect(DB_PATH)
+    bad: list[tuple[str, str]] = []
+    try:
+        for sql in sorted(set(statements)):
+            if " ".join(sql.split()).startswith(_ALLOWED_FULL_SCANS):
+                continue
+            subqueries = set()
+            for row in db.execute("EXPLAIN QUERY PLAN " + sql):
+                detail = row[3]
+                if m := _SUBQUERY.match(detail):
+                    subqueries.add(m.group(1))
+                elif (m := _FULL_SCAN.match(detail)) and m.group(1) not in subqueries:
+                    bad.append((detail, " ".join(sql.split())))
+    finally:
+        db.close()
+    return bad
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    user_id = "query_plan_user"
+    try:
+        seeded = await seed(user_id)
+        with capture_statements() as captured:
+            await exercise_repos(user_id, seeded)
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+    statements = [s for s in captured if _DML.match(s)]
+    assert statements, "no statements captured"
+    bad = full_scans(statements)
+    for detail, sql in bad:
+        print(f"FULL SCAN: {detail}\n    {sql[:200]}")
+    assert not bad, f"{len(bad)} statements do a full table scan"
+    print(f"OK: {len(set(statements))} distinct statements, no full table scans")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
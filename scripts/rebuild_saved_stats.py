@@ -0,0 +1,44 @@
+"""끝난 시즌 스냅샷(saved_stats) 복구 스크립트.
+
+용도:
+- 공휴일 표를 다시 만들었거나, 트리거가 없던 경로로 DB를 직접 고친 뒤
+  저장된 시즌 스냅샷을 체크인 원본에서 다시 만든다.
+- 평소에는 필요 없다: 끝난 시즌 안의 기록이 바뀌면 트리거가 스냅샷을 지우고 다음 조회 때 다시 만든다.
+
+사용 예(PowerShell):
+  python scripts\\rebuild_saved_stats.py
+  python scripts\\rebuild_saved_stats.py --user 123456789
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain.saved_stats import rebuild_saved_stats
+
+
+async def main(user_id: str | None) -> int:
+    await init_db()
+    try:
+        count = await rebuild_saved_stats(user_id)
+        print(f"rebuilt: {count} seasons")
+        return 0
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="saved_stats 테이블(끝난 시즌 스냅샷)을 체크인 원본에서 다시 만든다")
+    parser.add_argument("--user", help="이 사용자만 다시 만든다(기본: 전체)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.user)))
@@ -0,0 +1,60 @@
+"""연속 완료 상태(routine_streak) 복구 스크립트.
+
+용도:
+- 공휴일 표를 다시 만들었거나, 쓰기 경로를 거치지 않고 DB를 직접 고친 뒤
+  저장된 연속 완료 상태를 체크인 원본에서 다시 만든다.
+- --verify를 주면 다시 만든 값을 calc_streak(전체 재계산)과 비교한다.
+
+사용 예(PowerShell):
+  python scripts\\rebuild_streaks.py
+  python scripts\\rebuild_streaks.py --user 123456789 --verify
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain.stats import calc_streak
+from domain.streaks import get_streaks, rebuild_streaks
+from storage import get_storage
+
+
+async def main(user_id: str | None, verify: bool) -> int:
+    await init_db()
+    try:
+        count = await rebuild_streaks(user_id)
+        print(f"rebuilt: {count} routines")
+        if not verify:
+            return 0
+        store = get_storage()
+        mismatches = 0
+        for uid in [user_id] if user_id else await store.list_routine_user_ids():
+            routines = await store.list_active_routines_for_user(uid)
+            stored = await get_streaks(uid, routines)
+            for r in routines:
+                want = await calc_streak(uid, r)
+                if stored[r["id"]] != want:
+                    mismatches += 1
+                    print(f"mismatch: user={uid} routine={r['id']} stored={stored[r['id']]} full={want}")
+        print(f"verify: {mismatches} mismatches")
+        return 1 if mismatches else 0
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="routine_streak 테이블을 체크인 원본에서 다시 만든다")
+    parser.add_argument("--user", help="이 사용자만 다시 만든다(기본: 전체)")
+    parser.add_argument("--verify", action="store_true", help="다시 만든 값을 calc_streak과 비교")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.user, args.verify)))
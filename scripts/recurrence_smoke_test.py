@@ -0,0 +1,167 @@
+"""루틴 반복 규칙(recurrence) 스모크 테스트.
+
+시나리오:
+- 여러 규칙의 범위 마스크가 날짜별로 직접 계산한 기대값과 같은지 확인(2년 범위, 월/연 경계 포함)
+- weekday/weekend/all이 기존 is_applicable_day와 같은지, 잘못된 규칙은 RecurrenceError인지 확인
+- 루틴별 컴파일 캐시가 같은 객체를 돌려주고, 규칙/기준일이 바뀌면 새로 컴파일하는지 확인
+- 22:00 UTC에 만든 루틴(KST로는 다음 날)의 격일/격주/월 규칙이 사용자 기준 시작일에 맞춰지는지 확인
+- repo에 저장한 규칙으로 routines_applicable_for_date / valid_day_mask / is_valid_day가 일치하는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import calendar
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="recurrence_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "recurrence.db")
+
+from db.db import init_db, close_pool
+from domain.recurrence import RecurrenceError, compile_rule, normalize_rule, rule_for_routine, split_schedule
+from domain.stats import _routine_start_date
+from domain.time_utils import is_applicable_day, is_valid_day, routine_anchor_day, routine_rule, valid_day_mask
+from repos import routine_repo
+
+USER = "recurrence_user"
+START = date(2025, 12, 1)
+END = date(2027, 12, 31)
+
+
+def _nth_weekday(d: date) -> tuple:
+    """(그 달에서 몇 번째 요일인지, 뒤에서 몇 번째인지)."""
+    last = calendar.monthrange(d.year, d.month)[1]
+    return (d.day - 1) // 7 + 1, -((last - d.day) // 7 + 1)
+
+
+# (규칙, 기준일, 날짜별 기대값)
+CASES = [
+    ("FREQ=WEEKLY;BYDAY=MO,WE,FR", None, lambda d: d.weekday() in (0, 2, 4)),
+    ("FREQ=DAILY;INTERVAL=2", date(2026, 1, 1), lambda d: (d - date(2026, 1, 1)).days % 2 == 0),
+    ("FREQ=DAILY;INTERVAL=3;DTSTART=2026-02-10;UNTIL=2026-06-30",
+     None, lambda d: date(2026, 2, 10) <= d <= date(2026, 6, 30) and (d - date(2026, 2, 10)).days % 3 == 0),
+    ("FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH", date(2026, 1, 8),
+     lambda d: d.weekday() in (1, 3) and ((d - d.weekday() * timedelta(days=1)) - date(2026, 1, 5)).days // 7 % 2 == 0),
+    ("FREQ=MONTHLY;BYDAY=1MO", None, lambda d: d.weekday() == 0 and _nth_weekday(d)[0] == 1),
+    ("FREQ=MONTHLY;BYDAY=-1FR,2SA", None,
+     lambda d: (d.weekday() == 4 and _nth_weekday(d)[1] == -1) or (d.weekday() == 5 and _nth_weekday(d)[0] == 2)),
+    ("FREQ=MONTHLY;BYMONTHDAY=1,15,-1", None, lambda d: d.day in (1, 15) or d.day == calendar.monthrange(d.year, d.month)[1]),
+    ("FREQ=MONTHLY;INTERVAL=3", date(2026, 1, 31), lambda d: d.day == 31 and (d.month - 1) % 3 == 0),
+]
+
+
+def check_rules() -> None:
+    n = (END - START).days + 1
+    for text, anchor, expected in CASES:
+        rule = compile_rule(text, anchor)
+        mask = rule.mask(START, END)
+        want = bytes(1 if expected(START + timedelta(days=i)) else 0 for i in range(n))
+        assert bytes(mask) == want, (text, [START + timedelta(days=i) for i in range(n) if mask[i] != want[i]][:5])
+        # 부분 범위/하루 판정도 같은 결과
+        assert bytes(rule.mask(date(2026, 2, 27), date(2026, 3, 3))) == want[88:93], text
+        assert all(rule.occurs_on(START + timedelta(days=i)) == bool(want[i]) for i in range(0, n, 11)), text
+
+    for mode in ("weekday", "weekend", "all"):
+        mask = compile_rule(mode).mask(START, END)
+        assert all(mask[i] == is_applicable_day(mode, START + timedelta(days=i)) for i in range(n)), mode
+
+    assert normalize_rule("rrule:freq=weekly;byday=fr,mo,we") == "FREQ=WEEKLY;BYDAY=MO,WE,FR"
+    assert split_schedule(" Weekend ") == ("weekend", None)
+    assert split_schedule("FREQ=MONTHLY;BYDAY=1MO") == ("all", "FREQ=MONTHLY;BYDAY=1MO")
+    for bad in ("FREQ=YEARLY", "FREQ=WEEKLY;BYDAY=XX", "FREQ=DAILY;COUNT=3", "FREQ=WEEKLY;BYDAY=1MO", "monthly"):
+        try:
+            compile_rule(bad)
+        except RecurrenceError:
+            continue
+        raise AssertionError(f"잘못된 규칙이 통과함: {bad}")
+
+
+def check_routine_cache() -> None:
+    routine = {"id": 1, "weekend_mode": "all", "recurrence": "FREQ=DAILY;INTERVAL=2", "created_at": "2026-01-01T03:00:00"}
+    anchor = date(2026, 1, 1)
+    rule = rule_for_routine(routine, anchor)
+    assert rule_for_routine(dict(routine), anchor) is rule
+    assert rule.occurs_on(date(2026, 1, 3)) and not rule.occurs_on(date(2026, 1, 4))
+    moved = rule_for_routine(routine, date(2026, 1, 2))
+    assert moved is not rule and moved.occurs_on(date(2026, 1, 4))
+    routine["recurrence"] = "FREQ=WEEKLY;BYDAY=SU"
+    assert rule_for_routine(routine, anchor) is not moved and rule_for_routine(routine, anchor).occurs_on(date(2026, 1, 4))
+    routine["recurrence"] = "FREQ=NOPE"
+    assert rule_for_routine(routine, anchor) is None
+
+
+async def check_local_anchor() -> None:
+    """2026-03-01(일) 22:00 UTC = 2026-03-02(월) 07:00 KST. 기준일은 UTC 날짜가 아니라 사용자 업무일(3/2)이어야 한다."""
+    rules = ("FREQ=DAILY;INTERVAL=2", "FREQ=WEEKLY;INTERVAL=2", "FREQ=MONTHLY")
+    routines = []
+    for text in rules:
+        rid = await routine_repo.create_routine(USER + "_utc", text, "all", recurrence=text)
+        await routine_repo.update_routine(rid, created_at="2026-03-01T22:00:00")
+        routines.append(await routine_repo.get_routine(rid))
+    start = date(2026, 3, 2)
+    for r in routines:
+        assert await routine_anchor_day(r) == start == await _routine_start_date(r, date(2026, 6, 1)), r["recurrence"]
+        rule = await routine_rule(r)
+        assert rule.occurs_on(start) and not rule.occurs_on(date(2026, 3, 1)), r["recurrence"]
+    daily, weekly, monthly = [await routine_rule(r) for r in routines]
+    assert daily.occurs_on(date(2026, 3, 4)) and not daily.occurs_on(date(2026, 3, 3))
+    assert weekly.occurs_on(date(2026, 3, 16)) and not weekly.occurs_on(date(2026, 3, 9)) and not weekly.occurs_on(date(2026, 3, 15))
+    assert monthly.occurs_on(date(2026, 4, 2)) and not monthly.occurs_on(date(2026, 4, 1))
+    ids = {r["id"] for r in routines}
+    assert {r["id"] for r in await routine_repo.routines_applicable_for_date(USER + "_utc", start)} == ids
+    assert not await routine_repo.routines_applicable_for_date(USER + "_utc", date(2026, 3, 1))
+    # start_date가 있으면 created_at보다 우선
+    explicit = dict(routines[0], start_date="2026-03-05")
+    assert await routine_anchor_day(explicit) == date(2026, 3, 5) and (await routine_rule(explicit)).occurs_on(date(2026, 3, 7))
+
+
+async def main() -> None:
+    check_rules()
+    check_routine_cache()
+    await init_db()
+    try:
+        mwf = await routine_repo.create_routine(USER, "월수금", "all", recurrence="freq=weekly;byday=mo,we,fr")
+        first_mon = await routine_repo.create_routine(USER, "첫째 월요일", "all", recurrence="FREQ=MONTHLY;BYDAY=1MO")
+        daily = await routine_repo.create_routine(USER, "평일", "weekday")
+        assert (await routine_repo.get_routine(mwf))["recurrence"] == "FREQ=WEEKLY;BYDAY=MO,WE,FR"
+        try:
+            await routine_repo.create_routine(USER, "bad", "all", recurrence="FREQ=HOURLY")
+            raise AssertionError("잘못된 규칙으로 루틴이 생성됨")
+        except RecurrenceError:
+            pass
+
+        names = lambda rows: [r["id"] for r in rows]
+        assert names(await routine_repo.routines_applicable_for_date(USER, date(2026, 4, 6))) == [mwf, first_mon, daily]
+        assert names(await routine_repo.routines_applicable_for_date(USER, date(2026, 4, 7))) == [daily]
+        assert names(await routine_repo.routines_applicable_for_date(USER, date(2026, 4, 13))) == [mwf, daily]
+
+        await routine_repo.update_routine(mwf, recurrence="FREQ=WEEKLY;BYDAY=TU")
+        assert names(await routine_repo.routines_applicable_for_date(USER, date(2026, 4, 7))) == [mwf, daily]
+        await routine_repo.update_routine(mwf, recurrence=None, weekend_mode="weekend")
+        assert names(await routine_repo.routines_applicable_for_date(USER, date(2026, 4, 11))) == [mwf]
+
+        # 공휴일/면책과 합친 유효일 마스크도 날짜별 is_valid_day와 같아야 함
+        routine = await routine_repo.get_routine(first_mon)
+        rule = await routine_rule(routine)
+        mask = await valid_day_mask(USER, rule, START, END)
+        for i in range(len(mask)):
+            assert mask[i] == await is_valid_day(USER, rule, START + timedelta(days=i)), START + timedelta(days=i)
+        await check_local_anchor()
+        print(f"OK: {len(CASES)} rules match day-by-day expectations, routine rule cache, user-local anchors, repo/mask/is_valid_day agree")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
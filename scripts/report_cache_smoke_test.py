@@ -0,0 +1,135 @@
+"""리포트 결과 캐시(report_cache) 스모크 테스트.
+
+시나리오:
+- 처음 조회는 계산(miss), 바로 다시 조회하면 쿼리 없이 캐시에서(hit) 같은 객체를 돌려주는지 확인
+- 체크인/면책/루틴 추가/루틴 수정/시즌 생성 뒤에는 다시 계산하고 결과가 aggregate_user_metrics와 같은지 확인
+- 다른 사용자의 쓰기는 이 사용자의 캐시를 건드리지 않는지 확인
+- REPORT_CACHE_SIZE를 넘으면 오래된 항목부터 버리는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="report_cache_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "report_cache.db")
+os.environ["REPORT_CACHE_SIZE"] = "4"
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.report_cache import get_report_metrics, report_cache_stats
+from domain.stats import aggregate_user_metrics
+from domain.time_utils import user_local_day
+from repos import checkin_repo, exemption_repo, report_season_repo, routine_repo
+
+USER = "report_cache_user"
+OTHER = "report_cache_other"
+DAYS = 60
+
+
+async def seed(user_id: str) -> None:
+    today = await user_local_day(user_id)
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    for i, mode in enumerate(("all", "weekday")):
+        rid = await routine_repo.create_routine(user_id, f"루틴{i}", mode)
+        await routine_repo.update_routine(rid, created_at=created)
+        await asyncio.gather(*(
+            checkin_repo.upsert_checkin_done(rid, user_id, today - timedelta(days=k))
+            for k in range(1, DAYS) if k % 3
+        ))
+
+
+async def open_report(user_id: str, scope: str = "all") -> tuple:
+    """cogs/report.py generate_report와 같은 순서로 (결과, 시즌 id)를 구한다."""
+    routines = await routine_repo.list_active_routines_for_user(user_id)
+    season = await report_season_repo.get_or_create_current_season(user_id)
+    start = datetime.fromisoformat(str(season["start_day"])).date()
+    metrics = await get_report_metrics(user_id, routines, scope, season_id=season["id"], season_start=start)
+    want = await aggregate_user_metrics(user_id, routines, scope, season_start=start)
+    assert metrics == want, (scope, metrics, want)
+    return metrics, season["id"]
+
+
+async def expect_miss(user_id: str, label: str) -> dict:
+    before = report_cache_stats()["misses"]
+    metrics, _ = await open_report(user_id)
+    assert report_cache_stats()["misses"] == before + 1, label
+    return metrics
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    try:
+        await seed(USER)
+        await seed(OTHER)
+        today = await user_local_day(USER)
+
+        first = await expect_miss(USER, "cold")
+        # 같은 리포트를 다시 열면 계산 없이 같은 결과
+        routines = await routine_repo.list_active_routines_for_user(USER)
+        season = await report_season_repo.get_or_create_current_season(USER)
+        start = datetime.fromisoformat(str(season["start_day"])).date()
+        with capture_statements() as stmts:
+            t0 = time.perf_counter()
+            for _ in range(1000):
+                again = await get_report_metrics(USER, routines, "all", season_id=season["id"], season_start=start, today_local=today)
+            us = (time.perf_counter() - t0) * 1e6 / 1000
+        assert again is first
+        assert not stmts, stmts
+        assert report_cache_stats()["hits"] >= 1000
+
+        # 다른 사용자의 쓰기는 무관
+        other_rid = (await routine_repo.list_active_routines_for_user(OTHER))[0]["id"]
+        await checkin_repo.upsert_checkin_done(other_rid, OTHER, today - timedelta(days=3))
+        hits = report_cache_stats()["hits"]
+        await open_report(USER)
+        assert report_cache_stats()["hits"] == hits + 1
+
+        # 이 사용자의 쓰기 뒤에는 다시 계산
+        rid = routines[0]["id"]
+        await checkin_repo.upsert_checkin_done(rid, USER, today - timedelta(days=3))
+        assert (await expect_miss(USER, "checkin"))["by_routine"] != first["by_routine"]
+        await checkin_repo.clear_checkin(rid, today - timedelta(days=3))
+        await expect_miss(USER, "clear")
+        await exemption_repo.create_exemption(USER, today - timedelta(days=10), today - timedelta(days=8), "trip")
+        await expect_miss(USER, "exemption")
+        new_rid = await routine_repo.create_routine(USER, "새 루틴", "all")
+        await expect_miss(USER, "new routine")
+        await routine_repo.update_routine(new_rid, name="이름 바꿈")
+        await expect_miss(USER, "routine update")
+        await routine_repo.delete_routine(new_rid)
+        await expect_miss(USER, "routine delete")
+        old_season = season["id"]
+        await report_season_repo.create_new_season(USER, "새 시즌", (today - timedelta(days=5)).isoformat())
+        _, new_season = await open_report(USER)
+        assert new_season != old_season
+
+        # 용량을 넘으면 오래된 항목부터 버린다
+        for scope in ("7d", "30d", "all"):
+            await open_report(USER, scope)
+            await open_report(OTHER, scope)
+        st = report_cache_stats()
+        assert st["size"] == st["max_size"] == 4, st
+        assert st["evictions"] >= 2, st
+        print(f"OK: repeat report opens served from cache without queries ({us:.1f}us each), invalidated by checkin/exemption/routine/season writes, LRU bounded ({st})")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""리포트 계산 프로세스 풀(report_compute) 스모크 테스트.
+
+시나리오:
+- 기록이 긴 사용자의 처음 리포트는 누적 배열/연속 완료 계산이 프로세스 풀로 넘어가고,
+  풀을 끄고(이벤트 루프 안에서) 다시 계산한 결과와 같은지 확인
+- 기록이 짧은 사용자는 풀이 켜져 있어도 이벤트 루프 안에서 바로 계산하는지 확인
+- 큰 계산을 풀로 넘기면 그동안 이벤트 루프가 다른 일을 처리할 수 있는지(지연) 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+- 기준을 낮춰(REPORT_POOL_MIN_DAYS) 작은 데이터로도 풀을 쓰게 합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="report_pool_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "report_pool.db")
+os.environ["REPORT_POOL_SIZE"] = "2"
+os.environ["REPORT_POOL_MIN_DAYS"] = "2000"
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain import report_compute
+from domain.recurrence import compile_rule
+from domain.report_compute import StreakState, day_statuses, fold_status_streaks, report_compute_stats, run_report_task, shutdown_report_pool, start_report_pool
+from domain.stats import aggregate_user_metrics
+from domain.time_utils import user_local_day
+from domain.window_metrics import invalidate_series
+from repos import checkin_repo, routine_repo, streak_repo
+
+LONG_USER = "report_pool_long"
+SHORT_USER = "report_pool_short"
+
+
+async def seed(user_id: str, n: int, days: int) -> list:
+    today = await user_local_day(user_id)
+    created = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    for i in range(n):
+        rid = await routine_repo.create_routine(user_id, f"루틴{i}", ("all", "weekday")[i % 2])
+        await routine_repo.update_routine(rid, created_at=created)
+        await asyncio.gather(*(
+            checkin_repo.upsert_checkin_done(rid, user_id, today - timedelta(days=k))
+            for k in range(days + 1) if random.random() < 0.8
+        ))
+    return await routine_repo.list_active_routines_for_user(user_id)
+
+
+async def max_lag_during(coro) -> float:
+    """coro를 기다리는 동안 1ms 간격 타이머가 가장 늦게 깨어난 시간(ms)."""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, (time.perf_counter() - t0) * 1000 - 1)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await coro
+    done = True
+    await task
+    return lag
+
+
+async def main() -> None:
+    random.seed(23)
+    await init_db()
+    try:
+        await start_report_pool()
+        long_routines = await seed(LONG_USER, 3, 1000)
+        short_routines = await seed(SHORT_USER, 1, 30)
+
+        before = report_compute_stats()
+        pooled = await aggregate_user_metrics(LONG_USER, long_routines, "all")
+        after = report_compute_stats()
+        # 일별 상태 두 번(누적 배열, 연속 완료: 조회는 저장하지 않으므로 야간 확정 전에는 각자 계산) + 연속 완료 접기 한 번
+        assert after["offloaded"] - before["offloaded"] == 3, (before, after)
+
+        # 풀을 끄고 처음부터 다시 계산해도 같다
+        invalidate_series()
+        await streak_repo.delete_routine_streaks(LONG_USER)
+        report_compute.REPORT_POOL_SIZE = 0
+        try:
+            inline = await aggregate_user_metrics(LONG_USER, long_routines, "all")
+        finally:
+            report_compute.REPORT_POOL_SIZE = 2
+        assert pooled == inline
+
+        before = report_compute_stats()
+        await aggregate_user_metrics(SHORT_USER, short_routines, "all")
+        after = report_compute_stats()
+        assert after["offloaded"] == before["offloaded"] and after["inline"] > before["inline"], (before, after)
+
+        # 큰 계산: 풀에서 돌리는 동안 이벤트 루프는 멈추지 않는다
+        rule = compile_rule("weekday")
+        rows = [(n, 0, 1) for n in range(10000, 10000 + 40000) if random.random() < 0.8]
+        status = day_statuses(rule, 10000, 10000, 10000 + 40000 - 1, [], [], rows)
+        marks = list(range(10030, 10000 + 40000, 30))
+        jobs = [(StreakState.empty(10000), status, marks)] * 20
+        want = fold_status_streaks(jobs)
+        # 체크포인트에서 나눠 접어도 한 번에 접은 것과 같다
+        assert want[0][:2] == fold_status_streaks([(StreakState.empty(10000), status, ())])[0][:2]
+        assert [cp.last_day + 1 for cp in want[0][2]] == marks
+        cp = want[0][2][len(marks) // 2]
+        assert fold_status_streaks([(cp, status[cp.last_day + 1 - 10000:], ())])[0][:2] == want[0][:2]
+        t0 = time.perf_counter()
+        fold_status_streaks(jobs)
+        inline_ms = (time.perf_counter() - t0) * 1000
+        got = None
+
+        async def offloaded():
+            nonlocal got
+            got = await run_report_task(fold_status_streaks, jobs, work=len(jobs) * 40000)
+
+        lag = await max_lag_during(offloaded())
+        assert got == want
+        assert lag < inline_ms / 2, (lag, inline_ms)
+        print(f"OK: long history offloaded to process pool with identical results, short history inline, loop lag {lag:.1f}ms vs {inline_ms:.0f}ms inline ({report_compute_stats()})")
+    finally:
+        shutdown_report_pool()
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
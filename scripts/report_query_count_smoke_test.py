@@ -0,0 +1,120 @@
+"""리포트 집계 쿼리 수 회귀 테스트.
+
+시나리오:
+- 루틴 2개인 사용자와 12개인 사용자에게 같은 모양의 기록을 넣고 aggregate_user_metrics를 실행
+- 처음(캐시 없음) 실행의 SELECT 수가 루틴 수와 상관없이 같고 상한(COLD_SELECT_LIMIT) 이하인지 확인
+- 야간 작업(advance_streaks)이 연속 완료 상태를 저장한 뒤 다시 실행하면(캐시/저장된 상태 사용)
+  SELECT가 WARM_SELECT_LIMIT 이하이고 쓰기가 없는지 확인
+- 결과는 루틴별로 계산한 count_valid_days/count_done_days/calc_streak과 같은지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="report_queries_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "report_queries.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain import stats
+from domain.day_num import to_day_num
+from domain.streaks import advance_streaks
+from domain.time_utils import user_local_day
+from repos import checkin_repo, exemption_repo, routine_repo
+
+# 설정 1 + 면책 1 + 누적 배열용 일별 상태 1 + 체크인 1 + 연속 상태 1 + 가장 늦은 체크포인트 1 + 연속용 일별 상태 1(방금 확정된 어제까지) + 오늘 체크인 1
+COLD_SELECT_LIMIT = 8
+# 연속 상태 1 + 마지막 반영일 이후 체크인 1
+WARM_SELECT_LIMIT = 2
+DAYS = 120
+MODES = ("all", "weekday", "weekend")
+
+
+def _selects(stmts: list) -> list:
+    return [s for s in stmts if s.lstrip().upper().startswith("SELECT")]
+
+
+def _writes(stmts: list) -> list:
+    return [s for s in stmts if s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+
+
+async def seed(user_id: str, n: int) -> list:
+    today = await user_local_day(user_id)
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    rids = []
+    for i in range(n):
+        rid = await routine_repo.create_routine(user_id, f"루틴{i}", MODES[i % len(MODES)])
+        await routine_repo.update_routine(rid, created_at=created)
+        rids.append(rid)
+    writes = []
+    for rid in rids:
+        for k in range(DAYS + 1):
+            x = random.random()
+            if x < 0.8:
+                writes.append(checkin_repo.upsert_checkin_done(rid, user_id, today - timedelta(days=k)))
+            elif x < 0.85:
+                writes.append(checkin_repo.skip_checkin(rid, user_id, today - timedelta(days=k), "rest"))
+    await asyncio.gather(*writes)
+    await exemption_repo.create_exemption(user_id, today - timedelta(days=40), today - timedelta(days=35), "trip")
+    return await routine_repo.list_active_routines_for_user(user_id)
+
+
+async def reference(user_id: str, routines: list, scope: str) -> list:
+    today = await user_local_day(user_id)
+    end = today - timedelta(days=1)
+    out = []
+    for r in routines:
+        start = end - timedelta(days=29) if scope == "30d" else await stats._routine_start_date(r, today)
+        valid, valid_days = await stats.count_valid_days(user_id, r, range(to_day_num(start), to_day_num(end) + 1))
+        done, _ = await stats.count_done_days(r["id"], valid_days)
+        out.append((r["id"], done, valid, *await stats.calc_streak(user_id, r)))
+    return out
+
+
+async def main() -> None:
+    random.seed(20)
+    enable_statement_trace()
+    await init_db()
+    try:
+        cold_counts = []
+        for user_id, n in (("small_user", 2), ("large_user", 12)):
+            routines = await seed(user_id, n)
+            with capture_statements() as stmts:
+                metrics = await stats.aggregate_user_metrics(user_id, routines, "all")
+            cold = len(_selects(stmts))
+            assert cold <= COLD_SELECT_LIMIT, (n, cold, _selects(stmts))
+            cold_counts.append(cold)
+            # 조회는 연속 완료 상태를 저장하지 않는다
+            assert not any("routine_streak" in s for s in _writes(stmts)), _writes(stmts)
+            await advance_streaks(user_id)
+
+            for scope in ("all", "30d"):
+                with capture_statements() as stmts:
+                    metrics = await stats.aggregate_user_metrics(user_id, routines, scope)
+                assert len(_selects(stmts)) <= WARM_SELECT_LIMIT, (n, scope, _selects(stmts))
+                assert not _writes(stmts), (n, scope, _writes(stmts))
+                got = [(m["id"], m["done"], m["valid"], m["max_streak"], m["current_streak"]) for m in metrics["by_routine"]]
+                assert got == await reference(user_id, routines, scope), (n, scope)
+        assert cold_counts[0] == cold_counts[1], cold_counts
+        print(f"OK: report SELECTs independent of routine count (cold {cold_counts[0]}, warm <= {WARM_SELECT_LIMIT}), results match per-routine counts")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""전체 사용자 일별 지표 롤업(metrics_rollup) 야간 배치 스크립트.
+
+용도:
+- 매일 새벽 작업 스케줄러/cron으로 돌려, 모든 사용자(시간대/하루 경계별)에게 끝난 마지막 날 기준
+  루틴별 7d/30d/전체 달성 수와 연속 완료를 metrics_rollup 테이블에 쌓는다(다이제스트/대시보드용).
+- 중간에 멈췄으면 같은 명령을 다시 돌리면 마지막으로 커밋한 사용자 다음부터 이어서 한다.
+- 이미 끝난 기준일은 다시 계산하지 않는다. 과거 기록을 고친 뒤 다시 만들려면 --restart.
+
+사용 예(PowerShell):
+  python scripts\\run_metrics_rollup.py
+  python scripts\\run_metrics_rollup.py --day 2025-01-31 --restart
+  python scripts\\run_metrics_rollup.py --max-chunks 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain.report_compute import shutdown_report_pool
+from domain.rollup import run_rollup
+
+
+async def main(day: date | None, restart: bool, max_chunks: int | None) -> int:
+    await init_db()
+    try:
+        started = time.perf_counter()
+        run = await run_rollup(day, restart=restart, max_chunks=max_chunks)
+        state = "finished" if run["finished_at"] else f"paused after user {run['last_user_id']!r}"
+        print(
+            f"metrics_rollup {run['rollup_day']}: {state}, "
+            f"users={run['users_done']} rows={run['rows_written']} ({time.perf_counter() - started:.1f}s)"
+        )
+        return 0
+    finally:
+        shutdown_report_pool()
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전체 사용자 루틴 지표를 기준일 롤업(metrics_rollup)으로 쌓는다")
+    parser.add_argument("--day", type=date.fromisoformat, help="기준일 YYYY-MM-DD(기본: 모든 사용자에게 끝난 마지막 날)")
+    parser.add_argument("--restart", action="store_true", help="그 기준일 롤업을 지우고 처음부터")
+    parser.add_argument("--max-chunks", type=int, help="이 수만큼 사용자 청크를 처리하고 멈춘다(다음 실행이 이어서)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.day, args.restart, args.max_chunks)))
@@ -5,7 +5,9 @@
 - 그런데 실제 완료 체크인은 더 과거에 존재
 
 기대:
-- init_db() 실행 시 start_day가 첫 완료 체크인 day로 자동 보정된다.
+- 보정 마이그레이션 단계(fix_season_start_day_to_first_checkin) 실행 시
+  start_day가 첫 완료 체크인 day로 자동 보정된다.
+  (이미 마이그레이션된 DB에서는 init_db()가 이 단계를 다시 돌리지 않으므로 직접 호출한다)
 
 주의:
 - 개발 DB에 데이터가 잠깐 들어갔다가 정리됩니다.
@@ -23,9 +25,12 @@ if str(root) not in sys.path:
     sys.path.insert(0, str(root))
 
 from db.db import init_db, connect_db
+from db.migrations import fix_season_start_day_to_first_checkin
 
 
 async def main() -> None:
+    await init_db()
+
     user_id = "season_fix_test_user"
     today = date.today().isoformat()
 
@@ -51,8 +56,13 @@ async def main() -> None:
     finally:
         await db.close()
 
-    # run migration
-    await init_db()
+    # run migration step
+    db = await connect_db()
+    try:
+        await fix_season_start_day_to_first_checkin(db)
+        await db.commit()
+    finally:
+        await db.close()
 
     # verify
     db = await connect_db()
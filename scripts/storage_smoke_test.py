@@ -0,0 +1,148 @@
+"""저장소 백엔드 동등성 스모크 테스트.
+
+시나리오:
+- 같은 작업을 SQLite 백엔드(임시 DB)와 메모리 백엔드에 똑같이 실행하고 결과를 비교
+  (시각 컬럼은 값 대신 NULL 여부만 비교)
+- 같은 데이터에 대해 domain.stats.aggregate_user_metrics 결과가 두 백엔드에서 같은지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="storage_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "storage.db")
+
+from db.db import init_db, close_pool
+from db.write_queue import stop_write_queue
+from domain import stats
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USER = "storage_test_user"
+TODAY = date(2026, 3, 2)
+_TIME_COLUMNS = {"created_at", "checked_at", "undone_at", "closed_at"}
+
+
+def normalize(value):
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: (v is not None if k in _TIME_COLUMNS else normalize(v)) for k, v in value.items()}
+    return value
+
+
+async def scenario(store: StorageBackend) -> list:
+    out: list = []
+    await store.upsert_user_settings(USER, reminder_time="21:30")
+    await store.upsert_user_settings(USER, suggest_goals_on_checkin=False)
+    out.append(await store.get_user_settings(USER))
+    out.append(await store.list_all_user_settings())
+
+    rids = [await store.create_routine(USER, f"루틴{i}", mode) for i, mode in enumerate(("all", "weekday", "weekend"))]
+    extra = await store.create_routine(USER, "순서 지정", "all", order_index=0)
+    await store.update_routine(rids[1], notes="memo", active=1)
+    await store.update_routine(rids[2], active=0)
+    out.append(await store.list_active_routines_for_user(USER))
+    out.append(await store.routines_applicable_for_date(USER, TODAY))
+    out.append(await store.prepare_checkin_for_date(USER, datetime(2026, 3, 7, 12, 0)))
+    out.append(await store.list_routine_user_ids())
+    await store.delete_routine(extra)
+    out.append(await store.get_routine(extra))
+    rec = await store.create_routine(USER, "월수금", "all", recurrence="freq=weekly;byday=fr,mo,we")
+    out.append(await store.get_routine(rec))
+    for d in range(3):
+        out.append([r["id"] for r in await store.routines_applicable_for_date(USER, TODAY + timedelta(days=d))])
+    await store.delete_routine(rec)
+
+    for i in range(40):
+        d = TODAY - timedelta(days=i)
+        for rid in rids:
+            if i % 7 == 0:
+                await store.skip_checkin(rid, USER, d, "rest")
+            elif (i + rid) % 3:
+                await store.upsert_checkin_done(rid, USER, d)
+    await store.undo_checkin(rids[0], TODAY - timedelta(days=1))
+    await store.clear_checkin(rids[0], TODAY - timedelta(days=2))
+    await store.upsert_checkin_done(rids[0], USER, TODAY - timedelta(days=7))
+    out.append(await store.get_checkin(rids[0], TODAY - timedelta(days=1)))
+    out.append(await store.get_checkin(rids[0], "1999-01-01"))
+    out.append(await store.list_checkins_for_user_day(USER, TODAY - timedelta(days=7)))
+    out.append(await store.list_checkins_for_routine(rids[1], TODAY - timedelta(days=10), TODAY - timedelta(days=3)))
+    out.append(len(await store.list_checkins_for_routine(rids[0])))
+    out.append(await store.get_checkins_for_routines([*rids, 9999], TODAY - timedelta(days=3), TODAY))
+    out.append(await store.get_checkins_for_routines(rids, TODAY - timedelta(days=7)))
+
+    ex1 = await store.create_exemption(USER, TODAY - timedelta(days=20), TODAY - timedelta(days=15), "trip")
+    ex2 = await store.create_exemption(USER, "2026-01-01", "2026-01-03")
+    out.append(await store.list_exemptions_for_user(USER))
+    out.append([await store.has_exemption_on(USER, TODAY - timedelta(days=n)) for n in (14, 15, 20, 21)])
+    await store.delete_exemption(ex2)
+    out.append(await store.get_exemption(ex1))
+    out.append(await store.get_exemption(ex2))
+
+    gid = await store.create_goal(USER, "goal", "2026-12-31", "desc")
+    tmp = await store.create_goal(USER, "tmp")
+    await store.update_goal(gid, description="changed")
+    await store.delete_goal(tmp)
+    out.append(await store.get_goal(gid))
+    out.append(await store.list_active_goals_for_user(USER))
+    out.append(await store.list_progress_for_goal(gid))
+
+    out.append(await store.get_first_checkin_day(USER))
+    out.append(await store.get_last_checkin_day(USER))
+    sid = await store.ensure_default_season(USER)
+    out.append(await store.ensure_default_season(USER) == sid)
+    out.append(await store.get_or_create_current_season(USER))
+    sid2 = await store.create_new_season(USER, "시즌2", (TODAY - timedelta(days=5)).isoformat())
+    out.append(await store.list_seasons_for_user(USER))
+    out.append(await store.get_season(USER, sid))
+    out.append(await store.get_season("someone_else", sid))
+    out.append(await store.get_season_by_id_for_user(USER, sid2))
+    out.append(await store.get_current_season(USER))
+
+    routines = await store.list_active_routines_for_user(USER)
+    with use_storage(store):
+        for scope in ("7d", "30d", "all"):
+            out.append(await stats.aggregate_user_metrics(USER, routines, scope, TODAY))
+    return out
+
+
+async def main() -> None:
+    await init_db()
+    try:
+        memory = MemoryBackend()
+        assert isinstance(memory, StorageBackend) and isinstance(SqliteBackend(), StorageBackend)
+
+        started = time.perf_counter()
+        sqlite_out = await scenario(SqliteBackend())
+        sqlite_ms = (time.perf_counter() - started) * 1000.0
+        started = time.perf_counter()
+        memory_out = await scenario(memory)
+        memory_ms = (time.perf_counter() - started) * 1000.0
+
+        for i, (a, b) in enumerate(zip(normalize(sqlite_out), normalize(memory_out))):
+            assert a == b, f"step {i} differs:\n  sqlite={a}\n  memory={b}"
+        assert len(sqlite_out) == len(memory_out)
+        print(f"OK: {len(sqlite_out)} results identical (sqlite {sqlite_ms:.0f}ms, memory {memory_ms:.0f}ms)")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""연속 완료(streak) 계산 스모크 테스트.
+
+시나리오:
+- 무작위 체크인(완료/스킵/취소)·면책·공휴일이 섞인 루틴들에서 calc_streak 결과가
+  날짜마다 is_valid_day/get_checkin으로 순방향·역방향을 도는 기준 구현과 같은지 확인
+- calc_streak 한 번에 체크인 조회 쿼리가 한 번만 실행되는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="streak_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "streak.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.stats import _routine_start_date, calc_streak
+from domain.time_utils import is_valid_day, routine_rule, user_local_day
+from repos import checkin_repo, exemption_repo, routine_repo
+
+USER = "streak_user"
+DAYS = 420
+
+
+async def reference_streak(routine: dict) -> tuple:
+    """예전 방식: 날짜마다 유효일/체크인을 확인하며 순방향(최대), 역방향(현재) 두 번 순회."""
+    today = await user_local_day(USER)
+    start = await _routine_start_date(routine, today)
+    days = [start + timedelta(days=i) for i in range((today - start).days + 1)]
+    rule = await routine_rule(routine)
+    status = []
+    for d in days:
+        if not await is_valid_day(USER, rule, d):
+            status.append("neutral")
+            continue
+        ci = await checkin_repo.get_checkin(routine["id"], d)
+        if ci and ci["skipped"]:
+            status.append("neutral")
+        elif ci and ci["checked_at"]:
+            status.append("done")
+        else:
+            status.append("miss")
+    max_streak = running = 0
+    for s in status:
+        if s == "done":
+            running += 1
+            max_streak = max(max_streak, running)
+        elif s == "miss":
+            running = 0
+    current = 0
+    for s in reversed(status):
+        if s == "done":
+            current += 1
+        elif s == "miss":
+            break
+    return max_streak, current
+
+
+async def main() -> None:
+    random.seed(17)
+    enable_statement_trace()
+    await init_db()
+    try:
+        today = await user_local_day(USER)
+        created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+        specs = [("weekday", None), ("all", None), ("weekend", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"), ("all", "FREQ=DAILY;INTERVAL=3")]
+        rids = []
+        plans = []
+        for i, (mode, rule) in enumerate(specs):
+            rid = await routine_repo.create_routine(USER, f"루틴{i}", mode, recurrence=rule)
+            await routine_repo.update_routine(rid, created_at=created)
+            rids.append(rid)
+            # 연속 구간이 생기도록 완료 확률을 구간마다 바꾼다
+            plan, p = [], 0.9
+            for k in range(DAYS + 1):
+                if k % 30 == 0:
+                    p = random.choice((0.6, 0.9, 0.98))
+                x = random.random()
+                kind = "done" if x < p else "skip" if x < p + 0.04 else "undo" if x < p + 0.06 else None
+                plan.append((today - timedelta(days=k), kind))
+            plans.append((rid, plan))
+
+        async def seed(rid: int, plan: list) -> None:
+            for d, kind in plan:
+                if kind in ("done", "undo"):
+                    await checkin_repo.upsert_checkin_done(rid, USER, d)
+                if kind == "undo":
+                    await checkin_repo.undo_checkin(rid, d)
+                elif kind == "skip":
+                    await checkin_repo.skip_checkin(rid, USER, d, "rest")
+
+        # 루틴별로 동시에 넣어 쓰기 큐가 한 커밋에 묶도록
+        await asyncio.gather(*(seed(rid, plan) for rid, plan in plans))
+        await exemption_repo.create_exemption(USER, today - timedelta(days=100), today - timedelta(days=90), "trip")
+        await exemption_repo.create_exemption(USER, today - timedelta(days=2), today, "sick")
+
+        for rid in rids:
+            routine = await routine_repo.get_routine(rid)
+            want = await reference_streak(routine)
+            t0 = time.perf_counter()
+            with capture_statements() as stmts:
+                got = await calc_streak(USER, routine)
+            ms = (time.perf_counter() - t0) * 1000
+            assert got == want, (routine["weekend_mode"], routine["recurrence"], got, want)
+            checkin_queries = [s for s in stmts if "routine_checkin" in s]
+            assert len(checkin_queries) == 1, checkin_queries
+            print(f"routine {rid} ({routine['recurrence'] or routine['weekend_mode']}): streak={got} {ms:.2f}ms")
+        print(f"OK: calc_streak matches day-by-day reference for {len(rids)} routines, one checkin query each")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""저장된 연속 완료 상태(routine_streak) 스모크 테스트.
+
+시나리오:
+- SQLite 백엔드(임시 DB)와 메모리 백엔드 각각에서, 상태를 이어서 구한 값이 calc_streak(전체 재계산)과 같은지 확인
+- 조회(get_streaks)는 저장하지 않고, 야간 작업(advance_streaks)만 어제까지 반영해 저장하는지 확인
+- 오늘 체크인은 상태를 건드리지 않고(rev만 올림), 과거 수정은 그날 이후를 반영한 상태와
+  그 뒤 달의 체크포인트만 버려 남은 체크포인트에서 이어서 계산하는지 확인
+- 체크포인트가 없는 첫 달의 수정/규칙 변경은 상태를 지워 처음부터 다시 만드는지 확인
+- 면책 추가/삭제 뒤에도 값이 맞는지, 계산 도중 들어온 쓰기가 있으면 저장(rev 비교)이 거절되는지 확인
+- 이미 어제까지 반영된 상태에서는 조회가 상태 1번 + 체크인 1번만 읽고 쓰지 않는지 확인(SQLite)
+- rebuild_streaks(복구)가 같은 값을 다시 만드는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="streak_state_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "streak_state.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.day_num import month_start_of, to_day_num
+from domain.stats import _routine_start_date, calc_streak
+from domain.streaks import advance_streaks, get_streaks, rebuild_streaks
+from domain.time_utils import user_local_day
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USER = "streak_state_user"
+DAYS = 200
+
+
+async def check(store: StorageBackend, routines: list, label: str) -> dict:
+    got = await get_streaks(USER, routines)
+    for r in routines:
+        want = await calc_streak(USER, r)
+        assert got[r["id"]] == want, (label, r["id"], got[r["id"]], want)
+    return await store.get_routine_streaks([r["id"] for r in routines])
+
+
+async def scenario(store: StorageBackend, sqlite: bool) -> None:
+    random.seed(18)
+    today = await user_local_day(USER)
+    t = to_day_num(today)
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    rids = []
+    for i, (mode, rule) in enumerate((("all", None), ("weekday", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"))):
+        rid = await store.create_routine(USER, f"루틴{i}", mode, recurrence=rule)
+        await store.update_routine(rid, created_at=created)
+        rids.append(rid)
+    writes = []
+    for rid in rids:
+        for k in range(1, DAYS + 1):
+            x = random.random()
+            if x < 0.9:
+                writes.append(store.upsert_checkin_done(rid, USER, today - timedelta(days=k)))
+            elif x < 0.93:
+                writes.append(store.skip_checkin(rid, USER, today - timedelta(days=k), "rest"))
+    await asyncio.gather(*writes)
+    # 마지막 열흘은 모두 완료해서 현재 연속 구간을 만든다
+    await asyncio.gather(*(store.upsert_checkin_done(rid, USER, today - timedelta(days=k)) for rid in rids for k in range(1, 11)))
+    routines = await store.list_active_routines_for_user(USER)
+    daily = next(r for r in routines if r["id"] == rids[0])
+    ids = [r["id"] for r in routines]
+
+    # 조회는 저장하지 않는다: 상태가 없으면 시작일부터 계산만 하고, 야간 작업이 어제까지 반영해 저장한다
+    assert not await check(store, routines, "before nightly")
+    assert await advance_streaks(USER) == len(routines)
+    rows = await check(store, routines, "first build")
+    assert all(rows[rid]["last_day_num"] == t - 1 for rid in rids), rows
+    run_start = rows[rids[0]]["run_start_day_num"]
+    assert run_start <= t - 10
+    assert await store.get_latest_streak_checkpoints(ids)
+
+    # 이미 반영된 상태: 상태 1번 + 체크인 1번 읽기, 쓰기 없음
+    if sqlite:
+        with capture_statements() as stmts:
+            await get_streaks(USER, routines)
+        assert sum("routine_streak" in s for s in stmts) == 1, stmts
+        assert sum("routine_checkin" in s for s in stmts) == 1, stmts
+        assert not _writes(stmts), stmts
+
+    # 오늘 체크인: 저장된 상태는 그대로(오늘은 저장하지 않음), rev만 올라 그 사이의 야간 저장을 막는다
+    rev = rows[rids[0]]["rev"]
+    await store.upsert_checkin_done(rids[0], USER, today)
+    rows = await check(store, routines, "today")
+    assert rows[rids[0]]["last_day_num"] == t - 1 and rows[rids[0]]["rev"] == rev + 1
+
+    # 과거 수정: 그날 이후를 반영한 상태와 그 뒤 달의 체크포인트를 버리고, 조회는 남은 체크포인트에서 이어서 계산한다
+    await store.undo_checkin(rids[0], today - timedelta(days=3))
+    assert rids[0] not in await store.get_routine_streaks([rids[0]])
+    cp = (await store.get_latest_streak_checkpoints([rids[0]]))[rids[0]]
+    assert cp["month_start"] <= t - 3, cp
+    if sqlite:
+        with capture_statements() as stmts:
+            await check(store, routines, "edit in run")
+        assert not _writes(stmts), stmts
+    await check(store, routines, "edit in run")
+    await advance_streaks(USER)
+    rows = await check(store, routines, "edit in run advanced")
+    assert (rows[rids[0]]["last_day_num"], rows[rids[0]]["run_start_day_num"]) == (t - 1, t - 2), rows[rids[0]]
+
+    # 오래된 수정: 그날이 속한 달 1일의 체크포인트까지만 남는다
+    old = t - 150
+    await store.clear_checkin(rids[0], today - timedelta(days=150))
+    cp = (await store.get_latest_streak_checkpoints([rids[0]]))[rids[0]]
+    assert cp["month_start"] == month_start_of(old), (cp, month_start_of(old))
+    await check(store, routines, "old edit")
+    await advance_streaks(USER)
+    await check(store, routines, "old edit advanced")
+
+    # 첫 달(체크포인트 전)의 수정: 상태와 체크포인트가 모두 없어져 처음부터
+    first = to_day_num(await _routine_start_date(daily, today))
+    await store.skip_checkin(rids[0], USER, today - timedelta(days=t - first), "first month")
+    assert rids[0] not in await store.get_routine_streaks([rids[0]])
+    assert rids[0] not in await store.get_latest_streak_checkpoints([rids[0]])
+    await check(store, routines, "first month edit")
+    await advance_streaks(USER)
+
+    # 면책: 사용자 루틴 전체에 반영
+    ex = await store.create_exemption(USER, today - timedelta(days=2), today - timedelta(days=2), "trip")
+    assert not await store.get_routine_streaks(ids)
+    await check(store, routines, "exemption added")
+    await store.delete_exemption(ex)
+    await check(store, routines, "exemption removed")
+    await advance_streaks(USER)
+
+    # 규칙 변경: 해당 루틴만 처음부터
+    await store.update_routine(rids[1], weekend_mode="all")
+    assert rids[1] not in await store.get_routine_streaks([rids[1]])
+    assert rids[1] not in await store.get_latest_streak_checkpoints([rids[1]])
+    routines = await store.list_active_routines_for_user(USER)
+    await check(store, routines, "rule changed")
+    await advance_streaks(USER)
+
+    # 계산 도중 쓰기가 들어오면 오래된 rev로는 저장되지 않는다
+    row = (await store.get_routine_streaks([rids[2]]))[rids[2]]
+    await store.skip_checkin(rids[2], USER, today, "late edit")
+    assert not await store.save_routine_streak(rids[2], row["rev"], 999, 999, t - 1, t - 1, 999, [(month_start_of(t), 999, t - 1, 999)])
+    assert (await store.get_latest_streak_checkpoints([rids[2]]))[rids[2]]["current_streak"] != 999
+    await check(store, routines, "stale save rejected")
+
+    # 복구: 전부 지우고 다시 만들어도 같은 값
+    before = await get_streaks(USER, routines)
+    assert await rebuild_streaks(USER) == len(routines)
+    assert await get_streaks(USER, routines) == before
+    assert await calc_streak(USER, daily) == before[daily["id"]]
+
+
+def _writes(stmts: list) -> list:
+    return [s for s in stmts if s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    try:
+        await scenario(SqliteBackend(), sqlite=True)
+        memory = MemoryBackend()
+        with use_storage(memory):
+            await scenario(memory, sqlite=False)
+        print("OK: stored streak state matches calc_streak on sqlite/memory, reads never write, edits drop later snapshots, rejects stale saves, rebuilds")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
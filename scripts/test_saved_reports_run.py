@@ -1,2 +1,142 @@
+"""끝난 시즌 스냅샷(saved_stats) 스모크 테스트.
 
+시나리오:
+- SQLite 백엔드(임시 DB)와 메모리 백엔드 각각에서, 새 시즌을 시작해 끝난 직전 시즌의 스냅샷을 만들고
+  7d/30d/all 결과가 시즌 마지막 날 기준으로 직접 계산한 값과 같은지 확인
+- 진행 중 시즌은 스냅샷을 쓰지 않는지(None) 확인
+- 다시 볼 때는 saved_stats 한 행만 읽는지 확인(SQLite)
+- 시즌 안 날짜의 체크인 보충 입력/면책 추가/루틴 이름 변경은 스냅샷을 지워 다시 만들고,
+  시즌이 끝난 뒤의 체크인은 스냅샷을 건드리지 않는지 확인
+- 지난 시즌 요약 목록과 rebuild_saved_stats(복구)를 확인
 
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="saved_reports_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "saved_reports.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.saved_stats import (
+    get_closed_season_metrics,
+    list_closed_season_summaries,
+    rebuild_saved_stats,
+    snapshot_closed_seasons,
+)
+from domain.stats import aggregate_user_metrics, calc_streak
+from domain.time_utils import user_local_day
+from storage import StorageBackend, use_storage
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SqliteBackend
+
+USER = "saved_reports_user"
+DAYS = 90
+
+
+async def expected(store: StorageBackend, season: dict, scope: str) -> dict:
+    """시즌 마지막 날 다음 날을 기준일로 직접 계산한 결과(연속 완료는 마지막 날 기준)."""
+    start, end = date.fromisoformat(season["start_day"]), date.fromisoformat(season["end_day"])
+    routines = await store.list_active_routines_for_user(USER)
+    metrics = await aggregate_user_metrics(USER, routines, scope, end + timedelta(days=1), season_start=start, season_end=end)
+    for row, r in zip(metrics["by_routine"], routines):
+        row["max_streak"], row["current_streak"] = await calc_streak(USER, r, until=end)
+    return metrics
+
+
+async def check_all(store: StorageBackend, season: dict, label: str) -> None:
+    for scope in ("7d", "30d", "all"):
+        got = await get_closed_season_metrics(USER, season, scope)
+        want = await expected(store, season, scope)
+        assert got == want, (label, scope, got, want)
+
+
+async def scenario(store: StorageBackend, sqlite: bool) -> None:
+    random.seed(22)
+    today = await user_local_day(USER)
+    created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+    rids = []
+    for i, mode in enumerate(("all", "weekday")):
+        rid = await store.create_routine(USER, f"루틴{i}", mode)
+        await store.update_routine(rid, created_at=created)
+        rids.append(rid)
+    for rid in rids:
+        for k in range(12, DAYS):
+            x = random.random()
+            if x < 0.8:
+                await store.upsert_checkin_done(rid, USER, today - timedelta(days=k))
+            elif x < 0.85:
+                await store.skip_checkin(rid, USER, today - timedelta(days=k), "rest")
+
+    # 첫 시즌은 첫 체크인부터, 새 시즌을 시작하면 마지막 체크인 날로 닫힌다
+    old_id = await store.ensure_default_season(USER)
+    new_id = await store.create_new_season(USER, "새 시즌", (today - timedelta(days=5)).isoformat())
+    old = await store.get_season(USER, old_id)
+    current = await store.get_season(USER, new_id)
+    assert old["end_day"] < today.isoformat(), old
+    assert await get_closed_season_metrics(USER, current, "all") is None
+
+    assert await snapshot_closed_seasons(USER) == 1
+    assert await snapshot_closed_seasons(USER) == 0
+    await check_all(store, old, "fresh")
+
+    if sqlite:
+        with capture_statements() as stmts:
+            for scope in ("7d", "30d", "all"):
+                await get_closed_season_metrics(USER, old, scope, today)
+        assert len(stmts) == 3 and all("saved_stats" in s for s in stmts), stmts
+
+    # 시즌이 끝난 뒤의 체크인은 스냅샷과 무관
+    await store.upsert_checkin_done(rids[0], USER, today)
+    assert await store.get_saved_stats(old_id) is not None
+
+    # 시즌 안 보충 입력/면책/루틴 이름 변경은 스냅샷을 지우고 다시 만든다
+    end = date.fromisoformat(old["end_day"])
+    await store.upsert_checkin_done(rids[1], USER, end - timedelta(days=3))
+    assert await store.get_saved_stats(old_id) is None
+    await check_all(store, old, "backfill")
+    await store.create_exemption(USER, end - timedelta(days=20), end - timedelta(days=15), "trip")
+    assert await store.get_saved_stats(old_id) is None
+    await check_all(store, old, "exemption")
+    await store.update_routine(rids[0], name="이름 바꿈")
+    assert await store.get_saved_stats(old_id) is None
+    assert (await get_closed_season_metrics(USER, old, "all"))["by_routine"][0]["name"] == "이름 바꿈"
+
+    summaries = await list_closed_season_summaries(USER)
+    assert [s["id"] for s in summaries] == [old_id], summaries
+    assert summaries[0]["summary"] == (await expected(store, old, "all"))["summary"]
+    assert await rebuild_saved_stats(USER) == 1
+    await check_all(store, old, "rebuilt")
+
+
+async def main() -> None:
+    enable_statement_trace()
+    await init_db()
+    try:
+        with use_storage(SqliteBackend()) as store:
+            await scenario(store, sqlite=True)
+        memory = MemoryBackend()
+        with use_storage(memory):
+            await scenario(memory, sqlite=False)
+        print("OK: closed seasons served from one saved_stats row on sqlite/memory, dropped and rebuilt on backfill/exemption/routine edits")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""사용자별 시간대/하루 경계 스모크 테스트.
+
+시나리오:
+- 설정이 없는 사용자는 기존 local_day(KST, 04:00 경계)와 같은 날을 돌려주는지 확인
+- 다른 시간대/경계 시각을 저장하면 그 기준으로 업무일이 바뀌는지 확인(DST 전환일 포함)
+- 시계를 한 번 읽은 뒤에는 같은 업무일 안의 조회가 DB를 조회하지 않는지 확인
+- upsert_user_settings 뒤에는 캐시가 무효화되고, 비워 둔 tz/경계는 기존 값이 유지되는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="user_day_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "user_day.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from domain.day_clock import DayClock, day_bounds, get_zone
+from domain.time_utils import KST, local_day, user_local_day
+from repos import user_settings_repo
+
+USER = "user_day_user"
+UTC = ZoneInfo("UTC")
+
+
+def check_clock() -> None:
+    # 설정 없음 = KST/04시: 기존 local_day와 같아야 함
+    kst = DayClock()
+    t = datetime(2026, 3, 1, 0, 0, tzinfo=UTC)
+    for h in range(0, 72):
+        dt = t + timedelta(hours=h)
+        assert kst.local_day(dt) == local_day(dt), dt
+
+    # 뉴욕 06시 경계: DST 시작(2026-03-08 02시)을 품은 업무일 03-07은 23시간
+    ny = DayClock("America/New_York", 6)
+    start, end = day_bounds(date(2026, 3, 7), ny.zone, 6)
+    assert end - start == 23 * 3600, end - start
+    start, end = day_bounds(date(2026, 3, 8), ny.zone, 6)
+    assert end - start == 24 * 3600, end - start
+    assert ny.local_day(datetime(2026, 3, 8, 5, 59, tzinfo=ny.zone)) == date(2026, 3, 7)
+    assert ny.local_day(datetime(2026, 3, 8, 6, 0, tzinfo=ny.zone)) == date(2026, 3, 8)
+    assert ny.local_day(datetime(2026, 3, 9, 5, 0, tzinfo=ny.zone)) == date(2026, 3, 8)
+    # 캐시된 구간 안/밖
+    assert ny.day == date(2026, 3, 8) and ny.start_ts == start and ny.end_ts == end
+    assert ny.day_at(end) == date(2026, 3, 9)
+
+    # 잘못된 시간대/경계는 KST/04시로
+    bad = DayClock("Not/AZone", 99)
+    assert bad.zone == KST and bad.cutoff_hour == 4
+    assert get_zone("Europe/Berlin") is get_zone("Europe/Berlin")
+
+
+async def main() -> None:
+    check_clock()
+    enable_statement_trace()
+    await init_db()
+    try:
+        # 2026-06-01 15:00 UTC = 06-02 00:00 KST(-> 06-01) / 06-01 08:00 LA
+        probe = datetime(2026, 6, 1, 15, 0, tzinfo=UTC)
+        assert await user_local_day(USER, probe) == date(2026, 6, 1)
+        assert await user_local_day(USER, probe + timedelta(hours=4)) == date(2026, 6, 2)
+
+        await user_settings_repo.upsert_user_settings(USER, tz="America/Los_Angeles", day_cutoff_hour=9)
+        assert await user_local_day(USER, probe) == date(2026, 5, 31), "upsert 뒤 시계가 갱신되지 않음"
+        assert await user_local_day(USER, probe + timedelta(hours=1)) == date(2026, 6, 1)
+
+        with capture_statements() as stmts:
+            for m in range(0, 24 * 60, 7):
+                await user_local_day(USER, probe + timedelta(hours=1, minutes=m))
+            await user_local_day(USER)
+        assert not stmts, f"캐시된 시계인데 {len(stmts)}개 쿼리 실행"
+
+        # tz/경계를 비워 두고 다른 설정만 바꾸면 기존 값 유지
+        await user_settings_repo.upsert_user_settings(USER, reminder_time="07:30")
+        settings = await user_settings_repo.get_user_settings(USER)
+        assert settings["tz"] == "America/Los_Angeles" and settings["day_cutoff_hour"] == 9, settings
+        assert settings["reminder_time"] == "07:30"
+        assert await user_local_day(USER, probe) == date(2026, 5, 31)
+        print("OK: per-user tz/cutoff, DST-length days, cached boundaries without queries, invalidation on upsert")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""유효일 마스크 스모크 테스트.
+
+시나리오:
+- 주말 모드 3종 x 1년 이상 범위에서 valid_day_mask가 날짜별 is_valid_day와 정확히 같은지 확인
+  (연도 경계, 한국 공휴일, 면책 기간 포함)
+- 잘못된 weekend_mode, 역전된 범위 처리 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="valid_mask_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "valid_mask.db")
+
+from db.db import init_db, close_pool
+from domain.time_utils import is_valid_day, mask_days, valid_day_mask
+from repos import exemption_repo
+
+USER = "valid_mask_user"
+START = date(2025, 11, 20)
+END = date(2027, 1, 10)
+
+
+async def main() -> None:
+    await init_db()
+    try:
+        await exemption_repo.create_exemption(USER, date(2026, 2, 10), date(2026, 2, 20), "trip")
+        await exemption_repo.create_exemption(USER, date(2026, 12, 30), date(2027, 1, 2), "year end")
+
+        for mode in ("weekday", "weekend", "all"):
+            started = time.perf_counter()
+            mask = await valid_day_mask(USER, mode, START, END)
+            mask_ms = (time.perf_counter() - started) * 1000.0
+            assert len(mask) == (END - START).days + 1
+            expected = []
+            d = START
+            while d <= END:
+                expected.append(1 if await is_valid_day(USER, mode, d) else 0)
+                d += timedelta(days=1)
+            assert list(mask) == expected, mode
+            assert mask_days(START, mask) == [START + timedelta(days=i) for i, v in enumerate(expected) if v]
+            print(f"{mode}: {sum(mask)}/{len(mask)} valid days, mask {mask_ms:.2f}ms")
+
+        assert await valid_day_mask(USER, "bogus", START, END) == bytearray((END - START).days + 1)
+        assert await valid_day_mask(USER, "all", END, START) == bytearray()
+        print("OK: valid_day_mask matches is_valid_day day by day")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
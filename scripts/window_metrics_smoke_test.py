@@ -0,0 +1,128 @@
+"""누적합 기간 지표(window_metrics) 스모크 테스트.
+
+시나리오:
+- 무작위 기간들의 (완료일, 유효일) 수가 count_valid_days/count_done_days로 센 값과 같은지 확인
+- 캐시가 유효하면 다시 조회해도 쿼리가 없고, 더 뒤의 날짜가 필요하면 늘어난 날만 읽는지 확인
+- 체크인/면책/루틴 수정 뒤에는 새 값으로 다시 만들어지는지 확인
+
+주의:
+- 개발 DB를 건드리지 않도록 임시 DB 파일을 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+_tmpdir = tempfile.mkdtemp(prefix="window_metrics_")
+os.environ["DATABASE_PATH"] = str(Path(_tmpdir) / "window_metrics.db")
+
+from db.db import init_db, close_pool, enable_statement_trace, capture_statements
+from db.write_queue import stop_write_queue
+from domain.day_num import to_day_num
+from domain.stats import _routine_start_date, count_done_days, count_valid_days
+from domain.time_utils import user_local_day
+from domain.window_metrics import get_series, window_metrics_stats
+from repos import checkin_repo, exemption_repo, routine_repo
+
+USER = "window_metrics_user"
+DAYS = 500
+
+
+async def expected(routine: dict, a, b) -> tuple:
+    days = range(to_day_num(a), to_day_num(b) + 1)
+    valid, valid_days = await count_valid_days(USER, routine, days)
+    done, _ = await count_done_days(routine["id"], valid_days)
+    return done, valid
+
+
+async def check_windows(routine: dict, n: int) -> None:
+    today = await user_local_day(USER)
+    start = await _routine_start_date(routine, today)
+    end = today - timedelta(days=1)
+    series = await get_series(USER, routine, start, end)
+    for _ in range(n):
+        a = start + timedelta(days=random.randrange(-5, DAYS))
+        b = a + timedelta(days=random.randrange(0, 120))
+        b = min(b, end)
+        got = series.counts(to_day_num(a), to_day_num(b))
+        want = await expected(routine, a, b)
+        assert got == want, (routine["id"], a, b, got, want)
+
+
+async def main() -> None:
+    random.seed(19)
+    enable_statement_trace()
+    await init_db()
+    try:
+        today = await user_local_day(USER)
+        created = (datetime.utcnow() - timedelta(days=DAYS)).isoformat()
+        rids = []
+        for i, (mode, rule) in enumerate((("weekday", None), ("all", "FREQ=WEEKLY;BYDAY=MO,WE,FR"), ("all", "FREQ=DAILY;INTERVAL=2"))):
+            rid = await routine_repo.create_routine(USER, f"루틴{i}", mode, recurrence=rule)
+            await routine_repo.update_routine(rid, created_at=created)
+            rids.append(rid)
+        writes = []
+        for rid in rids:
+            for k in range(DAYS + 1):
+                x = random.random()
+                d = today - timedelta(days=k)
+                if x < 0.75:
+                    writes.append(checkin_repo.upsert_checkin_done(rid, USER, d))
+                elif x < 0.82:
+                    writes.append(checkin_repo.skip_checkin(rid, USER, d, "rest"))
+        await asyncio.gather(*writes)
+        await exemption_repo.create_exemption(USER, today - timedelta(days=200), today - timedelta(days=190), "trip")
+
+        for rid in rids:
+            await check_windows(await routine_repo.get_routine(rid), 40)
+
+        # 캐시가 유효하면 쿼리 없이 O(1)
+        routine = await routine_repo.get_routine(rids[0])
+        start = await _routine_start_date(routine, today)
+        with capture_statements() as stmts:
+            t0 = time.perf_counter()
+            series = await get_series(USER, routine, start, today - timedelta(days=1))
+            for _ in range(1000):
+                series.counts(to_day_num(today) - 30, to_day_num(today) - 1)
+            ms = (time.perf_counter() - t0) * 1000
+        assert not stmts, stmts
+
+        # 더 뒤의 날짜(오늘)가 필요하면 늘어난 하루만 읽는다
+        with capture_statements() as stmts:
+            series = await get_series(USER, routine, start, today)
+        assert series.end == to_day_num(today)
+        assert [s for s in stmts if "routine_checkin" in s], stmts
+        assert window_metrics_stats()["extends"] >= 1
+
+        # 쓰기 뒤에는 다시 만든다
+        d3 = to_day_num(today) - 3
+        await checkin_repo.upsert_checkin_done(rids[0], USER, today - timedelta(days=3))
+        series = await get_series(USER, routine, start, today)
+        assert series.counts(d3, d3)[0] == series.counts(d3, d3)[1]
+        await checkin_repo.clear_checkin(rids[0], today - timedelta(days=3))
+        series = await get_series(USER, routine, start, today)
+        assert series.counts(d3, d3)[0] == 0
+        await checkin_repo.skip_checkin(rids[1], USER, today - timedelta(days=4), "sick")
+        await exemption_repo.create_exemption(USER, today - timedelta(days=10), today - timedelta(days=8), "trip")
+        await routine_repo.update_routine(rids[2], recurrence="FREQ=WEEKLY;BYDAY=SA,SU")
+        for rid in rids:
+            await check_windows(await routine_repo.get_routine(rid), 20)
+        print(f"OK: prefix-sum windows match day-by-day counts, cached lookups without queries (1000 windows {ms:.2f}ms), rebuilt after writes")
+    finally:
+        await stop_write_queue()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""그룹 커밋 쓰기 큐 스모크 테스트.
+
+시나리오:
+- 여러 사용자가 동시에 체크인 버튼을 누르는 상황을 흉내내어 upsert_checkin_done을 한꺼번에 호출
+- 모든 호출이 성공하고, 여러 요청이 소수의 트랜잭션으로 묶여 커밋되는지 확인
+- writer 커넥션이 PRAGMA 프로필(기본 balanced = NORMAL)과 상관없이 synchronous=FULL인지 확인
+- writer 태스크가 취소되면 모으는 중이던 요청과 대기 중인 요청이 멈추지 않고 실패하는지 확인
+
+주의:
+- 개발 DB에 데이터가 잠깐 들어갔다가 정리됩니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from db.db import DB_PATH, DB_PRAGMAS, init_db, connect_db
+from db.write_queue import WriteQueue, get_write_queue, stop_write_queue
+from repos import checkin_repo
+
+N = 200
+
+
+async def main() -> None:
+    await init_db()
+    user_id = "write_queue_test_user"
+    day = "2026-01-05"
+
+    try:
+        await asyncio.gather(*(checkin_repo.upsert_checkin_done(10_000 + i, user_id, day) for i in range(N)))
+        stats = get_write_queue().stats()
+        print("stats:", stats)
+        assert stats["writes"] == N, stats
+        assert stats["batches"] < N, ("expected batched commits", stats)
+
+        rows = await checkin_repo.list_checkins_for_user_day(user_id, day)
+        assert len(rows) == N, ("expected", N, "got", len(rows))
+        assert all(r["checked_at"] for r in rows)
+
+        # 실패하는 요청은 같은 배치의 다른 요청에 영향을 주지 않아야 한다
+        wq = get_write_queue()
+        bad = wq.submit("INSERT INTO no_such_table VALUES(1)")
+        good = checkin_repo.clear_checkin(10_000, day)
+        res = await asyncio.gather(bad, good, return_exceptions=True)
+        assert isinstance(res[0], Exception) and res[1] is None, res
+        ci = await checkin_repo.get_checkin(10_000, day)
+        assert ci is not None and ci["checked_at"] is None, ci
+
+        # writer 커넥션은 PRAGMA 프로필과 상관없이 매 커밋 fsync(FULL=2)
+        sync = await wq.submit("PRAGMA synchronous", fetch=True)
+        assert sync.rows[0]["synchronous"] == 2, (DB_PRAGMAS, sync.rows)
+
+        # writer 태스크가 취소돼도(루프 종료 등) submit()을 기다리는 호출자는 풀려나야 한다
+        slow = WriteQueue(DB_PATH, flush_interval_ms=10_000)
+        waiting = [asyncio.ensure_future(slow.submit("SELECT 1")) for _ in range(2)]
+        await asyncio.sleep(0.2)
+        slow._task.cancel()
+        res = await asyncio.wait_for(asyncio.gather(*waiting, return_exceptions=True), 2)
+        assert all(isinstance(r, RuntimeError) for r in res) and slow.stopped, res
+        print("OK: concurrent checkins committed in", stats["batches"], "batches")
+    finally:
+        await stop_write_queue()
+        db = await connect_db()
+        try:
+            await db.execute("DELETE FROM routine_checkin WHERE user_id = ?", (user_id,))
+            await db.commit()
+        finally:
+            await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
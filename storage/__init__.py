@@ -0,0 +1,52 @@
+"""저장소 백엔드 선택.
+
+도메인 계층(domain/stats, domain/time_utils)과 스케줄러는 get_storage()로 얻은 백엔드를 통해
+데이터를 읽는다. 기본값은 repos/*에 위임하는 SQLite 백엔드이고, 벤치마크/테스트에서는
+디스크 I/O 없이 도메인 로직만 돌릴 수 있도록 메모리 백엔드로 바꿔 끼울 수 있다.
+
+사용 예:
+  from storage import use_storage
+  from storage.memory_backend import MemoryBackend
+
+  with use_storage(MemoryBackend()) as store:
+      rid = await store.create_routine("u1", "물 마시기", "all")
+      await stats.aggregate_user_metrics("u1", await store.list_active_routines_for_user("u1"), "30d")
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from storage.base import StorageBackend
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """현재 저장소 백엔드. 설정된 것이 없으면 SQLite 백엔드를 만든다."""
+    global _storage
+    if _storage is None:
+        # repos -> domain.time_utils -> storage 순환 import를 피하려고 처음 쓸 때 가져온다
+        from storage.sqlite_backend import SqliteBackend
+        _storage = SqliteBackend()
+    return _storage
+
+
+def set_storage(backend: Optional[StorageBackend]) -> Optional[StorageBackend]:
+    """저장소 백엔드를 바꾸고 이전 백엔드를 반환한다. None이면 기본(SQLite)으로 되돌린다."""
+    global _storage
+    prev, _storage = _storage, backend
+    return prev
+
+
+@contextmanager
+def use_storage(backend: StorageBackend) -> Iterator[StorageBackend]:
+    """블록 안에서만 저장소 백엔드를 바꾼다."""
+    prev = set_storage(backend)
+    try:
+        yield backend
+    finally:
+        set_storage(prev)
+
+
+__all__ = ["StorageBackend", "get_storage", "set_storage", "use_storage"]
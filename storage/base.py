@@ -0,0 +1,99 @@
+"""저장소 백엔드 프로토콜.
+
+repos/*의 함수들과 같은 이름/인자/반환 형태를 갖는다. 반환되는 행은 SQLite 테이블의
+컬럼 이름을 키로 쓰는 dict이고, 날짜는 ISO 문자열(YYYY-MM-DD)이다.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple, Union, runtime_checkable
+
+Day = Union[date, str]
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    # routine_repo
+    async def create_routine(self, user_id: str, name: str, weekend_mode: str = "weekday", deadline_time: Optional[str] = None, notes: Optional[str] = None, active: int = 1, order_index: Optional[int] = None, recurrence: Optional[str] = None) -> int: ...
+    async def get_routine(self, routine_id: int) -> Optional[dict]: ...
+    async def update_routine(self, routine_id: int, **fields) -> None: ...
+    async def delete_routine(self, routine_id: int) -> None: ...
+    async def list_active_routines_for_user(self, user_id: str) -> List[dict]: ...
+    async def list_routine_user_ids(self) -> List[str]: ...
+    async def routines_applicable_for_date(self, user_id: str, d: date) -> List[dict]: ...
+    async def prepare_checkin_for_date(self, user_id: str, dt: datetime) -> List[dict]: ...
+
+    # checkin_repo
+    async def upsert_checkin_done(self, routine_id: int, user_id: str, local_day: Day) -> None: ...
+    async def undo_checkin(self, routine_id: int, local_day: Day) -> None: ...
+    async def skip_checkin(self, routine_id: int, user_id: str, local_day: Day, reason: Optional[str] = None) -> None: ...
+    async def clear_checkin(self, routine_id: int, local_day: Day) -> None: ...
+    async def get_checkin(self, routine_id: int, local_day: Day) -> Optional[dict]: ...
+    async def list_checkins_for_user_day(self, user_id: str, local_day: Day) -> List[dict]: ...
+    async def get_checkins_for_routines(self, routine_ids: Iterable[int], start_day: Day, end_day: Optional[Day] = None) -> Dict[Tuple[int, str], dict]: ...
+    async def list_checkins_for_routine(self, routine_id: int, start_day: Optional[Day] = None, end_day: Optional[Day] = None) -> List[dict]: ...
+
+    # streak_repo
+    async def get_routine_streaks(self, routine_ids: Iterable[int]) -> Dict[int, dict]: ...
+    async def get_latest_streak_checkpoints(self, routine_ids: Iterable[int]) -> Dict[int, dict]: ...
+    async def reset_routine_streak(self, routine_id: int, user_id: str, start_day_num: int) -> None: ...
+    async def save_routine_streak(self, routine_id: int, rev: int, current_streak: int, max_streak: int, last_day_num: int, run_start_day_num: int, max_before_run: int, checkpoints: Sequence[Tuple[int, int, int, int]] = ()) -> bool: ...
+    async def delete_routine_streaks(self, user_id: Optional[str] = None) -> int: ...
+
+    # saved_stats_repo
+    async def get_saved_stats(self, season_id: int) -> Optional[dict]: ...
+    async def list_saved_stats_for_user(self, user_id: str) -> List[dict]: ...
+    async def save_saved_stats(self, season_id: int, user_id: str, start_day: str, end_day: str, metrics: str) -> None: ...
+    async def delete_saved_stats(self, user_id: Optional[str] = None) -> int: ...
+
+    # day_status_repo
+    async def get_day_status_rows(self, routine_ids: Iterable[int], first_month: int, last_month: int) -> Dict[Tuple[int, int], dict]: ...
+    async def insert_day_status_placeholders(self, rows: Sequence[Tuple[int, str, int, int]]) -> Set[Tuple[int, int]]: ...
+    async def save_day_status(self, routine_id: int, month_start: int, rev: int, status: bytes, finalized_through: int) -> bool: ...
+    async def delete_day_status(self, user_id: Optional[str] = None) -> int: ...
+
+    # rollup_repo
+    async def list_rollup_user_ids(self, after_user_id: str, limit: int) -> List[str]: ...
+    async def list_day_clock_settings(self) -> List[dict]: ...
+    async def get_rollup_inputs(self, user_ids: Sequence[str]) -> Dict[str, List[dict]]: ...
+    def iter_checkins_for_users(self, first_user_id: str, last_user_id: str, end_day_num: int) -> AsyncIterator[Tuple[str, int, int, int, int]]: ...
+    async def get_rollup_run(self, rollup_day: str) -> Optional[dict]: ...
+    async def start_rollup_run(self, rollup_day: str, restart: bool = False) -> dict: ...
+    async def save_rollup_chunk(self, rollup_day: str, rows: Sequence[Tuple], last_user_id: str, users: int) -> None: ...
+    async def finish_rollup_run(self, rollup_day: str) -> None: ...
+    async def list_metrics_rollup(self, rollup_day: str, user_id: Optional[str] = None) -> List[dict]: ...
+
+    # exemption_repo
+    async def create_exemption(self, user_id: str, start_day: Day, end_day: Day, reason: Optional[str] = None) -> int: ...
+    async def get_exemption(self, exemption_id: int) -> Optional[dict]: ...
+    async def list_exemptions_for_user(self, user_id: str) -> List[dict]: ...
+    async def has_exemption_on(self, user_id: str, day: Day) -> bool: ...
+    async def delete_exemption(self, exemption_id: int) -> None: ...
+
+    # goal_repo
+    async def create_goal(self, user_id: str, title: str, deadline: Optional[str] = None, description: Optional[str] = None) -> int: ...
+    async def get_goal(self, goal_id: int) -> Optional[dict]: ...
+    async def update_goal(self, goal_id: int, **fields) -> None: ...
+    async def delete_goal(self, goal_id: int) -> None: ...
+    async def list_active_goals_for_user(self, user_id: str) -> List[dict]: ...
+
+    # progress_repo
+    async def add_progress(self, goal_id: int, user_id: str, delta: int) -> int: ...
+    async def list_progress_for_goal(self, goal_id: int) -> List[dict]: ...
+
+    # report_season_repo
+    async def get_first_checkin_day(self, user_id: str) -> Optional[str]: ...
+    async def get_last_checkin_day(self, user_id: str) -> Optional[str]: ...
+    async def ensure_default_season(self, user_id: str, title: str = "현재 시즌") -> int: ...
+    async def list_seasons_for_user(self, user_id: str, limit: int = 12) -> List[Dict[str, Any]]: ...
+    async def get_season(self, user_id: str, season_id: int) -> Optional[Dict[str, Any]]: ...
+    async def get_current_season(self, user_id: str) -> Optional[Dict[str, Any]]: ...
+    async def get_or_create_current_season(self, user_id: str) -> Dict[str, Any]: ...
+    async def get_season_by_id_for_user(self, user_id: str, season_id: int) -> Optional[Dict[str, Any]]: ...
+    async def close_previous_season_to_last_checkin(self, user_id: str) -> None: ...
+    async def create_new_season(self, user_id: str, title: str, start_day: str, auto_close_prev: bool = True) -> int: ...
+
+    # user_settings_repo
+    async def upsert_user_settings(self, user_id: str, tz: Optional[str] = None, reminder_time: str = "23:00", suggest_goals_on_checkin: int | bool = True, day_cutoff_hour: Optional[int] = None) -> None: ...
+    async def get_user_settings(self, user_id: str) -> Optional[dict]: ...
+    async def list_all_user_settings(self) -> List[dict]: ...
@@ -0,0 +1,750 @@
+"""메모리 저장소 백엔드.
+
+dict와 정렬된 인덱스(bisect)만으로 repos/*와 같은 동작을 흉내낸다. 프로세스가 끝나면
+데이터가 사라지므로 벤치마크/테스트/프로파일링 전용이다.
+
+- 행은 SQLite 테이블과 같은 컬럼 이름을 갖는 dict로 저장하고, 반환할 때는 복사본을 준다.
+- 루틴별 체크인은 local_day 정렬 인덱스로, 사용자별 완료일은 날짜별 개수 인덱스로 관리해
+  범위 조회와 첫/마지막 완료일 조회를 전체 순회 없이 처리한다.
+- SQLite 쪽과 마찬가지로 삭제는 연관 행으로 전파되지 않는다(외래 키 없음).
+"""
+from __future__ import annotations
+
+import itertools
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, UTC
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from domain.data_version import bump_routine, bump_user
+from domain.day_clock import DEFAULT_DAY_CUTOFF_HOUR, DEFAULT_TZ, DayClock, invalidate_user_day, normalize_cutoff_hour
+from domain.day_num import from_day_num, month_start_of, to_day_num
+from domain.exemption_index import invalidate_exemption_index
+from domain.recurrence import normalize_rule, rule_for_routine
+from domain.time_utils import routine_anchor_day
+from storage.base import Day
+
+_ROUTINE_COLUMNS = {"user_id", "name", "weekend_mode", "deadline_time", "notes", "active", "created_at", "order_index", "recurrence"}
+_GOAL_COLUMNS = {"user_id", "title", "deadline", "description", "active", "created_at"}
+
+
+def _iso(d: Optional[Day]) -> Optional[str]:
+    if isinstance(d, date):
+        return d.isoformat()
+    return d
+
+
+def _utcnow() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class _SortedIndex:
+    """정렬된 키 목록 + 키 -> 값 dict. 범위 조회는 bisect로 처리한다."""
+
+    __slots__ = ("keys", "values")
+
+    def __init__(self) -> None:
+        self.keys: List[Any] = []
+        self.values: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    def set(self, key: Any, value: Any) -> None:
+        if key not in self.values:
+            insort(self.keys, key)
+        self.values[key] = value
+
+    def pop(self, key: Any) -> Any:
+        value = self.values.pop(key)
+        i = bisect_left(self.keys, key)
+        del self.keys[i]
+        return value
+
+    def range(self, lo: Any = None, hi: Any = None) -> Iterable[Tuple[Any, Any]]:
+        """lo <= key <= hi 인 (key, value)를 키 오름차순으로. None이면 그쪽 제한 없음."""
+        i = 0 if lo is None else bisect_left(self.keys, lo)
+        j = len(self.keys) if hi is None else bisect_right(self.keys, hi)
+        for k in self.keys[i:j]:
+            yield k, self.values[k]
+
+    def first(self) -> Any:
+        return self.keys[0] if self.keys else None
+
+    def last(self) -> Any:
+        return self.keys[-1] if self.keys else None
+
+
+class MemoryBackend:
+    """repos/*와 같은 인터페이스를 갖는 순수 메모리 백엔드."""
+
+    def __init__(self) -> None:
+        self._ids = {name: itertools.count(1) for name in ("routine", "checkin", "exemption", "goal", "progress", "season")}
+
+        self._routines: Dict[int, dict] = {}
+        self._routines_by_user: Dict[str, set[int]] = {}
+
+        # routine_id -> _SortedIndex(local_day -> row)
+        self._checkins_by_routine: Dict[int, _SortedIndex] = {}
+        # (user_id, local_day) -> {routine_id: row}
+        self._checkins_by_user_day: Dict[Tuple[str, str], Dict[int, dict]] = {}
+        # user_id -> _SortedIndex(local_day -> 완료 체크인 수)
+        self._done_days_by_user: Dict[str, _SortedIndex] = {}
+
+        self._exemptions: Dict[int, dict] = {}
+        # user_id -> 정렬된 (start_day, id) 목록
+        self._exemptions_by_user: Dict[str, List[Tuple[str, int]]] = {}
+
+        self._goals: Dict[int, dict] = {}
+        self._progress: Dict[int, dict] = {}
+        self._progress_by_goal: Dict[int, List[int]] = {}
+
+        self._seasons: Dict[int, dict] = {}
+        self._seasons_by_user: Dict[str, List[int]] = {}
+
+        self._user_settings: Dict[str, dict] = {}
+
+        # routine_id -> routine_streak 행
+        self._streaks: Dict[int, dict] = {}
+        # (routine_id, month_start) -> routine_streak_checkpoint 행
+        self._streak_checkpoints: Dict[Tuple[int, int], dict] = {}
+        # season_id -> saved_stats 행
+        self._saved_stats: Dict[int, dict] = {}
+        # (routine_id, month_start) -> routine_day_status 행
+        self._day_status: Dict[Tuple[int, int], dict] = {}
+        # (rollup_day, user_id, routine_id) -> metrics_rollup 행, rollup_day -> metrics_rollup_run 행
+        self._rollup: Dict[Tuple[str, str, int], dict] = {}
+        self._rollup_runs: Dict[str, dict] = {}
+
+    # ------------------------------------------------------------------ routine
+    async def create_routine(self, user_id: str, name: str, weekend_mode: str = "weekday", deadline_time: Optional[str] = None, notes: Optional[str] = None, active: int = 1, order_index: Optional[int] = None, recurrence: Optional[str] = None) -> int:
+        if weekend_mode not in ("weekday", "weekend", "all"):
+            raise ValueError(f"Invalid weekend_mode: {weekend_mode}")
+        recurrence = normalize_rule(recurrence) if recurrence else None
+        if order_index is None:
+            indexes = [self._routines[rid]["order_index"] for rid in self._routines_by_user.get(user_id, ())]
+            order_index = max((i for i in indexes if i is not None), default=0) + 1
+        rid = next(self._ids["routine"])
+        self._routines[rid] = {
+            "id": rid,
+            "user_id": user_id,
+            "name": name,
+            "weekend_mode": weekend_mode,
+            "deadline_time": deadline_time,
+            "notes": notes,
+            "active": active,
+            "created_at": _utcnow(),
+            "order_index": order_index,
+            "recurrence": recurrence,
+        }
+        self._routines_by_user.setdefault(user_id, set()).add(rid)
+        bump_user(user_id)
+        return rid
+
+    async def get_routine(self, routine_id: int) -> Optional[dict]:
+        row = self._routines.get(routine_id)
+        return dict(row) if row else None
+
+    async def update_routine(self, routine_id: int, **fields) -> None:
+        if not fields:
+            return
+        unknown = set(fields) - _ROUTINE_COLUMNS
+        if unknown:
+            raise ValueError(f"unknown routine column(s): {sorted(unknown)}")
+        if "recurrence" in fields:
+            fields["recurrence"] = normalize_rule(fields["recurrence"]) if fields["recurrence"] else None
+        row = self._routines.get(routine_id)
+        if row is None:
+            return
+        if "user_id" in fields and fields["user_id"] != row["user_id"]:
+            self._routines_by_user[row["user_id"]].discard(routine_id)
+            self._routines_by_user.setdefault(fields["user_id"], set()).add(routine_id)
+        if fields.keys() & {"weekend_mode", "recurrence", "created_at", "user_id"}:
+            self._invalidate_derived(routine_id=routine_id)
+        if fields.keys() & {"name", "weekend_mode", "recurrence", "created_at", "active", "user_id"}:
+            self._drop_saved_stats(row["user_id"])
+            self._drop_saved_stats(fields.get("user_id", row["user_id"]))
+        row.update(fields)
+        bump_routine(routine_id)
+
+    async def delete_routine(self, routine_id: int) -> None:
+        row = self._routines.pop(routine_id, None)
+        if row is not None:
+            self._routines_by_user[row["user_id"]].discard(routine_id)
+            self._drop_saved_stats(row["user_id"])
+        self._invalidate_derived(routine_id=routine_id)
+        bump_routine(routine_id)
+
+    async def list_active_routines_for_user(self, user_id: str) -> List[dict]:
+        rows = [self._routines[rid] for rid in self._routines_by_user.get(user_id, ()) if self._routines[rid]["active"] == 1]
+        rows.sort(key=lambda r: (r["order_index"] if r["order_index"] is not None else r["id"], r["id"]))
+        return [dict(r) for r in rows]
+
+    async def list_routine_user_ids(self) -> List[str]:
+        return [uid for uid, rids in self._routines_by_user.items() if rids]
+
+    async def routines_applicable_for_date(self, user_id: str, d: date) -> List[dict]:
+        result = []
+        clock = self._day_clock(user_id)
+        for r in await self.list_active_routines_for_user(user_id):
+            rule = rule_for_routine(r, await routine_anchor_day(r, clock))
+            if rule is not None and rule.occurs_on(d):
+                result.append(r)
+        return result
+
+    async def prepare_checkin_for_date(self, user_id: str, dt: datetime) -> List[dict]:
+        return await self.routines_applicable_for_date(user_id, self._day_clock(user_id).local_day(dt))
+
+    def _day_clock(self, user_id: str) -> DayClock:
+        # 전역 저장소가 아니라 이 백엔드의 사용자 설정으로 업무일을 정한다
+        settings = self._user_settings.get(user_id) or {}
+        return DayClock(settings.get("tz"), settings.get("day_cutoff_hour", DEFAULT_DAY_CUTOFF_HOUR))
+
+    # ------------------------------------------------------------------ checkin
+    @staticmethod
+    def _is_done(row: dict) -> bool:
+        return row["checked_at"] is not None and row["skipped"] == 0
+
+    def _mark_done(self, row: dict, was_done: bool) -> None:
+        # 사용자별 완료일 인덱스를 행의 이전/현재 완료 여부에 맞춰 갱신
+        now_done = self._is_done(row)
+        if was_done == now_done:
+            return
+        idx = self._done_days_by_user.setdefault(row["user_id"], _SortedIndex())
+        day = row["local_day"]
+        count = idx.get(day, 0) + (1 if now_done else -1)
+        if count > 0:
+            idx.set(day, count)
+        elif day in idx.values:
+            idx.pop(day)
+
+    def _upsert_checkin(self, routine_id: int, user_id: str, day: str, **values) -> None:
+        by_day = self._checkins_by_routine.setdefault(routine_id, _SortedIndex())
+        row = by_day.get(day)
+        if row is None:
+            row = {
+                "id": next(self._ids["checkin"]),
+                "routine_id": routine_id,
+                "user_id": user_id,
+                "local_day": day,
+                "day_num": to_day_num(day),
+                "checked_at": None,
+                "undone_at": None,
+                "skipped": 0,
+                "skip_reason": None,
+            }
+            by_day.set(day, row)
+            self._checkins_by_user_day.setdefault((user_id, day), {})[routine_id] = row
+            was_done = False
+        else:
+            was_done = self._is_done(row)
+        row.update(values)
+        self._mark_done(row, was_done)
+        self._checkin_derived(routine_id, row["day_num"])
+        self._drop_saved_stats(row["user_id"], day)
+        bump_routine(routine_id)
+
+    def _update_checkin(self, routine_id: int, day: str, **values) -> None:
+        row = self._checkins_by_routine.get(routine_id, _SortedIndex()).get(day)
+        if row is None:
+            # SQLite 쪽도 바뀐 행이 없어도 파생 상태 문장을 같이 실행한다
+            self._checkin_derived(routine_id, to_day_num(day))
+            return
+        was_done = self._is_done(row)
+        row.update(values)
+        self._mark_done(row, was_done)
+        self._checkin_derived(routine_id, row["day_num"])
+        self._drop_saved_stats(row["user_id"], day)
+        bump_routine(routine_id)
+
+    async def upsert_checkin_done(self, routine_id: int, user_id: str, local_day: Day) -> None:
+        self._upsert_checkin(routine_id, user_id, _iso(local_day), checked_at=_utcnow(), undone_at=None, skipped=0, skip_reason=None)
+
+    async def undo_checkin(self, routine_id: int, local_day: Day) -> None:
+        self._update_checkin(routine_id, _iso(local_day), checked_at=None, undone_at=_utcnow())
+
+    async def skip_checkin(self, routine_id: int, user_id: str, local_day: Day, reason: Optional[str] = None) -> None:
+        self._upsert_checkin(routine_id, user_id, _iso(local_day), skipped=1, skip_reason=reason, checked_at=None, undone_at=None)
+
+    async def clear_checkin(self, routine_id: int, local_day: Day) -> None:
+        self._update_checkin(routine_id, _iso(local_day), checked_at=None, undone_at=None, skipped=0, skip_reason=None)
+
+    async def get_checkin(self, routine_id: int, local_day: Day) -> Optional[dict]:
+        row = self._checkins_by_routine.get(routine_id, _SortedIndex()).get(_iso(local_day))
+        return dict(row) if row else None
+
+    async def list_checkins_for_user_day(self, user_id: str, local_day: Day) -> List[dict]:
+        rows = self._checkins_by_user_day.get((user_id, _iso(local_day)), {}).values()
+        return [dict(r) for r in sorted(rows, key=lambda r: r["id"])]
+
+    async def get_checkins_for_routines(self, routine_ids: Iterable[int], start_day: Day, end_day: Optional[Day] = None) -> Dict[Tuple[int, str], dict]:
+        sd = _iso(start_day)
+        ed = _iso(end_day) if end_day is not None else sd
+        result: Dict[Tuple[int, str], dict] = {}
+        for rid in dict.fromkeys(routine_ids):
+            idx = self._checkins_by_routine.get(rid)
+            if idx is None:
+                continue
+            for day, row in idx.range(sd, ed):
+                result[(rid, day)] = dict(row)
+        return result
+
+    async def list_checkins_for_routine(self, routine_id: int, start_day: Optional[Day] = None, end_day: Optional[Day] = None) -> List[dict]:
+        idx = self._checkins_by_routine.get(routine_id)
+        if idx is None:
+            return []
+        return [dict(row) for _, row in idx.range(_iso(start_day), _iso(end_day))]
+
+    # ------------------------------------------------------------------ derived
+    def _invalidate_streaks(self, hit: Callable[[int, dict], bool], first_day: Optional[int]) -> None:
+        for rid, st in list(self._streaks.items()):
+            if not hit(rid, st):
+                continue
+            if first_day is None or st["last_day_num"] >= first_day:
+                del self._streaks[rid]
+            else:
+                st["rev"] += 1
+        for key in [k for k, cp in self._streak_checkpoints.items() if hit(k[0], cp) and (first_day is None or k[1] > first_day)]:
+            del self._streak_checkpoints[key]
+
+    def _invalidate_derived(
+        self,
+        *,
+        routine_id: Optional[int] = None,
+        user_id: Optional[str] = None,
+        first_day: Optional[int] = None,
+        last_day: Optional[int] = None,
+    ) -> None:
+        # SQLite 쪽 repos.derived_repo.invalidation_statements()와 같은 규칙
+        def hit(key: int, row: dict) -> bool:
+            return key == routine_id if routine_id is not None else row["user_id"] == user_id
+
+        self._invalidate_streaks(hit, first_day)
+        lo = month_start_of(first_day) if first_day is not None else None
+        for key in [
+            k for k, st in self._day_status.items()
+            if hit(k[0], st) and (lo is None or k[1] >= lo) and (last_day is None or k[1] <= last_day)
+        ]:
+            del self._day_status[key]
+
+    def _checkin_derived(self, routine_id: int, day_num: int) -> None:
+        # SQLite 쪽 repos.derived_repo.checkin_statements()와 같은 규칙: 확정된 미완료/스킵/완료 바이트만 고치고 rev는 항상 올린다
+        self._invalidate_streaks(lambda key, _: key == routine_id, day_num)
+        st = self._day_status.get((routine_id, month_start_of(day_num)))
+        if st is None:
+            return
+        i = day_num - st["month_start"]
+        if st["status"][i] in (3, 4, 5):
+            row = self._checkins_by_routine.get(routine_id, _SortedIndex()).get(from_day_num(day_num).isoformat())
+            status = bytearray(st["status"])
+            status[i] = 3 if row is None else 4 if row["skipped"] else 5 if row["checked_at"] is not None else 3
+            st["status"] = bytes(status)
+        st["rev"] += 1
+
+    # ------------------------------------------------------------------- streak
+    async def get_routine_streaks(self, routine_ids: Iterable[int]) -> Dict[int, dict]:
+        return {rid: dict(self._streaks[rid]) for rid in dict.fromkeys(routine_ids) if rid in self._streaks}
+
+    async def get_latest_streak_checkpoints(self, routine_ids: Iterable[int]) -> Dict[int, dict]:
+        latest: Dict[int, dict] = {}
+        wanted = set(routine_ids)
+        for (rid, month_start), cp in self._streak_checkpoints.items():
+            if rid in wanted and (rid not in latest or month_start > latest[rid]["month_start"]):
+                latest[rid] = cp
+        return {rid: dict(cp) for rid, cp in latest.items()}
+
+    async def reset_routine_streak(self, routine_id: int, user_id: str, start_day_num: int) -> None:
+        prev = self._streaks.get(routine_id)
+        self._streaks[routine_id] = {
+            "routine_id": routine_id,
+            "user_id": user_id,
+            "current_streak": 0,
+            "max_streak": 0,
+            "last_day_num": start_day_num - 1,
+            "run_start_day_num": start_day_num,
+            "max_before_run": 0,
+            "rev": prev["rev"] + 1 if prev else 0,
+            "updated_at": _utcnow(),
+        }
+
+    async def save_routine_streak(self, routine_id: int, rev: int, current_streak: int, max_streak: int, last_day_num: int, run_start_day_num: int, max_before_run: int, checkpoints: Sequence[Tuple[int, int, int, int]] = ()) -> bool:
+        st = self._streaks.get(routine_id)
+        if st is None or st["rev"] != rev:
+            return False
+        for month_start, cp_current, cp_run_start, cp_before in checkpoints:
+            self._streak_checkpoints[(routine_id, month_start)] = {
+                "routine_id": routine_id,
+                "month_start": month_start,
+                "user_id": st["user_id"],
+                "current_streak": cp_current,
+                "run_start_day_num": cp_run_start,
+                "max_before_run": cp_before,
+            }
+        st.update(
+            current_streak=current_streak,
+            max_streak=max_streak,
+            last_day_num=last_day_num,
+            run_start_day_num=run_start_day_num,
+            max_before_run=max_before_run,
+            rev=rev + 1,
+            updated_at=_utcnow(),
+        )
+        return True
+
+    async def delete_routine_streaks(self, user_id: Optional[str] = None) -> int:
+        rids = [rid for rid, st in self._streaks.items() if user_id is None or st["user_id"] == user_id]
+        for rid in rids:
+            del self._streaks[rid]
+        for key in [k for k, cp in self._streak_checkpoints.items() if user_id is None or cp["user_id"] == user_id]:
+            del self._streak_checkpoints[key]
+        return len(rids)
+
+    # -------------------------------------------------------------- saved_stats
+    def _drop_saved_stats(self, user_id: str, day: Optional[str] = None) -> None:
+        # SQLite 쪽 trg_*_saved_stats_* 트리거와 같은 규칙: day(포함) 이후에 끝나는 시즌의 스냅샷을 지운다
+        for sid in [sid for sid, row in self._saved_stats.items() if row["user_id"] == user_id and (day is None or row["end_day"] >= day)]:
+            del self._saved_stats[sid]
+
+    async def get_saved_stats(self, season_id: int) -> Optional[dict]:
+        row = self._saved_stats.get(season_id)
+        return dict(row) if row else None
+
+    async def list_saved_stats_for_user(self, user_id: str) -> List[dict]:
+        rows = [r for r in self._saved_stats.values() if r["user_id"] == user_id]
+        rows.sort(key=lambda r: (r["end_day"], r["season_id"]), reverse=True)
+        return [dict(r) for r in rows]
+
+    async def save_saved_stats(self, season_id: int, user_id: str, start_day: str, end_day: str, metrics: str) -> None:
+        self._saved_stats[season_id] = {
+            "season_id": season_id,
+            "user_id": user_id,
+            "start_day": start_day,
+            "end_day": end_day,
+            "metrics": metrics,
+            "created_at": _utcnow(),
+        }
+
+    async def delete_saved_stats(self, user_id: Optional[str] = None) -> int:
+        sids = [sid for sid, row in self._saved_stats.items() if user_id is None or row["user_id"] == user_id]
+        for sid in sids:
+            del self._saved_stats[sid]
+        return len(sids)
+
+    # --------------------------------------------------------------- day_status
+    async def get_day_status_rows(self, routine_ids: Iterable[int], first_month: int, last_month: int) -> Dict[Tuple[int, int], dict]:
+        wanted = set(routine_ids)
+        return {
+            key: dict(st) for key, st in self._day_status.items()
+            if key[0] in wanted and first_month <= key[1] <= last_month
+        }
+
+    async def insert_day_status_placeholders(self, rows: Sequence[Tuple[int, str, int, int]]) -> set[Tuple[int, int]]:
+        inserted = set()
+        for routine_id, user_id, month_start, days in rows:
+            if (routine_id, month_start) in self._day_status:
+                continue
+            self._day_status[(routine_id, month_start)] = {
+                "routine_id": routine_id,
+                "month_start": month_start,
+                "user_id": user_id,
+                "status": bytes(days),
+                "finalized_through": month_start - 1,
+                "rev": 0,
+                "updated_at": _utcnow(),
+            }
+            inserted.add((routine_id, month_start))
+        return inserted
+
+    async def save_day_status(self, routine_id: int, month_start: int, rev: int, status: bytes, finalized_through: int) -> bool:
+        st = self._day_status.get((routine_id, month_start))
+        if st is None or st["rev"] != rev:
+            return False
+        st.update(status=bytes(status), finalized_through=finalized_through, rev=rev + 1, updated_at=_utcnow())
+        return True
+
+    async def delete_day_status(self, user_id: Optional[str] = None) -> int:
+        keys = [k for k, st in self._day_status.items() if user_id is None or st["user_id"] == user_id]
+        for key in keys:
+            del self._day_status[key]
+        return len(keys)
+
+    # ------------------------------------------------------------------- rollup
+    async def list_rollup_user_ids(self, after_user_id: str, limit: int) -> List[str]:
+        uids = sorted(
+            uid for uid, rids in self._routines_by_user.items()
+            if uid > after_user_id and any(self._routines[rid]["active"] == 1 for rid in rids)
+        )
+        return uids[:limit]
+
+    async def list_day_clock_settings(self) -> List[dict]:
+        pairs = {(s.get("tz"), s.get("day_cutoff_hour")) for s in self._user_settings.values()}
+        return [{"tz": tz, "day_cutoff_hour": cutoff} for tz, cutoff in pairs]
+
+    async def get_rollup_inputs(self, user_ids: Sequence[str]) -> Dict[str, List[dict]]:
+        routines: List[dict] = []
+        exemptions: List[dict] = []
+        for uid in sorted(set(user_ids)):
+            routines.extend(await self.list_active_routines_for_user(uid))
+            exemptions.extend(await self.list_exemptions_for_user(uid))
+        settings = [dict(self._user_settings[uid]) for uid in user_ids if uid in self._user_settings]
+        return {"routines": routines, "exemptions": exemptions, "settings": settings}
+
+    async def iter_checkins_for_users(self, first_user_id: str, last_user_id: str, end_day_num: int) -> AsyncIterator[Tuple[str, int, int, int, int]]:
+        keys = sorted(
+            (uid, rid)
+            for uid, rids in self._routines_by_user.items() if first_user_id <= uid <= last_user_id
+            for rid in rids
+        )
+        for uid, rid in keys:
+            for _, row in self._checkins_by_routine.get(rid, _SortedIndex()).range():
+                if row["day_num"] > end_day_num:
+                    break
+                yield uid, rid, row["day_num"], 1 if row["skipped"] else 0, 1 if row["checked_at"] is not None else 0
+
+    async def get_rollup_run(self, rollup_day: str) -> Optional[dict]:
+        row = self._rollup_runs.get(rollup_day)
+        return dict(row) if row else None
+
+    async def start_rollup_run(self, rollup_day: str, restart: bool = False) -> dict:
+        if restart:
+            for key in [k for k in self._rollup if k[0] == rollup_day]:
+                del self._rollup[key]
+            self._rollup_runs.pop(rollup_day, None)
+        row = self._rollup_runs.setdefault(rollup_day, {
+            "rollup_day": rollup_day,
+            "last_user_id": "",
+            "users_done": 0,
+            "rows_written": 0,
+            "started_at": _utcnow(),
+            "finished_at": None,
+        })
+        return dict(row)
+
+    async def save_rollup_chunk(self, rollup_day: str, rows: Sequence[Tuple], last_user_id: str, users: int) -> None:
+        columns = ("done_7d", "valid_7d", "done_30d", "valid_30d", "done_all", "valid_all", "max_streak", "current_streak")
+        for user_id, routine_id, *values in rows:
+            self._rollup[(rollup_day, user_id, routine_id)] = {
+                "rollup_day": rollup_day, "user_id": user_id, "routine_id": routine_id, **dict(zip(columns, values)),
+            }
+        run = self._rollup_runs[rollup_day]
+        run.update(last_user_id=last_user_id, users_done=run["users_done"] + users, rows_written=run["rows_written"] + len(rows))
+
+    async def finish_rollup_run(self, rollup_day: str) -> None:
+        if rollup_day in self._rollup_runs:
+            self._rollup_runs[rollup_day]["finished_at"] = _utcnow()
+
+    async def list_metrics_rollup(self, rollup_day: str, user_id: Optional[str] = None) -> List[dict]:
+        rows = []
+        for (day, uid, rid), row in self._rollup.items():
+            if day != rollup_day or (user_id is not None and uid != user_id):
+                continue
+            routine = self._routines.get(rid) or {}
+            order = routine.get("order_index")
+            rows.append(((uid, order if order is not None else rid, rid), {**row, "name": routine.get("name")}))
+        rows.sort(key=lambda x: x[0])
+        return [row for _, row in rows]
+
+    # ---------------------------------------------------------------- exemption
+    async def create_exemption(self, user_id: str, start_day: Day, end_day: Day, reason: Optional[str] = None) -> int:
+        eid = next(self._ids["exemption"])
+        sd = _iso(start_day)
+        self._exemptions[eid] = {"id": eid, "user_id": user_id, "start_day": sd, "end_day": _iso(end_day), "reason": reason}
+        insort(self._exemptions_by_user.setdefault(user_id, []), (sd, eid))
+        invalidate_exemption_index(user_id)
+        bump_user(user_id)
+        self._invalidate_derived(user_id=user_id, first_day=to_day_num(sd), last_day=to_day_num(_iso(end_day)))
+        self._drop_saved_stats(user_id, sd)
+        return eid
+
+    async def get_exemption(self, exemption_id: int) -> Optional[dict]:
+        row = self._exemptions.get(exemption_id)
+        return dict(row) if row else None
+
+    async def list_exemptions_for_user(self, user_id: str) -> List[dict]:
+        keys = self._exemptions_by_user.get(user_id, [])
+        return [dict(self._exemptions[eid]) for _, eid in reversed(keys)]
+
+    async def has_exemption_on(self, user_id: str, day: Day) -> bool:
+        iso = _iso(day)
+        keys = self._exemptions_by_user.get(user_id, [])
+        # start_day <= day 인 것만 후보
+        end = bisect_right(keys, (iso, float("inf")))
+        return any(self._exemptions[eid]["end_day"] >= iso for _, eid in keys[:end])
+
+    async def delete_exemption(self, exemption_id: int) -> None:
+        row = self._exemptions.pop(exemption_id, None)
+        if row is not None:
+            self._exemptions_by_user[row["user_id"]].remove((row["start_day"], exemption_id))
+            invalidate_exemption_index(row["user_id"])
+            bump_user(row["user_id"])
+            self._invalidate_derived(user_id=row["user_id"], first_day=to_day_num(row["start_day"]), last_day=to_day_num(row["end_day"]))
+            self._drop_saved_stats(row["user_id"], row["start_day"])
+
+    # --------------------------------------------------------------------- goal
+    async def create_goal(self, user_id: str, title: str, deadline: Optional[str] = None, description: Optional[str] = None) -> int:
+        gid = next(self._ids["goal"])
+        self._goals[gid] = {
+            "id": gid,
+            "user_id": user_id,
+            "title": title,
+            "deadline": deadline,
+            "description": description,
+            "active": 1,
+            "created_at": _utcnow(),
+        }
+        return gid
+
+    async def get_goal(self, goal_id: int) -> Optional[dict]:
+        row = self._goals.get(goal_id)
+        return dict(row) if row else None
+
+    async def update_goal(self, goal_id: int, **fields) -> None:
+        if not fields:
+            return
+        unknown = set(fields) - _GOAL_COLUMNS
+        if unknown:
+            raise ValueError(f"unknown goal column(s): {sorted(unknown)}")
+        row = self._goals.get(goal_id)
+        if row is not None:
+            row.update(fields)
+
+    async def delete_goal(self, goal_id: int) -> None:
+        self._goals.pop(goal_id, None)
+
+    async def list_active_goals_for_user(self, user_id: str) -> List[dict]:
+        return [dict(g) for g in self._goals.values() if g["user_id"] == user_id and g["active"] == 1]
+
+    # ----------------------------------------------------------------- progress
+    async def add_progress(self, goal_id: int, user_id: str, delta: int) -> int:
+        """goal_progress에 기록을 남긴다. 현재 값은 마지막 기록의 value_after(없으면 0)로 본다."""
+        if goal_id not in self._goals:
+            raise ValueError("Goal not found")
+        pids = self._progress_by_goal.setdefault(goal_id, [])
+        current = self._progress[pids[-1]]["value_after"] if pids else 0
+        pid = next(self._ids["progress"])
+        self._progress[pid] = {
+            "id": pid,
+            "goal_id": goal_id,
+            "user_id": user_id,
+            "delta": delta,
+            "value_after": current + delta,
+            "created_at": _utcnow(),
+        }
+        pids.append(pid)
+        return pid
+
+    async def list_progress_for_goal(self, goal_id: int) -> List[dict]:
+        rows = [self._progress[pid] for pid in self._progress_by_goal.get(goal_id, [])]
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return [dict(r) for r in rows]
+
+    # ------------------------------------------------------------ report_season
+    async def get_first_checkin_day(self, user_id: str) -> Optional[str]:
+        idx = self._done_days_by_user.get(user_id)
+        return idx.first() if idx else None
+
+    async def get_last_checkin_day(self, user_id: str) -> Optional[str]:
+        idx = self._done_days_by_user.get(user_id)
+        return idx.last() if idx else None
+
+    def _seasons_desc(self, user_id: str) -> List[dict]:
+        rows = [self._seasons[sid] for sid in self._seasons_by_user.get(user_id, [])]
+        rows.sort(key=lambda r: (r["start_day"], r["id"]), reverse=True)
+        return rows
+
+    def _insert_season(self, user_id: str, title: str, start_day: str) -> int:
+        sid = next(self._ids["season"])
+        self._seasons[sid] = {
+            "id": sid,
+            "user_id": user_id,
+            "title": title,
+            "start_day": start_day,
+            "end_day": None,
+            "created_at": datetime.now(UTC).isoformat(),
+            "closed_at": None,
+            "is_active": 1,
+        }
+        self._seasons_by_user.setdefault(user_id, []).append(sid)
+        bump_user(user_id)
+        return sid
+
+    async def ensure_default_season(self, user_id: str, title: str = "현재 시즌") -> int:
+        seasons = self._seasons_desc(user_id)
+        if seasons:
+            return int(seasons[0]["id"])
+        first_day = await self.get_first_checkin_day(user_id)
+        return self._insert_season(user_id, title, first_day or date.today().isoformat())
+
+    async def list_seasons_for_user(self, user_id: str, limit: int = 12) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self._seasons_desc(user_id)[:limit]]
+
+    async def get_season(self, user_id: str, season_id: int) -> Optional[Dict[str, Any]]:
+        row = self._seasons.get(season_id)
+        return dict(row) if row and row["user_id"] == user_id else None
+
+    async def get_current_season(self, user_id: str) -> Optional[Dict[str, Any]]:
+        seasons = self._seasons_desc(user_id)
+        return dict(seasons[0]) if seasons else None
+
+    async def get_or_create_current_season(self, user_id: str) -> Dict[str, Any]:
+        await self.ensure_default_season(user_id)
+        season = await self.get_current_season(user_id)
+        return season or {"id": None, "user_id": user_id, "title": "현재 시즌", "start_day": date.today().isoformat(), "end_day": None}
+
+    async def get_season_by_id_for_user(self, user_id: str, season_id: int) -> Optional[Dict[str, Any]]:
+        return await self.get_season(user_id, season_id)
+
+    async def close_previous_season_to_last_checkin(self, user_id: str) -> None:
+        last_day = await self.get_last_checkin_day(user_id)
+        if not last_day:
+            return
+        seasons = self._seasons_desc(user_id)
+        if len(seasons) < 2:
+            return
+        prev = seasons[1]
+        if not prev["end_day"]:
+            prev["end_day"] = last_day
+            self._saved_stats.pop(prev["id"], None)
+            bump_user(user_id)
+
+    async def create_new_season(self, user_id: str, title: str, start_day: str, auto_close_prev: bool = True) -> int:
+        new_id = self._insert_season(user_id, title, start_day)
+        if auto_close_prev:
+            await self.close_previous_season_to_last_checkin(user_id)
+        return new_id
+
+    # ------------------------------------------------------------ user_settings
+    async def upsert_user_settings(self, user_id: str, tz: Optional[str] = None, reminder_time: str = "23:00", suggest_goals_on_checkin: int | bool = True, day_cutoff_hour: Optional[int] = None) -> None:
+        suggest_flag = 1 if bool(suggest_goals_on_checkin) else 0
+        cutoff = None if day_cutoff_hour is None else normalize_cutoff_hour(day_cutoff_hour)
+        row = self._user_settings.get(user_id)
+        if row is None or (tz is not None and tz != row["tz"]) or (cutoff is not None and cutoff != row["day_cutoff_hour"]):
+            # 시간대/하루 경계가 바뀌면 루틴 시작일(업무일)이 달라질 수 있다
+            self._invalidate_derived(user_id=user_id)
+            await self.delete_saved_stats(user_id)
+        if row is None:
+            self._user_settings[user_id] = {
+                "user_id": user_id,
+                "tz": tz if tz is not None else DEFAULT_TZ,
+                "reminder_time": reminder_time,
+                "created_at": _utcnow(),
+                "suggest_goals_on_checkin": suggest_flag,
+                "day_cutoff_hour": cutoff if cutoff is not None else DEFAULT_DAY_CUTOFF_HOUR,
+            }
+        else:
+            row.update(reminder_time=reminder_time, suggest_goals_on_checkin=suggest_flag)
+            if tz is not None:
+                row["tz"] = tz
+            if cutoff is not None:
+                row["day_cutoff_hour"] = cutoff
+        invalidate_user_day(user_id)
+        bump_user(user_id)
+
+    async def get_user_settings(self, user_id: str) -> Optional[dict]:
+        row = self._user_settings.get(user_id)
+        return dict(row) if row else None
+
+    async def list_all_user_settings(self) -> List[dict]:
+        return [{"user_id": r["user_id"], "tz": r["tz"], "reminder_time": r["reminder_time"]} for r in self._user_settings.values()]
@@ -0,0 +1,105 @@
+"""SQLite 저장소 백엔드: repos/*의 함수를 그대로 노출한다."""
+from __future__ import annotations
+
+from repos import (
+    checkin_repo,
+    day_status_repo,
+    exemption_repo,
+    goal_repo,
+    progress_repo,
+    report_season_repo,
+    rollup_repo,
+    routine_repo,
+    saved_stats_repo,
+    streak_repo,
+    user_settings_repo,
+)
+
+
+class SqliteBackend:
+    """기본 백엔드. 커넥션 풀/쓰기 큐/레인 선택은 repos 쪽 동작을 그대로 따른다."""
+
+    # routine_repo
+    create_routine = staticmethod(routine_repo.create_routine)
+    get_routine = staticmethod(routine_repo.get_routine)
+    update_routine = staticmethod(routine_repo.update_routine)
+    delete_routine = staticmethod(routine_repo.delete_routine)
+    list_active_routines_for_user = staticmethod(routine_repo.list_active_routines_for_user)
+    list_routine_user_ids = staticmethod(routine_repo.list_routine_user_ids)
+    routines_applicable_for_date = staticmethod(routine_repo.routines_applicable_for_date)
+    prepare_checkin_for_date = staticmethod(routine_repo.prepare_checkin_for_date)
+
+    # checkin_repo
+    upsert_checkin_done = staticmethod(checkin_repo.upsert_checkin_done)
+    undo_checkin = staticmethod(checkin_repo.undo_checkin)
+    skip_checkin = staticmethod(checkin_repo.skip_checkin)
+    clear_checkin = staticmethod(checkin_repo.clear_checkin)
+    get_checkin = staticmethod(checkin_repo.get_checkin)
+    list_checkins_for_user_day = staticmethod(checkin_repo.list_checkins_for_user_day)
+    get_checkins_for_routines = staticmethod(checkin_repo.get_checkins_for_routines)
+    list_checkins_for_routine = staticmethod(checkin_repo.list_checkins_for_routine)
+
+    # streak_repo
+    get_routine_streaks = staticmethod(streak_repo.get_routine_streaks)
+    get_latest_streak_checkpoints = staticmethod(streak_repo.get_latest_streak_checkpoints)
+    reset_routine_streak = staticmethod(streak_repo.reset_routine_streak)
+    save_routine_streak = staticmethod(streak_repo.save_routine_streak)
+    delete_routine_streaks = staticmethod(streak_repo.delete_routine_streaks)
+
+    # saved_stats_repo
+    get_saved_stats = staticmethod(saved_stats_repo.get_saved_stats)
+    list_saved_stats_for_user = staticmethod(saved_stats_repo.list_saved_stats_for_user)
+    save_saved_stats = staticmethod(saved_stats_repo.save_saved_stats)
+    delete_saved_stats = staticmethod(saved_stats_repo.delete_saved_stats)
+
+    # day_status_repo
+    get_day_status_rows = staticmethod(day_status_repo.get_day_status_rows)
+    insert_day_status_placeholders = staticmethod(day_status_repo.insert_day_status_placeholders)
+    save_day_status = staticmethod(day_status_repo.save_day_status)
+    delete_day_status = staticmethod(day_status_repo.delete_day_status)
+
+    # rollup_repo
+    list_rollup_user_ids = staticmethod(rollup_repo.list_rollup_user_ids)
+    list_day_clock_settings = staticmethod(rollup_repo.list_day_clock_settings)
+    get_rollup_inputs = staticmethod(rollup_repo.get_rollup_inputs)
+    iter_checkins_for_users = staticmethod(rollup_repo.iter_checkins_for_users)
+    get_rollup_run = staticmethod(rollup_repo.get_rollup_run)
+    start_rollup_run = staticmethod(rollup_repo.start_rollup_run)
+    save_rollup_chunk = staticmethod(rollup_repo.save_rollup_chunk)
+    finish_rollup_run = staticmethod(rollup_repo.finish_rollup_run)
+    list_metrics_rollup = staticmethod(rollup_repo.list_metrics_rollup)
+
+    # exemption_repo
+    create_exemption = staticmethod(exemption_repo.create_exemption)
+    get_exemption = staticmethod(exemption_repo.get_exemption)
+    list_exemptions_for_user = staticmethod(exemption_repo.list_exemptions_for_user)
+    has_exemption_on = staticmethod(exemption_repo.has_exemption_on)
+    delete_exemption = staticmethod(exemption_repo.delete_exemption)
+
+    # goal_repo
+    create_goal = staticmethod(goal_repo.create_goal)
+    get_goal = staticmethod(goal_repo.get_goal)
+    update_goal = staticmethod(goal_repo.update_goal)
+    delete_goal = staticmethod(goal_repo.delete_goal)
+    list_active_goals_for_user = staticmethod(goal_repo.list_active_goals_for_user)
+
+    # progress_repo
+    add_progress = staticmethod(progress_repo.add_progress)
+    list_progress_for_goal = staticmethod(progress_repo.list_progress_for_goal)
+
+    # report_season_repo
+    get_first_checkin_day = staticmethod(report_season_repo.get_first_checkin_day)
+    get_last_checkin_day = staticmethod(report_season_repo.get_last_checkin_day)
+    ensure_default_season = staticmethod(report_season_repo.ensure_default_season)
+    list_seasons_for_user = staticmethod(report_season_repo.list_seasons_for_user)
+    get_season = staticmethod(report_season_repo.get_season)
+    get_current_season = staticmethod(report_season_repo.get_current_season)
+    get_or_create_current_season = staticmethod(report_season_repo.get_or_create_current_season)
+    get_season_by_id_for_user = staticmethod(report_season_repo.get_season_by_id_for_user)
+    close_previous_season_to_last_checkin = staticmethod(report_season_repo.close_previous_season_to_last_checkin)
+    create_new_season = staticmethod(report_season_repo.create_new_season)
+
+    # user_settings_repo
+    upsert_user_settings = staticmethod(user_settings_repo.upsert_user_settings)
+    get_user_settings = staticmethod(user_settings_repo.get_user_settings)
+    list_all_user_settings = staticmethod(user_settings_repo.list_all_user_settings)
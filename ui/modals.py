@@ -1,9 +1,14 @@
 ﻿import discord
 from typing import Optional
 
+from domain.recurrence import schedule_text
+
 class AddRoutineModal(discord.ui.Modal, title="루틴 추가"):
     name = discord.ui.TextInput(label="이름")
-    weekend_mode = discord.ui.TextInput(label="주말 모드(weekday|weekend|all)")
+    weekend_mode = discord.ui.TextInput(
+        label="반복(weekday|weekend|all 또는 RRULE)",
+        placeholder="예: weekday 또는 FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    )
     deadline_time = discord.ui.TextInput(label="마감(HH:MM)", required=False)
     notes = discord.ui.TextInput(label="메모", style=discord.TextStyle.paragraph, required=False)
     order_index = discord.ui.TextInput(label="표시 순서(숫자, 작을수록 위)", required=False)
@@ -79,6 +84,14 @@ class SettingsModal(discord.ui.Modal, title="설정"):
         label="체크인 시 목표 설정 제안 여부(true/false)", required=False,
         placeholder="예: true 또는 false (비워두면 true로 간주)",
     )
+    tz = discord.ui.TextInput(
+        label="시간대(IANA 이름)", required=False,
+        placeholder="예: Asia/Seoul, Europe/Berlin (비워두면 기존 값 유지)",
+    )
+    day_cutoff_hour = discord.ui.TextInput(
+        label="하루가 바뀌는 시각(0~23시)", required=False, max_length=2,
+        placeholder="예: 4 → 새벽 4시 전까지는 전날로 기록 (비워두면 기존 값 유지)",
+    )
 
     async def on_submit(self, itx: discord.Interaction):
         print("SettingsModal submitted by", itx.user)
@@ -92,6 +105,8 @@ class SettingsModal(discord.ui.Modal, title="설정"):
                     {
                         "reminder_time": self.reminder_time.value,
                         "suggest_goals_on_checkin": self.suggest_goals_on_checkin.value,
+                        "tz": self.tz.value,
+                        "day_cutoff_hour": self.day_cutoff_hour.value,
                     },
                 )
             except Exception as e:
@@ -103,7 +118,10 @@ class SettingsModal(discord.ui.Modal, title="설정"):
 # --- Edit modals for Routine and Goal ---
 class EditRoutineModal(discord.ui.Modal, title="루틴 편집"):
     name = discord.ui.TextInput(label="이름")
-    weekend_mode = discord.ui.TextInput(label="주말 모드(weekday|weekend|all)")
+    weekend_mode = discord.ui.TextInput(
+        label="반복(weekday|weekend|all 또는 RRULE)",
+        placeholder="예: weekday 또는 FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    )
     deadline_time = discord.ui.TextInput(label="마감(HH:MM)", required=False)
     notes = discord.ui.TextInput(label="메모", style=discord.TextStyle.paragraph, required=False)
     order_index = discord.ui.TextInput(label="표시 순서(숫자, 작을수록 위)", required=False)
@@ -115,7 +133,7 @@ class EditRoutineModal(discord.ui.Modal, title="루틴 편집"):
         if initial:
             try:
                 self.name.default = initial.get('name', '')
-                self.weekend_mode.default = initial.get('weekend_mode', '')
+                self.weekend_mode.default = schedule_text(initial)
                 self.deadline_time.default = initial.get('deadline_time', '')
                 self.notes.default = initial.get('notes', '')
                 if initial.get('order_index') is not None: